@@ -0,0 +1,10 @@
+from .similarity import SimilarityIndex, DEFAULT_SIMILARITY_PATH, company_features, hash_features, top_k
+from .cube import AnalyticsCube, DEFAULT_CUBE_PATH, DIMENSIONS, normalize_batch
+from .entities import (
+    DEFAULT_ENTITIES_PATH, MinHasher, default_inputs, load_records, lsh_candidates, record_from_company,
+    record_from_story, resolve_entities, write_entities
+)
+from .graph import (
+    CompanyGraph, GraphCache, DEFAULT_GRAPH_DIR, build_graph, detect_clusters, force_layout, encode_payload,
+    decode_payload, payload_to_json
+)
@@ -0,0 +1,484 @@
+import json
+import re
+import sqlite3
+import threading
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+
+from scraper.ycombinator.incremental import company_key, normalize_industries
+
+DEFAULT_CUBE_PATH = Path("ycombinator_data") / "cube.sqlite3"
+
+# Value used for companies with no batch, location or industry
+UNKNOWN = "Unknown"
+
+# Order of batch seasons within a year; YC short codes are W24, X25 (spring), S24 and F24
+SEASONS = {"winter": 1, "w": 1, "spring": 2, "x": 2, "summer": 3, "s": 3, "fall": 4, "autumn": 4, "f": 4}
+SEASON_NAMES = {1: "Winter", 2: "Spring", 3: "Summer", 4: "Fall"}
+
+BATCH_PATTERN = re.compile(r"^\s*(?:(winter|spring|summer|fall|autumn)\s+(\d{4})|([wxsf])(\d{2}))\s*$", re.IGNORECASE)
+
+# Queryable dimensions: the stored base field each one is read from and how the value is rolled up.
+# year, country and month are the coarse levels of batch, location and seen respectively.
+DIMENSIONS = {
+    "batch": "batch",
+    "year": "batch",
+    "industry": "industries",
+    "location": "location",
+    "country": "location",
+    "seen": "seen",
+    "month": "seen",
+}
+
+# Dimensions that order chronologically rather than by count
+TIME_DIMENSIONS = ("batch", "year", "seen", "month")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS members (
+    slug TEXT PRIMARY KEY,
+    batch TEXT NOT NULL,
+    location TEXT NOT NULL,
+    industries TEXT NOT NULL,
+    seen TEXT NOT NULL
+) WITHOUT ROWID;
+"""
+
+_MAX_PARAMS = 900
+
+
+def normalize_batch(batch):
+    """
+    Spell a batch the same way whichever form the directory used.
+
+    "W24", "w24" and "Winter 2024" all become "Winter 2024"; anything
+    unrecognised is returned stripped.
+    """
+    batch = (batch or "").strip()
+    match = BATCH_PATTERN.match(batch)
+    if not match:
+        return batch or UNKNOWN
+    season, year, code, short_year = match.groups()
+    if code:
+        season, year = code, f"20{short_year}"
+    return f"{SEASON_NAMES[SEASONS[season.lower()]]} {year}"
+
+
+def batch_sort_key(batch):
+    """Chronological sort key for a normalized batch; unparseable batches sort first by name."""
+    match = BATCH_PATTERN.match(batch or "")
+    if not match:
+        return (0, 0, batch or "")
+    season, year, code, short_year = match.groups()
+    if code:
+        season, year = code, f"20{short_year}"
+    return (int(year), SEASONS[season.lower()], "")
+
+
+def country_of(location):
+    """Coarse location: the last comma-separated part ("San Francisco, CA, USA" -> "USA")."""
+    return location.rsplit(",", 1)[-1].strip() or UNKNOWN
+
+
+def _level(dimension, value):
+    if dimension == "year":
+        key = batch_sort_key(value)
+        return str(key[0]) if key[0] else UNKNOWN
+    if dimension == "country":
+        return country_of(value)
+    if dimension == "month":
+        return value[:7] if value != UNKNOWN else UNKNOWN
+    return value
+
+
+def _sort_key(dimension, value):
+    if dimension == "batch":
+        return batch_sort_key(value)
+    return (value == UNKNOWN, value)
+
+
+def member_of(company, seen=None):
+    """
+    Get the cube coordinates of a company.
+
+    Args:
+        company: Company dictionary from the scraper or the store
+        seen: ISO timestamp of the scrape that first saw it; defaults to
+            the record's `firstSeen`
+
+    Returns:
+        (batch, location, industries tuple, seen day)
+    """
+    seen = seen or company.get("firstSeen") or ""
+    industries = normalize_industries(company.get("industries"))
+    return (
+        normalize_batch(company.get("batch")),
+        (company.get("location") or "").strip() or UNKNOWN,
+        tuple(industries) or (UNKNOWN,),
+        seen[:10] or UNKNOWN,
+    )
+
+
+class AnalyticsCube:
+    """
+    Count cubes over batch × industry × location × first-seen day, kept in memory.
+
+    Each company is one member of the base cuboid. Industries are
+    multi-valued, so two cuboids are kept: one counting companies per
+    (batch, location, seen) cell and one per (batch, industry, location,
+    seen) cell. Queries that group by or filter on industry read the second,
+    everything else the first, so totals never double count a company with
+    several industries.
+
+    Members are persisted in SQLite so updates only touch the companies in a
+    scrape delta, and another process (the API) reloads them when the file
+    changes. Roll-ups are cached until the next update.
+    """
+
+    def __init__(self, path=DEFAULT_CUBE_PATH, cache_entries=256):
+        """
+        Args:
+            path: Database file; parent directories are created as needed
+            cache_entries: Roll-up results kept between updates
+        """
+        self.path = path
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        # Updated from the scheduler's blocking executor and read from the
+        # API's worker threads, so the connection is shared behind a lock
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = NORMAL")
+        self._conn.executescript(SCHEMA)
+        self.cache_entries = cache_entries
+        self._loaded_version = None
+        self._load()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def data_version(self):
+        """SQLite's data version, which changes whenever another connection commits."""
+        with self._lock:
+            return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def __len__(self):
+        with self._lock:
+            self._ensure_current()
+            return len(self._members)
+
+    def _load(self):
+        self._members = {}
+        self._companies = Counter()
+        self._industries = Counter()
+        self._cache = {}
+        for slug, batch, location, industries, seen in self._conn.execute("SELECT * FROM members"):
+            self._add(slug, (batch, location, tuple(json.loads(industries)), seen))
+        self._loaded_version = self.data_version()
+
+    def _ensure_current(self):
+        # Our own commits are applied in memory already; only other writers need a reload
+        if self.data_version() != self._loaded_version:
+            self._load()
+
+    def _add(self, slug, member):
+        batch, location, industries, seen = member
+        self._members[slug] = member
+        self._companies[(batch, location, seen)] += 1
+        for industry in industries:
+            self._industries[(batch, industry, location, seen)] += 1
+
+    def _remove(self, slug):
+        batch, location, industries, seen = self._members.pop(slug)
+        cell = (batch, location, seen)
+        self._companies[cell] -= 1
+        if not self._companies[cell]:
+            del self._companies[cell]
+        for industry in industries:
+            cell = (batch, industry, location, seen)
+            self._industries[cell] -= 1
+            if not self._industries[cell]:
+                del self._industries[cell]
+
+    def apply(self, upserts=(), removed=()):
+        """
+        Apply changed members and removals in one transaction.
+
+        Args:
+            upserts: Iterable of (slug, member) pairs, members from `member_of`
+            removed: Iterable of slugs no longer in the directory
+
+        Returns:
+            {"added": n, "updated": n, "removed": n}; members whose
+            coordinates did not change are not counted
+        """
+        with self._lock:
+            self._ensure_current()
+            counts = {"added": 0, "updated": 0, "removed": 0}
+            writes, deletes = [], []
+            for slug, member in upserts:
+                previous = self._members.get(slug)
+                if previous == member:
+                    continue
+                if previous is None:
+                    counts["added"] += 1
+                else:
+                    counts["updated"] += 1
+                    self._remove(slug)
+                self._add(slug, member)
+                batch, location, industries, seen = member
+                writes.append((slug, batch, location, json.dumps(list(industries)), seen))
+            for slug in removed:
+                if slug in self._members:
+                    self._remove(slug)
+                    deletes.append(slug)
+            counts["removed"] = len(deletes)
+
+            if writes or deletes:
+                with self._conn:
+                    self._conn.executemany("INSERT OR REPLACE INTO members VALUES (?, ?, ?, ?, ?)", writes)
+                    for start in range(0, len(deletes), _MAX_PARAMS):
+                        chunk = deletes[start:start + _MAX_PARAMS]
+                        self._conn.execute(f"DELETE FROM members WHERE slug IN ({','.join('?' * len(chunk))})", chunk)
+                self._loaded_version = self.data_version()
+                self._cache.clear()
+            return counts
+
+    def apply_delta(self, delta, seen_at=None):
+        """
+        Update the cube from an incremental scrape.
+
+        Args:
+            delta: CompanyDelta from the scraper
+            seen_at: ISO timestamp of the scrape, recorded as the first-seen
+                day of added companies (defaults to now)
+
+        Returns:
+            Counts as for `apply`
+        """
+        with self._lock:
+            seen_at = seen_at or datetime.now().isoformat(timespec="seconds")
+            self._ensure_current()
+            upserts = [(company_key(company), member_of(company, seen_at)) for company in delta.added]
+            for item in delta.changed:
+                slug = company_key(item["company"])
+                # A change keeps the day the company was first seen
+                previous = self._members.get(slug)
+                first_seen = previous[3] if previous else seen_at
+                upserts.append((slug, member_of(item["company"], first_seen)))
+            return self.apply([(slug, member) for slug, member in upserts if slug],
+                              removed=[item["key"] for item in delta.removed])
+
+    def refresh(self, companies):
+        """
+        Bring the cube in line with a full list of companies.
+
+        Args:
+            companies: Every company currently in the directory, e.g. from
+                `CompanyStore.iter_companies()`; members not in it are removed
+
+        Returns:
+            Counts as for `apply`
+        """
+        with self._lock:
+            self._ensure_current()
+            upserts = {}
+            for company in companies:
+                slug = company.get("slug") or company_key(company)
+                if slug:
+                    upserts[slug] = member_of(company)
+            return self.apply(upserts.items(), removed=[slug for slug in self._members if slug not in upserts])
+
+    def refresh_from_store(self, store):
+        """Refresh from every company in a CompanyStore."""
+        with self._lock:
+            return self.refresh(store.iter_companies())
+
+    def sync(self, store, delta=None, seen_at=None):
+        """
+        Update the cube after a scrape.
+
+        Applies just the delta when there is one, and falls back to a full
+        refresh from the store after a full scrape or while the cube is empty.
+
+        Returns:
+            Counts as for `apply`
+        """
+        with self._lock:
+            if delta is None or not len(self):
+                return self.refresh_from_store(store)
+            return self.apply_delta(delta, seen_at=seen_at)
+
+    def rollup(self, group_by=(), filters=None, limit=None):
+        """
+        Count companies grouped by some dimensions.
+
+        Drilling down is a roll-up on a finer dimension filtered by the
+        coarser one, e.g. group_by=["location"] with filters={"country": ["USA"]}.
+
+        Args:
+            group_by: Dimension names from DIMENSIONS, in output order
+            filters: Dictionary of dimension name to a list of accepted values
+            limit: Keep only the largest groups
+
+        Returns:
+            List of {<dimension>: value, ..., "count": n}, sorted
+            chronologically when the first dimension is a time dimension and
+            by count otherwise
+
+        Raises:
+            ValueError: On an unknown dimension
+        """
+        with self._lock:
+            group_by = tuple(group_by)
+            filters = {name: frozenset(values) for name, values in (filters or {}).items() if values}
+            for name in group_by + tuple(filters):
+                if name not in DIMENSIONS:
+                    raise ValueError(f"Unknown dimension {name!r}, expected one of {', '.join(DIMENSIONS)}")
+            self._ensure_current()
+
+            key = (group_by, tuple(sorted(filters.items(), key=lambda item: item[0])), limit)
+            if key in self._cache:
+                return self._cache[key]
+
+            groups = self._group(group_by, filters)
+            rows = [{**dict(zip(group_by, values)), "count": count} for values, count in groups.items()]
+            rows.sort(key=lambda row: (-row["count"], [_sort_key(name, row[name]) for name in group_by]))
+            if limit is not None:
+                rows = rows[:limit]
+            if group_by and group_by[0] in TIME_DIMENSIONS:
+                rows.sort(key=lambda row: [_sort_key(name, row[name]) for name in group_by])
+
+            if len(self._cache) >= self.cache_entries:
+                self._cache.pop(next(iter(self._cache)))
+            self._cache[key] = rows
+            return rows
+
+    def _group(self, group_by, filters):
+        uses_industry = "industry" in group_by or "industry" in filters
+        if uses_industry:
+            fields = ("batch", "industries", "location", "seen")
+            cells = self._industries
+        else:
+            fields = ("batch", "location", "seen")
+            cells = self._companies
+        positions = {field: index for index, field in enumerate(fields)}
+        group_positions = [(name, positions[DIMENSIONS[name]]) for name in group_by]
+        filter_positions = [(name, positions[DIMENSIONS[name]], values) for name, values in filters.items()]
+
+        # Rolling a base value up to a coarser level is repeated across cells, so memoize it per query
+        levels = {}
+
+        def level(name, value):
+            cached = levels.get((name, value))
+            if cached is None:
+                cached = levels[(name, value)] = _level(name, value)
+            return cached
+
+        groups = Counter()
+        for cell, count in cells.items():
+            if all(level(name, cell[position]) in values for name, position, values in filter_positions):
+                groups[tuple(level(name, cell[position]) for name, position in group_positions)] += count
+        return groups
+
+    def tree(self, levels, filters=None):
+        """
+        Nest a roll-up into a hierarchy for d3.hierarchy / d3.pack bubble charts.
+
+        Args:
+            levels: Dimension names from the outermost grouping inwards,
+                e.g. ["industry", "batch"]
+            filters: As for `rollup`
+
+        Returns:
+            {"name": "all", "children": [...]} where leaves carry "value"
+        """
+        with self._lock:
+            root = {"name": "all", "children": []}
+            index = {(): root}
+            for row in self.rollup(levels, filters):
+                path = ()
+                for name in levels:
+                    parent = index[path]
+                    path = path + (row[name],)
+                    if path not in index:
+                        index[path] = {"name": row[name], "dimension": name, "children": []}
+                        parent["children"].append(index[path])
+                leaf = index[path]
+                leaf.pop("children", None)
+                leaf["value"] = row["count"]
+            return root
+
+    def growth(self, dimension, by="batch", current=None, previous=None, filters=None, top=10, min_count=1):
+        """
+        Rank the values of a dimension by how much they grew between two periods.
+
+        Args:
+            dimension: Dimension to rank, e.g. "industry" or "country"
+            by: Time dimension the periods belong to ("batch", "year", "seen"
+                or "month")
+            current: Period to measure; defaults to the latest one
+            previous: Period to compare against; defaults to the one before
+                `current`
+            filters: As for `rollup`
+            top: Number of values to return
+            min_count: Ignore values with fewer companies than this in both periods
+
+        Returns:
+            {"by": ..., "current": ..., "previous": ..., "items": [{<dimension>: value,
+            "current": n, "previous": n, "change": n, "growth": ratio or None}, ...]}
+            ordered by change, then growth
+
+        Raises:
+            ValueError: On an unknown or non-time `by` dimension, or unknown periods
+        """
+        with self._lock:
+            if by not in TIME_DIMENSIONS:
+                raise ValueError(f"Growth is measured over one of {', '.join(TIME_DIMENSIONS)}")
+            periods = [row[by] for row in self.rollup([by], filters) if row[by] != UNKNOWN]
+            if current is None:
+                current = periods[-1] if periods else None
+            if previous is None and current in periods:
+                position = periods.index(current)
+                previous = periods[position - 1] if position else None
+            if current is None or previous is None:
+                return {"by": by, "current": current, "previous": previous, "items": []}
+
+            period_filters = {**(filters or {}), by: [current, previous]}
+            counts = {}
+            for row in self.rollup([dimension, by], period_filters):
+                counts.setdefault(row[dimension], {current: 0, previous: 0})[row[by]] = row["count"]
+
+            items = []
+            for value, period_counts in counts.items():
+                now, before = period_counts[current], period_counts[previous]
+                if max(now, before) < min_count:
+                    continue
+                items.append({
+                    dimension: value,
+                    "current": now,
+                    "previous": before,
+                    "change": now - before,
+                    "growth": round((now - before) / before, 4) if before else None,
+                })
+            items.sort(key=lambda item: (-item["change"], -(item["growth"] or 0), item[dimension]))
+            return {"by": by, "current": current, "previous": previous, "items": items[:top]}
+
+    def stats(self):
+        """Get member and cell counts."""
+        with self._lock:
+            self._ensure_current()
+            return {
+                "companies": len(self._members),
+                "cells": len(self._companies),
+                "industryCells": len(self._industries),
+                "path": str(self.path),
+            }
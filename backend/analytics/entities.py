@@ -0,0 +1,487 @@
+import hashlib
+import json
+import re
+import zlib
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import numpy as np
+
+from scraper.ycombinator.incremental import company_key
+
+DEFAULT_DATA_DIR = Path("ycombinator_data")
+DEFAULT_ENTITIES_PATH = DEFAULT_DATA_DIR / "entities.json"
+
+# Signature length and LSH banding; 32 bands of 4 rows make pairs above a
+# Jaccard similarity of roughly (1/32) ** (1/4) = 0.42 likely to share a bucket
+NUM_PERM = 128
+BANDS = 32
+
+# Names are only a handful of trigrams, so they are banded more strictly:
+# 16 bands of 8 rows start colliding around a similarity of 0.7
+NAME_BANDS = 16
+
+# Buckets larger than this are boilerplate ("AI for X") rather than duplicates
+MAX_BUCKET = 50
+
+# How much each field counts when scoring a candidate pair
+FIELD_WEIGHTS = {"name": 0.4, "description": 0.35, "domain": 0.25}
+
+# Sources that win when picking the canonical name and description, best first
+SOURCE_PRIORITY = ("ycombinator", "hackernews")
+
+# Hosts that say nothing about which company a link belongs to
+SHARED_HOSTS = frozenset({
+    "ycombinator.com", "news.ycombinator.com", "github.com", "twitter.com", "x.com", "linkedin.com",
+    "youtube.com", "medium.com", "substack.com", "producthunt.com", "apps.apple.com", "play.google.com",
+})
+
+NAME_SUFFIXES = frozenset({"inc", "llc", "ltd", "co", "corp", "corporation", "company", "gmbh", "hq", "the"})
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has in is it its of on or that the this to was were will with we our your "
+    "you their they".split()
+)
+
+SNAPSHOT_PATTERN = re.compile(r"(\d{8}_\d{6})")
+
+# Show HN: Name – what it does
+SHOW_HN_PATTERN = re.compile(r"^(?:show|launch)\s+hn\s*:\s*(.+?)(?:\s+[-–—:|]\s+(.*))?$", re.IGNORECASE)
+
+# Mersenne prime for the universal hash family; keys are reduced below it so a * x fits in 64 bits
+_PRIME = (1 << 31) - 1
+
+
+def normalize_name(name):
+    """Lower-case a company name and drop punctuation and legal suffixes ("Acme, Inc." -> "acme")."""
+    words = WORD_PATTERN.findall((name or "").lower())
+    while len(words) > 1 and words[-1] in NAME_SUFFIXES:
+        words.pop()
+    return " ".join(words)
+
+
+def normalize_domain(url):
+    """
+    Get the registrable-looking host of a URL without "www." ("https://www.acme.io/x" -> "acme.io").
+
+    Returns an empty string for hosts shared by many companies, such as
+    GitHub or the YC directory itself.
+    """
+    url = (url or "").strip()
+    if url and "//" not in url:
+        url = f"//{url}"
+    host = (urlsplit(url).hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if not host or host in SHARED_HOSTS or any(host.endswith(f".{shared}") for shared in SHARED_HOSTS):
+        return ""
+    return host
+
+
+def snapshot_time(path):
+    """Timestamp of a snapshot from its file name (ycombinator_companies_20240101_120000.json), or None."""
+    match = SNAPSHOT_PATTERN.search(Path(path).name)
+    return datetime.strptime(match.group(1), "%Y%m%d_%H%M%S").isoformat() if match else None
+
+
+def record_from_company(company, snapshot=None):
+    """
+    Convert a YC company into an entity-resolution record.
+
+    Args:
+        company: Company dictionary from the scraper or the store
+        snapshot: ISO timestamp of the snapshot it came from
+
+    Returns:
+        Record dictionary, or None without a key
+    """
+    key = company.get("slug") or company_key(company)
+    if not key:
+        return None
+    return {
+        "source": "ycombinator",
+        "id": key,
+        "name": company.get("name") or "",
+        "domain": normalize_domain(company.get("website")),
+        "description": company.get("description") or company.get("longDescription") or "",
+        "url": company.get("url") or "",
+        "seenAt": snapshot or company.get("lastSeen") or "",
+    }
+
+
+def record_from_story(story):
+    """
+    Convert a Show HN / Launch HN story into an entity-resolution record.
+
+    Returns:
+        Record dictionary, or None for stories that do not launch something
+    """
+    match = SHOW_HN_PATTERN.match((story.get("title") or "").strip())
+    if not match or not story.get("id"):
+        return None
+    return {
+        "source": "hackernews",
+        "id": str(story["id"]),
+        "name": match.group(1),
+        "domain": normalize_domain(story.get("url")),
+        "description": match.group(2) or "",
+        "url": story.get("url") or "",
+        "seenAt": story.get("createdAt") or "",
+    }
+
+
+def load_records(paths):
+    """
+    Read records from YC snapshots (JSON or NDJSON) and Hacker News NDJSON files.
+
+    The source is told apart by the record shape: HN stories have a title,
+    YC companies a name.
+
+    Args:
+        paths: Iterable of file paths
+
+    Returns:
+        List of records
+    """
+    records = []
+    for path in paths:
+        path = Path(path)
+        snapshot = snapshot_time(path)
+        with open(path, "r", encoding="utf-8") as f:
+            if path.suffix == ".ndjson":
+                items = (json.loads(line) for line in f if line.strip())
+            else:
+                items = json.load(f)
+            for item in items:
+                record = record_from_story(item) if "title" in item else record_from_company(item, snapshot)
+                if record is not None:
+                    records.append(record)
+    return records
+
+
+def default_inputs(data_dir=DEFAULT_DATA_DIR):
+    """Every YC snapshot and HN file under the data directory, oldest first."""
+    data_dir = Path(data_dir)
+    paths = [
+        *data_dir.glob("ycombinator_companies_*.json"),
+        *data_dir.glob("ycombinator_companies_*.ndjson"),
+        *data_dir.glob("hackernews/hn_*.ndjson"),
+    ]
+    return sorted(paths, key=lambda path: (snapshot_time(path) or "", str(path)))
+
+
+def shingles(record):
+    """
+    Get the shingle sets of a record, one per field.
+
+    The name gives character trigrams (robust to "Acme AI" vs "AcmeAI"), the
+    description word pairs, and the domain itself plus its first label.
+    """
+    name = normalize_name(record["name"])
+    compact = f" {name.replace(' ', '')} "
+    words = [word for word in WORD_PATTERN.findall(record["description"].lower()) if word not in STOPWORDS]
+    domain = record["domain"]
+    return {
+        "name": {compact[i:i + 3] for i in range(len(compact) - 2)} if name else set(),
+        "description": {f"{first} {second}" for first, second in zip(words, words[1:])} or set(words),
+        "domain": {domain, domain.split(".", 1)[0]} if domain else set(),
+    }
+
+
+def _jaccard(first, second):
+    if not first or not second:
+        return None
+    return len(first & second) / len(first | second)
+
+
+def _succeeds(first, second):
+    if not (first.get("firstSeen") and second.get("firstSeen")):
+        return False
+    return first["seenAt"] < second["firstSeen"] or second["seenAt"] < first["firstSeen"]
+
+
+def pair_score(first, second):
+    """
+    Score how likely two records describe the same company, from 0 to 1.
+
+    Each field's Jaccard similarity is weighted by FIELD_WEIGHTS; fields
+    missing from either record are left out and the weights renormalized.
+    A shared domain is all or nothing. When one id of a source stops being
+    listed before the other first appears, the pair looks like a rename and
+    the names are not compared at all.
+    """
+    renamed = first["source"] == second["source"] and _succeeds(first, second)
+    total, weights = 0.0, 0.0
+    for field, weight in FIELD_WEIGHTS.items():
+        if field == "name" and renamed:
+            continue
+        if field == "domain":
+            similarity = (float(first["domain"] == second["domain"])
+                          if first["domain"] and second["domain"] else None)
+        else:
+            similarity = _jaccard(first["shingles"][field], second["shingles"][field])
+        if similarity is not None:
+            total += weight * similarity
+            weights += weight
+    return total / weights if weights else 0.0
+
+
+class MinHasher:
+    """MinHash signatures over string shingles, computed for many sets at once with NumPy."""
+
+    def __init__(self, num_perm=NUM_PERM, seed=1):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self._a = rng.integers(1, _PRIME, size=(num_perm, 1), dtype=np.uint64)
+        self._b = rng.integers(0, _PRIME, size=(num_perm, 1), dtype=np.uint64)
+
+    def signatures(self, shingle_sets, chunk_shingles=1 << 16):
+        """
+        Args:
+            shingle_sets: List of sets of strings
+            chunk_shingles: Shingles hashed per step, bounding memory to
+                num_perm * chunk_shingles * 8 bytes
+
+        Returns:
+            (len(shingle_sets), num_perm) uint32 array; empty sets get all-max rows
+        """
+        signatures = np.full((len(shingle_sets), self.num_perm), np.iinfo(np.uint32).max, dtype=np.uint32)
+        start = 0
+        while start < len(shingle_sets):
+            # Take whole sets until the chunk is full
+            end, size = start, 0
+            while end < len(shingle_sets) and (size == 0 or size + len(shingle_sets[end]) <= chunk_shingles):
+                size += len(shingle_sets[end])
+                end += 1
+            chunk = shingle_sets[start:end]
+            lengths = np.fromiter((len(items) for items in chunk), dtype=np.int64, count=len(chunk))
+            keys = np.fromiter((zlib.crc32(item.encode("utf-8")) for items in chunk for item in items),
+                               dtype=np.uint64, count=int(lengths.sum()))
+            if len(keys):
+                hashed = (self._a * (keys % _PRIME) + self._b) % _PRIME
+                filled = np.flatnonzero(lengths)
+                offsets = np.concatenate(([0], np.cumsum(lengths)[:-1]))[filled]
+                signatures[start + filled] = np.minimum.reduceat(hashed, offsets, axis=1).T.astype(np.uint32)
+            start = end
+        return signatures
+
+
+def lsh_candidates(signatures, bands=BANDS, max_bucket=MAX_BUCKET):
+    """
+    Find pairs of rows whose signatures agree on at least one band.
+
+    Args:
+        signatures: (n, num_perm) MinHash signatures; num_perm must divide by bands
+        bands: Number of bands
+        max_bucket: Skip buckets with more rows than this
+
+    Returns:
+        Set of (i, j) row pairs with i < j
+    """
+    count, num_perm = signatures.shape
+    rows = num_perm // bands
+    empty = np.all(signatures == np.iinfo(np.uint32).max, axis=1)
+    pairs = set()
+    for band in range(bands):
+        block = np.ascontiguousarray(signatures[:, band * rows:(band + 1) * rows])
+        keys = block.view(np.dtype((np.void, block.dtype.itemsize * rows))).ravel()
+        _, inverse, sizes = np.unique(keys, return_inverse=True, return_counts=True)
+        shared = (sizes[inverse] > 1) & (sizes[inverse] <= max_bucket) & ~empty
+        members = np.flatnonzero(shared)
+        order = members[np.argsort(inverse[members], kind="stable")]
+        buckets = np.split(order, np.flatnonzero(np.diff(inverse[order])) + 1)
+        for bucket in buckets:
+            for position, first in enumerate(bucket):
+                for second in bucket[position + 1:]:
+                    pairs.add((int(first), int(second)))
+    return pairs
+
+
+class _Clusters:
+    """Union-find over nodes that refuses to merge two different ids seen in the same snapshot."""
+
+    def __init__(self, nodes):
+        self.parent = list(range(len(nodes)))
+        # Per root: (source, snapshot) -> id; the same listing cannot contain one company twice
+        self.listings = [{(node["source"], snapshot): node["id"] for snapshot in node["snapshots"]} for node in nodes]
+
+    def find(self, item):
+        while self.parent[item] != item:
+            self.parent[item] = self.parent[self.parent[item]]
+            item = self.parent[item]
+        return item
+
+    def union(self, first, second):
+        first, second = self.find(first), self.find(second)
+        if first == second:
+            return False
+        small, large = sorted((first, second), key=lambda root: len(self.listings[root]))
+        for listing, key in self.listings[small].items():
+            if self.listings[large].get(listing, key) != key:
+                return False
+        self.parent[small] = large
+        self.listings[large].update(self.listings[small])
+        self.listings[small] = None
+        return True
+
+
+def _nodes(records):
+    """Collapse records of the same (source, id) into one node holding its latest fields and every name seen."""
+    nodes = {}
+    for record in sorted(records, key=lambda record: record["seenAt"] or ""):
+        key = (record["source"], record["id"])
+        node = nodes.get(key)
+        if node is None:
+            node = nodes[key] = {"source": record["source"], "id": record["id"], "names": [], "snapshots": set(),
+                                 "firstSeen": record["seenAt"]}
+        for field in ("name", "domain", "description", "url", "seenAt"):
+            if record[field] or not node.get(field):
+                node[field] = record[field]
+        if record["name"] and record["name"] not in node["names"]:
+            node["names"].append(record["name"])
+        if record["seenAt"]:
+            node["snapshots"].add(record["seenAt"])
+    return list(nodes.values())
+
+
+def _canonical(members):
+    # The most recent record of the best-ranked source names the entity
+    rank = {source: position for position, source in enumerate(SOURCE_PRIORITY)}
+    top = min(rank.get(node["source"], len(rank)) for node in members)
+    best = max((node for node in members if rank.get(node["source"], len(rank)) == top),
+               key=lambda node: node["seenAt"] or "")
+    latest = max(members, key=lambda node: node["seenAt"] or "")
+    names = []
+    for node in sorted(members, key=lambda node: node["seenAt"] or "", reverse=True):
+        for name in reversed(node["names"]):
+            if name not in names:
+                names.append(name)
+    key = min(f"{node['source']}:{node['id']}" for node in members)
+    return {
+        "id": "ent_" + hashlib.sha1(key.encode("utf-8")).hexdigest()[:12],
+        "name": best["name"],
+        "domain": next((node["domain"] for node in [best, latest, *members] if node["domain"]), ""),
+        "description": max((node["description"] for node in members), key=len),
+        "aliases": [name for name in names if name != best["name"]],
+        "firstSeen": min((node["firstSeen"] for node in members if node["firstSeen"]), default=""),
+        "lastSeen": latest["seenAt"],
+        "sources": [
+            {
+                "source": node["source"],
+                "id": node["id"],
+                "name": node["name"],
+                "url": node["url"],
+                "firstSeen": node["firstSeen"],
+                "lastSeen": node["seenAt"],
+                "snapshots": len(node["snapshots"]),
+            }
+            for node in sorted(members, key=lambda node: (node["source"], node["firstSeen"] or ""))
+        ],
+    }
+
+
+def _prune(pairs, nodes, signatures, threshold, margin=0.15, chunk=1 << 16):
+    """
+    Drop candidate pairs that cannot reach the threshold before scoring them exactly.
+
+    A weighted mean only reaches the threshold if some field does, so pairs
+    whose estimated name and description similarities (the share of equal
+    MinHash rows) and domain match all fall below it, less a margin for
+    estimation error, are skipped.
+    """
+    domains = {}
+    domain_ids = np.array([domains.setdefault(node["domain"], len(domains)) if node["domain"] else -1
+                           for node in nodes])
+    keep = np.zeros(len(pairs), dtype=bool)
+    for start in range(0, len(pairs), chunk):
+        first, second = pairs[start:start + chunk, 0], pairs[start:start + chunk, 1]
+        best = ((domain_ids[first] == domain_ids[second]) & (domain_ids[first] >= 0)).astype(np.float64)
+        for field_signatures in signatures.values():
+            estimate = (field_signatures[first] == field_signatures[second]).mean(axis=1)
+            best = np.maximum(best, estimate)
+        keep[start:start + chunk] = best >= threshold - margin
+    return pairs[keep]
+
+
+def resolve_entities(records, threshold=0.55, num_perm=NUM_PERM, bands=BANDS, name_bands=NAME_BANDS,
+                     max_bucket=MAX_BUCKET):
+    """
+    Merge records describing the same company into canonical entities.
+
+    Records with the same source and id (one company across snapshots) are
+    collapsed first. MinHash signatures of the name and description
+    shingles are banded into LSH buckets and records sharing a domain are
+    blocked together, so only records that collide somewhere are compared; candidates scoring at least
+    `threshold` are merged best-first with union-find. Two ids listed in
+    the same snapshot of a source are never merged.
+
+    Args:
+        records: Records from `load_records`, `record_from_company` or `record_from_story`
+        threshold: Minimum `pair_score` to merge
+        num_perm: MinHash signature length
+        bands: LSH bands of the description signatures; num_perm / bands rows each
+        name_bands: LSH bands of the name signatures
+        max_bucket: Skip LSH buckets larger than this
+
+    Returns:
+        (entities, stats) where entities are dictionaries with provenance
+        under "sources", largest first
+    """
+    nodes = _nodes(records)
+    for node in nodes:
+        node["shingles"] = shingles(node)
+
+    # Names and descriptions are banded separately so a rename still collides on its description
+    hasher = MinHasher(num_perm)
+    candidates = set()
+    signatures = {}
+    for field, field_bands in (("name", name_bands), ("description", bands)):
+        signatures[field] = hasher.signatures([node["shingles"][field] for node in nodes])
+        candidates |= lsh_candidates(signatures[field], bands=field_bands, max_bucket=max_bucket)
+    # A shared company domain is a candidate on its own, whatever the text says
+    by_domain = defaultdict(list)
+    for index, node in enumerate(nodes):
+        if node["domain"]:
+            by_domain[node["domain"]].append(index)
+    for indices in by_domain.values():
+        if len(indices) <= max_bucket:
+            candidates.update((first, second) for position, first in enumerate(indices)
+                              for second in indices[position + 1:])
+
+    pairs = _prune(np.array(sorted(candidates), dtype=np.int64).reshape(-1, 2), nodes, signatures, threshold)
+    scored = sorted(
+        ((pair_score(nodes[first], nodes[second]), first, second) for first, second in pairs.tolist()),
+        reverse=True
+    )
+    clusters = _Clusters(nodes)
+    merges = sum(clusters.union(first, second) for score, first, second in scored if score >= threshold)
+
+    groups = defaultdict(list)
+    for index, node in enumerate(nodes):
+        groups[clusters.find(index)].append(node)
+    entities = sorted((_canonical(members) for members in groups.values()),
+                      key=lambda entity: (-len(entity["sources"]), entity["name"].lower()))
+    stats = {
+        "records": len(records),
+        "nodes": len(nodes),
+        "candidates": len(candidates),
+        "scored": len(pairs),
+        "merges": merges,
+        "entities": len(entities),
+    }
+    return entities, stats
+
+
+def write_entities(entities, path=DEFAULT_ENTITIES_PATH):
+    """Write entities as JSON, replacing the file atomically."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary = path.with_suffix(path.suffix + ".tmp")
+    with open(temporary, "w", encoding="utf-8") as f:
+        json.dump(entities, f, ensure_ascii=False, separators=(",", ":"))
+    temporary.replace(path)
+    return path
@@ -0,0 +1,605 @@
+import hashlib
+import itertools
+import json
+import os
+import struct
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+DEFAULT_GRAPH_DIR = Path("ycombinator_data") / "graph"
+
+# Node kinds, as stored in the payload
+COMPANY, INDUSTRY, BATCH = 0, 1, 2
+KIND_NAMES = ("company", "industry", "batch")
+
+# Edge weights by kind; similarity edges are weighted by their score
+INDUSTRY_EDGE_WEIGHT = 1.0
+BATCH_EDGE_WEIGHT = 0.3
+
+# Node counts of the levels of detail; the last level always holds every node
+DEFAULT_LOD_SIZES = (500, 2500)
+
+PAYLOAD_MAGIC = b"GEGR"
+PAYLOAD_VERSION = 1
+_HEADER = struct.Struct("<4sHBBIIH")
+_LEVEL = struct.Struct("<II")
+
+
+@dataclass
+class CompanyGraph:
+    """
+    Nodes and undirected weighted edges of the company graph.
+
+    Attributes:
+        ids: Node ids ("company:<slug>", "industry:<name>", "batch:<name>")
+        labels: Display names
+        kinds: uint8 array of COMPANY, INDUSTRY or BATCH
+        sources: int array of edge start nodes
+        targets: int array of edge end nodes
+        weights: float32 array of edge weights
+    """
+    ids: list
+    labels: list
+    kinds: np.ndarray
+    sources: np.ndarray
+    targets: np.ndarray
+    weights: np.ndarray
+
+    def __len__(self):
+        return len(self.ids)
+
+    def degrees(self):
+        """Weighted degree of every node."""
+        return (np.bincount(self.sources, weights=self.weights, minlength=len(self))
+                + np.bincount(self.targets, weights=self.weights, minlength=len(self)))
+
+    def signature(self):
+        """Hash of the nodes and edges, to skip layouts when nothing changed."""
+        digest = hashlib.sha1("\n".join(self.ids).encode("utf-8"))
+        for array in (self.sources, self.targets, np.round(self.weights, 3)):
+            digest.update(np.ascontiguousarray(array).tobytes())
+        return digest.hexdigest()
+
+
+def build_graph(companies, similarity=None, max_similar=5, min_similarity=0.2):
+    """
+    Build the company/industry/batch graph.
+
+    Companies link to their industries and batch, so companies sharing a
+    tag meet at its hub instead of forming a clique. With a
+    SimilarityIndex, each company also links to up to `max_similar` of its
+    most similar companies.
+
+    Args:
+        companies: Iterable of company records with a slug
+        similarity: Optional SimilarityIndex
+        max_similar: Similarity edges per company
+        min_similarity: Lowest similarity score that makes an edge
+
+    Returns:
+        CompanyGraph
+    """
+    ids, labels, kinds = [], [], []
+    index = {}
+
+    def node(node_id, label, kind):
+        position = index.get(node_id)
+        if position is None:
+            position = index[node_id] = len(ids)
+            ids.append(node_id)
+            labels.append(label)
+            kinds.append(kind)
+        return position
+
+    edges = {}
+    companies = [company for company in companies if company.get("slug")]
+    for company in companies:
+        node(f"company:{company['slug']}", company.get("name") or company["slug"], COMPANY)
+    for company in companies:
+        source = index[f"company:{company['slug']}"]
+        for industry in company.get("industries") or []:
+            edges[(source, node(f"industry:{industry}", industry, INDUSTRY))] = INDUSTRY_EDGE_WEIGHT
+        if company.get("batch"):
+            edges[(source, node(f"batch:{company['batch']}", company["batch"], BATCH))] = BATCH_EDGE_WEIGHT
+        if similarity is not None:
+            for neighbor in similarity.neighbors(company["slug"], limit=max_similar) or []:
+                target = index.get(f"company:{neighbor['slug']}")
+                if target is not None and neighbor["score"] >= min_similarity:
+                    key = (min(source, target), max(source, target))
+                    edges[key] = max(edges.get(key, 0.0), neighbor["score"])
+
+    pairs = np.array(list(edges), dtype=np.int64).reshape(-1, 2)
+    return CompanyGraph(
+        ids=ids,
+        labels=labels,
+        kinds=np.array(kinds, dtype=np.uint8),
+        sources=pairs[:, 0],
+        targets=pairs[:, 1],
+        weights=np.fromiter(edges.values(), dtype=np.float32, count=len(edges)),
+    )
+
+
+def detect_clusters(graph, initial=None, iterations=30, resolution=1.0, seed=0):
+    """
+    Find communities with modularity-aware label propagation (LPAm).
+
+    Every node repeatedly takes the label with the best modularity gain:
+    the edge weight it has to the label minus its expected share,
+    resolution * degree * label volume / 2m. The penalty keeps hubs from
+    pulling everything into one giant cluster. Only a random half of the
+    nodes moves per round, which keeps bipartite parts (companies and
+    their hubs) from flipping back and forth. Batch edges are ignored, as
+    a batch is a time, not a topic.
+
+    Args:
+        graph: CompanyGraph
+        initial: Optional starting labels (e.g. the previous clusters), -1 for unknown
+        iterations: Maximum rounds
+        resolution: Higher values give smaller clusters
+        seed: Random seed
+
+    Returns:
+        int array of cluster ids, 0 for the largest cluster
+    """
+    n = len(graph)
+    rng = np.random.default_rng(seed)
+    labels = np.arange(n, dtype=np.int64)
+    if initial is not None:
+        known = initial >= 0
+        labels[known] = initial[known]
+        # Unknown nodes get labels no previous cluster uses
+        labels[~known] = n + np.flatnonzero(~known)
+    span = int(labels.max()) + 1 if n else 1
+
+    topical = (graph.kinds[graph.sources] != BATCH) & (graph.kinds[graph.targets] != BATCH)
+    sources = np.concatenate([graph.sources[topical], graph.targets[topical]])
+    targets = np.concatenate([graph.targets[topical], graph.sources[topical]])
+    weights = np.concatenate([graph.weights[topical], graph.weights[topical]]).astype(np.float64)
+    degrees = np.bincount(sources, weights=weights, minlength=n)
+    total = degrees.sum() or 1.0
+    for _ in range(iterations):
+        volumes = np.bincount(labels, weights=degrees, minlength=span)
+        keys = sources * span + labels[targets]
+        unique, inverse = np.unique(keys, return_inverse=True)
+        nodes, candidates = unique // span, unique % span
+        # A node's own degree does not count against the label it already has
+        own = candidates == labels[nodes]
+        expected = degrees[nodes] * (volumes[candidates] - own * degrees[nodes]) / total
+        gains = np.bincount(inverse, weights=weights) - resolution * expected + 1e-9 * own
+        order = np.lexsort((-gains, nodes))
+        first = order[np.r_[True, nodes[order][1:] != nodes[order][:-1]]]
+        best = labels.copy()
+        # Leaving for a label with no gain is pointless; a node alone has gain 0
+        better = gains[first] > 0
+        best[nodes[first][better]] = candidates[first][better]
+
+        movable = (rng.random(n) < 0.5) & (best != labels)
+        if not movable.any():
+            break
+        labels[movable] = best[movable]
+
+    # Number clusters by size, largest first
+    _, compact, sizes = np.unique(labels, return_inverse=True, return_counts=True)
+    rank = np.empty(len(sizes), dtype=np.int64)
+    rank[np.argsort(-sizes, kind="stable")] = np.arange(len(sizes))
+    return rank[compact]
+
+
+def _cic_weights(grid_positions, shape):
+    """
+    Cloud-in-cell corners of every node.
+
+    Returns:
+        Tuple of (flat grid indices, weights), both shaped (2^dims, n)
+    """
+    dims = len(shape)
+    base = np.floor(grid_positions).astype(np.int64)
+    fraction = grid_positions - base
+    indices, weights = [], []
+    for offset in itertools.product((0, 1), repeat=dims):
+        weight = np.ones(len(grid_positions))
+        for axis, step in enumerate(offset):
+            weight *= fraction[:, axis] if step else 1 - fraction[:, axis]
+        indices.append(np.ravel_multi_index(tuple(base[:, axis] + step for axis, step in enumerate(offset)), shape))
+        weights.append(weight)
+    return np.array(indices), np.array(weights)
+
+
+def _repulsion_kernels(grid, dims):
+    """FFTs of the 1/r repulsion field components on the zero-padded grid, in grid units."""
+    axis = np.arange(2 * grid)
+    axis = np.where(axis < grid, axis, axis - 2 * grid).astype(np.float64)
+    offsets = np.meshgrid(*([axis] * dims), indexing="ij")
+    squared = sum(offset ** 2 for offset in offsets)
+    squared[(0,) * dims] = np.inf
+    return [np.fft.rfftn(offset / squared) for offset in offsets]
+
+
+def force_layout(graph, dims=2, iterations=300, initial=None, temperature=0.1, grid=None, gravity=1.0,
+                 repulsion=1.0, seed=0):
+    """
+    Lay out the graph with ForceAtlas2-style forces, vectorized with NumPy.
+
+    Edges pull their ends together linearly, every pair of nodes pushes
+    apart with (degree + 1)-weighted 1/d repulsion, and gravity keeps
+    disconnected parts in view. Repulsion between all pairs is
+    approximated on a grid (particle-mesh): node masses are spread onto the
+    grid, convolved with the repulsion field by FFT and read back, which
+    costs O(n + G^d log G) per iteration instead of O(n^2).
+
+    Args:
+        graph: CompanyGraph
+        dims: 2 or 3
+        iterations: Force iterations
+        initial: Optional starting positions (n x dims); NaN rows are placed
+            next to their neighbors
+        temperature: Largest step per iteration, relative to the layout size;
+            it cools linearly to zero
+        grid: Grid cells per axis (default from the node count)
+        gravity: Pull toward the center
+        repulsion: Repulsion strength
+        seed: Random seed
+
+    Returns:
+        float32 array of positions (n x dims), scaled into [-1, 1]
+    """
+    n = len(graph)
+    if n == 0:
+        return np.zeros((0, dims), dtype=np.float32)
+    rng = np.random.default_rng(seed)
+    if grid is None:
+        # About one node per cell in 2D; 3D grids grow with the cube, so they stay coarser
+        grid = int(min(128 if dims == 2 else 24, max(16, 8 * np.ceil(n ** (1 / dims) / 8))))
+    mass = graph.degrees() + 1
+    size = np.sqrt(mass.sum()) * 2
+
+    if initial is None:
+        positions = rng.normal(scale=size / 4, size=(n, dims))
+    else:
+        positions = np.array(initial, dtype=np.float64) * size / 2
+        positions = _place_new_nodes(graph, positions, rng, size / 50)
+
+    kernels = _repulsion_kernels(grid, dims)
+    padded = (2 * grid,) * dims
+    for iteration in range(iterations):
+        forces = np.zeros_like(positions)
+
+        # Repulsion through the grid
+        low = positions.min(axis=0)
+        cell = max((positions.max(axis=0) - low).max() / (grid - 1.001), 1e-9)
+        corners, corner_weights = _cic_weights((positions - low) / cell, padded)
+        density = np.bincount(corners.ravel(), weights=(corner_weights * mass).ravel(),
+                              minlength=int(np.prod(padded))).reshape(padded)
+        density_fft = np.fft.rfftn(density)
+        for axis, kernel in enumerate(kernels):
+            field = np.fft.irfftn(density_fft * kernel, s=padded).ravel()
+            forces[:, axis] += (field[corners] * corner_weights).sum(axis=0) * mass * repulsion / cell
+
+        # Linear attraction along edges
+        delta = positions[graph.targets] - positions[graph.sources]
+        for axis in range(dims):
+            pull = graph.weights * delta[:, axis]
+            forces[:, axis] += (np.bincount(graph.sources, weights=pull, minlength=n)
+                                - np.bincount(graph.targets, weights=pull, minlength=n))
+
+        # Gravity toward the center
+        forces -= gravity * mass[:, None] * positions / (np.linalg.norm(positions, axis=1, keepdims=True) + 1e-9)
+
+        # Heavier nodes move slower; steps are capped by the cooling temperature
+        steps = forces / mass[:, None]
+        limit = temperature * size * (1 - iteration / iterations)
+        lengths = np.linalg.norm(steps, axis=1, keepdims=True)
+        positions += steps * np.minimum(1.0, limit / np.maximum(lengths, 1e-9))
+
+    positions -= positions.mean(axis=0)
+    extent = np.abs(positions).max() or 1.0
+    return (positions / extent).astype(np.float32)
+
+
+def _place_new_nodes(graph, positions, rng, jitter):
+    """Put nodes without a position (NaN) at the mean of their placed neighbors."""
+    missing = np.isnan(positions).any(axis=1)
+    for _ in range(3):
+        if not missing.any():
+            break
+        placed = ~missing
+        sums = np.zeros_like(positions)
+        counts = np.zeros(len(positions))
+        for a, b in ((graph.sources, graph.targets), (graph.targets, graph.sources)):
+            usable = missing[a] & placed[b]
+            np.add.at(sums, a[usable], positions[b[usable]])
+            np.add.at(counts, a[usable], 1)
+        ready = missing & (counts > 0)
+        positions[ready] = sums[ready] / counts[ready, None] + rng.normal(scale=jitter, size=(ready.sum(), positions.shape[1]))
+        missing &= ~ready
+    # Nodes with no placed neighbors at all start near the center
+    spread = np.nanstd(positions) if (~missing).any() else 1.0
+    positions[missing] = rng.normal(scale=spread or 1.0, size=(missing.sum(), positions.shape[1]))
+    return positions
+
+
+def lod_order(graph):
+    """
+    Order nodes by importance: hubs, then companies by weighted degree.
+
+    Returns:
+        int array of node indices, most important first
+    """
+    degrees = graph.degrees()
+    return np.lexsort((-degrees, graph.kinds == COMPANY))
+
+
+def encode_payload(graph, positions, clusters, lod_sizes=DEFAULT_LOD_SIZES, meta=None):
+    """
+    Pack a laid-out graph into the binary payload the frontend draws.
+
+    Nodes are ordered by importance (see `lod_order`) and edges by their
+    later endpoint, so every level of detail is a prefix of the node and
+    edge arrays; a client can draw level 0 as soon as its bytes arrive.
+
+    Layout (little-endian):
+        header: magic "GEGR", version u16, dims u8, reserved u8,
+                node count u32, edge count u32, level count u16
+        levels: (node count u32, edge count u32) per level
+        meta: length u32 + UTF-8 JSON (ids, labels, clusters, extra meta)
+        positions: float32 [nodes x dims]
+        kinds: uint8 [nodes]
+        clusters: uint16 [nodes]
+        edges: uint32 [edges x 2], indices into the ordered nodes
+        weights: uint8 [edges], weight scaled to 0-255
+
+    Returns:
+        Bytes
+    """
+    order = lod_order(graph)
+    rank = np.empty(len(order), dtype=np.int64)
+    rank[order] = np.arange(len(order))
+    sources, targets = rank[graph.sources], rank[graph.targets]
+    edge_order = np.argsort(np.maximum(sources, targets), kind="stable")
+    sources, targets = sources[edge_order], targets[edge_order]
+    weights = graph.weights[edge_order]
+    last_endpoint = np.maximum(sources, targets)
+
+    level_nodes = [size for size in lod_sizes if size < len(order)] + [len(order)]
+    levels = [(count, int(np.searchsorted(last_endpoint, count))) for count in level_nodes]
+
+    cluster_meta = cluster_summary(graph, positions, clusters)
+    meta_json = json.dumps({
+        **(meta or {}),
+        "ids": [graph.ids[i] for i in order],
+        "labels": [graph.labels[i] for i in order],
+        "clusters": cluster_meta,
+        "kinds": KIND_NAMES,
+    }, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    peak = float(weights.max()) if len(weights) else 1.0
+    parts = [
+        _HEADER.pack(PAYLOAD_MAGIC, PAYLOAD_VERSION, positions.shape[1], 0, len(order), len(weights), len(levels)),
+        b"".join(_LEVEL.pack(*level) for level in levels),
+        struct.pack("<I", len(meta_json)),
+        meta_json,
+        positions[order].astype("<f4").tobytes(),
+        graph.kinds[order].astype(np.uint8).tobytes(),
+        np.minimum(clusters[order], 65535).astype("<u2").tobytes(),
+        np.stack([sources, targets], axis=1).astype("<u4").tobytes(),
+        np.round(weights / (peak or 1.0) * 255).astype(np.uint8).tobytes(),
+    ]
+    return b"".join(parts)
+
+
+def decode_payload(data):
+    """
+    Unpack a payload from `encode_payload`.
+
+    Returns:
+        Dictionary with meta, levels, positions, kinds, clusters, edges and weights
+    """
+    magic, version, dims, _, node_count, edge_count, level_count = _HEADER.unpack_from(data, 0)
+    if magic != PAYLOAD_MAGIC or version != PAYLOAD_VERSION:
+        raise ValueError("Not a graph payload of a supported version")
+    offset = _HEADER.size
+    levels = [_LEVEL.unpack_from(data, offset + i * _LEVEL.size) for i in range(level_count)]
+    offset += level_count * _LEVEL.size
+    (meta_length,) = struct.unpack_from("<I", data, offset)
+    offset += 4
+    meta = json.loads(data[offset:offset + meta_length])
+    offset += meta_length
+
+    def take(dtype, count):
+        nonlocal offset
+        array = np.frombuffer(data, dtype=dtype, count=count, offset=offset)
+        offset += array.nbytes
+        return array
+
+    positions = take("<f4", node_count * dims).reshape(node_count, dims)
+    kinds = take(np.uint8, node_count)
+    clusters = take("<u2", node_count)
+    edges = take("<u4", edge_count * 2).reshape(edge_count, 2)
+    weights = take(np.uint8, edge_count)
+    return {"meta": meta, "levels": levels, "positions": positions, "kinds": kinds, "clusters": clusters,
+            "edges": edges, "weights": weights}
+
+
+def cluster_summary(graph, positions, clusters, top=3):
+    """
+    Describe clusters by size, centroid and their most connected industries.
+
+    Returns:
+        List of dictionaries, largest cluster first
+    """
+    companies = graph.kinds == COMPANY
+    sizes = np.bincount(clusters[companies], minlength=int(clusters.max()) + 1 if len(clusters) else 0)
+    industry_edges = {}
+    for source, target in zip(graph.sources.tolist(), graph.targets.tolist()):
+        if graph.kinds[target] == INDUSTRY and graph.kinds[source] == COMPANY:
+            counts = industry_edges.setdefault(int(clusters[source]), {})
+            counts[graph.labels[target]] = counts.get(graph.labels[target], 0) + 1
+
+    summary = []
+    for cluster in np.flatnonzero(sizes).tolist():
+        members = companies & (clusters == cluster)
+        industries = sorted(industry_edges.get(cluster, {}).items(), key=lambda item: -item[1])[:top]
+        summary.append({
+            "id": cluster,
+            "size": int(sizes[cluster]),
+            "label": " / ".join(name for name, _ in industries) or f"Cluster {cluster}",
+            "centroid": [round(float(value), 4) for value in positions[members].mean(axis=0)],
+        })
+    return sorted(summary, key=lambda item: -item["size"])
+
+
+def payload_to_json(payload, level=None):
+    """
+    Convert a decoded payload to the {nodes, links} shape of ForceDirectedGraph.
+
+    Args:
+        payload: Output of `decode_payload`
+        level: Level of detail to cut at (default: every node)
+
+    Returns:
+        Dictionary with nodes (id, label, kind, group, x, y[, z]), links, clusters and levels
+    """
+    levels = payload["levels"]
+    node_count, edge_count = levels[-1] if level is None else levels[min(level, len(levels) - 1)]
+    meta = payload["meta"]
+    axes = ("x", "y", "z")
+    nodes = []
+    for i in range(node_count):
+        node = {
+            "id": meta["ids"][i],
+            "label": meta["labels"][i],
+            "kind": KIND_NAMES[payload["kinds"][i]],
+            "group": int(payload["clusters"][i]),
+        }
+        node.update({axes[axis]: round(float(value), 4) for axis, value in enumerate(payload["positions"][i])})
+        nodes.append(node)
+    links = [
+        {"source": meta["ids"][source], "target": meta["ids"][target], "value": round(int(weight) / 255, 3)}
+        for (source, target), weight in zip(payload["edges"][:edge_count].tolist(), payload["weights"][:edge_count])
+    ]
+    return {"nodes": nodes, "links": links, "clusters": meta["clusters"],
+            "levels": [{"nodes": nodes_at, "links": links_at} for nodes_at, links_at in levels]}
+
+
+class GraphCache:
+    """
+    Precomputed graph layouts on disk, refreshed incrementally.
+
+    `refresh` rebuilds the graph from the companies and, when it changed,
+    lays it out again. If most nodes were already laid out, their previous
+    positions and clusters seed the new run, new nodes start next to their
+    neighbors and a short, cool run settles them, so existing nodes barely
+    move between refreshes. Payloads are written as `graph_<dims>d.bin`.
+    """
+
+    def __init__(self, directory=DEFAULT_GRAPH_DIR, lod_sizes=DEFAULT_LOD_SIZES, iterations=300,
+                 max_new_fraction=0.3):
+        """
+        Args:
+            directory: Directory of the payloads and layout state
+            lod_sizes: Node counts of the levels of detail
+            iterations: Force iterations of a full layout (a warm start uses a quarter)
+            max_new_fraction: Share of new nodes above which the layout starts over
+        """
+        self.directory = Path(directory)
+        self.lod_sizes = lod_sizes
+        self.iterations = iterations
+        self.max_new_fraction = max_new_fraction
+
+    def payload_path(self, dims=2):
+        return self.directory / f"graph_{dims}d.bin"
+
+    def _state_path(self, dims):
+        return self.directory / f"layout_{dims}d.npz"
+
+    def data_version(self):
+        """Modification times of the payloads, which change whenever a refresh writes one."""
+        return tuple(
+            path.stat().st_mtime_ns if path.exists() else 0 for path in (self.payload_path(2), self.payload_path(3))
+        )
+
+    def load(self, dims=2):
+        """
+        Read a payload.
+
+        Returns:
+            Payload bytes, or None if it has not been built
+        """
+        path = self.payload_path(dims)
+        return path.read_bytes() if path.exists() else None
+
+    def refresh(self, companies, similarity=None, dims=2, full=False, seed=0):
+        """
+        Rebuild the graph and its layout if the companies changed.
+
+        Args:
+            companies: Iterable of every current company record
+            similarity: Optional SimilarityIndex adding company-company edges
+            dims: 2 or 3
+            full: Whether to lay out from scratch even if a layout exists
+            seed: Random seed
+
+        Returns:
+            Dictionary with "mode" ("full", "incremental" or "unchanged") and counts
+        """
+        graph = build_graph(companies, similarity=similarity)
+        signature = graph.signature()
+        state = self._load_state(dims)
+        summary = {"nodes": len(graph), "edges": len(graph.weights)}
+        if state is not None and state["signature"] == signature and not full and self.payload_path(dims).exists():
+            return {"mode": "unchanged", **summary}
+
+        initial, initial_clusters, new_nodes = None, None, len(graph)
+        if state is not None and not full:
+            previous = {node_id: i for i, node_id in enumerate(state["ids"])}
+            rows = np.array([previous.get(node_id, -1) for node_id in graph.ids], dtype=np.int64)
+            new_nodes = int((rows < 0).sum())
+            if new_nodes <= self.max_new_fraction * len(graph):
+                initial = np.full((len(graph), dims), np.nan)
+                initial[rows >= 0] = state["positions"][rows[rows >= 0]]
+                initial_clusters = np.where(rows >= 0, state["clusters"][np.maximum(rows, 0)], -1)
+
+        if initial is None:
+            positions = force_layout(graph, dims=dims, iterations=self.iterations, seed=seed)
+            clusters = detect_clusters(graph, seed=seed)
+            mode = "full"
+        else:
+            positions = force_layout(graph, dims=dims, iterations=max(20, self.iterations // 4), initial=initial,
+                                     temperature=0.02, seed=seed)
+            clusters = detect_clusters(graph, initial=initial_clusters, iterations=10, seed=seed)
+            mode = "incremental"
+
+        meta = {"generatedAt": datetime.now().isoformat(timespec="seconds"), "dims": dims}
+        payload = encode_payload(graph, positions, clusters, lod_sizes=self.lod_sizes, meta=meta)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._write_state(dims, graph, positions, clusters, signature)
+        _write_atomic(self.payload_path(dims), payload)
+        return {"mode": mode, **summary, "newNodes": new_nodes,
+                "clusters": len(np.unique(clusters[graph.kinds == COMPANY])), "bytes": len(payload)}
+
+    def _load_state(self, dims):
+        path = self._state_path(dims)
+        if not path.exists():
+            return None
+        with np.load(path, allow_pickle=False) as state:
+            return {
+                "ids": state["ids"].tolist(),
+                "positions": state["positions"],
+                "clusters": state["clusters"],
+                "signature": str(state["signature"]),
+            }
+
+    def _write_state(self, dims, graph, positions, clusters, signature):
+        temporary = self._state_path(dims).with_suffix(".tmp.npz")
+        np.savez_compressed(temporary, ids=np.array(graph.ids), positions=positions, clusters=clusters,
+                            signature=np.array(signature))
+        os.replace(temporary, self._state_path(dims))
+
+
+def _write_atomic(path, data):
+    temporary = path.with_suffix(path.suffix + ".tmp")
+    temporary.write_bytes(data)
+    os.replace(temporary, path)
@@ -0,0 +1,425 @@
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import zlib
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+DEFAULT_SIMILARITY_PATH = Path("ycombinator_data") / "similarity.sqlite3"
+
+# Hashed feature dimensions; collisions are spread out by a per-feature sign
+DEFAULT_DIMS = 512
+
+# Industries are few per company but say a lot about what it does
+INDUSTRY_WEIGHT = 2.0
+
+# Bigrams add phrases ("machine learning") but also most of the hash collisions
+BIGRAM_WEIGHT = 0.5
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has in is it its of on or that the this to was were will with we our your "
+    "you their they help helps helping platform company companies".split()
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    slug TEXT PRIMARY KEY,
+    content_hash TEXT NOT NULL
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS neighbors (
+    slug TEXT PRIMARY KEY,
+    data TEXT NOT NULL,
+    floor REAL NOT NULL
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+
+-- Document frequencies of the last full build, as one zlib-compressed JSON object
+CREATE TABLE IF NOT EXISTS model (
+    key TEXT PRIMARY KEY,
+    data BLOB NOT NULL
+);
+"""
+
+_MAX_PARAMS = 900
+
+
+def company_features(company):
+    """
+    Get the weighted features of a company: description unigrams and bigrams plus its industries.
+
+    Returns:
+        Counter of feature to raw weight
+    """
+    words = [word for word in WORD_PATTERN.findall((company.get("description") or "").lower())
+             if word not in STOPWORDS]
+    features = Counter(words)
+    for first, second in zip(words, words[1:]):
+        features[f"{first} {second}"] += BIGRAM_WEIGHT
+    for industry in company.get("industries") or []:
+        features[f"industry:{industry.lower()}"] += INDUSTRY_WEIGHT
+    return features
+
+
+def content_hash(company):
+    """Hash of the fields the vectors are built from, to notice which companies changed."""
+    raw = json.dumps([company.get("description") or "", sorted(company.get("industries") or [])])
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def hash_features(features, dims):
+    """
+    Map features to signed buckets of a `dims`-sized vector (the hashing trick).
+
+    CRC32 is stable across processes (unlike `hash`), so persisted models
+    and fresh vectors agree.
+
+    Returns:
+        Tuple of (bucket array, sign array)
+    """
+    codes = np.fromiter((zlib.crc32(feature.encode("utf-8")) for feature in features), dtype=np.int64,
+                        count=len(features))
+    return codes % dims, np.where(codes & 0x80000000, 1.0, -1.0).astype(np.float32)
+
+
+def top_k(similarities, k):
+    """
+    Get the k highest scores of every row.
+
+    Args:
+        similarities: 2D array of scores
+        k: Number of neighbors per row
+
+    Returns:
+        Tuple of (index array, score array), both shaped (rows, k) and sorted by descending score
+    """
+    k = min(k, similarities.shape[1])
+    if k <= 0:
+        return np.empty((len(similarities), 0), dtype=np.int64), np.empty((len(similarities), 0), dtype=np.float32)
+    indices = np.argpartition(similarities, -k, axis=1)[:, -k:]
+    scores = np.take_along_axis(similarities, indices, axis=1)
+    order = np.argsort(-scores, axis=1, kind="stable")
+    return np.take_along_axis(indices, order, axis=1), np.take_along_axis(scores, order, axis=1)
+
+
+class SimilarityIndex:
+    """
+    Precomputed "similar companies" lists from hashed TF-IDF vectors.
+
+    Each company becomes an L2-normalized vector of its description
+    unigrams/bigrams and industries, TF-IDF weighted and hashed into `dims`
+    signed buckets, so the whole dataset is one dense float32 matrix and
+    cosine similarity is a matrix product. Neighbors are computed for
+    blocks of rows at a time (block x n products keep memory bounded) and
+    stored per company, so a lookup is a primary-key read.
+
+    Document frequencies are frozen at the last full build. A refresh then
+    only recomputes the rows of changed companies and merges those
+    companies into everyone else's lists. Each list keeps 2k candidates and
+    a floor: it holds every company scoring at least the floor, so dropping
+    changed or removed neighbors leaves an exact (shorter) list, and only
+    lists left with fewer than k entries are recomputed. Once more than
+    `rebuild_fraction` of the companies changed, a refresh rebuilds
+    everything so the IDF weights follow the data.
+    """
+
+    def __init__(self, path=DEFAULT_SIMILARITY_PATH, dims=DEFAULT_DIMS, k=20, block_size=1024,
+                 rebuild_fraction=0.2, min_score=0.05):
+        """
+        Args:
+            path: Database file; ":memory:" for a throwaway index
+            dims: Vector dimensions (fixed once built; a different value forces a full build)
+            k: Neighbors stored per company
+            block_size: Rows per matrix product block
+            rebuild_fraction: Share of changed companies above which a refresh rebuilds
+            min_score: Similarity below which neighbors are not stored
+        """
+        self.path = path
+        self.dims = dims
+        self.k = k
+        self.depth = 2 * k
+        self.block_size = block_size
+        self.rebuild_fraction = rebuild_fraction
+        self.min_score = min_score
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        # The scheduler refreshes the index in a worker thread and the graph
+        # layout reads neighbors from another, so the connection is shared
+        # across threads behind a lock
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def data_version(self):
+        """SQLite's data version (see CompanyStore.data_version)."""
+        with self._lock:
+            return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def _meta(self, key, default=None):
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def _set_meta(self, key, value):
+        self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, json.dumps(value)))
+
+    def vectorize(self, feature_lists, document_frequencies, doc_count):
+        """
+        Build the normalized TF-IDF matrix of a list of feature Counters.
+
+        Features missing from `document_frequencies` get the weight of a
+        feature seen once.
+
+        Returns:
+            float32 array shaped (len(feature_lists), dims)
+        """
+        # Each distinct feature is hashed and weighted once, then scattered into the matrix
+        columns = {}
+        rows, feature_ids, weights = [], [], []
+        for row, features in enumerate(feature_lists):
+            for feature, weight in features.items():
+                rows.append(row)
+                feature_ids.append(columns.setdefault(feature, len(columns)))
+                weights.append(weight)
+        features = list(columns)
+        buckets, signs = hash_features(features, self.dims)
+        df = np.fromiter((document_frequencies.get(feature, 1) for feature in features), dtype=np.float32,
+                         count=len(features))
+        idf = np.log((1 + doc_count) / (1 + df)) + 1
+
+        feature_ids = np.array(feature_ids, dtype=np.int64)
+        weights = np.array(weights, dtype=np.float32)
+        tf = np.where(weights >= 1, 1 + np.log(np.maximum(weights, 1)), weights)
+        matrix = np.zeros((len(feature_lists), self.dims), dtype=np.float32)
+        np.add.at(matrix, (np.array(rows, dtype=np.int64), buckets[feature_ids]),
+                  signs[feature_ids] * tf * idf[feature_ids])
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        np.divide(matrix, norms, out=matrix, where=norms > 0)
+        return matrix
+
+    def _neighbors_for_rows(self, rows, matrix, exclude=None):
+        """Top-k neighbor indices and scores of `rows` against every row of `matrix`, block by block."""
+        all_indices, all_scores = [], []
+        for start in range(0, len(rows), self.block_size):
+            block = rows[start:start + self.block_size]
+            similarities = matrix[block] @ matrix.T
+            # A company is not its own neighbor
+            similarities[np.arange(len(block)), block] = -np.inf
+            if exclude is not None:
+                similarities[:, exclude] = -np.inf
+            indices, scores = top_k(similarities, self.depth)
+            all_indices.append(indices)
+            all_scores.append(scores)
+        if not all_indices:
+            return np.empty((0, self.depth), dtype=np.int64), np.empty((0, self.depth), dtype=np.float32)
+        return np.concatenate(all_indices), np.concatenate(all_scores)
+
+    def _row(self, entries, truncated):
+        """Encode a neighbor list and its floor (the lowest score if candidates were cut off)."""
+        floor = entries[-1][1] if truncated and entries else self.min_score
+        return json.dumps(entries, separators=(",", ":")), floor
+
+    def _computed_row(self, slugs, indices, scores):
+        entries = [[slugs[index], score]
+                   for index, score in zip(indices.tolist(), np.round(scores.astype(np.float64), 4).tolist()) if score >= self.min_score]
+        return self._row(entries, truncated=len(entries) == self.depth and len(slugs) - 1 > self.depth)
+
+    def build(self, companies):
+        """
+        Recompute every neighbor list and the document frequencies.
+
+        Args:
+            companies: Iterable of company records with a slug
+
+        Returns:
+            Number of companies indexed
+        """
+        with self._lock:
+            return self._build(companies)
+
+    def _build(self, companies):
+        companies = [company for company in companies if company.get("slug")]
+        slugs = [company["slug"] for company in companies]
+        feature_lists = [company_features(company) for company in companies]
+        document_frequencies = Counter(feature for features in feature_lists for feature in features)
+        matrix = self.vectorize(feature_lists, document_frequencies, len(companies))
+        indices, scores = self._neighbors_for_rows(np.arange(len(slugs)), matrix)
+
+        with self._conn:
+            for table in ("items", "neighbors"):
+                self._conn.execute(f"DELETE FROM {table}")
+            self._conn.executemany(
+                "INSERT INTO items (slug, content_hash) VALUES (?, ?)",
+                ((slug, content_hash(company)) for slug, company in zip(slugs, companies))
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO model (key, data) VALUES ('document_frequencies', ?)",
+                (zlib.compress(json.dumps(document_frequencies, separators=(",", ":")).encode("utf-8")),)
+            )
+            self._conn.executemany(
+                "INSERT INTO neighbors (slug, data, floor) VALUES (?, ?, ?)",
+                ((slug, *self._computed_row(slugs, row_indices, row_scores))
+                 for slug, row_indices, row_scores in zip(slugs, indices, scores))
+            )
+            self._set_meta("dims", self.dims)
+            self._set_meta("k", self.k)
+            self._set_meta("doc_count", len(slugs))
+            self._set_meta("feature_count", len(document_frequencies))
+            self._set_meta("built_at", datetime.now().isoformat(timespec="seconds"))
+        return len(slugs)
+
+    def refresh(self, companies):
+        """
+        Update neighbor lists for companies added, changed or removed since the last build or refresh.
+
+        Args:
+            companies: Iterable of every current company record
+
+        Returns:
+            Dictionary with "mode" ("full", "incremental" or "unchanged") and counts
+        """
+        with self._lock:
+            return self._refresh(companies)
+
+    def _refresh(self, companies):
+        companies = [company for company in companies if company.get("slug")]
+        slugs = [company["slug"] for company in companies]
+        hashes = [content_hash(company) for company in companies]
+        known = dict(self._conn.execute("SELECT slug, content_hash FROM items"))
+
+        position = {slug: i for i, slug in enumerate(slugs)}
+        changed = [i for i, (slug, digest) in enumerate(zip(slugs, hashes)) if known.get(slug) != digest]
+        removed = set(known) - set(position)
+        summary = {"companies": len(slugs), "changed": len(changed), "removed": len(removed)}
+
+        if (not known or self._meta("dims") != self.dims or self._meta("k") != self.k
+                or len(changed) + len(removed) > self.rebuild_fraction * max(1, len(known))):
+            self._build(companies)
+            return {"mode": "full", **summary}
+        if not changed and not removed:
+            return {"mode": "unchanged", **summary}
+
+        row = self._conn.execute("SELECT data FROM model WHERE key = 'document_frequencies'").fetchone()
+        document_frequencies = json.loads(zlib.decompress(row[0])) if row else {}
+        matrix = self.vectorize([company_features(company) for company in companies], document_frequencies,
+                                self._meta("doc_count", len(slugs)))
+        changed_slugs = {slugs[i] for i in changed}
+        stale = changed_slugs | removed
+
+        # Dropping stale neighbors keeps a list exact down to its floor; lists
+        # left shorter than k (and new companies) are recomputed in full
+        lists = {slug: (data, floor) for slug, data, floor in self._conn.execute("SELECT slug, data, floor FROM neighbors")}
+        recompute = set(changed)
+        merge = []
+        for i, slug in enumerate(slugs):
+            if i in recompute or slug not in lists:
+                recompute.add(i)
+                continue
+            data, floor = lists[slug]
+            entries = json.loads(data)
+            valid = [entry for entry in entries if entry[0] not in stale]
+            if len(valid) < self.k and floor > self.min_score:
+                recompute.add(i)
+            else:
+                merge.append((i, valid, floor, len(valid) != len(entries)))
+
+        updates = {}
+        recompute_rows = np.array(sorted(recompute), dtype=np.int64)
+        indices, scores = self._neighbors_for_rows(recompute_rows, matrix)
+        for row, row_indices, row_scores in zip(recompute_rows, indices, scores):
+            updates[slugs[row]] = self._computed_row(slugs, row_indices, row_scores)
+
+        # Everyone else keeps their list and only competes it against the changed companies
+        changed_rows = np.array(changed, dtype=np.int64)
+        for start in range(0, len(merge), self.block_size):
+            block = merge[start:start + self.block_size]
+            rows = np.array([i for i, _, _, _ in block], dtype=np.int64)
+            similarities = np.round((matrix[rows] @ matrix[changed_rows].T).astype(np.float64), 4) if len(changed_rows) else None
+            for offset, (i, entries, floor, dropped) in enumerate(block):
+                additions = []
+                if similarities is not None:
+                    # Below the floor, unlisted companies could outrank a changed one
+                    for column in np.flatnonzero(similarities[offset] >= max(floor, self.min_score)):
+                        if changed_rows[column] != i:
+                            additions.append([slugs[changed_rows[column]], float(similarities[offset, column])])
+                if not additions and not dropped:
+                    continue
+                best = sorted(entries + additions, key=lambda entry: -entry[1])
+                truncated = len(best) > self.depth
+                best = best[:self.depth]
+                updates[slugs[i]] = (json.dumps(best, separators=(",", ":")),
+                                     best[-1][1] if truncated else floor)
+
+        with self._conn:
+            removed_list = list(removed)
+            for start in range(0, len(removed_list), _MAX_PARAMS):
+                chunk = removed_list[start:start + _MAX_PARAMS]
+                placeholders = ",".join("?" * len(chunk))
+                self._conn.execute(f"DELETE FROM items WHERE slug IN ({placeholders})", chunk)
+                self._conn.execute(f"DELETE FROM neighbors WHERE slug IN ({placeholders})", chunk)
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO items (slug, content_hash) VALUES (?, ?)",
+                ((slugs[i], hashes[i]) for i in changed)
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO neighbors (slug, data, floor) VALUES (?, ?, ?)",
+                ((slug, data, floor) for slug, (data, floor) in updates.items())
+            )
+            self._set_meta("refreshed_at", datetime.now().isoformat(timespec="seconds"))
+        return {"mode": "incremental", **summary, "recomputed": len(recompute), "updated": len(updates)}
+
+    def refresh_from_store(self, store):
+        """Refresh from every company in a CompanyStore (see `refresh`)."""
+        return self.refresh(store.iter_companies())
+
+    def neighbors(self, slug, limit=None):
+        """
+        Get the stored most similar companies of a company.
+
+        Args:
+            slug: Company slug
+            limit: Maximum neighbors (at most k)
+
+        Returns:
+            List of {"slug", "score"} dictionaries, most similar first, or None
+            if the company is not indexed
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM neighbors WHERE slug = ?", (slug,)).fetchone()
+        if row is None:
+            return None
+        entries = json.loads(row[0])[:min(limit or self.k, self.k)]
+        return [{"slug": neighbor, "score": score} for neighbor, score in entries]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "companies": self._conn.execute("SELECT COUNT(*) FROM items").fetchone()[0],
+                "features": self._meta("feature_count"),
+                "dims": self._meta("dims"),
+                "k": self._meta("k"),
+                "builtAt": self._meta("built_at"),
+                "refreshedAt": self._meta("refreshed_at"),
+            }
@@ -0,0 +1 @@
+from .server import ApiServer, CompanyApi, ResponseCache, ApiError, run_api_server
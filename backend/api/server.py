@@ -0,0 +1,599 @@
+import asyncio
+import gzip
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from analytics.cube import DIMENSIONS, AnalyticsCube
+from analytics.graph import GraphCache, decode_payload, payload_to_json
+from analytics.similarity import SimilarityIndex
+from search.index import SearchIndex
+from storage.company_store import CompanyStore, DEFAULT_DB_PATH, SORT_COLUMNS
+from utils.metrics import REGISTRY, inc, observe
+
+# Brotli is optional; without it responses are gzipped
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Bodies smaller than this are not worth compressing
+MIN_COMPRESS_BYTES = 1024
+
+# Seconds an idle keep-alive connection is kept open
+KEEP_ALIVE_TIMEOUT = 15
+
+# Largest request head we read
+MAX_HEADER_BYTES = 16 * 1024
+
+FACETS = ("batch", "industry", "location")
+
+# First path segments of the routes, for request metrics
+ROUTE_ROOTS = frozenset({"companies", "facets", "search", "graph", "cube", "health", "metrics"})
+
+# Content type of the Prometheus text exposition
+METRICS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+REGISTRY.describe("api_requests_total", "counter", "API requests by route and status")
+REGISTRY.describe("api_request_seconds", "histogram", "Time to answer an API request by route")
+
+STATUS_TEXT = {
+    200: "OK",
+    304: "Not Modified",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    431: "Request Header Fields Too Large",
+    500: "Internal Server Error",
+}
+
+
+class ApiError(Exception):
+    """Raised by handlers to answer with an error status and message."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class CachedBody:
+    """A rendered response body, its compressed variants and a strong ETag for each."""
+
+    def __init__(self, status, body, content_type="application/json; charset=utf-8"):
+        self.status = status
+        self.body = body
+        self.content_type = content_type
+        self.digest = hashlib.sha1(body).hexdigest()
+        self._encoded = {}
+
+    def etag(self, encoding=None):
+        """Get the strong ETag of the body in a content encoding; every encoding has its own."""
+        return f'"{self.digest}-{encoding}"' if encoding else f'"{self.digest}"'
+
+    def encoded(self, encoding):
+        """Get the body in the given content encoding ("br", "gzip" or None), compressing once."""
+        if encoding is None or len(self.body) < MIN_COMPRESS_BYTES:
+            return None, self.body
+        if encoding not in self._encoded:
+            if encoding == "br":
+                self._encoded[encoding] = brotli.compress(self.body, quality=5)
+            else:
+                self._encoded[encoding] = gzip.compress(self.body, compresslevel=6)
+        return encoding, self._encoded[encoding]
+
+
+class ResponseCache:
+    """
+    LRU cache of rendered responses, emptied whenever a database changes.
+
+    Each source's `data_version` is checked before every lookup, so a scrape
+    or index update committed by another process invalidates everything on
+    the next request. Responses are rendered on worker threads, so lookups
+    and insertions are locked.
+    """
+
+    def __init__(self, sources, max_entries=2048):
+        """
+        Args:
+            sources: Objects with a `data_version()` method (CompanyStore, SearchIndex)
+            max_entries: Responses kept
+        """
+        self.sources = list(sources)
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = self._current_version()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _current_version(self):
+        return tuple(source.data_version() for source in self.sources)
+
+    def get(self, key):
+        version = self._current_version()
+        with self._lock:
+            if version != self._version:
+                self._version = version
+                self._entries.clear()
+                self.invalidations += 1
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+def _single(params, name, default=None):
+    values = params.get(name)
+    return values[-1] if values else default
+
+
+def _multi(params, name):
+    """Collect a filter given as repeated parameters and/or comma-separated values."""
+    values = [value.strip() for raw in params.get(name, []) for value in raw.split(",") if value.strip()]
+    return values or None
+
+
+def _project(record, fields):
+    if not fields:
+        return record
+    return {name: record[name] for name in fields if name in record}
+
+
+def _route_label(target):
+    """The route a request target matched, with slugs replaced so labels stay few."""
+    parts = [part for part in urlsplit(target).path.strip("/").split("/") if part]
+    if not parts or parts[0] not in ROUTE_ROOTS:
+        return "other"
+    if len(parts) >= 2 and parts[0] == "companies":
+        parts[1] = "{slug}"
+    elif len(parts) == 2 and parts[0] == "facets" and parts[1] not in FACETS:
+        parts[1] = "{facet}"
+    return "/" + "/".join(parts[:3])
+
+
+def _choose_encoding(accept_encoding):
+    accepted = {
+        part.split(";", 1)[0].strip().lower()
+        for part in accept_encoding.split(",")
+        if part.strip() and not part.strip().endswith("q=0")
+    }
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+class CompanyApi:
+    """
+    Read-only JSON API over the company store.
+
+    Routes:
+        GET /companies          One page of companies. Query parameters:
+                                batch, industry, location (repeatable or
+                                comma-separated), sort, order (asc/desc),
+                                limit, cursor, fields (comma-separated
+                                projection) and count (1 to include the total)
+        GET /companies/<slug>   One company (fields applies too)
+        GET /companies/<slug>/similar
+                                Most similar companies (needs a similarity
+                                index): limit and fields
+        GET /facets/<facet>     Counts per batch, industry or location
+        GET /search             Full-text search (needs a search index):
+                                q, limit, kind (company/note) and prefix
+                                (1 to match the last term as a prefix)
+        GET /graph              Precomputed graph layout (needs a graph cache):
+                                dims (2 or 3), format (bin or json) and
+                                level (level of detail, json only)
+        GET /cube               Company counts from the analytics cube (needs a
+                                cube): group (comma-separated dimensions),
+                                limit, and a filter per dimension (batch, year,
+                                industry, location, country, seen, month)
+        GET /cube/tree          The same counts nested for bubble charts:
+                                levels (comma-separated) and the filters
+        GET /cube/growth        Values that grew most between two periods:
+                                dimension, by (batch, year, seen or month),
+                                current, previous, top, min_count and the filters
+        GET /health             Liveness and cache counters
+        GET /metrics            Prometheus text exposition of the process's
+                                metrics (requests, spans, proxies, bytes)
+    """
+
+    def __init__(self, store, search_index=None, similarity=None, graph=None, cube=None, cache_entries=2048):
+        self.store = store
+        self.search_index = search_index
+        self.similarity = similarity
+        self.graph = graph
+        self.cube = cube
+        sources = [source for source in (store, search_index, similarity, graph, cube) if source is not None]
+        self.cache = ResponseCache(sources, max_entries=cache_entries)
+
+    def render(self, path, params):
+        """
+        Render the JSON body for a route.
+
+        Returns:
+            Dictionary to serialize as JSON, or bytes to send as they are
+
+        Raises:
+            ApiError: For unknown routes and invalid parameters
+        """
+        parts = [unquote(part) for part in path.strip("/").split("/") if part]
+        if parts == ["companies"]:
+            return self._companies(params)
+        if len(parts) == 2 and parts[0] == "companies":
+            company = self.store.get(parts[1])
+            if company is None:
+                raise ApiError(404, f"No company '{parts[1]}'")
+            return _project(company, _multi(params, "fields"))
+        if len(parts) == 3 and parts[0] == "companies" and parts[2] == "similar":
+            return self._similar(parts[1], params)
+        if len(parts) == 2 and parts[0] == "facets":
+            if parts[1] not in FACETS:
+                raise ApiError(404, f"Unknown facet '{parts[1]}', expected one of {', '.join(FACETS)}")
+            return {"facet": parts[1], "counts": [[value, count] for value, count in self.store.facet_counts(parts[1])]}
+        if parts == ["search"]:
+            return self._search(params)
+        if parts == ["graph"]:
+            return self._graph(params)
+        if parts and parts[0] == "cube" and len(parts) <= 2:
+            return self._cube(parts[1] if len(parts) == 2 else None, params)
+        raise ApiError(404, f"No route for /{'/'.join(parts)}")
+
+    def _companies(self, params):
+        sort = _single(params, "sort", "name")
+        if sort not in SORT_COLUMNS:
+            raise ApiError(400, f"Cannot sort by '{sort}', expected one of {', '.join(SORT_COLUMNS)}")
+        order = _single(params, "order", "asc")
+        if order not in ("asc", "desc"):
+            raise ApiError(400, "order must be asc or desc")
+        try:
+            limit = int(_single(params, "limit", DEFAULT_PAGE_SIZE))
+        except ValueError:
+            raise ApiError(400, "limit must be a number") from None
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+        filters = {name: _multi(params, name) for name in FACETS}
+        try:
+            page = self.store.query(
+                sort=sort,
+                descending=order == "desc",
+                limit=limit,
+                cursor=_single(params, "cursor"),
+                **filters
+            )
+        except ValueError as e:
+            raise ApiError(400, str(e)) from None
+
+        fields = _multi(params, "fields")
+        result = {
+            "items": [_project(record, fields) for record in page.items],
+            "next_cursor": page.next_cursor,
+        }
+        if _single(params, "count") in ("1", "true"):
+            result["total"] = self.store.count(**filters)
+        return result
+
+    def _similar(self, slug, params):
+        if self.similarity is None:
+            raise ApiError(404, "Similar companies are not enabled, start the API with --similarity")
+        try:
+            limit = max(1, int(_single(params, "limit", 10)))
+        except ValueError:
+            raise ApiError(400, "limit must be a number") from None
+        neighbors = self.similarity.neighbors(slug, limit=limit)
+        if neighbors is None:
+            raise ApiError(404, f"No similar companies for '{slug}'")
+
+        fields = _multi(params, "fields")
+        items = []
+        for neighbor in neighbors:
+            company = self.store.get(neighbor["slug"])
+            # The neighbor lists may lag behind the store by one refresh
+            if company is not None:
+                items.append({**_project(company, fields), "score": neighbor["score"]})
+        return {"slug": slug, "items": items}
+
+    def _graph(self, params):
+        if self.graph is None:
+            raise ApiError(404, "The graph is not enabled, start the API with --graph")
+        dims = _single(params, "dims", "2")
+        if dims not in ("2", "3"):
+            raise ApiError(400, "dims must be 2 or 3")
+        payload = self.graph.load(int(dims))
+        if payload is None:
+            raise ApiError(404, f"No {dims}D layout yet, run the graph command first")
+
+        output = _single(params, "format", "bin")
+        if output == "bin":
+            return payload
+        if output != "json":
+            raise ApiError(400, "format must be bin or json")
+        try:
+            level = int(_single(params, "level")) if _single(params, "level") is not None else None
+        except ValueError:
+            raise ApiError(400, "level must be a number") from None
+        return payload_to_json(decode_payload(payload), level=level)
+
+    def _cube(self, view, params):
+        if self.cube is None:
+            raise ApiError(404, "The analytics cube is not enabled, start the API with --cube")
+        filters = {name: _multi(params, name) for name in DIMENSIONS if _multi(params, name)}
+        try:
+            if view is None:
+                group = _multi(params, "group") or []
+                limit = _single(params, "limit")
+                rows = self.cube.rollup(group, filters, limit=int(limit) if limit is not None else None)
+                # Industries overlap, so the distinct total is its own roll-up rather than a sum of rows
+                total = self.cube.rollup([], filters)
+                return {"group": group, "filters": filters, "total": total[0]["count"] if total else 0, "items": rows}
+            if view == "tree":
+                levels = _multi(params, "levels")
+                if not levels:
+                    raise ApiError(400, "levels is required")
+                return self.cube.tree(levels, filters)
+            if view == "growth":
+                dimension = _single(params, "dimension")
+                if not dimension:
+                    raise ApiError(400, "dimension is required")
+                return self.cube.growth(
+                    dimension,
+                    by=_single(params, "by", "batch"),
+                    current=_single(params, "current"),
+                    previous=_single(params, "previous"),
+                    filters=filters,
+                    top=int(_single(params, "top", 10)),
+                    min_count=int(_single(params, "min_count", 1))
+                )
+        except ValueError as e:
+            raise ApiError(400, str(e)) from None
+        raise ApiError(404, f"Unknown cube view '{view}', expected tree or growth")
+
+    def _search(self, params):
+        if self.search_index is None:
+            raise ApiError(404, "Search is not enabled, start the API with --search-index")
+        query = _single(params, "q", "").strip()
+        if not query:
+            raise ApiError(400, "q is required")
+        try:
+            limit = max(1, min(int(_single(params, "limit", 10)), MAX_PAGE_SIZE))
+        except ValueError:
+            raise ApiError(400, "limit must be a number") from None
+        results = self.search_index.search(
+            query,
+            limit=limit,
+            kind=_multi(params, "kind"),
+            prefix=_single(params, "prefix") in ("1", "true")
+        )
+        return {"query": query, "items": results}
+
+    def respond(self, method, target, headers):
+        """
+        Handle one request.
+
+        Args:
+            method: HTTP method
+            target: Request target (path and query string)
+            headers: Request headers with lower-case names
+
+        Returns:
+            Tuple of (status, headers dictionary, body bytes)
+        """
+        if method not in ("GET", "HEAD"):
+            return self._error(405, "Only GET and HEAD are supported")
+
+        url = urlsplit(target)
+        if url.path.rstrip("/") == "/health":
+            body = json.dumps({
+                "status": "ok",
+                "cache": {"hits": self.cache.hits, "misses": self.cache.misses,
+                          "invalidations": self.cache.invalidations},
+            }).encode("utf-8")
+            return 200, {"Content-Type": "application/json", "Cache-Control": "no-store"}, body
+        if url.path.rstrip("/") == "/metrics":
+            return 200, {"Content-Type": METRICS_CONTENT_TYPE, "Cache-Control": "no-store"}, REGISTRY.render().encode("utf-8")
+
+        # Parameter order does not matter, so it does not split the cache
+        params = parse_qs(url.query, keep_blank_values=False)
+        key = (url.path.rstrip("/"), tuple(sorted((name, tuple(values)) for name, values in params.items())))
+        cached = self.cache.get(key)
+        if cached is None:
+            try:
+                payload = self.render(url.path, params)
+                if isinstance(payload, bytes):
+                    cached = CachedBody(200, payload, content_type="application/octet-stream")
+                else:
+                    cached = CachedBody(200, json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+            except ApiError as e:
+                cached = CachedBody(e.status, json.dumps({"error": e.message}).encode("utf-8"))
+            self.cache.put(key, cached)
+
+        encoding, body = cached.encoded(_choose_encoding(headers.get("accept-encoding", "")))
+        etag = cached.etag(encoding)
+        response_headers = {
+            "Content-Type": cached.content_type,
+            "ETag": etag,
+            "Cache-Control": "no-cache",
+            "Vary": "Accept-Encoding",
+        }
+        if encoding:
+            response_headers["Content-Encoding"] = encoding
+        if cached.status == 200 and etag in [tag.strip() for tag in headers.get("if-none-match", "").split(",")]:
+            return 304, response_headers, b""
+        return cached.status, response_headers, body
+
+    def _error(self, status, message):
+        return status, {"Content-Type": "application/json; charset=utf-8"}, json.dumps({"error": message}).encode("utf-8")
+
+
+async def _read_request(reader):
+    head = await reader.readuntil(b"\r\n\r\n")
+    if len(head) > MAX_HEADER_BYTES:
+        raise ApiError(431, "Request headers too large")
+    lines = head.decode("latin-1").split("\r\n")
+    try:
+        method, target, version = lines[0].split(" ", 2)
+    except ValueError:
+        raise ApiError(400, "Malformed request line") from None
+
+    headers = {}
+    for line in lines[1:]:
+        if ":" in line:
+            name, value = line.split(":", 1)
+            headers[name.strip().lower()] = value.strip()
+
+    # Drain any body so the next request on the connection starts cleanly
+    try:
+        length = int(headers.get("content-length") or 0)
+    except ValueError:
+        raise ApiError(400, "Malformed Content-Length header") from None
+    if length < 0:
+        raise ApiError(400, "Malformed Content-Length header")
+    if length:
+        await reader.readexactly(length)
+    return method.upper(), target, version, headers
+
+
+def _write_response(writer, status, headers, body, keep_alive, head_only=False):
+    lines = [f"HTTP/1.1 {status} {STATUS_TEXT.get(status, 'Unknown')}"]
+    headers = {
+        **headers,
+        "Content-Length": str(len(body)),
+        "Connection": "keep-alive" if keep_alive else "close",
+        # The frontend runs on its own origin during development
+        "Access-Control-Allow-Origin": "*",
+    }
+    lines.extend(f"{name}: {value}" for name, value in headers.items())
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+    if body and not head_only and status != 304:
+        writer.write(body)
+
+
+class ApiServer:
+    """
+    A small asyncio HTTP/1.1 server (keep-alive, no dependencies) serving CompanyApi.
+
+    Responses are rendered once per distinct request and database version
+    and served from memory afterwards, so repeated page loads cost a dict
+    lookup and a socket write. Rendering (queries, search, serialization
+    and compression) runs on worker threads, so a slow request never holds
+    up the event loop or the other connections.
+    """
+
+    def __init__(self, store, host="127.0.0.1", port=8000, search_index=None, similarity=None, graph=None,
+                 cube=None, cache_entries=2048, access_log=False):
+        self.api = CompanyApi(store, search_index=search_index, similarity=similarity, graph=graph, cube=cube,
+                              cache_entries=cache_entries)
+        self.host = host
+        self.port = port
+        self.access_log = access_log
+        self._server = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port,
+                                                  limit=MAX_HEADER_BYTES * 2)
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info(f"API listening on http://{self.host}:{self.port}")
+        return self
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    method, target, version, headers = await asyncio.wait_for(
+                        _read_request(reader), KEEP_ALIVE_TIMEOUT
+                    )
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+                    return
+                except asyncio.LimitOverrunError:
+                    _write_response(writer, 431, {}, b"", keep_alive=False)
+                    return
+                except ApiError as e:
+                    _write_response(writer, e.status, {}, b"", keep_alive=False)
+                    return
+
+                started = time.perf_counter()
+                try:
+                    status, response_headers, body = await asyncio.to_thread(self.api.respond, method, target, headers)
+                except Exception:
+                    logger.exception(f"Error handling {method} {target}")
+                    status, response_headers, body = self.api._error(500, "Internal server error")
+
+                connection = headers.get("connection", "").lower()
+                keep_alive = connection != "close" and (version == "HTTP/1.1" or connection == "keep-alive")
+                _write_response(writer, status, response_headers, body, keep_alive, head_only=method == "HEAD")
+                await writer.drain()
+                route = _route_label(target)
+                inc("api_requests_total", route=route, status=status)
+                observe("api_request_seconds", time.perf_counter() - started, route=route)
+                if self.access_log:
+                    logger.info(f"{method} {target} {status} {len(body)}B {(time.perf_counter() - started) * 1000:.2f}ms")
+                if not keep_alive:
+                    return
+        finally:
+            writer.close()
+
+
+async def run_api_server(db_path=DEFAULT_DB_PATH, host="127.0.0.1", port=8000, search_index_path=None,
+                         similarity_path=None, graph_dir=None, cube_path=None, access_log=False):
+    """
+    Serve the company store until cancelled.
+
+    Args:
+        db_path: Company store to serve
+        host: Interface to listen on
+        port: Port to listen on
+        search_index_path: Optional SearchIndex database enabling /search
+        similarity_path: Optional SimilarityIndex database enabling /companies/<slug>/similar
+        graph_dir: Optional GraphCache directory enabling /graph
+        cube_path: Optional AnalyticsCube database enabling /cube
+        access_log: Whether to log a line per request
+    """
+    search_index = SearchIndex(search_index_path) if search_index_path else None
+    similarity = SimilarityIndex(similarity_path) if similarity_path else None
+    cube = AnalyticsCube(cube_path) if cube_path else None
+    try:
+        with CompanyStore(db_path) as store:
+            server = ApiServer(store, host=host, port=port, search_index=search_index, similarity=similarity,
+                               graph=GraphCache(graph_dir) if graph_dir else None, cube=cube, access_log=access_log)
+            await server.start()
+            try:
+                await server.serve_forever()
+            finally:
+                await server.close()
+    finally:
+        for index in (search_index, similarity, cube):
+            if index is not None:
+                index.close()
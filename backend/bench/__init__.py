@@ -0,0 +1,8 @@
+from .fixture import (
+    FIXTURE_BASE_URL, DirectoryFixture, FixtureStats, load_fixture, synthetic_companies
+)
+from .proxy import ProxyStats, StandInProxy
+from .runner import (
+    RssSampler, compare_results, format_comparison, run_benchmark, run_scraper_once, save_results, stage_times,
+    summarize
+)
@@ -0,0 +1,425 @@
+import html
+import json
+import math
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qsl, urlsplit
+
+from scraper.ycombinator.incremental import company_key
+from scraper.ycombinator.network_capture import PAGINATION_LIMIT
+
+# Host the scraper is pointed at. It never resolves, so a request that
+# bypasses the stand-in proxy fails instead of reaching a real site.
+FIXTURE_BASE_URL = "http://www.ycombinator.test"
+
+# The search endpoint lives on the fixture host; the scraper only looks for
+# "algolia.net/1/indexes/" in the URL, so nothing is sent to Algolia itself
+SEARCH_PATH = "/algolia.net/1/indexes/*/queries"
+
+PROXY_LIST_PATH = "/api/v2/proxy/list/"
+
+INDEX_NAME = "YCCompany_production"
+
+BATCHES = ("W21", "S21", "W22", "S22", "W23", "S23", "W24", "S24", "F24", "W25")
+INDUSTRIES = ("B2B", "Fintech", "Healthcare", "Consumer", "Developer Tools", "Education", "Climate", "Robotics",
+              "Security", "AI")
+LOCATIONS = ("San Francisco, CA, USA", "New York, NY, USA", "London, England, United Kingdom", "Berlin, Germany",
+             "Bengaluru, KA, India", "Remote")
+WORDS = ("platform", "automates", "teams", "data", "customers", "payments", "clinics", "developers", "infrastructure",
+         "workflows", "analytics", "compliance", "supply", "chain", "energy", "robots", "students", "security",
+         "agents", "open", "source", "billing", "insurance", "logistics", "hiring", "models")
+
+# Markup and script of the directory page. Class names and structure match the
+# selectors in scraper/ycombinator/ycombinator.py; cards are built through the
+# DOM like the real React app, which is what allows links inside links.
+DIRECTORY_PAGE = """<!doctype html>
+<html>
+<head><meta charset="utf-8"><title>Startup Directory | Y Combinator</title></head>
+<body>
+<div class="_facet_i9oky_85">
+  <h4>Batch</h4>
+  <label><input type="checkbox"> All batches</label>
+</div>
+<div class="_showResults_i9oky_169"><button type="button">Show __TOTAL__ companies</button></div>
+<div class="_section_i9oky_163 _results_i9oky_343"></div>
+<nav class="pagination" hidden><span></span> <button type="button" class="pagination-next">Next</button></nav>
+<script>
+const SEARCH_URL = "__SEARCH_PATH__";
+const INDEX = "__INDEX__";
+const PAGE_SIZE = __PAGE_SIZE__;
+let current = 0;
+let pages = 1;
+
+function element(tag, className, text) {
+  const node = document.createElement(tag);
+  if (className) node.className = className;
+  if (text !== undefined) node.textContent = text;
+  return node;
+}
+
+function pill(facet, value, text) {
+  const link = element("a");
+  link.href = "/companies?" + facet + "=" + encodeURIComponent(value);
+  link.append(element("span", null, text));
+  return link;
+}
+
+function card(hit) {
+  const link = element("a", "_company_i9oky_355");
+  link.href = "/companies/" + hit.slug;
+  const logo = element("img");
+  logo.src = hit.small_logo_thumb_url;
+  const pills = element("div", "_pillWrapper_i9oky_33");
+  pills.append(pill("batch", hit.batch, "YC " + hit.batch));
+  for (const industry of hit.industries) pills.append(pill("industry", industry, industry));
+  link.append(logo, element("span", "_coName_i9oky_470", hit.name),
+              element("span", "_coLocation_i9oky_486", hit.all_locations),
+              element("span", "_coDescription_i9oky_495", hit.one_liner), pills);
+  return link;
+}
+
+async function search(page) {
+  const hits = new URLSearchParams({query: "", page: String(page), hitsPerPage: String(PAGE_SIZE)});
+  const facets = new URLSearchParams({query: "", hitsPerPage: "0", facets: '["batch","industries"]'});
+  const response = await fetch(SEARCH_URL, {
+    method: "POST",
+    headers: {"Content-Type": "application/json"},
+    body: JSON.stringify({requests: [{indexName: INDEX, params: hits.toString()},
+                                     {indexName: INDEX, params: facets.toString()}]})
+  });
+  return (await response.json()).results[0];
+}
+
+async function show(page) {
+  const result = await search(page);
+  current = result.page;
+  pages = result.nbPages;
+  document.querySelector("._results_i9oky_343").replaceChildren(...result.hits.map(card));
+  const nav = document.querySelector("nav.pagination");
+  nav.querySelector("span").textContent = "Page " + (current + 1) + " of " + pages;
+  nav.hidden = false;
+}
+
+document.querySelector("._showResults_i9oky_169 button").addEventListener("click", () => show(0));
+document.querySelector(".pagination-next").addEventListener("click", () => {
+  if (current + 1 < pages) show(current + 1);
+});
+</script>
+</body>
+</html>
+"""
+
+
+def synthetic_companies(count, seed=0):
+    """
+    Generate directory hits that look like the real index.
+
+    Args:
+        count: Number of companies
+        seed: Random seed, so runs compare like for like
+
+    Returns:
+        List of Algolia-style hit dictionaries, newest batch first
+    """
+    rng = random.Random(seed)
+    hits = []
+    for number in range(count):
+        name = f"{rng.choice(WORDS).title()}{rng.choice(WORDS)} {number}"
+        slug = name.lower().replace(" ", "-")
+        hits.append({
+            "slug": slug,
+            "name": name,
+            "all_locations": rng.choice(LOCATIONS),
+            "one_liner": " ".join(rng.choices(WORDS, k=rng.randint(6, 14))).capitalize(),
+            "long_description": " ".join(rng.choices(WORDS, k=60)).capitalize(),
+            "batch": BATCHES[-1 - number * len(BATCHES) // max(count, 1)],
+            "industries": rng.sample(INDUSTRIES, rng.randint(1, 3)),
+            "small_logo_thumb_url": f"/logos/{slug}.png",
+            "team_size": rng.randint(1, 200),
+            "year_founded": rng.randint(2015, 2025),
+            "website": f"https://{slug}.example",
+        })
+    return hits
+
+
+def load_fixture(path):
+    """
+    Turn a recorded snapshot (ycombinator_companies_*.json or .ndjson) into directory hits.
+
+    Returns:
+        List of Algolia-style hit dictionaries in snapshot order
+    """
+    path = Path(path)
+    with open(path, "r", encoding="utf-8") as f:
+        if path.suffix == ".ndjson":
+            companies = [json.loads(line) for line in f if line.strip()]
+        else:
+            companies = json.load(f)
+    return [
+        {
+            "slug": company_key(company),
+            "name": company.get("name") or "",
+            "all_locations": company.get("location") or "",
+            "one_liner": company.get("description") or "",
+            "long_description": company.get("longDescription") or "",
+            "batch": company.get("batch") or "",
+            "industries": company.get("industries") or [],
+            "small_logo_thumb_url": f"/logos/{company_key(company)}.png",
+            "team_size": company.get("teamSize"),
+            "year_founded": company.get("yearFounded"),
+            "website": company.get("website") or "",
+        }
+        for company in companies
+        if company_key(company)
+    ]
+
+
+class FixtureStats:
+    """Request counters shared by the fixture's handler threads."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = {"directory": 0, "searchRequests": 0, "searchPages": 0, "hits": 0, "details": 0,
+                       "proxyLists": 0, "notFound": 0, "bytes": 0}
+
+    def add(self, **counts):
+        with self._lock:
+            for name, value in counts.items():
+                self.counts[name] += value
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.counts)
+
+
+class DirectoryFixture:
+    """
+    Local HTTP server standing in for the YC directory, its search API and the proxy provider.
+
+    Routes:
+        GET  /companies              Directory page (same markup and script as the real one)
+        POST /algolia.net/1/indexes/*/queries
+                                     Multi-query search honouring page, hitsPerPage,
+                                     facetFilters and facets, capped like Algolia
+        GET  /companies/<slug>       Server-rendered detail page with Inertia props
+        GET  /api/v2/proxy/list/     Webshare-style paginated list of the stand-in proxies
+
+    Every response waits `latency` seconds first, from its own thread, so
+    concurrent requests overlap the way they would against a real server.
+    """
+
+    def __init__(self, hits, page_size=40, latency=0.0, host="127.0.0.1", port=0):
+        """
+        Args:
+            hits: Companies to serve, from `synthetic_companies` or `load_fixture`
+            page_size: Companies per rendered directory page
+            latency: Seconds added to every response
+            host: Interface to listen on
+            port: Port to listen on (0 picks a free one)
+        """
+        self.hits = hits
+        self.by_slug = {hit["slug"]: hit for hit in hits}
+        self.page_size = page_size
+        self.latency = latency
+        self.proxies = []
+        self.stats = FixtureStats()
+        self._server = ThreadingHTTPServer((host, port), _handler(self))
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def address(self):
+        return self._server.server_address[:2]
+
+    @property
+    def proxy_list_url(self):
+        host, port = self.address
+        return f"http://{host}:{port}{PROXY_LIST_PATH}?mode=direct"
+
+    @property
+    def pages(self):
+        return max(1, math.ceil(len(self.hits) / self.page_size))
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="bench-fixture", daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def directory_page(self):
+        return (DIRECTORY_PAGE
+                .replace("__TOTAL__", str(len(self.hits)))
+                .replace("__SEARCH_PATH__", SEARCH_PATH)
+                .replace("__INDEX__", INDEX_NAME)
+                .replace("__PAGE_SIZE__", str(self.page_size)))
+
+    def search(self, body):
+        """
+        Answer an Algolia multi-query request body.
+
+        Like Algolia, only the first PAGINATION_LIMIT hits of a query can be
+        paged through; `facetFilters` narrow a query and `facets` add hit
+        counts per facet value.
+        """
+        results = []
+        for query in body.get("requests") or []:
+            params = dict(parse_qsl(query.get("params", "")))
+            matching = [hit for hit in self.hits if _matches_facet_filters(hit, params.get("facetFilters"))]
+            reachable = matching[:PAGINATION_LIMIT]
+            hits_per_page = min(int(params.get("hitsPerPage", 20)), 1000)
+            page = int(params.get("page", 0))
+            hits = reachable[page * hits_per_page:(page + 1) * hits_per_page] if hits_per_page else []
+            result = {
+                "hits": hits,
+                "page": page,
+                "nbHits": len(matching),
+                "nbPages": math.ceil(len(reachable) / hits_per_page) if hits_per_page else 0,
+                "hitsPerPage": hits_per_page,
+                "index": query.get("indexName") or INDEX_NAME,
+            }
+            if params.get("facets"):
+                result["facets"] = {
+                    facet: dict(Counter(value for hit in matching for value in _facet_values(hit, facet)))
+                    for facet in json.loads(params["facets"])
+                }
+            results.append(result)
+            if hits:
+                self.stats.add(searchPages=1, hits=len(hits))
+        return {"results": results}
+
+    def detail_page(self, hit):
+        props = {
+            "component": "Company",
+            "props": {"company": {
+                "name": hit["name"],
+                "website": hit["website"],
+                "team_size": hit["team_size"],
+                "year_founded": hit["year_founded"],
+                "long_description": hit["long_description"],
+                "status": "Active",
+                "founders": [{"full_name": f"Founder of {hit['name']}", "title": "CEO"}],
+            }},
+        }
+        return (f'<!doctype html><html><head><title>{html.escape(hit["name"])}</title></head>'
+                f'<body><div id="app" data-page="{html.escape(json.dumps(props))}"></div></body></html>')
+
+    def proxy_list(self, query):
+        page = int(query.get("page", 1))
+        page_size = int(query.get("page_size", 100))
+        items = self.proxies[(page - 1) * page_size:page * page_size]
+        return {
+            "count": len(self.proxies),
+            "next": None,
+            "previous": None,
+            "results": [
+                {
+                    "id": f"bench-{host}-{port}",
+                    "username": "bench",
+                    "password": "bench",
+                    "proxy_address": host,
+                    "port": port,
+                    "valid": True,
+                    "country_code": "ZZ",
+                    "city_name": "Localhost",
+                }
+                for host, port in items
+            ],
+        }
+
+
+def _facet_values(hit, facet):
+    value = hit.get(facet)
+    if isinstance(value, list):
+        return value
+    return [value] if value else []
+
+
+def _matches_facet_filters(hit, facet_filters):
+    """Check a hit against Algolia `facetFilters`: a list of "facet:value" filters, inner lists ORed."""
+    if not facet_filters:
+        return True
+    for group in json.loads(facet_filters):
+        alternatives = [group] if isinstance(group, str) else group
+        if not any(value in _facet_values(hit, facet) for facet, _, value in
+                   (alternative.partition(":") for alternative in alternatives)):
+            return False
+    return True
+
+
+def _handler(fixture):
+    class FixtureHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status, body, content_type):
+            if isinstance(body, str):
+                body = body.encode("utf-8")
+            if fixture.latency:
+                time.sleep(fixture.latency)
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if self.command != "HEAD":
+                self.wfile.write(body)
+            fixture.stats.add(bytes=len(body))
+
+        def _send_json(self, payload):
+            self._send(200, json.dumps(payload, separators=(",", ":")), "application/json; charset=utf-8")
+
+        def do_GET(self):
+            url = urlsplit(self.path)
+            path = url.path.rstrip("/")
+            if path == "/companies":
+                fixture.stats.add(directory=1)
+                self._send(200, fixture.directory_page(), "text/html; charset=utf-8")
+            elif path.startswith("/companies/") and path.count("/") == 2:
+                hit = fixture.by_slug.get(path.rsplit("/", 1)[-1])
+                if hit is None:
+                    fixture.stats.add(notFound=1)
+                    self._send(404, "Not found", "text/plain")
+                else:
+                    fixture.stats.add(details=1)
+                    self._send(200, fixture.detail_page(hit), "text/html; charset=utf-8")
+            elif path == PROXY_LIST_PATH.rstrip("/"):
+                fixture.stats.add(proxyLists=1)
+                self._send_json(fixture.proxy_list(dict(parse_qsl(url.query))))
+            else:
+                fixture.stats.add(notFound=1)
+                self._send(404, "Not found", "text/plain")
+
+        do_HEAD = do_GET
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            if urlsplit(self.path).path != SEARCH_PATH:
+                fixture.stats.add(notFound=1)
+                self._send(404, "Not found", "text/plain")
+                return
+            fixture.stats.add(searchRequests=1)
+            try:
+                payload = json.loads(body or b"{}")
+            except ValueError:
+                self._send(400, '{"message":"Invalid JSON"}', "application/json")
+                return
+            self._send_json(fixture.search(payload))
+
+        def do_OPTIONS(self):
+            self._send(204, b"", "text/plain")
+
+    return FixtureHandler
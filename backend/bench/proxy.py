@@ -0,0 +1,138 @@
+import http.client
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+# Hop-by-hop headers a proxy must not forward
+HOP_HEADERS = frozenset({"connection", "keep-alive", "proxy-authenticate", "proxy-authorization", "te", "trailers",
+                         "transfer-encoding", "upgrade", "proxy-connection"})
+
+
+class ProxyStats:
+    """Counters shared by every stand-in proxy of a run."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = {"forwarded": 0, "refused": 0, "errors": 0, "bytes": 0}
+        self.hosts = {}
+
+    def add(self, host=None, **counts):
+        with self._lock:
+            for name, value in counts.items():
+                self.counts[name] += value
+            if host:
+                self.hosts[host] = self.hosts.get(host, 0) + 1
+
+    def snapshot(self):
+        with self._lock:
+            return {**self.counts, "hosts": dict(self.hosts)}
+
+
+class StandInProxy:
+    """
+    Forward proxy that sends every plain-HTTP request to the fixture, whatever its host.
+
+    It takes the place of a Webshare proxy: the scraper configures it like
+    one (credentials are accepted and ignored) and every request it carries
+    lands on the local fixture, so a benchmark cannot reach the internet.
+    HTTPS tunnels (CONNECT) are refused and counted.
+    """
+
+    def __init__(self, upstream, latency=0.0, stats=None, host="127.0.0.1", port=0):
+        """
+        Args:
+            upstream: (host, port) of the fixture server
+            latency: Seconds added before forwarding each request
+            stats: Optional ProxyStats to share between proxies
+            host: Interface to listen on
+            port: Port to listen on (0 picks a free one)
+        """
+        self.upstream = upstream
+        self.latency = latency
+        self.stats = stats or ProxyStats()
+        self._server = ThreadingHTTPServer((host, port), _handler(self))
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def address(self):
+        return self._server.server_address[:2]
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="bench-proxy", daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def _handler(proxy):
+    local = threading.local()
+
+    def upstream_connection():
+        # One keep-alive connection to the fixture per handler thread
+        connection = getattr(local, "connection", None)
+        if connection is None:
+            connection = local.connection = http.client.HTTPConnection(*proxy.upstream, timeout=60)
+        return connection
+
+    class ProxyHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_CONNECT(self):
+            proxy.stats.add(host=self.path.split(":", 1)[0], refused=1)
+            self.send_response(403, "The benchmark proxy only forwards plain HTTP")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def _forward(self):
+            url = urlsplit(self.path)
+            body = self.rfile.read(int(self.headers.get("Content-Length") or 0)) or None
+            headers = {name: value for name, value in self.headers.items() if name.lower() not in HOP_HEADERS}
+            headers["Host"] = url.netloc or self.headers.get("Host", "")
+            target = url.path + (f"?{url.query}" if url.query else "") or "/"
+            if proxy.latency:
+                time.sleep(proxy.latency)
+
+            try:
+                connection = upstream_connection()
+                try:
+                    connection.request(self.command, target, body=body, headers=headers)
+                    response = connection.getresponse()
+                except (http.client.HTTPException, OSError):
+                    # The kept-alive connection went stale; retry once on a fresh one
+                    connection.close()
+                    connection.request(self.command, target, body=body, headers=headers)
+                    response = connection.getresponse()
+                payload = response.read()
+            except (http.client.HTTPException, OSError) as e:
+                local.connection = None
+                proxy.stats.add(host=url.hostname, errors=1)
+                self.send_error(502, f"Fixture unreachable: {e}")
+                return
+
+            proxy.stats.add(host=url.hostname, forwarded=1, bytes=len(payload))
+            self.send_response(response.status, response.reason)
+            for name, value in response.getheaders():
+                if name.lower() not in HOP_HEADERS and name.lower() != "content-length":
+                    self.send_header(name, value)
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            if self.command != "HEAD":
+                self.wfile.write(payload)
+
+        do_GET = do_POST = do_HEAD = do_PUT = do_DELETE = do_OPTIONS = do_PATCH = _forward
+
+    return ProxyHandler
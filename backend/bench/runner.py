@@ -0,0 +1,395 @@
+import json
+import os
+import platform
+import re
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+from .fixture import FIXTURE_BASE_URL, DirectoryFixture, load_fixture, synthetic_companies
+from .proxy import ProxyStats, StandInProxy
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+MAIN_PATH = BACKEND_DIR / "main.py"
+
+DEFAULT_RESULTS_DIR = Path("bench_results")
+
+# Format version of the results JSON
+RESULTS_VERSION = 1
+
+# Lines in the scraper's output that end each stage, in the order they happen.
+# A stage's time runs from the previous boundary to the first matching line.
+STAGE_MARKERS = (
+    ("startup", re.compile(r"Successfully loaded \d+ proxies")),
+    ("open_directory", re.compile(r"Results loaded successfully")),
+    ("crawl", re.compile(r"Successfully scraped \d+ companies in total|Incremental scrape \(")),
+    ("enrich", re.compile(r"Enriched \d+ of \d+ companies")),
+)
+
+# Metrics summarised across repeats and compared between results; True where higher is better
+METRICS = {
+    "wallSeconds": False,
+    "pagesPerSecond": True,
+    "recordsPerSecond": True,
+    "peakRssMb": False,
+}
+
+
+class RssSampler:
+    """
+    Samples the resident memory of a process and all of its descendants.
+
+    The scraper's memory is mostly Chromium's, which lives in child
+    processes, so the whole tree is summed. Reads /proc, so it only measures
+    on Linux; elsewhere the peak stays None.
+    """
+
+    def __init__(self, pid, interval=0.1):
+        self.pid = pid
+        self.interval = interval
+        self.peak_bytes = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="bench-rss", daemon=True)
+        self._page_size = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+    def start(self):
+        if Path("/proc").is_dir():
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def _tree_rss(self):
+        children = {}
+        for entry in os.scandir("/proc"):
+            if not entry.name.isdigit():
+                continue
+            try:
+                with open(f"/proc/{entry.name}/stat", "rb") as f:
+                    # The command name may contain spaces; fields after it are fixed
+                    fields = f.read().rsplit(b")", 1)[1].split()
+                children.setdefault(int(fields[1]), []).append(int(entry.name))
+            except (OSError, IndexError, ValueError):
+                continue
+
+        total, pending = 0, [self.pid]
+        while pending:
+            pid = pending.pop()
+            try:
+                with open(f"/proc/{pid}/statm", "rb") as f:
+                    total += int(f.read().split()[1]) * self._page_size
+            except (OSError, IndexError, ValueError):
+                pass
+            pending.extend(children.get(pid, ()))
+        return total
+
+    def _run(self):
+        while not self._stop.is_set():
+            rss = self._tree_rss()
+            if rss and (self.peak_bytes is None or rss > self.peak_bytes):
+                self.peak_bytes = rss
+            self._stop.wait(self.interval)
+
+
+def stage_times(lines, started, finished):
+    """
+    Split a run into stages from the timestamps of its output lines.
+
+    Args:
+        lines: List of (monotonic time, line) pairs
+        started: Monotonic time the process was started
+        finished: Monotonic time the process exited
+
+    Returns:
+        Dictionary of stage name to seconds, in order, ending with "shutdown"
+        for whatever ran after the last boundary
+    """
+    stages = {}
+    boundary = started
+    position = 0
+    for at, line in lines:
+        for index in range(position, len(STAGE_MARKERS)):
+            name, pattern = STAGE_MARKERS[index]
+            if pattern.search(line):
+                stages[name] = round(at - boundary, 3)
+                boundary = at
+                position = index + 1
+                break
+    stages["shutdown"] = round(finished - boundary, 3)
+    return stages
+
+
+def _count_records(db_path):
+    if not Path(db_path).exists():
+        return 0
+    connection = sqlite3.connect(str(db_path))
+    try:
+        return connection.execute("SELECT COUNT(*) FROM companies").fetchone()[0]
+    except sqlite3.Error:
+        return 0
+    finally:
+        connection.close()
+
+
+def run_scraper_once(fixture, proxy_stats, scraper_args=(), timeout=900, keep_output=None):
+    """
+    Run `main.py yc-scraper` once against a running fixture and measure it.
+
+    Args:
+        fixture: Started DirectoryFixture whose `proxies` point at running StandInProxy servers
+        proxy_stats: ProxyStats those proxies share
+        scraper_args: Extra yc-scraper arguments (engine, workers, enrich, ...)
+        timeout: Seconds before the run is killed
+        keep_output: Optional path to save the scraper's output to
+
+    Returns:
+        Dictionary of measurements for the run
+    """
+    fixture_before = fixture.stats.snapshot()
+    proxy_before = proxy_stats.snapshot()
+    with tempfile.TemporaryDirectory(prefix="godseye-bench-") as workdir:
+        db_path = Path(workdir) / "companies.sqlite3"
+        command = [
+            sys.executable, str(MAIN_PATH), "yc-scraper",
+            "--proxy-api", fixture.proxy_list_url,
+            "--base-url", FIXTURE_BASE_URL,
+            "--db", str(db_path),
+            "--no-http-cache",
+            *scraper_args,
+        ]
+        env = {**os.environ, "WEBSHARE_API_KEY": "bench-key", "PYTHONUNBUFFERED": "1"}
+
+        lines = []
+        started = time.monotonic()
+        # Run from the scratch directory so logs, snapshots and checkpoints land there
+        process = subprocess.Popen(command, cwd=workdir, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                   text=True, errors="replace")
+        sampler = RssSampler(process.pid).start()
+        timer = threading.Timer(timeout, process.kill)
+        timer.start()
+        try:
+            for line in process.stdout:
+                lines.append((time.monotonic(), line.rstrip("\n")))
+            exit_code = process.wait()
+        finally:
+            timer.cancel()
+            sampler.stop()
+        finished = time.monotonic()
+        records = _count_records(db_path)
+
+    if keep_output:
+        Path(keep_output).parent.mkdir(parents=True, exist_ok=True)
+        Path(keep_output).write_text("\n".join(line for _, line in lines) + "\n", encoding="utf-8")
+
+    fixture_counts = {name: value - fixture_before[name] for name, value in fixture.stats.snapshot().items()}
+    proxy_after = proxy_stats.snapshot()
+    proxy_counts = {name: proxy_after[name] - proxy_before[name] for name in proxy_before if name != "hosts"}
+    stages = stage_times(lines, started, finished)
+    wall = finished - started
+    crawl = stages.get("crawl") or wall
+    pages = fixture_counts["searchPages"]
+    return {
+        "exitCode": exit_code,
+        "wallSeconds": round(wall, 3),
+        "pages": pages,
+        "records": records,
+        "pagesPerSecond": round(pages / crawl, 3) if crawl else None,
+        "recordsPerSecond": round(records / crawl, 3) if crawl else None,
+        "peakRssMb": round(sampler.peak_bytes / 2 ** 20, 1) if sampler.peak_bytes else None,
+        "stages": stages,
+        "fixture": fixture_counts,
+        "proxy": proxy_counts,
+        "error": None if exit_code == 0 else "\n".join(line for _, line in lines[-20:]),
+    }
+
+
+def _git_revision():
+    try:
+        revision = subprocess.run(["git", "rev-parse", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True,
+                                  timeout=10).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=BACKEND_DIR,
+                               capture_output=True, text=True, timeout=30).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None, None
+    return revision or None, bool(dirty)
+
+
+def summarize(runs):
+    """Median of each metric over the successful runs."""
+    ok = [run for run in runs if run["exitCode"] == 0]
+    summary = {"runs": len(runs), "failed": len(runs) - len(ok)}
+    for metric in METRICS:
+        values = [run[metric] for run in ok if run[metric] is not None]
+        summary[metric] = round(statistics.median(values), 3) if values else None
+    stage_names = [name for name, _ in STAGE_MARKERS] + ["shutdown"]
+    summary["stages"] = {
+        name: round(statistics.median(run["stages"][name] for run in ok if name in run["stages"]), 3)
+        for name in stage_names
+        if any(name in run["stages"] for run in ok)
+    }
+    return summary
+
+
+def run_benchmark(pages=20, page_size=40, fixture_path=None, latency=0.0, proxy_latency=0.0, proxies=None,
+                  engine="dom", workers=1, search_page_size=None, enrich=False, repeat=1, extra_args=(),
+                  timeout=900, seed=0, log_dir=None):
+    """
+    Benchmark the yc-scraper entry point against the local fixture.
+
+    A DirectoryFixture and one StandInProxy per worker run in this process;
+    the scraper runs as a subprocess pointed at them through --proxy-api
+    and --base-url, so nothing leaves the machine.
+
+    Args:
+        pages: Directory pages of synthetic companies (ignored with fixture_path)
+        page_size: Companies per rendered directory page
+        fixture_path: Optional recorded snapshot to serve instead of synthetic companies
+        latency: Seconds the fixture adds to every response
+        proxy_latency: Seconds each proxy adds to every request
+        proxies: Number of stand-in proxies (defaults to workers)
+        engine: Scraper extraction engine, "dom" or "network"
+        workers: Scraper workers
+        search_page_size: Companies per search page for the network engine
+        enrich: Whether the scraper also fetches every detail page
+        repeat: Number of runs
+        extra_args: More yc-scraper arguments
+        timeout: Seconds before a run is killed
+        seed: Seed of the synthetic companies
+        log_dir: Optional directory to keep each run's output in
+
+    Returns:
+        Results dictionary: environment, configuration, every run and a summary
+    """
+    hits = load_fixture(fixture_path) if fixture_path else synthetic_companies(pages * page_size, seed=seed)
+    config = {
+        "companies": len(hits),
+        "pageSize": page_size,
+        "fixture": str(fixture_path) if fixture_path else f"synthetic:{seed}",
+        "latencyMs": round(latency * 1000),
+        "proxyLatencyMs": round(proxy_latency * 1000),
+        "proxies": proxies or workers,
+        "engine": engine,
+        "workers": workers,
+        "searchPageSize": search_page_size,
+        "enrich": enrich,
+        "extraArgs": list(extra_args),
+    }
+    scraper_args = ["--engine", engine, "--workers", str(workers), *extra_args]
+    if search_page_size:
+        scraper_args += ["--page-size", str(search_page_size)]
+    if enrich:
+        scraper_args.append("--enrich")
+
+    proxy_stats = ProxyStats()
+    runs = []
+    with DirectoryFixture(hits, page_size=page_size, latency=latency) as fixture:
+        config["pages"] = fixture.pages
+        stand_ins = [StandInProxy(fixture.address, latency=proxy_latency, stats=proxy_stats).start()
+                     for _ in range(proxies or workers)]
+        fixture.proxies = [stand_in.address for stand_in in stand_ins]
+        try:
+            for number in range(repeat):
+                print(f"Benchmark run {number + 1} of {repeat}...")
+                keep_output = Path(log_dir) / f"run_{number + 1}.log" if log_dir else None
+                run = run_scraper_once(fixture, proxy_stats, scraper_args, timeout=timeout, keep_output=keep_output)
+                runs.append(run)
+                if run["exitCode"] == 0:
+                    print(f"  {run['pages']} pages, {run['records']} records in {run['wallSeconds']}s "
+                          f"({run['pagesPerSecond']} pages/s, peak RSS {run['peakRssMb']} MB)")
+                else:
+                    print(f"  Run failed with exit code {run['exitCode']}:\n{run['error']}")
+        finally:
+            for stand_in in stand_ins:
+                stand_in.close()
+
+    revision, dirty = _git_revision()
+    return {
+        "version": RESULTS_VERSION,
+        "benchmark": "yc-scraper",
+        "commit": revision,
+        "dirty": dirty,
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "config": config,
+        "runs": runs,
+        "summary": summarize(runs),
+    }
+
+
+def save_results(results, path=None):
+    """
+    Write results as JSON, by default to bench_results/<timestamp>_<commit>.json.
+
+    Returns:
+        Path written
+    """
+    if path is None:
+        commit = (results.get("commit") or "nogit")[:10]
+        stamp = results["timestamp"].replace(":", "").replace("-", "")
+        path = DEFAULT_RESULTS_DIR / f"{stamp}_{commit}.json"
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    return path
+
+
+def compare_results(baseline, current):
+    """
+    Compare the summaries of two results.
+
+    Args:
+        baseline: Results dictionary (or path to one) to compare against
+        current: Results dictionary (or path to one)
+
+    Returns:
+        List of {"metric", "baseline", "current", "change", "better"} rows;
+        change is relative, and better says whether it moved the right way.
+        Stage times are included as "stage:<name>".
+    """
+    if not isinstance(baseline, dict):
+        with open(baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    if not isinstance(current, dict):
+        with open(current, "r", encoding="utf-8") as f:
+            current = json.load(f)
+
+    pairs = [(metric, higher, baseline["summary"].get(metric), current["summary"].get(metric))
+             for metric, higher in METRICS.items()]
+    stages = list(dict.fromkeys([*baseline["summary"].get("stages", {}), *current["summary"].get("stages", {})]))
+    pairs += [(f"stage:{name}", False, baseline["summary"].get("stages", {}).get(name),
+               current["summary"].get("stages", {}).get(name)) for name in stages]
+
+    rows = []
+    for metric, higher, before, after in pairs:
+        change = (after - before) / before if before and after is not None else None
+        rows.append({
+            "metric": metric,
+            "baseline": before,
+            "current": after,
+            "change": round(change, 4) if change is not None else None,
+            "better": None if change is None or change == 0 else (change > 0) == higher,
+        })
+    return rows
+
+
+def format_comparison(rows):
+    lines = [f"{'metric':<24}{'baseline':>12}{'current':>12}{'change':>10}"]
+    for row in rows:
+        change = f"{row['change']:+.1%}" if row["change"] is not None else "-"
+        mark = {True: " better", False: " worse", None: ""}[row["better"]]
+        lines.append(f"{row['metric']:<24}{str(row['baseline']):>12}{str(row['current']):>12}{change:>10}{mark}")
+    return "\n".join(lines)
@@ -0,0 +1,6 @@
+from .chunking import Chunk, Chunker, DEFAULT_CHUNK_SIZE, DEFAULT_OVERLAP, chunk_pages, content_hash, normalize_page_text
+from .extract import (
+    KINDS, MEDIA_EXTENSIONS, UnsupportedDocument, document_kind, extract_docx_pages, extract_pdf_pages, iter_text_pages,
+    pdf_page_count
+)
+from .pipeline import DEFAULT_BATCH_SIZE, DEFAULT_PAGES_PER_TASK, chunk_document, discover, file_hash, ingest_paths
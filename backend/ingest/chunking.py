@@ -0,0 +1,166 @@
+import hashlib
+import re
+from dataclasses import dataclass
+
+# Characters per chunk and characters repeated from the end of one chunk at the start of the next
+DEFAULT_CHUNK_SIZE = 1200
+DEFAULT_OVERLAP = 200
+
+# A chunk ends at the best boundary in its last quarter: paragraph, then sentence, then word
+_BOUNDARIES = (re.compile(r"\n\s*\n"), re.compile(r"[.!?][\"')\]]?\s"), re.compile(r"\s"))
+
+# Words hyphenated across a line break, as PDFs lay them out
+_HYPHENATED = re.compile(r"(\w)-\n(\w)")
+_SPACES = re.compile(r"[ \t\r\f\v\u00a0]+")
+_BLANK_LINES = re.compile(r"\n\s*\n\s*")
+
+
+@dataclass
+class Chunk:
+    """
+    One piece of a document's text.
+
+    Attributes:
+        position: 0-based index of the chunk within its document
+        text: Chunk text
+        hash: Content hash of the text with whitespace normalized
+        page_start: First page (1-based) the text comes from
+        page_end: Last page the text comes from
+    """
+    position: int
+    text: str
+    hash: str
+    page_start: int
+    page_end: int
+
+
+def normalize_page_text(text):
+    """
+    Tidy extracted page text: rejoin hyphenated words, collapse runs of
+    spaces and keep at most one blank line between paragraphs.
+    """
+    text = _HYPHENATED.sub(r"\1\2", text)
+    lines = (_SPACES.sub(" ", line).strip() for line in text.split("\n"))
+    return _BLANK_LINES.sub("\n\n", "\n".join(lines)).strip()
+
+
+def content_hash(text):
+    """SHA-256 of the text with all whitespace runs collapsed, so layout differences do not split duplicates."""
+    return hashlib.sha256(" ".join(text.split()).encode("utf-8")).hexdigest()
+
+
+class Chunker:
+    """
+    Splits a stream of pages into overlapping chunks as the pages arrive.
+
+    Only the text not yet emitted is held, so memory is bounded by the
+    chunk size and the longest page however long the document is.
+    """
+
+    def __init__(self, size=DEFAULT_CHUNK_SIZE, overlap=DEFAULT_OVERLAP):
+        """
+        Args:
+            size: Target characters per chunk
+            overlap: Characters each chunk repeats from the end of the previous one
+                (at most half the size)
+        """
+        # Each chunk must move past at least a quarter of the previous one
+        if size <= 0 or not 0 <= overlap <= size // 2:
+            raise ValueError("Chunk size must be positive and overlap between 0 and half the size")
+        self.size = size
+        self.overlap = overlap
+        self.position = 0
+        self._buffer = ""
+        # (offset in the buffer, page number) of every page that starts in it
+        self._pages = []
+        self._last_page = 1
+
+    def feed(self, page_number, text):
+        """
+        Add the next page's text.
+
+        Returns:
+            List of chunks completed by it
+        """
+        text = normalize_page_text(text)
+        if not text:
+            return []
+        if self._buffer:
+            self._buffer += "\n\n"
+        self._pages.append((len(self._buffer), page_number))
+        self._buffer += text
+        self._last_page = page_number
+
+        chunks = []
+        while len(self._buffer) > self.size:
+            chunks.append(self._emit(self._cut()))
+        return chunks
+
+    def finish(self):
+        """
+        Flush the remaining text.
+
+        Returns:
+            List with the last chunk, or empty if nothing is left
+        """
+        if not self._buffer.strip():
+            return []
+        return [self._emit(len(self._buffer), final=True)]
+
+    def _cut(self):
+        window_start = self.size * 3 // 4
+        window = self._buffer[window_start:self.size]
+        for pattern in _BOUNDARIES:
+            matches = list(pattern.finditer(window))
+            if matches:
+                return window_start + matches[-1].end()
+        return self.size
+
+    def _emit(self, cut, final=False):
+        text = self._buffer[:cut].strip()
+        page_start = self._page_at(0)
+        page_end = self._page_at(max(0, cut - 1))
+        chunk = Chunk(self.position, text, content_hash(text), page_start, page_end)
+        self.position += 1
+
+        if final:
+            self._buffer = ""
+            self._pages = []
+            return chunk
+
+        # Start the next chunk `overlap` characters back, at the start of a word
+        start = max(0, cut - self.overlap)
+        if start > 0 and not self._buffer[start - 1].isspace():
+            space = self._buffer.find(" ", start, cut)
+            newline = self._buffer.find("\n", start, cut)
+            breaks = [index for index in (space, newline) if index != -1]
+            start = min(breaks) + 1 if breaks else cut
+        while start < len(self._buffer) and self._buffer[start].isspace():
+            start += 1
+        # The page the new buffer starts in may have begun before it
+        current = self._page_at(start)
+        self._pages = [(offset - start, page) for offset, page in self._pages if offset > start]
+        self._pages.insert(0, (0, current))
+        self._buffer = self._buffer[start:]
+        return chunk
+
+    def _page_at(self, offset):
+        page = self._pages[0][1] if self._pages else self._last_page
+        for start, number in self._pages:
+            if start > offset:
+                break
+            page = number
+        return page
+
+
+def chunk_pages(pages, size=DEFAULT_CHUNK_SIZE, overlap=DEFAULT_OVERLAP):
+    """
+    Chunk an iterable of (page number, text) pairs lazily.
+
+    Yields:
+        Chunk objects in document order
+    """
+    chunker = Chunker(size, overlap)
+    for page_number, text in pages:
+        yield from chunker.feed(page_number, text)
+    yield from chunker.finish()
@@ -0,0 +1,200 @@
+import codecs
+import zipfile
+from pathlib import Path
+from xml.etree.ElementTree import iterparse
+
+# pypdf is optional; without it PDFs are skipped
+try:
+    from pypdf import PdfReader
+    from pypdf.errors import PdfReadError
+except ImportError:
+    PdfReader = None
+    PdfReadError = Exception
+
+# Formats with a text extractor, by file extension
+KINDS = {
+    ".pdf": "pdf",
+    ".docx": "docx",
+    ".txt": "text",
+    ".md": "text",
+    ".markdown": "text",
+    ".csv": "text",
+    ".json": "text",
+    ".html": "text",
+}
+
+# Formats the upload dialog accepts that need OCR or transcription, which are not available
+MEDIA_EXTENSIONS = frozenset({".png", ".jpg", ".jpeg", ".gif", ".webp", ".mp3", ".wav", ".m4a", ".ogg", ".webm"})
+
+# Plain text has no pages; it is cut into pages of about this many characters at line ends
+TEXT_PAGE_CHARS = 4000
+
+# Bytes read at a time from text files
+_READ_SIZE = 64 * 1024
+
+_WORD_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+
+class UnsupportedDocument(ValueError):
+    """Raised for files no extractor can read."""
+
+
+def document_kind(path):
+    """
+    Work out which extractor reads a file.
+
+    Returns:
+        "pdf", "docx" or "text"
+
+    Raises:
+        UnsupportedDocument: For media and unknown formats, or PDFs without pypdf
+    """
+    suffix = Path(path).suffix.lower()
+    kind = KINDS.get(suffix)
+    if kind is None:
+        if suffix in MEDIA_EXTENSIONS:
+            raise UnsupportedDocument(f"{suffix} files need OCR or transcription, which is not available")
+        raise UnsupportedDocument(f"No text extractor for {suffix or 'files without an extension'}")
+    if kind == "pdf" and PdfReader is None:
+        raise UnsupportedDocument("Reading PDFs needs pypdf (pip install pypdf)")
+    return kind
+
+
+def _open_pdf(path):
+    reader = PdfReader(str(path))
+    if reader.is_encrypted and not reader.decrypt(""):
+        raise UnsupportedDocument("PDF is password protected")
+    return reader
+
+
+def pdf_page_count(path):
+    """
+    Count a PDF's pages without extracting anything.
+
+    Raises:
+        UnsupportedDocument: If the PDF cannot be opened
+    """
+    try:
+        return len(_open_pdf(path).pages)
+    except (PdfReadError, OSError, ValueError) as e:
+        raise UnsupportedDocument(f"Unreadable PDF: {e}") from e
+
+
+def extract_pdf_pages(path, start, stop):
+    """
+    Extract the text of pages [start, stop) of a PDF.
+
+    Each call opens the file itself, so calls can run in separate processes
+    and the parsed pages are freed when it returns, however long the PDF is.
+    A page that fails to parse comes back empty instead of failing the range.
+
+    Args:
+        path: PDF file
+        start: First page index (0-based)
+        stop: Page index to stop before
+
+    Returns:
+        List of (page number, text) pairs, page numbers starting at 1
+    """
+    reader = _open_pdf(path)
+    pages = []
+    for index in range(start, min(stop, len(reader.pages))):
+        try:
+            text = reader.pages[index].extract_text() or ""
+        except Exception:
+            text = ""
+        pages.append((index + 1, text))
+    return pages
+
+
+def extract_docx_pages(path):
+    """
+    Extract a DOCX file's text, split where Word last laid out a page break.
+
+    The document XML is parsed as a stream with the standard library, so no
+    DOCX package is needed and memory does not grow with the document.
+
+    Returns:
+        List of (page number, text) pairs
+    """
+    pages = []
+    paragraphs = []
+    runs = []
+
+    def end_page():
+        text = "\n".join(paragraphs).strip()
+        if text:
+            pages.append((len(pages) + 1, text))
+        paragraphs.clear()
+
+    try:
+        with zipfile.ZipFile(path) as archive, archive.open("word/document.xml") as document:
+            for event, element in iterparse(document, events=("start", "end")):
+                tag = element.tag
+                if event == "start":
+                    page_break = tag == f"{_WORD_NS}br" and element.get(f"{_WORD_NS}type") == "page"
+                    if page_break or tag == f"{_WORD_NS}lastRenderedPageBreak":
+                        paragraphs.append("".join(runs))
+                        runs.clear()
+                        end_page()
+                    continue
+                if tag == f"{_WORD_NS}t":
+                    runs.append(element.text or "")
+                elif tag == f"{_WORD_NS}tab":
+                    runs.append("\t")
+                elif tag == f"{_WORD_NS}br" and element.get(f"{_WORD_NS}type") != "page":
+                    runs.append("\n")
+                elif tag == f"{_WORD_NS}p":
+                    paragraphs.append("".join(runs))
+                    runs.clear()
+                    element.clear()
+    except (zipfile.BadZipFile, KeyError) as e:
+        raise UnsupportedDocument(f"Unreadable DOCX: {e}") from e
+    end_page()
+    return pages
+
+
+def _text_page_end(text, page_chars):
+    """Where the first page of `text` ends and the next begins, or None if more text is needed."""
+    form_feed = text.find("\f", 0, page_chars * 2)
+    if form_feed != -1:
+        return form_feed, form_feed + 1
+    if len(text) <= page_chars:
+        return None
+    newline = text.find("\n", page_chars, page_chars * 2)
+    if newline != -1:
+        return newline, newline + 1
+    if len(text) < page_chars * 2:
+        return None
+    # A very long line: break it at a space if there is one
+    space = text.rfind(" ", page_chars, page_chars * 2)
+    end = space if space != -1 else page_chars * 2
+    return end, end + (space != -1)
+
+
+def iter_text_pages(path, page_chars=TEXT_PAGE_CHARS):
+    """
+    Read a text file in pages, streaming it from disk.
+
+    Form feeds end a page; otherwise a page ends at the first line break
+    after `page_chars` characters. The encoding is UTF-8 (with or without a
+    BOM), and undecodable bytes are replaced.
+
+    Yields:
+        (page number, text) pairs
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    number = 0
+    pending = ""
+    with open(path, "rb") as f:
+        while True:
+            block = f.read(_READ_SIZE)
+            pending += decoder.decode(block, final=not block)
+            while (bounds := _text_page_end(pending, page_chars)) is not None:
+                number += 1
+                yield number, pending[:bounds[0]]
+                pending = pending[bounds[1]:]
+            if not block:
+                break
+    if pending.strip():
+        yield number + 1, pending
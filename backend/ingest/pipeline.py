@@ -0,0 +1,272 @@
+import hashlib
+import logging
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+
+from utils.metrics import inc
+from .chunking import Chunker, DEFAULT_CHUNK_SIZE, DEFAULT_OVERLAP
+from .extract import (
+    UnsupportedDocument, document_kind, extract_docx_pages, extract_pdf_pages, iter_text_pages, pdf_page_count
+)
+
+logger = logging.getLogger(__name__)
+
+# PDF pages extracted per worker task; small enough to spread one PDF over every core
+DEFAULT_PAGES_PER_TASK = 8
+
+# Chunks written to the store per transaction
+DEFAULT_BATCH_SIZE = 500
+
+_HASH_BLOCK = 1024 * 1024
+
+
+def discover(paths):
+    """
+    Expand files and directories into the files to ingest.
+
+    Directories are walked recursively; hidden files and directories are
+    skipped. Each file appears once, in sorted order.
+    """
+    files = set()
+    for path in map(Path, paths):
+        if path.is_dir():
+            for root, dirs, names in os.walk(path):
+                dirs[:] = [name for name in dirs if not name.startswith(".")]
+                files.update(Path(root) / name for name in names if not name.startswith("."))
+        elif path.is_file():
+            files.add(path)
+        else:
+            logger.warning(f"Skipping {path}: no such file or directory")
+    return sorted(files)
+
+
+def file_hash(path):
+    """SHA-256 of a file's bytes, read in blocks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while block := f.read(_HASH_BLOCK):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def chunk_document(path, chunk_size=DEFAULT_CHUNK_SIZE, overlap=DEFAULT_OVERLAP, pages_per_task=DEFAULT_PAGES_PER_TASK):
+    """
+    Chunk one document in this process, without a store.
+
+    PDFs are read `pages_per_task` pages at a time, so only that many parsed
+    pages and the unfinished chunk are held at once.
+
+    Yields:
+        Chunk objects in document order
+
+    Raises:
+        UnsupportedDocument: If no extractor can read the file
+    """
+    kind = document_kind(path)
+    chunker = Chunker(chunk_size, overlap)
+    if kind == "pdf":
+        count = pdf_page_count(path)
+        pages = (
+            page
+            for start in range(0, count, pages_per_task)
+            for page in extract_pdf_pages(path, start, start + pages_per_task)
+        )
+    elif kind == "docx":
+        pages = extract_docx_pages(path)
+    else:
+        pages = iter_text_pages(path)
+    for page_number, text in pages:
+        yield from chunker.feed(page_number, text)
+    yield from chunker.finish()
+
+
+class _Document:
+    """A document whose extracted pages are being chunked and written."""
+
+    def __init__(self, document_id, path, tasks, chunker):
+        self.id = document_id
+        self.path = path
+        self.tasks = tasks
+        self.chunker = chunker
+        self.next_task = 0
+        # Finished tasks waiting for an earlier one, by task index
+        self.ready = {}
+        self.batch = []
+        self.pages = 0
+        self.chunks = 0
+        self.error = None
+
+
+class _Ingestion:
+    """One run of `ingest_paths`: feeds extraction tasks to the pool and chunks their results in order."""
+
+    def __init__(self, store, workers, chunk_size, overlap, pages_per_task, batch_size, force):
+        self.store = store
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.overlap = overlap
+        self.pages_per_task = pages_per_task
+        self.batch_size = batch_size
+        self.force = force
+        self.stats = {"documents": 0, "unchanged": 0, "copied": 0, "skipped": 0, "failed": 0,
+                      "pages": 0, "chunks": 0, "newChunks": 0, "bytes": 0}
+        self._ready_count = 0
+
+    def run(self, files):
+        # Tasks running or finished out of order are capped, so a long PDF
+        # never has more than a few dozen parsed pages in memory
+        window = self.workers * 2
+        tasks = self._tasks(files)
+        running = {}
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            while True:
+                while len(running) + self._ready_count < window:
+                    task = next(tasks, None)
+                    if task is None:
+                        break
+                    document, index, function, args = task
+                    running[pool.submit(function, *args)] = (document, index)
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    document, index = running.pop(future)
+                    try:
+                        pages = future.result()
+                    except Exception as e:
+                        document.error = document.error or e
+                        pages = []
+                    document.ready[index] = pages
+                    self._ready_count += 1
+                    self._drain(document)
+        self.stats["prunedChunks"] = self.store.prune_chunks()
+        return self.stats
+
+    def _tasks(self, files):
+        """Prepare each file in turn, yielding its extraction tasks; plain text is chunked right here."""
+        for path in files:
+            try:
+                kind = document_kind(path)
+            except UnsupportedDocument as e:
+                logger.warning(f"Skipping {path}: {e}")
+                self.stats["skipped"] += 1
+                continue
+
+            size = path.stat().st_size
+            digest = file_hash(path)
+            existing = self.store.get_document(path)
+            if not self.force and existing and existing["fileHash"] == digest and existing["status"] == "done":
+                self.stats["unchanged"] += 1
+                continue
+
+            self.stats["bytes"] += size
+            duplicate = None if self.force else self.store.find_by_hash(digest)
+            document_id = self.store.begin_document(path, path.name, kind, size, digest)
+            if duplicate and duplicate["id"] != document_id:
+                # Same bytes under another path: share the chunks already stored
+                self.store.copy_chunks(duplicate["id"], document_id)
+                self.store.finish_document(document_id, duplicate["pages"], duplicate["chunks"])
+                self.stats["copied"] += 1
+                self.stats["documents"] += 1
+                continue
+
+            chunker = Chunker(self.chunk_size, self.overlap)
+            if kind == "pdf":
+                try:
+                    count = pdf_page_count(path)
+                except UnsupportedDocument as e:
+                    self._finish(_Document(document_id, path, 0, chunker), error=e)
+                    continue
+                starts = range(0, count, self.pages_per_task)
+                document = _Document(document_id, path, len(starts), chunker)
+                if not starts:
+                    self._finish(document)
+                for index, start in enumerate(starts):
+                    yield document, index, extract_pdf_pages, (str(path), start, start + self.pages_per_task)
+            elif kind == "docx":
+                yield _Document(document_id, path, 1, chunker), 0, extract_docx_pages, (str(path),)
+            else:
+                document = _Document(document_id, path, 0, chunker)
+                try:
+                    for page_number, text in iter_text_pages(path):
+                        self._feed(document, page_number, text)
+                except OSError as e:
+                    document.error = e
+                self._finish(document)
+
+    def _drain(self, document):
+        """Chunk the document's finished tasks that are next in page order."""
+        while document.next_task in document.ready:
+            pages = document.ready.pop(document.next_task)
+            self._ready_count -= 1
+            document.next_task += 1
+            for page_number, text in pages:
+                self._feed(document, page_number, text)
+        if document.next_task == document.tasks:
+            self._finish(document)
+
+    def _feed(self, document, page_number, text):
+        document.pages += 1
+        document.batch.extend(document.chunker.feed(page_number, text))
+        if len(document.batch) >= self.batch_size:
+            self._flush(document)
+
+    def _flush(self, document):
+        self.stats["newChunks"] += self.store.add_chunks(document.id, document.batch)
+        document.chunks += len(document.batch)
+        document.batch = []
+
+    def _finish(self, document, error=None):
+        error = error or document.error
+        document.batch.extend(document.chunker.finish())
+        self._flush(document)
+        self.store.finish_document(document.id, document.pages, document.chunks, error)
+        if error:
+            logger.error(f"Failed to ingest {document.path}: {error}")
+            self.stats["failed"] += 1
+        else:
+            self.stats["documents"] += 1
+        self.stats["pages"] += document.pages
+        self.stats["chunks"] += document.chunks
+        inc("ingest_documents_total", status="failed" if error else "done")
+        inc("ingest_pages_total", document.pages)
+        inc("ingest_chunks_total", document.chunks)
+
+
+def ingest_paths(paths, store, workers=None, chunk_size=DEFAULT_CHUNK_SIZE, overlap=DEFAULT_OVERLAP,
+                 pages_per_task=DEFAULT_PAGES_PER_TASK, batch_size=DEFAULT_BATCH_SIZE, force=False):
+    """
+    Ingest files and folders into a document store.
+
+    Text is extracted in a process pool: PDFs are split into ranges of
+    pages so one large PDF keeps every worker busy, and a folder's files
+    are extracted side by side. Pages are chunked in order as their ranges
+    finish, and chunks are written in batches, each text stored once per
+    content hash. Files whose bytes are unchanged since they were last
+    ingested are skipped, and a file identical to another ingested one
+    shares its chunks instead of being extracted again.
+
+    Args:
+        paths: Files and directories (searched recursively)
+        store: DocumentStore to write to
+        workers: Extraction processes (default: one per CPU)
+        chunk_size: Target characters per chunk
+        overlap: Characters repeated between consecutive chunks
+        pages_per_task: PDF pages extracted per task
+        batch_size: Chunks written per transaction
+        force: Re-ingest files even if unchanged
+
+    Returns:
+        Dictionary of counts: documents, unchanged, copied, skipped, failed,
+        pages, chunks, newChunks, prunedChunks, bytes and seconds
+    """
+    # Fail on bad chunk settings before any document is touched
+    Chunker(chunk_size, overlap)
+    started = time.monotonic()
+    files = discover(paths)
+    ingestion = _Ingestion(store, workers or os.cpu_count() or 1, chunk_size, overlap, pages_per_task, batch_size, force)
+    stats = ingestion.run(files)
+    stats["seconds"] = round(time.monotonic() - started, 2)
+    return stats
@@ -3,6 +3,7 @@ import asyncio
 import argparse
 import logging
 import sys
+import time
 import os
 from datetime import datetime
 from pathlib import Path
@@ -22,7 +23,26 @@ logger = logging.getLogger("backend")
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 # Import scraper modules
-from scraper.ycombinator.ycombinator import scrape_ycombinator_companies, load_proxies, run_periodic_scraper
+from scraper.ycombinator.ycombinator import (
+    run_streaming_scrape, run_incremental_scrape, load_proxies, run_periodic_scraper, ENGINES
+)
+from scraper.ycombinator.network_capture import MAX_PAGE_SIZE
+from utils.browser_pool import BrowserPool, ResourcePolicy
+from utils.http_cache import HttpCache, parse_ttl_rule, DEFAULT_CACHE_DIR, DEFAULT_TTL_RULES
+from utils.metrics import REGISTRY
+from storage.company_store import CompanyStore, DEFAULT_DB_PATH
+from storage.document_store import DocumentStore, DEFAULT_DOCUMENTS_PATH
+from scheduler import Job, Scheduler, DomainRateLimiter, SOURCES, DEFAULT_STATE_PATH, get_source, load_jobs, parse_schedule
+
+# Analytics and search need numpy, and the api serves their stores, so those
+# packages (and the bench and ingest ones) are imported by the commands that
+# use them. Their default paths are repeated here for the argument parser.
+DATA_DIR = Path("ycombinator_data")
+DEFAULT_INDEX_PATH = DATA_DIR / "search_index.sqlite3"
+DEFAULT_SIMILARITY_PATH = DATA_DIR / "similarity.sqlite3"
+DEFAULT_GRAPH_DIR = DATA_DIR / "graph"
+DEFAULT_CUBE_PATH = DATA_DIR / "cube.sqlite3"
+DEFAULT_ENTITIES_PATH = DATA_DIR / "entities.json"
 
 async def run_ycombinator_scraper(args):
     """Run the YCombinator scraper with the specified arguments"""
@@ -39,25 +59,324 @@ async def run_ycombinator_scraper(args):
         logger.error("No API key provided. Set WEBSHARE_API_KEY in .env file or use --api-key")
         return
     
+    http_cache = None
+    if not args.no_http_cache:
+        http_cache = HttpCache(
+            args.http_cache,
+            max_bytes=args.http_cache_size * 1024 * 1024,
+            ttl_rules=[parse_ttl_rule(rule) for rule in args.cache_ttl] + list(DEFAULT_TTL_RULES)
+        )
+    
     if args.periodic:
         logger.info(f"Running in periodic mode with {args.interval} hour interval")
-        await run_periodic_scraper(
-            interval_hours=args.interval,
-            proxy_api_url=args.proxy_api,
-            api_key=api_key
-        )
+        with CompanyStore(args.db) as store:
+            await run_periodic_scraper(
+                interval_hours=args.interval,
+                proxy_api_url=args.proxy_api,
+                api_key=api_key,
+                workers=args.workers,
+                engine=args.engine,
+                headless=not args.headed,
+                max_pages_per_context=args.max_pages_per_context,
+                allowed_resources=args.allow_resource,
+                incremental=args.incremental,
+                store=store,
+                enrich=args.enrich,
+                enrich_options={'concurrency': args.enrich_concurrency, 'per_host': args.enrich_per_host},
+                http_cache=http_cache,
+                base_url=args.base_url,
+                metrics_path=args.metrics_file,
+                search_index=args.search_index,
+                similarity=args.similarity,
+                graph=args.graph,
+                cube=args.cube
+            )
     else:
         logger.info("Running scraper once")
         try:
             proxies = await load_proxies(args.proxy_api, api_key)
-            companies = await scrape_ycombinator_companies(
-                proxies=proxies,
-                limit_pages=args.limit
-            )
-            logger.info(f"Scraping completed. Scraped {len(companies)} companies.")
+            resource_policy = ResourcePolicy(allowed_url_patterns=args.allow_resource)
+            enrich_options = {'concurrency': args.enrich_concurrency, 'per_host': args.enrich_per_host,
+                              'http_cache': http_cache}
+            crawl_options = {}
+            if args.base_url:
+                crawl_options['base_url'] = enrich_options['base_url'] = args.base_url
+            with CompanyStore(args.db) as store:
+                delta = None
+                async with BrowserPool(headless=not args.headed, max_pages_per_context=args.max_pages_per_context,
+                                       resource_policy=resource_policy, http_cache=http_cache) as pool:
+                    if args.incremental:
+                        delta = await run_incremental_scrape(
+                            proxies,
+                            early_stop=not args.full,
+                            known_pages=args.known_pages,
+                            limit_pages=args.limit,
+                            workers=args.workers,
+                            engine=args.engine,
+                            page_size=args.page_size,
+                            pool=pool,
+                            store=store,
+                            enrich=args.enrich,
+                            enrich_options=enrich_options,
+                            **crawl_options
+                        )
+                        logger.info(f"Incremental scraping completed: {delta.summary()}")
+                    else:
+                        count = await run_streaming_scrape(
+                            proxies,
+                            resume=args.resume,
+                            store=store,
+                            save_snapshot=args.json_snapshot,
+                            limit_pages=args.limit,
+                            workers=args.workers,
+                            engine=args.engine,
+                            page_size=args.page_size,
+                            pool=pool,
+                            enrich=args.enrich,
+                            enrich_options=enrich_options,
+                            **crawl_options
+                        )
+                        logger.info(f"Scraping completed. Scraped {count} companies.")
+                
+                if args.search_index:
+                    from search import SearchIndex
+                    with SearchIndex(args.search_index) as index:
+                        logger.info(f"Search index synced: {index.sync_companies(store)}")
+                if args.similarity:
+                    from analytics import SimilarityIndex
+                    with SimilarityIndex(args.similarity) as similarity:
+                        logger.info(f"Similar companies refreshed: {similarity.refresh_from_store(store)}")
+                if args.graph:
+                    from analytics import GraphCache, SimilarityIndex
+                    similarity = SimilarityIndex(args.similarity) if args.similarity else None
+                    try:
+                        layout = GraphCache(args.graph).refresh(list(store.iter_companies()), similarity=similarity)
+                        logger.info(f"Graph layout refreshed: {layout}")
+                    finally:
+                        if similarity is not None:
+                            similarity.close()
+                if args.cube:
+                    from analytics import AnalyticsCube
+                    with AnalyticsCube(args.cube) as cube:
+                        logger.info(f"Analytics cube updated: {cube.sync(store, delta)}")
         except ValueError as e:
             logger.error(f"Scraping failed: {e}")
             sys.exit(1)
+        finally:
+            if http_cache is not None:
+                logger.info(f"HTTP cache: {http_cache.stats.summary()}")
+            logger.info(REGISTRY.format_profile())
+            if args.metrics_file:
+                logger.info(f"Metrics written to {REGISTRY.write(args.metrics_file)}")
+
+async def run_scheduler(args):
+    """Run source jobs on their schedules, or once with --once"""
+    if args.list_sources:
+        for name, source in sorted(SOURCES.items()):
+            print(f"{name:<14} default schedule: {source.default_schedule:<12} domains: {', '.join(source.domains)}")
+        return
+    
+    settings = {}
+    jobs = []
+    if args.config:
+        jobs, settings = load_jobs(args.config)
+    for spec in args.source:
+        name, _, schedule = spec.partition('=')
+        source_class = get_source(name)
+        jobs.append(Job(name=name, source=source_class(), schedule=parse_schedule(schedule or source_class.default_schedule)))
+    if not jobs:
+        logger.error("No jobs to run. Use --config or --source NAME[=SCHEDULE]")
+        return
+    
+    limiter = DomainRateLimiter(
+        default_rate=settings.get('rate', args.rate),
+        burst=settings.get('burst', args.burst),
+        overrides=settings.get('domain_rates')
+    )
+    http_cache = None
+    if not args.no_http_cache:
+        http_cache = HttpCache(args.http_cache, max_bytes=args.http_cache_size * 1024 * 1024)
+    
+    max_concurrency = settings.get('max_concurrency', args.max_concurrency)
+    scheduler = Scheduler(
+        jobs,
+        max_concurrency=max_concurrency,
+        limiter=limiter,
+        state_path=args.state,
+        http_cache=http_cache,
+        metrics_path=args.metrics_file
+    )
+    if args.once:
+        results = await scheduler.run_once()
+        logger.info(f"Ran {len(results)} jobs once: {results}")
+    else:
+        logger.info(f"Scheduling {len(jobs)} jobs with at most {max_concurrency} running at once")
+        await scheduler.run_forever()
+
+def run_search(args):
+    """Update the search index and/or query it"""
+    from search import SearchIndex, load_notes
+    
+    with SearchIndex(args.index) as index:
+        if args.sync:
+            with CompanyStore(args.db) as store:
+                logger.info(f"Synced companies: {index.sync_companies(store)}")
+        for path in args.notes:
+            logger.info(f"Indexed {index.add_notes(load_notes(path))} notes from {path}")
+        if args.compact:
+            index.compact()
+        if args.stats:
+            logger.info(f"Search index: {index.stats()}")
+        if args.query:
+            for result in index.search(args.query, limit=args.limit, kind=args.kind, prefix=args.prefix):
+                title = result['meta'].get('name') or result['meta'].get('title') or result['key']
+                print(f"{result['score']:>8.3f}  {title}  [{result['key']}]")
+                for field, snippet in result['highlights'].items():
+                    print(f"          {field}: {snippet}")
+
+def run_similar(args):
+    """Refresh the similar-companies index and/or show a company's neighbors"""
+    from analytics import SimilarityIndex
+    
+    with SimilarityIndex(args.path, dims=args.dims, k=args.k) as similarity:
+        if args.refresh or args.full:
+            with CompanyStore(args.db) as store:
+                if args.full:
+                    logger.info(f"Rebuilt similar companies for {similarity.build(store.iter_companies())} companies")
+                else:
+                    logger.info(f"Similar companies refreshed: {similarity.refresh_from_store(store)}")
+        if args.slug:
+            neighbors = similarity.neighbors(args.slug, limit=args.limit)
+            if neighbors is None:
+                logger.error(f"'{args.slug}' is not in the similarity index, run with --refresh first")
+                return
+            for neighbor in neighbors:
+                print(f"{neighbor['score']:.3f}  {neighbor['slug']}")
+
+def run_graph(args):
+    """Rebuild the company graph layout if the companies changed"""
+    from analytics import GraphCache, SimilarityIndex
+    
+    similarity = SimilarityIndex(args.similarity) if args.similarity else None
+    try:
+        with CompanyStore(args.db) as store:
+            companies = list(store.iter_companies())
+        cache = GraphCache(args.dir, iterations=args.iterations)
+        for dims in args.dims:
+            logger.info(f"{dims}D graph layout: {cache.refresh(companies, similarity=similarity, dims=dims, full=args.full)}")
+    finally:
+        if similarity is not None:
+            similarity.close()
+
+def run_cube(args):
+    """Update the analytics cube and print a roll-up or growth ranking"""
+    from analytics import AnalyticsCube
+    
+    filters = {}
+    for item in args.filter:
+        name, _, value = item.partition('=')
+        filters.setdefault(name, []).append(value)
+
+    with AnalyticsCube(args.path) as cube:
+        if args.sync:
+            with CompanyStore(args.db) as store:
+                logger.info(f"Analytics cube refreshed: {cube.refresh_from_store(store)}")
+        try:
+            if args.growth:
+                result = cube.growth(args.growth, by=args.by, filters=filters, top=args.limit)
+                print(f"{args.growth} growth, {result['previous']} -> {result['current']}:")
+                for item in result['items']:
+                    growth = f"{item['growth']:+.0%}" if item['growth'] is not None else "new"
+                    print(f"  {item[args.growth]}: {item['previous']} -> {item['current']} ({item['change']:+d}, {growth})")
+            else:
+                rows = cube.rollup(args.group, filters, limit=args.limit)
+                for row in rows:
+                    print("  " + " / ".join(str(row[name]) for name in args.group) + f": {row['count']}")
+                # Industries overlap, so the total is counted without grouping
+                total = cube.rollup([], filters)
+                print(f"{total[0]['count'] if total else 0} companies")
+        except ValueError as e:
+            logger.error(str(e))
+            sys.exit(1)
+
+def run_dedupe(args):
+    """Merge companies seen across snapshots and sources into canonical entities"""
+    from analytics import default_inputs, load_records, record_from_company, resolve_entities, write_entities
+    
+    paths = args.inputs or default_inputs(args.data_dir)
+    records = load_records(paths)
+    if args.db:
+        with CompanyStore(args.db) as store:
+            records.extend(record_from_company(company) for company in store.iter_companies())
+    if not records:
+        logger.error("No records to deduplicate, pass snapshot files or --db")
+        sys.exit(1)
+
+    start = time.time()
+    entities, stats = resolve_entities(records, threshold=args.threshold)
+    logger.info(f"Resolved {len(paths)} files in {time.time() - start:.1f}s: {stats}")
+    write_entities(entities, args.output)
+    logger.info(f"Entities saved to {args.output}")
+    for entity in entities[:args.show]:
+        if len(entity['sources']) < 2:
+            break
+        sources = ", ".join(f"{source['source']}:{source['id']}" for source in entity['sources'])
+        aliases = f" (also {', '.join(entity['aliases'])})" if entity['aliases'] else ""
+        print(f"  {entity['name']}{aliases}: {sources}")
+
+def run_bench(args):
+    """Benchmark the YC scraper offline against the local directory fixture"""
+    from bench import run_benchmark, save_results, compare_results, format_comparison
+    
+    if args.compare and len(args.compare) == 2:
+        # Two result files: compare them without running anything
+        print(format_comparison(compare_results(*args.compare)))
+        return
+
+    results = run_benchmark(
+        pages=args.pages or 20,
+        page_size=args.page_size,
+        fixture_path=args.fixture,
+        latency=args.latency_ms / 1000,
+        proxy_latency=args.proxy_latency_ms / 1000,
+        proxies=args.proxies,
+        engine=args.engine,
+        workers=args.workers,
+        search_page_size=args.search_page_size,
+        enrich=args.enrich,
+        repeat=args.repeat,
+        timeout=args.timeout,
+        seed=args.seed,
+        log_dir=args.log_dir,
+    )
+    path = save_results(results, args.output)
+    summary = results['summary']
+    logger.info(f"Benchmark results saved to {path}")
+    print(f"{summary['pagesPerSecond']} pages/s, {summary['recordsPerSecond']} records/s, "
+          f"{summary['wallSeconds']}s wall, peak RSS {summary['peakRssMb']} MB ({summary['failed']} of {summary['runs']} runs failed)")
+    print("Stages: " + ", ".join(f"{name} {seconds}s" for name, seconds in summary['stages'].items()))
+    if args.compare:
+        print(format_comparison(compare_results(args.compare[0], results)))
+    if summary['failed']:
+        sys.exit(1)
+
+def run_ingest(args):
+    """Extract, chunk and store documents for the assistant"""
+    from ingest import ingest_paths
+    
+    with DocumentStore(args.db) as store:
+        if args.paths:
+            try:
+                # Sizes left unset fall back to the ingest defaults
+                sizes = {name: getattr(args, name) for name in ('chunk_size', 'overlap', 'pages_per_task')
+                         if getattr(args, name) is not None}
+                stats = ingest_paths(args.paths, store, workers=args.workers, force=args.force, **sizes)
+            except ValueError as e:
+                logger.error(str(e))
+                sys.exit(1)
+            logger.info(f"Ingested into {args.db}: {stats}")
+        if args.stats:
+            logger.info(f"Document store: {store.stats()}")
 
 def main():
     """Main entry point for the backend"""
@@ -71,11 +390,140 @@ def main():
     yc_parser.add_argument('--proxy-api', type=str, help='API URL to fetch proxy list')
     yc_parser.add_argument('--api-key', type=str, help='API key for proxy service')
     yc_parser.add_argument('--limit', type=int, help='Limit scraping to N pages (for testing)')
+    yc_parser.add_argument('--workers', type=int, default=1, help='Number of parallel browser contexts, each behind its own proxy')
+    yc_parser.add_argument('--engine', choices=ENGINES, default='dom', help='Extraction engine: read the rendered cards (dom) or the search responses (network)')
+    yc_parser.add_argument('--page-size', type=int, default=MAX_PAGE_SIZE, help='Companies per search page for the network engine')
+    yc_parser.add_argument('--headed', action='store_true', help='Show the browser window instead of running headless')
+    yc_parser.add_argument('--max-pages-per-context', type=int, default=200, help='Pages a browser context serves before it is recycled')
+    yc_parser.add_argument('--allow-resource', action='append', default=[], help='Regex of URLs to load even if blocked (images, media, fonts, analytics); repeatable')
+    yc_parser.add_argument('--incremental', action='store_true', help='Write only companies added, changed or removed since the last run')
+    yc_parser.add_argument('--full', action='store_true', help='With --incremental, crawl every page instead of stopping at known companies')
+    yc_parser.add_argument('--known-pages', type=int, default=2, help='With --incremental, consecutive pages of known companies that end the crawl')
+    yc_parser.add_argument('--db', type=str, default=str(DEFAULT_DB_PATH), help='SQLite database the scraped companies are written to')
+    yc_parser.add_argument('--base-url', type=str, help='Crawl this site root instead of www.ycombinator.com, e.g. the benchmark fixture')
+    yc_parser.add_argument('--json-snapshot', action='store_true', help='Also write the full result to a timestamped JSON file')
+    yc_parser.add_argument('--resume', action='store_true', help='Continue the last unfinished run from its checkpoint')
+    yc_parser.add_argument('--enrich', action='store_true', help='Fetch detail pages (founders, team size, website, socials) for new and changed companies')
+    yc_parser.add_argument('--enrich-concurrency', type=int, default=32, help='With --enrich, maximum detail page requests in flight')
+    yc_parser.add_argument('--enrich-per-host', type=int, default=8, help='With --enrich, maximum detail page requests in flight per host')
+    yc_parser.add_argument('--http-cache', type=str, default=str(DEFAULT_CACHE_DIR), help='Directory of the on-disk HTTP response cache')
+    yc_parser.add_argument('--no-http-cache', action='store_true', help='Fetch everything from the network without caching')
+    yc_parser.add_argument('--metrics-file', type=str, help='Write Prometheus metrics to this file when the run ends (after every run with --periodic)')
+    yc_parser.add_argument('--http-cache-size', type=int, default=512, help='Megabytes of compressed responses the HTTP cache keeps')
+    yc_parser.add_argument('--cache-ttl', action='append', default=[], help='REGEX=SECONDS freshness rule for the HTTP cache, checked before the defaults; repeatable')
+    yc_parser.add_argument('--search-index', type=str, nargs='?', const=str(DEFAULT_INDEX_PATH), help='Update this full-text search index with the scraped companies after each run')
+    yc_parser.add_argument('--similarity', type=str, nargs='?', const=str(DEFAULT_SIMILARITY_PATH), help='Refresh this similar-companies index after each run')
+    yc_parser.add_argument('--graph', type=str, nargs='?', const=str(DEFAULT_GRAPH_DIR), help='Refresh the 2D graph layout in this directory after each run')
+    yc_parser.add_argument('--cube', type=str, nargs='?', const=str(DEFAULT_CUBE_PATH), help='Update this analytics cube from each run')
+    
+    # Scheduler command
+    scheduler_parser = subparsers.add_parser('scheduler', help='Run scraping sources on cron-style schedules')
+    scheduler_parser.add_argument('--config', type=str, help='JSON file with jobs and scheduler settings')
+    scheduler_parser.add_argument('--source', action='append', default=[], help='Source to schedule as NAME or NAME=SCHEDULE (cron or "@every 6h"); repeatable')
+    scheduler_parser.add_argument('--max-concurrency', type=int, default=4, help='Maximum jobs running at once')
+    scheduler_parser.add_argument('--rate', type=float, default=2.0, help='Requests per second each domain starts at')
+    scheduler_parser.add_argument('--burst', type=int, default=4, help='Requests each domain may make back to back')
+    scheduler_parser.add_argument('--state', type=str, default=str(DEFAULT_STATE_PATH), help='JSON file the job state is kept in')
+    scheduler_parser.add_argument('--once', action='store_true', help='Run every job once and exit')
+    scheduler_parser.add_argument('--list-sources', action='store_true', help='List the available sources and exit')
+    scheduler_parser.add_argument('--http-cache', type=str, default=str(DEFAULT_CACHE_DIR), help='Directory of the on-disk HTTP response cache')
+    scheduler_parser.add_argument('--no-http-cache', action='store_true', help='Fetch everything from the network without caching')
+    scheduler_parser.add_argument('--metrics-file', type=str, help='Write Prometheus metrics to this file after every job')
+    scheduler_parser.add_argument('--http-cache-size', type=int, default=512, help='Megabytes of compressed responses the HTTP cache keeps')
+    
+    # API command
+    api_parser = subparsers.add_parser('api', help='Run API server')
+    api_parser.add_argument('--host', type=str, default='127.0.0.1', help='Interface to listen on')
+    api_parser.add_argument('--port', type=int, default=8000, help='Port to run the API server on')
+    api_parser.add_argument('--db', type=str, default=str(DEFAULT_DB_PATH), help='SQLite database of scraped companies to serve')
+    api_parser.add_argument('--search-index', type=str, nargs='?', const=str(DEFAULT_INDEX_PATH), help='Full-text search index to serve on /search')
+    api_parser.add_argument('--similarity', type=str, nargs='?', const=str(DEFAULT_SIMILARITY_PATH), help='Similar-companies index to serve on /companies/<slug>/similar')
+    api_parser.add_argument('--graph', type=str, nargs='?', const=str(DEFAULT_GRAPH_DIR), help='Graph layout directory to serve on /graph')
+    api_parser.add_argument('--cube', type=str, nargs='?', const=str(DEFAULT_CUBE_PATH), help='Analytics cube to serve on /cube')
+    api_parser.add_argument('--access-log', action='store_true', help='Print a line per request')
+    
+    # Search command
+    search_parser = subparsers.add_parser('search', help='Update or query the full-text search index')
+    search_parser.add_argument('query', nargs='?', help='Text to search for')
+    search_parser.add_argument('--index', type=str, default=str(DEFAULT_INDEX_PATH), help='Search index database')
+    search_parser.add_argument('--db', type=str, default=str(DEFAULT_DB_PATH), help='SQLite database of scraped companies')
+    search_parser.add_argument('--sync', action='store_true', help='Index new and changed companies and drop removed ones')
+    search_parser.add_argument('--notes', action='append', default=[], help='JSON or NDJSON file of notes/clips (id, title, content, tags) to index; repeatable')
+    search_parser.add_argument('--compact', action='store_true', help='Merge all segments and drop replaced documents')
+    search_parser.add_argument('--stats', action='store_true', help='Print index statistics')
+    search_parser.add_argument('--limit', type=int, default=10, help='Number of results')
+    search_parser.add_argument('--kind', type=str, help='Only return documents of this kind (company, note)')
+    search_parser.add_argument('--prefix', action='store_true', help='Also match the last query term as a prefix')
+    
+    # Similar companies command
+    similar_parser = subparsers.add_parser('similar', help='Precompute or look up similar companies')
+    similar_parser.add_argument('slug', nargs='?', help='Company to show the most similar companies of')
+    similar_parser.add_argument('--path', type=str, default=str(DEFAULT_SIMILARITY_PATH), help='Similarity index database')
+    similar_parser.add_argument('--db', type=str, default=str(DEFAULT_DB_PATH), help='SQLite database of scraped companies')
+    similar_parser.add_argument('--refresh', action='store_true', help='Update the neighbors of companies that changed since the last refresh')
+    similar_parser.add_argument('--full', action='store_true', help='Recompute every neighbor list and the IDF weights')
+    similar_parser.add_argument('--dims', type=int, default=512, help='Hashed vector dimensions')
+    similar_parser.add_argument('--k', type=int, default=20, help='Neighbors kept per company')
+    similar_parser.add_argument('--limit', type=int, default=10, help='Neighbors to show')
+    
+    # Graph layout command
+    graph_parser = subparsers.add_parser('graph', help='Precompute the company/industry/batch graph layout')
+    graph_parser.add_argument('--dir', type=str, default=str(DEFAULT_GRAPH_DIR), help='Directory of the layout payloads')
+    graph_parser.add_argument('--db', type=str, default=str(DEFAULT_DB_PATH), help='SQLite database of scraped companies')
+    graph_parser.add_argument('--similarity', type=str, nargs='?', const=str(DEFAULT_SIMILARITY_PATH), help='Add edges between similar companies from this similarity index')
+    graph_parser.add_argument('--dims', type=int, nargs='+', choices=(2, 3), default=[2], help='Layouts to build (2, 3 or both)')
+    graph_parser.add_argument('--full', action='store_true', help='Lay out from scratch instead of starting from the previous layout')
+    graph_parser.add_argument('--iterations', type=int, default=300, help='Force iterations of a full layout')
+    
+    # Entity resolution command
+    dedupe_parser = subparsers.add_parser('dedupe', help='Merge the same company across snapshots and sources')
+    dedupe_parser.add_argument('inputs', nargs='*', help='Snapshot and HN NDJSON files (default: everything in --data-dir)')
+    dedupe_parser.add_argument('--data-dir', type=str, default='ycombinator_data', help='Directory searched for snapshots')
+    dedupe_parser.add_argument('--db', type=str, nargs='?', const=str(DEFAULT_DB_PATH), help='Also include the companies in this database')
+    dedupe_parser.add_argument('--output', type=str, default=str(DEFAULT_ENTITIES_PATH), help='Where to write the entities JSON')
+    dedupe_parser.add_argument('--threshold', type=float, default=0.55, help='Minimum match score to merge two records (0-1)')
+    dedupe_parser.add_argument('--show', type=int, default=10, help='Merged entities to print')
+    
+    # Analytics cube command
+    cube_parser = subparsers.add_parser('cube', help='Count companies by batch, industry, location and first-seen date')
+    cube_parser.add_argument('group', nargs='*', metavar='DIMENSION', help='Dimensions to group by (batch, year, industry, location, country, seen, month)')
+    cube_parser.add_argument('--path', type=str, default=str(DEFAULT_CUBE_PATH), help='Path of the cube database')
+    cube_parser.add_argument('--db', type=str, default=str(DEFAULT_DB_PATH), help='SQLite database of scraped companies')
+    cube_parser.add_argument('--sync', action='store_true', help='Refresh the cube from the database first')
+    cube_parser.add_argument('--filter', action='append', default=[], metavar='DIMENSION=VALUE', help='Only count matching companies (repeatable)')
+    cube_parser.add_argument('--growth', type=str, metavar='DIMENSION', help='Rank values of this dimension by growth instead')
+    cube_parser.add_argument('--by', type=str, default='batch', choices=['batch', 'year', 'seen', 'month'], help='Periods to compare with --growth')
+    cube_parser.add_argument('--limit', type=int, help='Rows to show')
+    
+    # Offline scraper benchmark command
+    bench_parser = subparsers.add_parser('bench', help='Benchmark the YC scraper offline against a local fixture')
+    bench_parser.add_argument('--pages', type=int, help='Directory pages of synthetic companies (default: 20)')
+    bench_parser.add_argument('--page-size', type=int, default=40, help='Companies per rendered directory page')
+    bench_parser.add_argument('--fixture', type=str, help='Serve a recorded snapshot (JSON or NDJSON) instead of synthetic companies')
+    bench_parser.add_argument('--latency-ms', type=float, default=0, help='Latency the fixture adds to every response')
+    bench_parser.add_argument('--proxy-latency-ms', type=float, default=0, help='Latency each stand-in proxy adds to every request')
+    bench_parser.add_argument('--proxies', type=int, help='Stand-in proxies to serve (default: one per worker)')
+    bench_parser.add_argument('--engine', choices=ENGINES, default='dom', help='Scraper extraction engine')
+    bench_parser.add_argument('--workers', type=int, default=1, help='Scraper workers')
+    bench_parser.add_argument('--search-page-size', type=int, help='Companies per search page for the network engine')
+    bench_parser.add_argument('--enrich', action='store_true', help='Also fetch every detail page')
+    bench_parser.add_argument('--repeat', type=int, default=3, help='Runs to take the median of')
+    bench_parser.add_argument('--timeout', type=int, default=900, help='Seconds before a run is killed')
+    bench_parser.add_argument('--seed', type=int, default=0, help='Seed of the synthetic companies')
+    bench_parser.add_argument('--output', type=str, help='Results JSON path (default: bench_results/<timestamp>_<commit>.json)')
+    bench_parser.add_argument('--log-dir', type=str, help='Keep the output of each run in this directory')
+    bench_parser.add_argument('--compare', type=str, nargs='+', metavar='RESULTS', help='Compare against a baseline results file, or compare two files without running')
     
-    # Add more commands for other backend services here
-    # Example:
-    # api_parser = subparsers.add_parser('api', help='Run API server')
-    # api_parser.add_argument('--port', type=int, default=8000, help='Port to run the API server on')
+    # Document ingestion command
+    ingest_parser = subparsers.add_parser('ingest', help='Extract and chunk PDF, DOCX and text files for the assistant')
+    ingest_parser.add_argument('paths', nargs='*', help='Files and folders to ingest (folders are searched recursively)')
+    ingest_parser.add_argument('--db', type=str, default=str(DEFAULT_DOCUMENTS_PATH), help='SQLite database of documents and chunks')
+    ingest_parser.add_argument('--workers', type=int, help='Extraction processes (default: one per CPU)')
+    ingest_parser.add_argument('--chunk-size', type=int, help='Target characters per chunk (default: 1200)')
+    ingest_parser.add_argument('--overlap', type=int, help='Characters repeated between consecutive chunks (default: 200)')
+    ingest_parser.add_argument('--pages-per-task', type=int, help='PDF pages extracted per worker task (default: 8)')
+    ingest_parser.add_argument('--force', action='store_true', help='Re-ingest files even if they are unchanged')
+    ingest_parser.add_argument('--stats', action='store_true', help='Print document store statistics')
     
     args = parser.parse_args()
     
@@ -85,9 +533,27 @@ def main():
     
     if args.command == 'yc-scraper':
         asyncio.run(run_ycombinator_scraper(args))
-    # Add more command handlers here
-    # elif args.command == 'api':
-    #     run_api_server(args)
+    elif args.command == 'scheduler':
+        asyncio.run(run_scheduler(args))
+    elif args.command == 'api':
+        from api import run_api_server
+        asyncio.run(run_api_server(args.db, host=args.host, port=args.port, search_index_path=args.search_index,
+                                   similarity_path=args.similarity, graph_dir=args.graph, cube_path=args.cube,
+                                   access_log=args.access_log))
+    elif args.command == 'search':
+        run_search(args)
+    elif args.command == 'similar':
+        run_similar(args)
+    elif args.command == 'graph':
+        run_graph(args)
+    elif args.command == 'cube':
+        run_cube(args)
+    elif args.command == 'dedupe':
+        run_dedupe(args)
+    elif args.command == 'bench':
+        run_bench(args)
+    elif args.command == 'ingest':
+        run_ingest(args)
     else:
         parser.print_help()
 
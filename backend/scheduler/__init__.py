@@ -0,0 +1,5 @@
+from .schedules import CronSchedule, IntervalSchedule, parse_schedule, parse_duration
+from .rate_limit import TokenBucket, DomainRateLimiter
+from .state import JobState, DEFAULT_STATE_PATH
+from .scheduler import Job, JobContext, Scheduler, load_jobs
+from .sources import SourcePlugin, SOURCES, register_source, get_source
@@ -0,0 +1,128 @@
+import asyncio
+import logging
+import time
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+# Statuses that mean "slow down"; they halve the domain's rate
+THROTTLE_STATUSES = {429, 503}
+
+
+class TokenBucket:
+    """
+    A token bucket refilled at `rate` tokens per second, holding at most `capacity`.
+
+    Waiters queue on a lock, so tokens are handed out in arrival order.
+    """
+
+    def __init__(self, rate, capacity=1, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.tokens = capacity
+        self.updated = clock()
+        self.blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return now
+
+    async def acquire(self, tokens=1):
+        """Wait until `tokens` are available and take them."""
+        async with self._lock:
+            while True:
+                now = self._refill()
+                if now < self.blocked_until:
+                    await asyncio.sleep(self.blocked_until - now)
+                    continue
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self.tokens) / self.rate)
+
+    def block_for(self, seconds):
+        """Hand out no tokens for the given number of seconds (e.g. a Retry-After)."""
+        self.blocked_until = max(self.blocked_until, self.clock() + seconds)
+
+
+class DomainRateLimiter:
+    """
+    One token bucket per domain, with AIMD rate control.
+
+    Every success raises a domain's rate additively (up to its ceiling); a
+    429 or 503 halves it (down to the floor) and honours Retry-After. Domains
+    without an override share the default rate and burst.
+    """
+
+    def __init__(self, default_rate=2.0, burst=4, max_rate=None, min_rate=0.05, increase=0.1, decrease=0.5,
+                 overrides=None):
+        """
+        Args:
+            default_rate: Requests per second a domain starts at
+            burst: Requests a domain may make back to back
+            max_rate: Ceiling the additive increase stops at (defaults to twice the start rate)
+            min_rate: Floor the multiplicative decrease stops at
+            increase: Requests per second added after each success
+            decrease: Factor the rate is multiplied by after a throttling response
+            overrides: Optional {domain: requests per second} start rates
+        """
+        self.default_rate = default_rate
+        self.burst = burst
+        self.max_rate = max_rate
+        self.min_rate = min_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.overrides = dict(overrides or {})
+        self._buckets = {}
+        self._ceilings = {}
+        self.throttled = {}
+
+    def _bucket(self, domain):
+        bucket = self._buckets.get(domain)
+        if bucket is None:
+            rate = self.overrides.get(domain, self.default_rate)
+            bucket = self._buckets[domain] = TokenBucket(rate, self.burst)
+            self._ceilings[domain] = self.max_rate or rate * 2
+        return bucket
+
+    async def acquire(self, url_or_domain):
+        """Wait for a request slot for the URL's domain."""
+        await self._bucket(domain_of(url_or_domain)).acquire()
+
+    def report(self, url_or_domain, status, retry_after=None):
+        """
+        Adjust a domain's rate after a response.
+
+        Args:
+            url_or_domain: URL or domain the request went to
+            status: HTTP status of the response
+            retry_after: Optional Retry-After header value in seconds
+        """
+        domain = domain_of(url_or_domain)
+        bucket = self._bucket(domain)
+        if status in THROTTLE_STATUSES:
+            bucket.rate = max(self.min_rate, bucket.rate * self.decrease)
+            self.throttled[domain] = self.throttled.get(domain, 0) + 1
+            try:
+                delay = float(retry_after) if retry_after is not None else 1 / bucket.rate
+            except ValueError:
+                delay = 1 / bucket.rate
+            bucket.block_for(delay)
+            logger.warning(f"{domain} answered {status}, slowing down to {bucket.rate:.2f} requests/s")
+        elif status < 400:
+            bucket.rate = min(self._ceilings[domain], bucket.rate + self.increase)
+
+    def rates(self):
+        """Current requests per second by domain."""
+        return {domain: round(bucket.rate, 3) for domain, bucket in self._buckets.items()}
+
+
+def domain_of(url_or_domain):
+    """Get the host of a URL, or return a bare domain unchanged."""
+    if "//" in url_or_domain:
+        return urlsplit(url_or_domain).hostname or url_or_domain
+    return url_or_domain
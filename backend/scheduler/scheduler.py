@@ -0,0 +1,352 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from functools import partial
+from pathlib import Path
+
+import requests
+
+from scheduler.rate_limit import DomainRateLimiter
+from scheduler.schedules import parse_schedule
+from scheduler.sources import get_source
+from scheduler.state import JobState, DEFAULT_STATE_PATH
+from utils.metrics import REGISTRY, span
+from utils.proxy_manager import get_random_user_agent
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Job:
+    """
+    A source plugin run on a schedule.
+
+    Attributes:
+        name: Unique job name, the key of its persisted state
+        source: SourcePlugin instance to run
+        schedule: CronSchedule or IntervalSchedule
+        catch_up: Whether a run missed while the scheduler was down is made
+            up (once) on start
+        timeout: Optional seconds after which a run is cancelled
+    """
+    name: str
+    source: object
+    schedule: object
+    catch_up: bool = True
+    timeout: float = None
+    next_run: datetime = field(default=None, repr=False)
+    running: bool = field(default=False, repr=False)
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        Build a job from a config dictionary.
+
+        Args:
+            config: {"name": ..., "source": ..., "schedule": ..., "options": {...},
+                "catch_up": ..., "timeout": ...}; name and schedule default to
+                the source's name and default schedule
+
+        Raises:
+            ValueError: If the source or schedule is invalid
+        """
+        source_class = get_source(config["source"])
+        return cls(
+            name=config.get("name") or source_class.name,
+            source=source_class(**config.get("options", {})),
+            schedule=parse_schedule(config.get("schedule") or source_class.default_schedule),
+            catch_up=config.get("catch_up", True),
+            timeout=config.get("timeout"),
+        )
+
+
+class JobContext:
+    """
+    What a source gets when it runs: rate-limited HTTP, shared resources and its cursor.
+    """
+
+    def __init__(self, scheduler, job, scheduled_for):
+        self.scheduler = scheduler
+        self.job = job
+        self.scheduled_for = scheduled_for
+        self.limiter = scheduler.limiter
+        self.http_cache = scheduler.http_cache
+
+    @property
+    def cursor(self):
+        """Value the source stored with `set_cursor` on a previous run, or None."""
+        return self.scheduler.state.get(self.job.name)["cursor"]
+
+    def set_cursor(self, value):
+        """Persist a JSON-serializable position for the next run."""
+        self.scheduler.state.get(self.job.name)["cursor"] = value
+        self.scheduler.state.save()
+
+    async def shared(self, name, factory, closer=None):
+        """
+        Get a resource shared by every job of the scheduler, creating it on first use.
+
+        Browsers, proxy pools and stores are expensive; sharing them is what
+        lets one process run many sources.
+
+        Args:
+            name: Key of the resource
+            factory: Coroutine function or function creating the resource
+            closer: Optional coroutine function or function given the resource on shutdown
+
+        Returns:
+            The resource
+        """
+        return await self.scheduler.shared(name, factory, closer)
+
+    async def run_blocking(self, function, *args, **kwargs):
+        """Run a blocking call in the scheduler's thread pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.scheduler.executor, partial(function, *args, **kwargs))
+
+    async def fetch(self, url, method="GET", headers=None, timeout=30, **kwargs):
+        """
+        Make an HTTP request after waiting for the domain's rate limit.
+
+        The response status feeds the limiter, so 429/503 answers slow the
+        domain down. GET requests go through the HTTP cache if there is one.
+
+        Returns:
+            requests.Response or CachedResponse
+        """
+        await self.limiter.acquire(url)
+        headers = {"User-Agent": get_random_user_agent(), **(headers or {})}
+
+        def call():
+            # Looked up on the worker thread, which has its own session
+            session = self.scheduler.session
+            if self.http_cache is not None and method == "GET":
+                return self.http_cache.request(session, method, url, headers=headers, timeout=timeout, **kwargs)
+            return session.request(method, url, headers=headers, timeout=timeout, **kwargs)
+
+        response = await self.run_blocking(call)
+        if not getattr(response, "from_cache", False) or getattr(response, "revalidated", False):
+            self.limiter.report(url, response.status_code, response.headers.get("Retry-After"))
+        return response
+
+    async def fetch_json(self, url, **kwargs):
+        """
+        Fetch and decode a JSON document (see `fetch`).
+
+        Raises:
+            ValueError: If the response is an error or not JSON
+        """
+        response = await self.fetch(url, **kwargs)
+        if response.status_code >= 400:
+            raise ValueError(f"{url} returned status {response.status_code}")
+        return json.loads(response.content)
+
+
+class Scheduler:
+    """
+    Runs source jobs on their schedules from a single event loop.
+
+    Run times come from the schedule (not from when the last run ended), so
+    they do not drift. Jobs run side by side up to `max_concurrency`, a job
+    never overlaps itself, and every HTTP request a source makes waits for
+    its domain's token bucket. Job state is persisted after every start and
+    finish; on start, a job whose scheduled time passed while the scheduler
+    was down runs once to catch up.
+    """
+
+    def __init__(self, jobs, max_concurrency=4, limiter=None, state_path=DEFAULT_STATE_PATH, http_cache=None,
+                 max_threads=16, metrics_path=None):
+        """
+        Args:
+            jobs: List of Job
+            max_concurrency: Maximum jobs running at once
+            limiter: DomainRateLimiter shared by every job (a default one if None)
+            state_path: JSON file for the job state
+            http_cache: Optional HttpCache for the sources' GET requests
+            max_threads: Threads available for blocking calls such as HTTP requests
+            metrics_path: Optional file the Prometheus metrics are written to after every job
+        """
+        names = [job.name for job in jobs]
+        duplicates = {name for name in names if names.count(name) > 1}
+        if duplicates:
+            raise ValueError(f"Duplicate job names: {', '.join(sorted(duplicates))}")
+
+        self.jobs = list(jobs)
+        self.limiter = limiter or DomainRateLimiter()
+        self.state = JobState.load(state_path)
+        self.http_cache = http_cache
+        self.metrics_path = metrics_path
+        self.executor = ThreadPoolExecutor(max_workers=max_threads, thread_name_prefix="scheduler")
+        # requests.Session is not thread-safe, so each executor thread gets its own
+        self._local = threading.local()
+        self._sessions = []
+        self._sessions_lock = threading.Lock()
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._resources = {}
+        self._closers = []
+        self._resource_lock = asyncio.Lock()
+        self._tasks = set()
+        self._wake = asyncio.Event()
+
+    @property
+    def session(self):
+        """The calling thread's requests.Session, created on first use."""
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = requests.Session()
+            with self._sessions_lock:
+                self._sessions.append(session)
+        return session
+
+    async def shared(self, name, factory, closer=None):
+        async with self._resource_lock:
+            if name not in self._resources:
+                resource = factory()
+                if asyncio.iscoroutine(resource):
+                    resource = await resource
+                self._resources[name] = resource
+                if closer is not None:
+                    self._closers.append((closer, resource))
+            return self._resources[name]
+
+    def _plan(self, now):
+        for job in self.jobs:
+            last = self.state.last_scheduled(job.name)
+            if last is None:
+                job.next_run = job.schedule.next_after(now)
+                continue
+            missed = job.schedule.next_after(last)
+            if missed <= now and job.catch_up:
+                # However many runs were missed, one run brings the job up to date
+                logger.info(f"Job '{job.name}' missed its run at {missed:%Y-%m-%d %H:%M}, catching up")
+                job.next_run = missed
+            else:
+                job.next_run = job.schedule.next_after(now)
+
+    async def run_job(self, job, scheduled_for=None):
+        """
+        Run one job now, waiting for a concurrency slot.
+
+        Returns:
+            True if the run succeeded
+        """
+        scheduled_for = scheduled_for or datetime.now()
+        job.running = True
+        try:
+            async with self._slots:
+                started = time.monotonic()
+                self.state.record_start(job.name, scheduled_for, datetime.now())
+                logger.info(f"Running job '{job.name}' (scheduled for {scheduled_for:%Y-%m-%d %H:%M:%S})")
+                error = None
+                try:
+                    run = job.source.run(JobContext(self, job, scheduled_for))
+                    with span("job", job=job.name):
+                        summary = await asyncio.wait_for(run, job.timeout) if job.timeout else await run
+                    logger.info(f"Job '{job.name}' finished in {time.monotonic() - started:.1f}s"
+                                f"{': ' + str(summary) if summary else ''}")
+                except asyncio.CancelledError:
+                    error = "cancelled"
+                    raise
+                except Exception as e:
+                    error = e
+                    logger.error(f"Job '{job.name}' failed: {e}")
+                finally:
+                    self.state.record_finish(job.name, datetime.now(), time.monotonic() - started, error)
+                    if self.metrics_path:
+                        REGISTRY.write(self.metrics_path)
+                return error is None
+        finally:
+            job.running = False
+            self._wake.set()
+
+    async def run_forever(self, start_now=False):
+        """
+        Run jobs on their schedules until cancelled.
+
+        Args:
+            start_now: Whether every job runs once right away before following its schedule
+        """
+        self._plan(datetime.now())
+        if start_now:
+            for job in self.jobs:
+                job.next_run = datetime.now()
+        for job in self.jobs:
+            logger.info(f"Job '{job.name}' ({job.source.name}, {job.schedule!r}) next runs at {job.next_run:%Y-%m-%d %H:%M:%S}")
+
+        try:
+            while True:
+                now = datetime.now()
+                for job in self.jobs:
+                    if job.next_run <= now and not job.running:
+                        scheduled_for = job.next_run
+                        job.next_run = job.schedule.next_after(max(now, scheduled_for))
+                        task = asyncio.ensure_future(self.run_job(job, scheduled_for))
+                        self._tasks.add(task)
+                        task.add_done_callback(self._tasks.discard)
+
+                # Sleep until the next job is due, or a running job finishes
+                waiting = [job.next_run for job in self.jobs if not job.running]
+                delay = max(0.0, (min(waiting) - datetime.now()).total_seconds()) if waiting else None
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            await self.close()
+
+    async def run_once(self, names=None):
+        """
+        Run the given jobs (all by default) once, side by side, and return.
+
+        Returns:
+            Dictionary of job name to whether it succeeded
+        """
+        jobs = [job for job in self.jobs if names is None or job.name in names]
+        try:
+            results = await asyncio.gather(*[self.run_job(job) for job in jobs])
+        finally:
+            await self.close()
+        return {job.name: result for job, result in zip(jobs, results)}
+
+    async def close(self):
+        """Cancel running jobs and close shared resources."""
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        for closer, resource in reversed(self._closers):
+            try:
+                result = closer(resource)
+                if asyncio.iscoroutine(result):
+                    await result
+            except Exception as e:
+                logger.warning(f"Error closing shared resource: {e}")
+        self._closers = []
+        self._resources = {}
+        with self._sessions_lock:
+            for session in self._sessions:
+                session.close()
+            self._sessions = []
+        self.executor.shutdown(wait=False)
+        logger.info(f"Domain rates at shutdown: {self.limiter.rates()}")
+
+
+def load_jobs(path):
+    """
+    Load jobs and scheduler settings from a JSON config file.
+
+    The file holds {"max_concurrency": ..., "rate": ..., "domain_rates": {...},
+    "jobs": [{"source": ..., "schedule": ..., "options": {...}}, ...]}.
+
+    Returns:
+        Tuple of (list of Job, settings dictionary without "jobs")
+    """
+    with open(Path(path), "r", encoding="utf-8") as f:
+        config = json.load(f)
+    jobs = [Job.from_config(job) for job in config.pop("jobs", [])]
+    return jobs, config
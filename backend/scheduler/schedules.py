@@ -0,0 +1,173 @@
+import re
+from datetime import datetime, timedelta
+
+# (name, lowest value, highest value) of the five cron fields
+CRON_FIELDS = (
+    ("minute", 0, 59),
+    ("hour", 0, 23),
+    ("day", 1, 31),
+    ("month", 1, 12),
+    ("weekday", 0, 7),
+)
+
+MONTH_NAMES = {name: number for number, name in enumerate(
+    ("jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"), start=1)}
+WEEKDAY_NAMES = {name: number for number, name in enumerate(("sun", "mon", "tue", "wed", "thu", "fri", "sat"))}
+
+# Shorthands accepted in place of five fields
+CRON_ALIASES = {
+    "@hourly": "0 * * * *",
+    "@daily": "0 0 * * *",
+    "@midnight": "0 0 * * *",
+    "@weekly": "0 0 * * 0",
+    "@monthly": "0 0 1 * *",
+    "@yearly": "0 0 1 1 *",
+    "@annually": "0 0 1 1 *",
+}
+
+_DURATION_PATTERN = re.compile(r"(\d+(?:\.\d+)?)\s*([smhd])")
+_DURATION_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def _parse_field(text, low, high, names=None):
+    values = set()
+    for part in text.lower().split(","):
+        expression, _, step = part.partition("/")
+        step = int(step) if step else 1
+        if step < 1:
+            raise ValueError(f"Invalid step in cron field '{text}'")
+
+        if expression == "*":
+            start, end = low, high
+        else:
+            first, _, last = expression.partition("-")
+            start = _parse_value(first, names)
+            end = _parse_value(last, names) if last else (high if step > 1 else start)
+        if not low <= start <= end <= high:
+            raise ValueError(f"Cron field '{text}' is outside {low}-{high}")
+        values.update(range(start, end + 1, step))
+    return frozenset(values)
+
+
+def _parse_value(text, names):
+    if names and text in names:
+        return names[text]
+    return int(text)
+
+
+class CronSchedule:
+    """
+    A five-field cron expression (minute hour day month weekday).
+
+    Fields accept `*`, numbers, ranges (`1-5`), steps (`*/15`, `0-30/10`),
+    lists (`1,15`) and month/weekday names, plus the @hourly/@daily/...
+    shorthands. As in cron, when both day and weekday are restricted a time
+    matches if either does. Weekday 7 is Sunday, like 0.
+    """
+
+    def __init__(self, expression):
+        """
+        Raises:
+            ValueError: If the expression is malformed
+        """
+        self.expression = expression
+        fields = CRON_ALIASES.get(expression.strip().lower(), expression).split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression '{expression}' needs 5 fields, got {len(fields)}")
+
+        names = (None, None, None, MONTH_NAMES, WEEKDAY_NAMES)
+        self.minutes, self.hours, self.days, self.months, self.weekdays = (
+            _parse_field(text, low, high, field_names)
+            for text, (_, low, high), field_names in zip(fields, CRON_FIELDS, names)
+        )
+        # Sunday may be written as 7
+        self.weekdays = frozenset(weekday % 7 for weekday in self.weekdays)
+        # A field is unrestricted when it covers every value, however it is written (`*`, `*/1`, `1-31`)
+        self._any_day = self.days == frozenset(range(1, 32))
+        self._any_weekday = self.weekdays == frozenset(range(7))
+
+    def __repr__(self):
+        return f"CronSchedule({self.expression!r})"
+
+    def _day_matches(self, moment):
+        day = moment.day in self.days
+        # Python counts Monday as 0, cron counts Sunday as 0
+        weekday = (moment.weekday() + 1) % 7 in self.weekdays
+        if self._any_day or self._any_weekday:
+            return day and weekday
+        return day or weekday
+
+    def next_after(self, moment):
+        """
+        Get the first matching minute strictly after `moment`.
+
+        Raises:
+            ValueError: If nothing matches within five years (e.g. February 30th)
+        """
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = moment + timedelta(days=5 * 366)
+        while candidate <= limit:
+            if candidate.month not in self.months:
+                # Jump to the first day of the next month
+                candidate = (candidate.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+                continue
+            if not self._day_matches(candidate):
+                candidate = candidate.replace(hour=0, minute=0) + timedelta(days=1)
+                continue
+            if candidate.hour not in self.hours:
+                candidate = candidate.replace(minute=0) + timedelta(hours=1)
+                continue
+            if candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+                continue
+            return candidate
+        raise ValueError(f"Cron expression '{self.expression}' never matches")
+
+
+class IntervalSchedule:
+    """
+    Runs every `seconds`, on a fixed grid from `anchor` so run times do not drift
+    by however long each run takes.
+    """
+
+    def __init__(self, seconds, anchor=None):
+        if seconds <= 0:
+            raise ValueError("Interval must be positive")
+        self.seconds = seconds
+        self.anchor = anchor or datetime(2000, 1, 1)
+
+    def __repr__(self):
+        return f"IntervalSchedule({self.seconds})"
+
+    def next_after(self, moment):
+        """Get the first grid point strictly after `moment`."""
+        elapsed = (moment - self.anchor).total_seconds()
+        steps = int(elapsed // self.seconds) + 1
+        return self.anchor + timedelta(seconds=steps * self.seconds)
+
+
+def parse_duration(text):
+    """
+    Parse a duration such as "90s", "15m", "6h", "1d" or "1h30m" into seconds.
+
+    Raises:
+        ValueError: If the text is not a duration
+    """
+    text = text.strip().lower()
+    parts = _DURATION_PATTERN.findall(text)
+    if not parts or _DURATION_PATTERN.sub("", text).strip():
+        raise ValueError(f"Invalid duration '{text}', expected e.g. 90s, 15m, 6h or 1d")
+    return sum(float(value) * _DURATION_UNITS[unit] for value, unit in parts)
+
+
+def parse_schedule(text):
+    """
+    Parse a schedule: "@every <duration>" for an interval, anything else as cron.
+
+    Returns:
+        CronSchedule or IntervalSchedule
+    """
+    text = text.strip()
+    if text.lower().startswith("@every"):
+        return IntervalSchedule(parse_duration(text[len("@every"):]))
+    return CronSchedule(text)
@@ -0,0 +1,4 @@
+from .base import SourcePlugin, SOURCES, register_source, get_source
+
+# Built-in sources register themselves on import
+from . import hackernews, ycombinator
@@ -0,0 +1,56 @@
+# Registered source plugin classes by name
+SOURCES = {}
+
+
+class SourcePlugin:
+    """
+    Base class for a schedulable data source.
+
+    Attributes:
+        name: Unique name jobs refer to the source by
+        default_schedule: Schedule used when a job does not give one
+        domains: Domains the source talks to, for documentation and rate limits
+    """
+    name = None
+    default_schedule = "@daily"
+    domains = ()
+
+    def __init__(self, **options):
+        self.options = options
+
+    async def run(self, context):
+        """
+        Run the source once.
+
+        Args:
+            context: JobContext with the rate limiter, HTTP helpers, shared
+                resources and the job's persisted cursor
+
+        Returns:
+            Optional short summary of what the run did
+        """
+        raise NotImplementedError
+
+
+def register_source(cls):
+    """Class decorator adding a SourcePlugin subclass to the registry."""
+    if not cls.name:
+        raise ValueError(f"{cls.__name__} needs a name to be registered")
+    if cls.name in SOURCES and SOURCES[cls.name] is not cls:
+        raise ValueError(f"A source named '{cls.name}' is already registered")
+    SOURCES[cls.name] = cls
+    return cls
+
+
+def get_source(name):
+    """
+    Get a registered source class by name.
+
+    Raises:
+        ValueError: If no source has that name
+    """
+    try:
+        return SOURCES[name]
+    except KeyError:
+        raise ValueError(f"Unknown source '{name}', expected one of {', '.join(sorted(SOURCES))}") from None
+
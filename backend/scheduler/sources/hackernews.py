@@ -0,0 +1,89 @@
+import json
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import urlencode
+
+from .base import SourcePlugin, register_source
+
+HN_SEARCH_URL = "https://hn.algolia.com/api/v1/search_by_date"
+
+
+def story_from_hit(hit):
+    """Convert an HN search hit into the record we store."""
+    return {
+        "id": hit.get("objectID"),
+        "title": hit.get("title") or hit.get("story_title") or "",
+        "url": hit.get("url") or hit.get("story_url") or "",
+        "author": hit.get("author") or "",
+        "points": hit.get("points") or 0,
+        "comments": hit.get("num_comments") or 0,
+        "createdAt": hit.get("created_at") or "",
+        "tags": [tag for tag in hit.get("_tags") or [] if not tag.startswith(("author_", "story_"))],
+    }
+
+
+@register_source
+class HackerNewsSource(SourcePlugin):
+    """
+    New Hacker News stories (Show HN by default) from the HN search API.
+
+    Each run fetches only stories newer than the last one seen and appends
+    them to `<output_dir>/hackernews/hn_<timestamp>.ndjson`. When there are
+    more than `max_pages` pages of them, the oldest are fetched first and the
+    rest on the following runs.
+
+    Options:
+        tags: HN search tags, e.g. "show_hn", "launch_hn" or "(story,show_hn)"
+        query: Optional search query
+        output_dir: Directory the NDJSON files are written to
+        page_size: Stories per request
+        max_pages: Maximum pages per run
+    """
+    name = "hackernews"
+    default_schedule = "@every 1h"
+    domains = ("hn.algolia.com",)
+
+    async def run(self, context):
+        tags = self.options.get("tags", "show_hn")
+        query = self.options.get("query", "")
+        page_size = self.options.get("page_size", 100)
+        max_pages = self.options.get("max_pages", 20)
+        output_dir = Path(self.options.get("output_dir", "ycombinator_data")) / "hackernews"
+
+        newest_seen = context.cursor or 0
+
+        async def fetch_page(page, numeric_filters):
+            params = {"tags": tags, "hitsPerPage": page_size, "page": page, "numericFilters": numeric_filters}
+            if query:
+                params["query"] = query
+            return await context.fetch_json(f"{HN_SEARCH_URL}?{urlencode(params)}")
+
+        # Results come newest first
+        first = await fetch_page(0, f"created_at_i>{newest_seen}")
+        page_count = first.get("nbPages") or 0
+        if page_count <= max_pages:
+            payloads = [first]
+            for page in range(1, page_count):
+                payloads.append(await fetch_page(page, f"created_at_i>{newest_seen}"))
+        else:
+            # More new stories than one run fetches: take the oldest pages, so the cursor
+            # only moves past stories that were written and the rest follow next run.
+            # Capping the time at the newest story keeps later posts from shifting the pages.
+            newest_now = max([newest_seen] + [hit.get("created_at_i") or 0 for hit in first.get("hits") or []])
+            numeric_filters = f"created_at_i>{newest_seen},created_at_i<={newest_now}"
+            payloads = []
+            for page in range(page_count - 1, page_count - 1 - max(1, max_pages - 1), -1):
+                payloads.insert(0, await fetch_page(page, numeric_filters))
+
+        hits = [hit for payload in payloads for hit in payload.get("hits") or []]
+        stories = [story_from_hit(hit) for hit in hits]
+        newest = max([newest_seen] + [hit.get("created_at_i") or 0 for hit in hits])
+
+        if stories:
+            output_dir.mkdir(parents=True, exist_ok=True)
+            output_file = output_dir / f"hn_{datetime.now().strftime('%Y%m%d_%H%M%S')}.ndjson"
+            with open(output_file, "w", encoding="utf-8") as f:
+                for story in stories:
+                    f.write(json.dumps(story, ensure_ascii=False, separators=(",", ":")) + "\n")
+        context.set_cursor(newest)
+        return f"{len(stories)} new stories"
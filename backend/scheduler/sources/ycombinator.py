@@ -0,0 +1,117 @@
+import os
+
+from .base import SourcePlugin, register_source
+
+
+@register_source
+class YCombinatorSource(SourcePlugin):
+    """
+    The YCombinator company directory, scraped into the company store.
+
+    The browser pool, proxy pool and company store are shared resources, so
+    they outlive a single run and are shared with any other job that uses
+    them.
+
+    Options:
+        incremental: Write deltas and stop at known companies (default True)
+        full: With incremental, crawl every page
+        workers, engine, page_size, limit_pages: Crawl options
+        enrich: Fetch detail pages of new and changed companies
+        enrich_options: Options for the detail page enricher
+        headless, max_pages_per_context, allowed_resources: Browser options
+        proxy_api_url, api_key: Proxy provider (api_key defaults to WEBSHARE_API_KEY)
+        db: Company store path
+        search_index: Optional SearchIndex path synced with the store after each run
+        similarity: Optional SimilarityIndex path refreshed after each run
+        graph: Optional GraphCache directory whose 2D layout is refreshed after each run
+        cube: Optional AnalyticsCube path updated from each run's delta
+        base_url: Optional site root to crawl instead of www.ycombinator.com
+        output_dir: Directory for NDJSON runs, deltas and fingerprints
+    """
+    name = "ycombinator"
+    default_schedule = "0 3 * * *"
+    domains = ("www.ycombinator.com", "algolia.net")
+
+    async def run(self, context):
+        # Imported here so listing or scheduling sources does not load Playwright
+        from scraper.ycombinator.ycombinator import run_incremental_scrape, run_streaming_scrape
+        from analytics.cube import AnalyticsCube
+        from analytics.graph import GraphCache
+        from analytics.similarity import SimilarityIndex
+        from search.index import SearchIndex
+        from storage.company_store import CompanyStore, DEFAULT_DB_PATH
+        from utils.browser_pool import BrowserPool, ResourcePolicy
+        from utils.proxy_manager import ProxyPool, WEBSHARE_PROXY_LIST_URL
+
+        options = dict(self.options)
+        api_key = options.pop("api_key", None) or os.getenv("WEBSHARE_API_KEY")
+        proxy_api_url = options.pop("proxy_api_url", None) or WEBSHARE_PROXY_LIST_URL
+        db_path = options.pop("db", None) or str(DEFAULT_DB_PATH)
+        headless = options.pop("headless", True)
+        max_pages_per_context = options.pop("max_pages_per_context", 200)
+        allowed_resources = options.pop("allowed_resources", ())
+        incremental = options.pop("incremental", True)
+        full = options.pop("full", False)
+        search_index_path = options.pop("search_index", None)
+        similarity_path = options.pop("similarity", None)
+        graph_dir = options.pop("graph", None)
+        cube_path = options.pop("cube", None)
+
+        proxy_pool = await context.shared(f"proxy_pool:{proxy_api_url}", lambda: ProxyPool(proxy_api_url, api_key))
+        browser_pool = await context.shared(
+            "browser_pool",
+            lambda: BrowserPool(
+                headless=headless,
+                max_pages_per_context=max_pages_per_context,
+                resource_policy=ResourcePolicy(allowed_url_patterns=allowed_resources),
+                http_cache=context.http_cache
+            ),
+            closer=lambda pool: pool.close()
+        )
+        store = await context.shared(f"company_store:{db_path}", lambda: CompanyStore(db_path),
+                                     closer=lambda store: store.close())
+
+        enrich_options = {**options.pop("enrich_options", {}), "rate_limiter": context.limiter}
+        if options.get("base_url"):
+            enrich_options["base_url"] = options["base_url"]
+        if context.http_cache is not None:
+            enrich_options["http_cache"] = context.http_cache
+
+        # Every navigation and search request waits for the job's limiter and reports back to it
+        options["rate_limiter"] = context.limiter
+        await proxy_pool.refresh()
+        delta = None
+        if incremental:
+            delta = await run_incremental_scrape(proxy_pool, early_stop=not full, pool=browser_pool, store=store,
+                                                 enrich_options=enrich_options, **options)
+            summary = delta.summary()
+        else:
+            count = await run_streaming_scrape(proxy_pool, pool=browser_pool, store=store,
+                                               enrich_options=enrich_options, **options)
+            summary = f"{count} companies"
+
+        if search_index_path:
+            index = await context.shared(f"search_index:{search_index_path}", lambda: SearchIndex(search_index_path),
+                                         closer=lambda index: index.close())
+            # Unchanged companies are skipped, so only this run's changes are indexed. The stores
+            # lock their own connections, so they can be read and written from worker threads
+            synced = await context.run_blocking(index.sync_companies, store)
+            summary += f", search index: {synced['indexed']} indexed, {synced['deleted']} removed"
+        # The index is shared across jobs and used from worker threads; it serializes its own connection
+        similarity = None
+        if similarity_path:
+            similarity = await context.shared(f"similarity:{similarity_path}", lambda: SimilarityIndex(similarity_path),
+                                              closer=lambda index: index.close())
+            refreshed = await context.run_blocking(similarity.refresh, list(store.iter_companies()))
+            summary += f", similar companies: {refreshed['mode']} ({refreshed['changed']} changed)"
+        if graph_dir:
+            # build_graph reads neighbor lists from the layout's worker thread
+            layout = await context.run_blocking(GraphCache(graph_dir).refresh, list(store.iter_companies()),
+                                                similarity=similarity)
+            summary += f", graph: {layout['mode']} ({layout['nodes']} nodes)"
+        if cube_path:
+            cube = await context.shared(f"cube:{cube_path}", lambda: AnalyticsCube(cube_path),
+                                        closer=lambda cube: cube.close())
+            updated = await context.run_blocking(cube.sync, store, delta)
+            summary += f", cube: {updated['added']} added, {updated['updated']} updated, {updated['removed']} removed"
+        return summary
@@ -0,0 +1,80 @@
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+
+DEFAULT_STATE_PATH = Path("ycombinator_data") / "scheduler_state.json"
+
+
+class JobState:
+    """
+    Per-job run history persisted as JSON so schedules survive restarts.
+
+    Each job records its last scheduled time, last run and success, the
+    outcome of the last run, counters, and an optional `cursor` sources may
+    use to fetch only what is new.
+    """
+
+    def __init__(self, path=DEFAULT_STATE_PATH, jobs=None):
+        self.path = Path(path)
+        self.jobs = jobs or {}
+
+    @classmethod
+    def load(cls, path=DEFAULT_STATE_PATH):
+        """Load the state, or start empty if there is none."""
+        path = Path(path)
+        if not path.exists():
+            return cls(path)
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(path, json.load(f))
+
+    def save(self):
+        """Write the state atomically."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self.jobs, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
+
+    def get(self, name):
+        """Get a job's record, creating an empty one if needed."""
+        return self.jobs.setdefault(name, {
+            "last_scheduled": None,
+            "last_started": None,
+            "last_finished": None,
+            "last_success": None,
+            "last_status": None,
+            "last_error": None,
+            "last_duration": None,
+            "runs": 0,
+            "failures": 0,
+            "cursor": None,
+        })
+
+    def last_scheduled(self, name):
+        """Get the scheduled time of a job's last run, or None."""
+        value = self.jobs.get(name, {}).get("last_scheduled")
+        return datetime.fromisoformat(value) if value else None
+
+    def record_start(self, name, scheduled_for, started_at):
+        record = self.get(name)
+        record["last_scheduled"] = scheduled_for.isoformat(timespec="seconds")
+        record["last_started"] = started_at.isoformat(timespec="seconds")
+        self.save()
+
+    def record_finish(self, name, finished_at, duration, error=None):
+        record = self.get(name)
+        record["last_finished"] = finished_at.isoformat(timespec="seconds")
+        record["last_duration"] = round(duration, 3)
+        record["runs"] += 1
+        if error is None:
+            record["last_status"] = "success"
+            record["last_success"] = record["last_finished"]
+            record["last_error"] = None
+        else:
+            record["last_status"] = "failed"
+            record["last_error"] = str(error)
+            record["failures"] += 1
+        self.save()
@@ -0,0 +1,333 @@
+import asyncio
+import html
+import json
+import logging
+import re
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from urllib.parse import urljoin, urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from utils.metrics import inc, span
+from utils.proxy_manager import parse_requests_proxy, get_random_user_agent
+from scraper.ycombinator.incremental import company_key
+
+logger = logging.getLogger(__name__)
+
+# Detail page URLs in company records are relative to this
+DETAIL_BASE_URL = 'https://www.ycombinator.com'
+
+# Fields an enriched record gains
+DETAIL_FIELDS = ('founders', 'teamSize', 'website', 'socials', 'longDescription', 'yearFounded', 'status')
+
+# The detail pages are server-rendered with their Inertia props in a data-page attribute
+DATA_PAGE_PATTERN = re.compile(r'data-page="([^"]*)"')
+META_TAG_PATTERN = re.compile(r'<meta\s[^>]*>', re.IGNORECASE)
+META_ATTRIBUTE_PATTERN = re.compile(r'([a-zA-Z:-]+)\s*=\s*"([^"]*)"')
+
+# Company URL fields on the page and the name they get under `socials`
+SOCIAL_FIELDS = {
+    'linkedin_url': 'linkedin',
+    'twitter_url': 'twitter',
+    'fb_url': 'facebook',
+    'cb_url': 'crunchbase',
+    'github_url': 'github',
+}
+
+# Statuses worth retrying; anything else (e.g. 404) will not get better
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def detail_url(company, base_url=DETAIL_BASE_URL):
+    """Get the absolute detail page URL for a company record."""
+    return urljoin(base_url, company.get('url') or f"/companies/{company_key(company)}")
+
+
+def details_from_company_props(company):
+    """
+    Convert the `company` prop of a detail page into the fields we merge into records.
+
+    Args:
+        company: Dictionary from the page's Inertia props
+
+    Returns:
+        Dictionary with the DETAIL_FIELDS that have a value
+    """
+    founders = [
+        {
+            'name': (founder.get('full_name') or '').strip(),
+            'title': (founder.get('title') or '').strip(),
+            'linkedin': founder.get('linkedin_url') or '',
+            'twitter': founder.get('twitter_url') or '',
+        }
+        for founder in company.get('founders') or []
+        if isinstance(founder, dict) and founder.get('full_name')
+    ]
+    socials = {name: company[field] for field, name in SOCIAL_FIELDS.items() if company.get(field)}
+
+    details = {
+        'founders': founders,
+        'teamSize': company.get('team_size'),
+        'website': company.get('website') or '',
+        'socials': socials,
+        'longDescription': (company.get('long_description') or '').strip(),
+        'yearFounded': company.get('year_founded'),
+        'status': company.get('status') or '',
+    }
+    return {name: value for name, value in details.items() if value not in (None, '', [], {})}
+
+
+def _details_from_meta(page_html):
+    meta = {}
+    for tag in META_TAG_PATTERN.findall(page_html):
+        attributes = {name.lower(): html.unescape(value) for name, value in META_ATTRIBUTE_PATTERN.findall(tag)}
+        name = attributes.get('property') or attributes.get('name')
+        if name and 'content' in attributes:
+            meta[name] = attributes['content'].strip()
+
+    description = meta.get('og:description') or meta.get('description')
+    return {'longDescription': description} if description else {}
+
+
+def parse_detail_page(page_html):
+    """
+    Extract company details from a detail page's HTML.
+
+    The page's Inertia props (`data-page`) are used when present; otherwise
+    the description meta tags are the best we can do.
+
+    Args:
+        page_html: HTML of the detail page
+
+    Returns:
+        Dictionary of details, or None if the page carries neither, which
+        usually means it has to be rendered by a browser
+    """
+    for match in DATA_PAGE_PATTERN.finditer(page_html):
+        try:
+            data = json.loads(html.unescape(match.group(1)))
+        except ValueError:
+            continue
+        company = (data.get('props') or {}).get('company') if isinstance(data, dict) else None
+        if isinstance(company, dict):
+            return details_from_company_props(company)
+
+    return _details_from_meta(page_html) or None
+
+
+def merge_details(company, details):
+    """Return a copy of the company record with its details merged in."""
+    return {**company, **details} if details else dict(company)
+
+
+class DetailEnricher:
+    """
+    Fetches company detail pages with bounded concurrency.
+
+    Pages are fetched with plain HTTP (requests, in a thread pool) first;
+    a page that does not carry its data in the HTML is rendered with
+    Playwright instead, if a BrowserPool is available. A global limit bounds
+    the number of requests in flight and a per-host limit keeps us polite to
+    each site. Transient errors are retried with backoff through another
+    proxy. With an HttpCache, pages fetched recently are served from disk and
+    older ones are revalidated rather than downloaded again.
+    """
+
+    def __init__(self, proxy_pool=None, browser_pool=None, concurrency=32, per_host=8, browser_concurrency=4,
+                 timeout=20, retries=2, http_cache=None, rate_limiter=None, base_url=DETAIL_BASE_URL):
+        """
+        Args:
+            proxy_pool: Optional ProxyPool to route requests through; proxies are
+                told how each request went
+            browser_pool: Optional BrowserPool for pages that need JavaScript
+            concurrency: Maximum requests in flight overall
+            per_host: Maximum requests in flight per host
+            browser_concurrency: Maximum pages rendered by the browser at once
+            timeout: Request timeout in seconds
+            retries: Extra attempts after a failed request
+            http_cache: Optional HttpCache plain HTTP requests go through
+            rate_limiter: Optional DomainRateLimiter each request waits for and
+                reports its status to
+            base_url: Site root relative company URLs are resolved against
+        """
+        self.proxy_pool = proxy_pool
+        self.browser_pool = browser_pool
+        self.per_host = per_host
+        self.timeout = timeout
+        self.retries = retries
+        self.http_cache = http_cache
+        self.rate_limiter = rate_limiter
+        self.base_url = base_url
+        self._slots = asyncio.Semaphore(concurrency)
+        self._browser_slots = asyncio.Semaphore(browser_concurrency)
+        self._hosts = defaultdict(lambda: asyncio.Semaphore(self.per_host))
+
+        # Requests block, so each one in flight gets a thread; the default executor is far smaller
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='enrich')
+        # One session shared by every thread; its connection pool is sized to the concurrency
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=concurrency)
+        self._session.mount('http://', adapter)
+        self._session.mount('https://', adapter)
+
+        self.fetched_http = 0
+        self.fetched_browser = 0
+        self.failed = 0
+
+    def close(self):
+        self._session.close()
+        self._executor.shutdown(wait=False)
+
+    async def enrich(self, companies, on_result=None):
+        """
+        Fetch the details of every company.
+
+        Args:
+            companies: Company records with a `url`
+            on_result: Optional callable given (slug, details) as each page completes
+
+        Returns:
+            Dictionary of slug to details for every page that could be parsed
+        """
+        companies = {company_key(company): company for company in companies if company_key(company)}
+        results = {}
+        started = time.monotonic()
+
+        async def enrich_one(slug, company):
+            details = await self.fetch_details(detail_url(company, self.base_url))
+            if details is None:
+                self.failed += 1
+                return
+            results[slug] = details
+            if on_result is not None:
+                on_result(slug, details)
+
+        await asyncio.gather(*[enrich_one(slug, company) for slug, company in companies.items()])
+
+        elapsed = time.monotonic() - started
+        logger.info(f"Enriched {len(results)} of {len(companies)} companies in {elapsed:.1f}s "
+                    f"({self.fetched_http} over HTTP, {self.fetched_browser} in the browser, {self.failed} failed)")
+        return results
+
+    async def fetch_details(self, url):
+        """
+        Fetch and parse one detail page.
+
+        Returns:
+            Dictionary of details, or None if the page could not be fetched or parsed
+        """
+        host = urlsplit(url).netloc
+        async with self._slots, self._hosts[host]:
+            page_html = await self._fetch_html(url)
+
+        if page_html is None:
+            # Missing (404) or unreachable: a browser would get the same answer
+            return None
+        details = parse_detail_page(page_html)
+        if details is not None:
+            self.fetched_http += 1
+            return details
+
+        # The HTML came back without the embedded props, so the page needs JavaScript
+        if self.browser_pool is None:
+            return None
+        async with self._browser_slots, self._hosts[host]:
+            page_html = await self._render_html(url)
+        details = parse_detail_page(page_html) if page_html is not None else None
+        if details is not None:
+            self.fetched_browser += 1
+        return details
+
+    async def _fetch_html(self, url):
+        for attempt in range(self.retries + 1):
+            if attempt:
+                inc("retries_total", kind="detail_page")
+            proxy = await self.proxy_pool.acquire() if self.proxy_pool is not None else None
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire(url)
+            started = time.monotonic()
+            try:
+                if self.http_cache is not None:
+                    get = partial(self.http_cache.request, self._session, 'GET', url)
+                else:
+                    get = partial(self._session.get, url)
+                with span("detail_request"):
+                    response = await asyncio.get_running_loop().run_in_executor(self._executor, partial(
+                        get,
+                        headers={'User-Agent': get_random_user_agent(), 'Accept': 'text/html'},
+                        proxies=parse_requests_proxy(proxy) if proxy else None,
+                        timeout=self.timeout
+                    ))
+            except requests.RequestException as e:
+                if proxy is not None:
+                    self.proxy_pool.report_failure(proxy)
+                logger.warning(f"Request for {url} failed: {e}")
+            else:
+                # A fresh cache hit never touched the proxy or the site, so it says nothing about either
+                if getattr(response, 'from_cache', False) and not response.revalidated:
+                    proxy = None
+                else:
+                    if not getattr(response, 'from_cache', False):
+                        inc("bytes_total", len(response.content), kind="detail")
+                    if self.rate_limiter is not None:
+                        self.rate_limiter.report(url, response.status_code, response.headers.get('Retry-After'))
+                if response.status_code == 200:
+                    if proxy is not None:
+                        self.proxy_pool.report_success(proxy, time.monotonic() - started)
+                    return response.text
+                if proxy is not None:
+                    if response.status_code in (403, 429):
+                        self.proxy_pool.report_failure(proxy, banned=True)
+                    else:
+                        # The proxy delivered the answer; the page itself is the problem
+                        self.proxy_pool.report_success(proxy, time.monotonic() - started)
+                if response.status_code not in RETRY_STATUSES and response.status_code != 403:
+                    logger.warning(f"Detail page {url} returned status {response.status_code}")
+                    return None
+
+            if attempt < self.retries:
+                await asyncio.sleep(2 ** attempt)
+        return None
+
+    async def _render_html(self, url):
+        proxy = await self.proxy_pool.acquire() if self.proxy_pool is not None else None
+        if proxy is None:
+            logger.warning(f"Rendering {url} needs a proxy for the browser context, skipping")
+            return None
+        try:
+            async with self.browser_pool.lease(proxy) as pooled:
+                page = await pooled.context.new_page()
+                try:
+                    await page.goto(url, wait_until='domcontentloaded', timeout=self.timeout * 1000)
+                    pooled.record_pages()
+                    return await page.content()
+                finally:
+                    await page.close()
+        except Exception as e:
+            self.proxy_pool.report_failure(proxy)
+            logger.warning(f"Rendering {url} failed: {e}")
+            return None
+
+
+async def enrich_companies(companies, proxy_pool=None, browser_pool=None, **options):
+    """
+    Fetch the detail pages of the given companies.
+
+    Args:
+        companies: Company records with a `url`
+        proxy_pool: Optional ProxyPool to route requests through
+        browser_pool: Optional BrowserPool for pages that need JavaScript
+        **options: Passed on to DetailEnricher (concurrency, per_host, timeout, ...)
+
+    Returns:
+        Dictionary of slug to details
+    """
+    enricher = DetailEnricher(proxy_pool=proxy_pool, browser_pool=browser_pool, **options)
+    try:
+        return await enricher.enrich(companies)
+    finally:
+        enricher.close()
@@ -0,0 +1,301 @@
+import hashlib
+import json
+import os
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import urlsplit
+
+# Fields that make up a company's fingerprint; url is the key, not part of the hash
+FINGERPRINT_FIELDS = ('name', 'location', 'description', 'batch', 'industries', 'logoUrl')
+
+# A "complete" crawl missing more than this share of known companies more likely
+# stopped short than saw them all removed, so its removals are not trusted
+MAX_REMOVED_FRACTION = 0.2
+
+
+def company_key(company):
+    """
+    Get the stable key for a company: the slug of its directory URL.
+
+    Args:
+        company: Company dictionary
+
+    Returns:
+        Slug string such as "airbnb", or the normalized name if there is no URL
+    """
+    path = urlsplit(company.get('url') or '').path.rstrip('/')
+    if path:
+        return path.rsplit('/', 1)[-1]
+    return normalize_text(company.get('name')).lower()
+
+
+def normalize_text(value):
+    """Collapse runs of whitespace and trim the ends."""
+    return ' '.join(str(value or '').split())
+
+
+def normalize_industries(industries):
+    """Normalize a company's industry list: whitespace collapsed, blanks and duplicates dropped, sorted."""
+    return sorted(filter(None, {normalize_text(industry) for industry in industries or []}))
+
+
+def normalize_company(company):
+    """
+    Normalize the fingerprinted fields so cosmetic differences do not count as changes.
+
+    Whitespace is collapsed, industries are de-duplicated and sorted, and the
+    logo URL loses its query string (CDN signatures change on every request).
+
+    Args:
+        company: Company dictionary
+
+    Returns:
+        Dictionary with one normalized value per fingerprinted field
+    """
+    normalized = {}
+    for name in FINGERPRINT_FIELDS:
+        value = company.get(name)
+        if name == 'industries':
+            normalized[name] = normalize_industries(value)
+        elif name == 'logoUrl':
+            parts = urlsplit(value or '')
+            normalized[name] = f"{parts.netloc}{parts.path}"
+        else:
+            normalized[name] = normalize_text(value)
+    return normalized
+
+
+def _digest(value, length=16):
+    encoded = json.dumps(value, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha1(encoded.encode('utf-8')).hexdigest()[:length]
+
+
+def fingerprint_company(company):
+    """
+    Hash a company's normalized fields.
+
+    Returns:
+        Tuple of (overall hash, dictionary of per-field hashes)
+    """
+    normalized = normalize_company(company)
+    return _digest(normalized), {name: _digest(value, 8) for name, value in normalized.items()}
+
+
+class FingerprintStore:
+    """
+    Per-company fingerprints from previous runs, persisted as compact JSON.
+
+    Each entry is keyed by company slug and holds the overall hash, per-field
+    hashes (so a changelog can say what changed), the name, and when the
+    company was first and last seen.
+    """
+
+    def __init__(self, path, entries=None):
+        self.path = Path(path)
+        self.entries = entries or {}
+
+    @classmethod
+    def load(cls, path):
+        """Load the store from disk, or start empty if the file does not exist."""
+        path = Path(path)
+        if not path.exists():
+            return cls(path)
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(path, json.load(f))
+
+    def save(self):
+        """Write the store atomically so a crash never leaves a half-written file."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.path.with_suffix(self.path.suffix + '.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, separators=(',', ':'))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def is_unchanged(self, company):
+        """Check whether a company is known and its fingerprint matches."""
+        entry = self.entries.get(company_key(company))
+        return entry is not None and entry['hash'] == fingerprint_company(company)[0]
+
+
+@dataclass
+class CompanyDelta:
+    """
+    What changed between the fingerprint store and a fresh scrape.
+
+    `removed` is only filled in when the scrape covered the whole directory;
+    after an early stop we cannot tell a removed company from one we did not
+    reach. `withheld_removals` counts removals dropped because there were
+    implausibly many of them.
+    """
+    added: list = field(default_factory=list)
+    changed: list = field(default_factory=list)
+    removed: list = field(default_factory=list)
+    unchanged_keys: list = field(default_factory=list)
+    complete: bool = True
+    withheld_removals: int = 0
+
+    @property
+    def has_changes(self):
+        return bool(self.added or self.changed or self.removed)
+
+    def summary(self):
+        return (f"{len(self.added)} added, {len(self.changed)} changed, {len(self.removed)} removed, "
+                f"{len(self.unchanged_keys)} unchanged")
+
+
+def compute_delta(companies, store, complete=True, max_removed_fraction=MAX_REMOVED_FRACTION):
+    """
+    Compare scraped companies against the fingerprint store.
+
+    Args:
+        companies: List of scraped company dictionaries
+        store: FingerprintStore from previous runs
+        complete: Whether the scrape covered the whole directory
+        max_removed_fraction: Share of known companies above which removals
+            are withheld and the delta is treated as partial (None to trust them all)
+
+    Returns:
+        CompanyDelta; `changed` items are {"company": ..., "fields": [...]}
+        and `removed` items are {"key": ..., "name": ...}
+    """
+    delta = CompanyDelta(complete=complete)
+    seen = set()
+    for company in companies:
+        key = company_key(company)
+        if not key or key in seen:
+            continue
+        seen.add(key)
+
+        overall, fields = fingerprint_company(company)
+        entry = store.entries.get(key)
+        if entry is None:
+            delta.added.append(company)
+        elif entry['hash'] != overall:
+            changed_fields = [name for name, value in fields.items() if entry['fields'].get(name) != value]
+            delta.changed.append({'company': company, 'fields': changed_fields})
+        else:
+            delta.unchanged_keys.append(key)
+
+    if complete:
+        delta.removed = [
+            {'key': key, 'name': entry.get('name', '')}
+            for key, entry in store.entries.items() if key not in seen
+        ]
+        if max_removed_fraction is not None and len(delta.removed) > max_removed_fraction * len(store):
+            delta.withheld_removals = len(delta.removed)
+            delta.removed = []
+            delta.complete = False
+    return delta
+
+
+def apply_delta(store, delta, seen_at=None):
+    """
+    Update the fingerprint store with a delta.
+
+    Args:
+        store: FingerprintStore to update in place
+        delta: CompanyDelta from `compute_delta`
+        seen_at: ISO timestamp of the scrape (defaults to now)
+    """
+    seen_at = seen_at or datetime.now().isoformat(timespec='seconds')
+    changed_companies = [item['company'] for item in delta.changed]
+    for company in delta.added + changed_companies:
+        key = company_key(company)
+        overall, fields = fingerprint_company(company)
+        first_seen = store.entries.get(key, {}).get('first_seen', seen_at)
+        store.entries[key] = {
+            'hash': overall,
+            'fields': fields,
+            'name': company.get('name', ''),
+            'first_seen': first_seen,
+            'last_seen': seen_at,
+        }
+    for key in delta.unchanged_keys:
+        store.entries[key]['last_seen'] = seen_at
+    for item in delta.removed:
+        store.entries.pop(item['key'], None)
+
+
+class KnownTerritory:
+    """
+    Stop condition for a crawl sorted newest-first: after `pages` consecutive
+    pages where every company is already known and unchanged, the rest of the
+    directory is older than anything that changed since the last run.
+    """
+
+    def __init__(self, store, pages=2):
+        self.store = store
+        self.pages = pages
+        self.streak = 0
+        self.triggered = False
+
+    def __call__(self, companies):
+        if companies and all(self.store.is_unchanged(company) for company in companies):
+            self.streak += 1
+        else:
+            self.streak = 0
+        self.triggered = self.streak >= self.pages
+        return self.triggered
+
+
+def write_delta(delta, output_dir, timestamp):
+    """
+    Write the added, changed and removed records of a run.
+
+    Args:
+        delta: CompanyDelta to write
+        output_dir: Directory to write into
+        timestamp: Run timestamp used in the file name
+
+    Returns:
+        Path of the written file
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    output_file = output_dir / f"ycombinator_delta_{timestamp}.json"
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump({
+            'timestamp': timestamp,
+            'complete': delta.complete,
+            'added': delta.added,
+            'changed': delta.changed,
+            'removed': delta.removed,
+        }, f, separators=(',', ':'))
+    return output_file
+
+
+def append_changelog(delta, output_dir, timestamp):
+    """
+    Append one compact line describing the run to changelog.jsonl.
+
+    Args:
+        delta: CompanyDelta to describe
+        output_dir: Directory holding the changelog
+        timestamp: Run timestamp
+
+    Returns:
+        Path of the changelog
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    changelog_file = output_dir / "changelog.jsonl"
+    entry = {
+        'timestamp': timestamp,
+        'complete': delta.complete,
+        'added': [company_key(company) for company in delta.added],
+        'changed': {company_key(item['company']): item['fields'] for item in delta.changed},
+        'removed': [item['key'] for item in delta.removed],
+        'unchanged': len(delta.unchanged_keys),
+    }
+    with open(changelog_file, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(entry, separators=(',', ':')) + '\n')
+    return changelog_file
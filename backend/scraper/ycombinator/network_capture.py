@@ -0,0 +1,345 @@
+import asyncio
+import json
+import logging
+import math
+import re
+from urllib.parse import parse_qsl, urlencode
+
+from utils.metrics import inc
+
+logger = logging.getLogger(__name__)
+
+# The directory queries Algolia's multi-query endpoint for every results page
+SEARCH_QUERIES_PATTERN = re.compile(r'algolia\.net/1/indexes/[^/]+/queries')
+
+# Algolia refuses larger pages
+MAX_PAGE_SIZE = 1000
+
+# Algolia only pages through the first this many hits of a query (its default paginationLimitedTo)
+PAGINATION_LIMIT = 1000
+
+# Facet a capped search is split on; every company has exactly one batch
+SPLIT_FACET = 'batch'
+
+# Replica of the company index sorted by launch date, newest first
+LAUNCH_DATE_INDEX = 'YCCompany_By_Launch_Date_production'
+
+# Headers Playwright or the network stack set on their own
+_SKIPPED_HEADERS = {'content-length', 'host', 'connection', 'accept-encoding'}
+
+
+class SearchRequestError(ValueError):
+    """Raised when the search endpoint answers a replayed request with an error status."""
+
+    def __init__(self, message, status, retry_after=None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+    @property
+    def banned(self):
+        """Whether the status means the proxy was refused rather than the request failing."""
+        return self.status in (403, 429)
+
+
+def company_from_hit(hit):
+    """
+    Convert an Algolia company hit into the same shape the DOM extraction returns.
+
+    Args:
+        hit: Dictionary from the `hits` list of a search response
+
+    Returns:
+        Company dictionary with name, url, location, description, batch,
+        industries and logoUrl
+    """
+    slug = hit.get('slug') or ''
+    industries = hit.get('industries')
+    if not isinstance(industries, list):
+        industries = [hit['industry']] if hit.get('industry') else []
+
+    return {
+        'name': (hit.get('name') or '').strip(),
+        'url': f"/companies/{slug}" if slug else '',
+        'location': (hit.get('all_locations') or hit.get('location') or '').strip(),
+        'description': (hit.get('one_liner') or '').strip(),
+        'batch': (hit.get('batch') or '').strip(),
+        'industries': [industry.strip() for industry in industries if industry],
+        'logoUrl': hit.get('small_logo_thumb_url') or '',
+    }
+
+
+def extract_companies_from_payload(payload):
+    """
+    Pull every company out of a search response payload.
+
+    Handles both the multi-query shape ({"results": [{"hits": [...]}]}) and a
+    single query response ({"hits": [...]}).
+
+    Args:
+        payload: Decoded JSON response
+
+    Returns:
+        List of company dictionaries
+    """
+    if isinstance(payload, dict) and isinstance(payload.get('results'), list):
+        results = payload['results']
+    else:
+        results = [payload]
+
+    companies = []
+    for result in results:
+        if not isinstance(result, dict):
+            continue
+        for hit in result.get('hits') or []:
+            if isinstance(hit, dict) and (hit.get('slug') or hit.get('name')):
+                companies.append(company_from_hit(hit))
+    return companies
+
+
+class SearchTemplate:
+    """
+    A captured search request that can be replayed for any page.
+
+    Only the query that returns hits is kept; facet-count queries the
+    directory sends alongside it are dropped.
+    """
+
+    def __init__(self, url, headers, index_name, params):
+        self.url = url
+        self.headers = headers
+        self.index_name = index_name
+        self.params = params
+
+    @classmethod
+    def from_request(cls, request):
+        """
+        Build a template from an intercepted Playwright request.
+
+        Args:
+            request: Playwright request for the search endpoint
+
+        Returns:
+            SearchTemplate, or None if the request carries no hit query
+        """
+        try:
+            body = json.loads(request.post_data or '')
+        except ValueError:
+            return None
+
+        queries = body.get('requests') if isinstance(body, dict) else None
+        if not queries:
+            return None
+
+        for query in queries:
+            params = dict(parse_qsl(query.get('params', ''), keep_blank_values=True))
+            if params.get('hitsPerPage', '1') != '0':
+                headers = {
+                    name: value for name, value in request.headers.items()
+                    if name.lower() not in _SKIPPED_HEADERS
+                }
+                return cls(request.url, headers, query.get('indexName'), params)
+        return None
+
+    def build_body(self, page_number, page_size=MAX_PAGE_SIZE, index_name=None, facet_filter=None, facets=None):
+        """
+        Build the request body for a 1-based page number.
+
+        Args:
+            page_number: Page to request, starting at 1
+            page_size: Hits per page (capped at MAX_PAGE_SIZE)
+            index_name: Optional index to query instead of the captured one
+            facet_filter: Optional "facet:value" filter added to the captured ones
+            facets: Optional facet names to return hit counts for
+
+        Returns:
+            JSON string to POST to the search endpoint
+        """
+        params = dict(self.params)
+        params['page'] = str(page_number - 1)
+        params['hitsPerPage'] = str(min(page_size, MAX_PAGE_SIZE))
+        if facet_filter:
+            params['facetFilters'] = json.dumps(_facet_filters(params.get('facetFilters')) + [facet_filter])
+        if facets:
+            params['facets'] = json.dumps(list(facets))
+            params['maxValuesPerFacet'] = str(PAGINATION_LIMIT)
+        return json.dumps({
+            'requests': [{
+                'indexName': index_name or self.index_name,
+                'params': urlencode(params),
+            }]
+        })
+
+
+def _facet_filters(value):
+    """Decode a captured `facetFilters` parameter into a list, whichever form the directory sent."""
+    if not value:
+        return []
+    try:
+        filters = json.loads(value)
+    except ValueError:
+        return [value]
+    return filters if isinstance(filters, list) else [filters]
+
+
+class SearchResponseCapture:
+    """
+    Listens to a page's responses and remembers the first search request that returned hits.
+
+    Attach it before navigating so the initial results request is not missed.
+    """
+
+    def __init__(self, page, pattern=SEARCH_QUERIES_PATTERN):
+        self.page = page
+        self.pattern = pattern
+        self.template = None
+        self.companies = []
+        self._captured = asyncio.Event()
+
+    def attach(self):
+        self.page.on('response', self._on_response)
+
+    def detach(self):
+        self.page.remove_listener('response', self._on_response)
+
+    async def _on_response(self, response):
+        if self._captured.is_set() or not self.pattern.search(response.url):
+            return
+        if response.request.method != 'POST' or not response.ok:
+            return
+
+        try:
+            payload = await response.json()
+        except Exception:
+            return
+
+        companies = extract_companies_from_payload(payload)
+        template = SearchTemplate.from_request(response.request)
+        if companies and template is not None:
+            self.template = template
+            self.companies = companies
+            self._captured.set()
+
+    async def wait(self, timeout=10):
+        """
+        Wait for a search response with hits.
+
+        Args:
+            timeout: Seconds to wait
+
+        Returns:
+            The captured SearchTemplate, or None if nothing arrived in time
+        """
+        try:
+            await asyncio.wait_for(self._captured.wait(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        return self.template
+
+
+async def _post_search(request_context, template, body, description):
+    """POST a search body and decode the first result of the response."""
+    response = await request_context.post(template.url, headers=template.headers, data=body)
+    if not response.ok:
+        raise SearchRequestError(
+            f"Search request for {description} failed with status {response.status}", response.status,
+            response.headers.get('retry-after')
+        )
+
+    body = await response.body()
+    inc("bytes_total", len(body), kind="search")
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        payload = None
+    if not isinstance(payload, dict):
+        raise SearchRequestError(f"Search response for {description} is not a JSON object", response.status)
+    results = payload.get('results') or [payload]
+    return payload, results[0] if isinstance(results[0], dict) else {}
+
+
+async def fetch_search_page(request_context, template, page_number, page_size=MAX_PAGE_SIZE, index_name=None,
+                            facet_filter=None):
+    """
+    Replay the captured search for one page.
+
+    Args:
+        request_context: Playwright APIRequestContext (e.g. `context.request`,
+            which goes through the context's proxy)
+        template: SearchTemplate captured from the directory
+        page_number: Page to fetch, starting at 1
+        page_size: Hits per page
+        index_name: Optional index to query instead of the captured one
+        facet_filter: Optional "facet:value" filter narrowing the query, see `split_search_pages`
+
+    Returns:
+        Tuple of (list of company dictionaries, total number of pages,
+        whether the pages stop short of every hit). Algolia only paginates
+        through its first PAGINATION_LIMIT hits, so a truncated result set
+        cannot be crawled to the end with this query.
+
+    Raises:
+        SearchRequestError: If the search endpoint returns an error or a body that is not JSON
+    """
+    description = f"page {page_number}" + (f" of {facet_filter}" if facet_filter else "")
+    payload, first_result = await _post_search(
+        request_context, template, template.build_body(page_number, page_size, index_name, facet_filter), description
+    )
+    total_pages = first_result.get('nbPages', 1)
+
+    # Algolia caps how deep an index can be paginated
+    total_hits = first_result.get('nbHits') or 0
+    hits_per_page = first_result.get('hitsPerPage') or 0
+    truncated = bool(hits_per_page) and total_hits > total_pages * hits_per_page
+    if truncated and page_number == 1:
+        logger.warning(f"Search {'for ' + facet_filter + ' ' if facet_filter else ''}only exposes "
+                       f"{total_pages * hits_per_page} of {total_hits} companies")
+
+    return extract_companies_from_payload(payload), total_pages, truncated
+
+
+async def fetch_facet_counts(request_context, template, facet=SPLIT_FACET, index_name=None):
+    """
+    Count the captured search's hits per value of one facet, without fetching any hits.
+
+    Returns:
+        Tuple of (dictionary of facet value to hit count, total number of hits)
+
+    Raises:
+        SearchRequestError: If the search endpoint returns an error or a body that is not JSON
+    """
+    _, first_result = await _post_search(
+        request_context, template, template.build_body(1, 0, index_name, facets=[facet]), f"{facet} counts"
+    )
+    counts = (first_result.get('facets') or {}).get(facet) or {}
+    return counts, first_result.get('nbHits') or 0
+
+
+def split_search_pages(counts, total_hits, page_size=MAX_PAGE_SIZE, facet=SPLIT_FACET):
+    """
+    Plan a crawl of a capped search as one query per facet value.
+
+    Each value's hits are paged through on their own, so every company is
+    reachable as long as no value has more than PAGINATION_LIMIT hits.
+    Values are taken in sorted order, so the same counts always give the
+    same page numbers and a resumed crawl skips the right pages.
+
+    Args:
+        counts: Dictionary of facet value to hit count, from `fetch_facet_counts`
+        total_hits: Hits of the unsplit search
+        page_size: Hits per page
+        facet: Facet the counts are for
+
+    Returns:
+        List of ("facet:value" filter, 1-based page number within the value)
+        tuples, one per page of the split crawl; None if the split cannot
+        reach every hit (a value over the cap, or hits with no value)
+    """
+    page_size = min(page_size, MAX_PAGE_SIZE)
+    if sum(counts.values()) < total_hits or any(count > PAGINATION_LIMIT for count in counts.values()):
+        return None
+    return [
+        (f"{facet}:{value}", page_number)
+        for value in sorted(counts)
+        for page_number in range(1, math.ceil(counts[value] / page_size) + 1)
+    ]
@@ -0,0 +1,225 @@
+import json
+import os
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+
+from scraper.ycombinator.incremental import company_key
+
+
+@dataclass
+class ScrapedPage:
+    """
+    One page of results as it comes off a worker.
+
+    Attributes:
+        number: 1-based page number within the engine's pagination
+        companies: Companies on the page
+        proxy: Proxy dictionary of the worker that scraped it
+        engine: Engine that produced the page, "dom" or "network"
+        truncated: Whether the engine's pagination stops short of the whole
+            directory, so crawling every page does not see every company
+    """
+    number: int
+    companies: list
+    proxy: dict
+    engine: str
+    truncated: bool = False
+
+    @property
+    def cursor(self):
+        """Position to continue from: the search `page` parameter, or the DOM page number."""
+        return self.number - 1 if self.engine == "network" else self.number
+
+
+def load_checkpoint(path):
+    """
+    Load a checkpoint written by NdjsonSink.
+
+    Returns:
+        Checkpoint dictionary, or None if there is none
+    """
+    path = Path(path)
+    if not path.exists():
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _write_json_atomically(path, data):
+    temp_path = path.with_suffix(path.suffix + '.tmp')
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, separators=(',', ':'))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+
+class NdjsonSink:
+    """
+    Appends scraped pages to an NDJSON file and checkpoints after every page.
+
+    Each page is written, flushed and fsynced before the checkpoint is
+    atomically replaced, so after a crash the checkpoint never claims more
+    than the file holds. The checkpoint records the file offset it covers;
+    resuming truncates anything written after it. Companies already written
+    (by slug) are skipped, which also drops duplicates across pages.
+    """
+
+    def __init__(self, output_path, checkpoint_path, checkpoint):
+        self.output_path = Path(output_path)
+        self.checkpoint_path = Path(checkpoint_path)
+        self.checkpoint = checkpoint
+        self.completed_pages = set(checkpoint['completed_pages'])
+        self.seen = set()
+        self._file = None
+
+    @classmethod
+    def create(cls, output_path, checkpoint_path, engine, page_size=None, index_name=None):
+        """
+        Start a new run.
+
+        Args:
+            output_path: NDJSON file to write
+            checkpoint_path: Checkpoint file to keep up to date
+            engine: Engine the run was started with
+            page_size: Page size of the network engine
+            index_name: Search index of the network engine
+
+        Returns:
+            NdjsonSink
+        """
+        output_path = Path(output_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        sink = cls(output_path, checkpoint_path, {
+            'status': 'running',
+            'output': str(output_path),
+            'engine': engine,
+            'page_size': page_size,
+            'index_name': index_name,
+            'completed_pages': [],
+            'last_page': None,
+            'cursor': None,
+            'proxy': None,
+            'records': 0,
+            'offset': 0,
+            'started_at': datetime.now().isoformat(timespec='seconds'),
+            'updated_at': None,
+        })
+        sink._file = open(output_path, 'wb')
+        sink._save_checkpoint()
+        return sink
+
+    @classmethod
+    def resume(cls, checkpoint_path):
+        """
+        Continue the run recorded in a checkpoint.
+
+        Args:
+            checkpoint_path: Checkpoint file of an unfinished run
+
+        Returns:
+            NdjsonSink positioned after the last checkpointed page
+
+        Raises:
+            ValueError: If there is no unfinished run to resume
+        """
+        checkpoint = load_checkpoint(checkpoint_path)
+        if checkpoint is None or checkpoint.get('status') != 'running':
+            raise ValueError(f"No unfinished run to resume in {checkpoint_path}")
+
+        sink = cls(checkpoint['output'], checkpoint_path, checkpoint)
+        sink._file = open(sink.output_path, 'r+b' if sink.output_path.exists() else 'w+b')
+
+        # Drop anything written after the last checkpoint, then remember what is already there
+        sink._file.truncate(checkpoint['offset'])
+        sink._file.seek(0)
+        for line in sink._file:
+            sink.seen.add(company_key(json.loads(line)))
+        sink._file.seek(checkpoint['offset'])
+        return sink
+
+    @property
+    def records(self):
+        return self.checkpoint['records']
+
+    def write_page(self, scraped_page):
+        """
+        Append a page's new companies and checkpoint it.
+
+        Args:
+            scraped_page: ScrapedPage from the scraper
+
+        Returns:
+            Number of companies written
+        """
+        # A fallback to another engine renumbers the pages, so earlier page numbers no longer apply
+        if scraped_page.engine != self.checkpoint['engine']:
+            self.checkpoint['engine'] = scraped_page.engine
+            self.completed_pages = set()
+
+        written = 0
+        lines = []
+        for company in scraped_page.companies:
+            key = company_key(company)
+            if key in self.seen:
+                continue
+            self.seen.add(key)
+            lines.append(json.dumps(company, ensure_ascii=False, separators=(',', ':')))
+            written += 1
+
+        if lines:
+            self._file.write(('\n'.join(lines) + '\n').encode('utf-8'))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+        proxy = scraped_page.proxy
+        self.completed_pages.add(scraped_page.number)
+        self.checkpoint.update({
+            'completed_pages': sorted(self.completed_pages),
+            'last_page': scraped_page.number,
+            'cursor': scraped_page.cursor,
+            'proxy': f"{proxy['proxy_address']}:{proxy['port']}" if proxy else None,
+            'records': self.checkpoint['records'] + written,
+            'offset': self._file.tell(),
+        })
+        self._save_checkpoint()
+        return written
+
+    def finish(self):
+        """Mark the run complete so it is not resumed."""
+        self.checkpoint['status'] = 'complete'
+        self._save_checkpoint()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _save_checkpoint(self):
+        self.checkpoint['updated_at'] = datetime.now().isoformat(timespec='seconds')
+        _write_json_atomically(self.checkpoint_path, self.checkpoint)
+
+
+def export_json_snapshot(ndjson_path, json_path):
+    """
+    Convert an NDJSON run into a JSON array file one record at a time.
+
+    Args:
+        ndjson_path: NDJSON file written by NdjsonSink
+        json_path: JSON file to write
+
+    Returns:
+        Number of records written
+    """
+    count = 0
+    with open(ndjson_path, 'r', encoding='utf-8') as source, open(json_path, 'w', encoding='utf-8') as target:
+        target.write('[')
+        for line in source:
+            line = line.strip()
+            if not line:
+                continue
+            target.write((',\n' if count else '\n') + line)
+            count += 1
+        target.write('\n]\n')
+    return count
@@ -1,20 +1,31 @@
 import asyncio
 import json
+import logging
+import re
 import time
-import random
-import requests
+from functools import partial
 from datetime import datetime
 from pathlib import Path
-from playwright.async_api import async_playwright
 import sys
 import os
 
 # Add the parent directory to sys.path to import from backend.utils
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
-from utils.proxy_manager import get_random_proxy, parse_proxy, get_proxy_info_string, get_random_user_agent, fetch_proxies
+from utils.proxy_manager import get_proxy_info_string, fetch_all_proxies, ProxyPool, WEBSHARE_PROXY_LIST_URL
+from utils.page_readiness import run_and_wait_for_results, ReadinessStats, PageNotReadyError
+from utils.browser_pool import BrowserPool
+from utils.metrics import REGISTRY, inc, span
+from scraper.ycombinator.network_capture import (
+    SearchResponseCapture, SearchRequestError, fetch_search_page, fetch_facet_counts, split_search_pages, MAX_PAGE_SIZE,
+    LAUNCH_DATE_INDEX, SPLIT_FACET
+)
+from scraper.ycombinator.streaming import ScrapedPage, NdjsonSink, export_json_snapshot
+from scraper.ycombinator.enrich import enrich_companies, merge_details
+from scraper.ycombinator.incremental import (
+    FingerprintStore, KnownTerritory, company_key, compute_delta, apply_delta, write_delta, append_changelog
+)
 
 from dotenv import load_dotenv
-import os
 
 # Fix the path to the .env file - use absolute path
 # The current approach with '../.env' is relative and may not work correctly
@@ -23,193 +34,974 @@ env_path = os.path.join(base_dir, '.env')
 load_dotenv(dotenv_path=env_path)
 
 webshare_api_key = os.getenv("WEBSHARE_API_KEY")
-print(f"webshare_api_key: {webshare_api_key}")
 
 # If the key is still None, try to load from a different location
 if webshare_api_key is None:
     # Try loading from the current directory
     load_dotenv()
     webshare_api_key = os.getenv("WEBSHARE_API_KEY")
-    print(f"Retrying with default .env path, webshare_api_key: {webshare_api_key}")
 
+logger = logging.getLogger(__name__)
+
+REGISTRY.describe("records_total", "counter", "Company records scraped")
+REGISTRY.describe("pages_total", "counter", "Result pages scraped")
+REGISTRY.describe("retries_total", "counter", "Requests retried after a failure")
+
+
+# Selectors for the YCombinator companies directory
+COMPANIES_URL = 'https://www.ycombinator.com/companies'
+ALL_BATCHES_CHECKBOX = 'div._facet_i9oky_85 h4:has-text("Batch") ~ label:has-text("All batches") input[type="checkbox"]'
+SHOW_RESULTS_BUTTON = 'div._showResults_i9oky_169 button'
+RESULTS_CONTAINER_SELECTOR = 'div._section_i9oky_163._results_i9oky_343'
+COMPANY_CARD_SELECTOR = 'div._section_i9oky_163._results_i9oky_343 a._company_i9oky_355'
+PAGINATION_SELECTOR = 'nav.pagination'
+NEXT_PAGE_BUTTON = 'button.pagination-next'
+
+# The directory loads each page of results from Algolia
+RESULTS_RESPONSE_PATTERN = re.compile(r'algolia\.net/1/indexes/')
+
+# Extraction engines: read the rendered cards, or parse the search responses directly
+ENGINES = ("dom", "network")
+
+# Extra attempts at a search page the endpoint answered with a server error
+SEARCH_PAGE_RETRIES = 2
+
+# Largest search page of an early-stopping crawl; the pages under Algolia's
+# pagination cap must leave room for a streak of known pages to end it
+EARLY_STOP_PAGE_SIZE = 100
 
-async def scrape_ycombinator_companies(proxies, limit_pages=None):
+# Script run inside the page to extract every company card on the current page
+EXTRACT_COMPANIES_SCRIPT = '''() => {
+    const companyElements = document.querySelectorAll('div._section_i9oky_163._results_i9oky_343 a._company_i9oky_355');
+    const companies = [];
+    
+    companyElements.forEach(company => {
+        // Extract company URL
+        const url = company.getAttribute('href');
+        
+        // Extract company name
+        const nameElement = company.querySelector('span._coName_i9oky_470');
+        const name = nameElement ? nameElement.textContent.trim() : '';
+        
+        // Extract company location
+        const locationElement = company.querySelector('span._coLocation_i9oky_486');
+        const location = locationElement ? locationElement.textContent.trim() : '';
+        
+        // Extract company description
+        const descriptionElement = company.querySelector('span._coDescription_i9oky_495');
+        const description = descriptionElement ? descriptionElement.textContent.trim() : '';
+        
+        // Extract batch information
+        const batchElement = company.querySelector('._pillWrapper_i9oky_33 a[href^="/companies?batch="] span');
+        const batch = batchElement ? batchElement.textContent.replace(/^\\S+\\s+/, '') : ''; // Remove YC logo
+        
+        // Extract industry tags
+        const industryElements = company.querySelectorAll('._pillWrapper_i9oky_33 a[href^="/companies?industry="] span');
+        const industries = Array.from(industryElements).map(el => el.textContent.trim());
+        
+        // Extract logo URL
+        const logoElement = company.querySelector('img');
+        const logoUrl = logoElement ? logoElement.getAttribute('src') : '';
+        
+        // Add the company data to the array
+        companies.push({
+            name,
+            url,
+            location,
+            description,
+            batch,
+            industries,
+            logoUrl
+        });
+    });
+    
+    return companies;
+}'''
+
+
+def report_directory_responses(page, rate_limiter, url=COMPANIES_URL):
     """
-    Scrape YCombinator companies using proxies.
+    Report the statuses of a page's document and search responses to a rate limiter.
+    
+    They are reported under the directory's domain, the one DOM workers
+    acquire their slots for, so throttling answers from either slow the crawl.
     
     Args:
-        proxies: List of proxy dictionaries (required)
-        limit_pages: Optional limit on number of pages to scrape
+        page: Playwright page
+        rate_limiter: DomainRateLimiter (or anything with the same `report`)
+        url: Directory URL whose domain the statuses count against
+    """
+    def on_response(response):
+        if response.request.resource_type == "document" or RESULTS_RESPONSE_PATTERN.search(response.url):
+            rate_limiter.report(url, response.status, response.headers.get("retry-after"))
+    
+    page.on("response", on_response)
+
+
+async def open_companies_directory(page, url=COMPANIES_URL):
+    """
+    Navigate to the companies directory with "All batches" selected and wait
+    for the first page of results.
+    
+    Args:
+        page: Playwright page to navigate
+        url: Directory URL, e.g. a local fixture's when benchmarking
+    """
+    # Navigate to the companies page
+    with span("navigate", step="directory"):
+        await page.goto(url)
+    logger.info('Navigated to YCombinator companies page')
+    
+    # Click on "All batches" checkbox if it's not already checked
+    all_batches_checkbox = page.locator(ALL_BATCHES_CHECKBOX)
+    
+    is_checked = await all_batches_checkbox.is_checked()
+    if not is_checked:
+        await all_batches_checkbox.click()
+        logger.info('Clicked "All batches" checkbox')
+    else:
+        logger.info('"All batches" checkbox is already checked')
+    
+    # Click the "Show X companies" button to load the results
+    show_results_button = page.locator(SHOW_RESULTS_BUTTON)
+    await show_results_button.click()
+    logger.info('Clicked "Show companies" button')
+    
+    # Wait for the results to load
+    with span("readiness_wait", step="first_results"):
+        await page.wait_for_selector(COMPANY_CARD_SELECTOR, timeout=30000)
+    logger.info('Results loaded successfully')
+
+
+async def scrape_current_page(page):
+    """
+    Extract every company card on the page's current results page.
+    
+    Args:
+        page: Playwright page showing directory results
         
     Returns:
         List of company dictionaries
     """
-    if not proxies:
-        raise ValueError("Proxies are required for scraping")
+    with span("extract", engine="dom"):
+        return await page.evaluate(EXTRACT_COMPANIES_SCRIPT)
+
+
+async def get_total_pages(page):
+    """
+    Read the total number of result pages from the pagination bar.
+    
+    Args:
+        page: Playwright page showing directory results
+        
+    Returns:
+        Number of result pages (1 if the results are not paginated)
+    """
+    pagination = page.locator(PAGINATION_SELECTOR)
+    if await pagination.count() == 0:
+        return 1
+    
+    pagination_text = await pagination.text_content()
+    match = re.search(r'of (\d+)', pagination_text or '')
+    return int(match.group(1)) if match else 1
+
+
+async def go_to_next_page(page, timeouts=None, stats=None, step="pagination"):
+    """
+    Click the "next" button and wait until the next page of results is rendered.
+    
+    Args:
+        page: Playwright page showing directory results
+        timeouts: Optional ReadinessTimeouts for the wait
+        stats: Optional ReadinessStats the wait is recorded in
+        step: Name the wait is recorded under
         
-    async with async_playwright() as p:
-        browser_options = {}
+    Returns:
+        ReadinessResult describing how the wait ended
         
-        # Configure proxy
-        try:
-            proxy_dict = get_random_proxy(proxies)
-            proxy_config = parse_proxy(proxy_dict)
-            browser_options["proxy"] = proxy_config
-            print(f"Using proxy: {get_proxy_info_string(proxy_dict)}")
-        except Exception as e:
-            raise ValueError(f"Error setting up proxy: {e}")
-        
-        # Launch browser with proxy
-        browser = await p.chromium.launch(headless=False, **browser_options)  # Set to True for production
-        
-        # Create a new context with a random user agent
-        context = await browser.new_context(
-            user_agent=get_random_user_agent()
+    Raises:
+        PageNotReadyError: If the results did not change in time
+    """
+    with span("readiness_wait", step=step):
+        return await run_and_wait_for_results(
+            page,
+            lambda: page.locator(NEXT_PAGE_BUTTON).click(),
+            RESULTS_CONTAINER_SELECTOR,
+            COMPANY_CARD_SELECTOR,
+            response_pattern=RESULTS_RESPONSE_PATTERN,
+            timeouts=timeouts,
+            stats=stats,
+            step=step
         )
+
+
+async def skip_to_page(page, current_page, target_page, timeouts=None, stats=None):
+    """
+    Click through the pagination bar without extracting anything.
+    
+    The directory only paginates through its "next" button, so a worker whose
+    range starts further in has to walk there first.
+    
+    Args:
+        page: Playwright page showing directory results
+        current_page: Page number currently displayed
+        target_page: Page number to stop on
+        timeouts: Optional ReadinessTimeouts for each page change
+        stats: Optional ReadinessStats the waits are recorded in
+    """
+    while current_page < target_page:
+        await go_to_next_page(page, timeouts=timeouts, stats=stats, step="skip")
+        current_page += 1
+
+
+def split_pages(page_numbers, workers):
+    """
+    Split page numbers into contiguous, non-empty chunks.
+    
+    Args:
+        page_numbers: Sorted page numbers to scrape
+        workers: Number of workers to split the pages between
         
-        # Create a new page from the context
-        page = await context.new_page()
+    Returns:
+        List of page number lists, one per worker that has work
+    """
+    page_numbers = list(page_numbers)
+    workers = max(1, min(workers, len(page_numbers)))
+    base, extra = divmod(len(page_numbers), workers)
+    
+    chunks = []
+    start = 0
+    for index in range(workers):
+        size = base + (1 if index < extra else 0)
+        if size:
+            chunks.append(page_numbers[start:start + size])
+        start += size
+    return chunks
+
+
+def merge_page_results(page_results):
+    """
+    Merge per-page results into a single list in page order, dropping duplicates.
+    
+    A company can show up on two pages when the directory shifts while it is
+    being crawled; the first occurrence wins.
+    
+    Args:
+        page_results: Dictionary mapping page number to a list of companies
         
-        try:
-            # Navigate to the companies page
-            await page.goto('https://www.ycombinator.com/companies')
-            print('Navigated to YCombinator companies page')
-            
-            # Click on "All batches" checkbox if it's not already checked
-            all_batches_checkbox = page.locator('div._facet_i9oky_85 h4:has-text("Batch") ~ label:has-text("All batches") input[type="checkbox"]')
+    Returns:
+        List of unique company dictionaries
+    """
+    seen = set()
+    merged = []
+    for page_number in sorted(page_results):
+        for company in page_results[page_number]:
+            key = company.get('url') or company.get('name')
+            if key in seen:
+                continue
+            seen.add(key)
+            merged.append(company)
+    return merged
+
+
+def _describe_pages(chunks):
+    return [f"{chunk[0]}-{chunk[-1]}" if len(chunk) > 1 else str(chunk[0]) for chunk in chunks]
+
+
+async def _scrape_dom_page_list(pooled, page_numbers, worker_id, emit, page=None, timeouts=None, stats=None,
+                                stop_condition=None, proxy_pool=None, directory_url=COMPANIES_URL, rate_limiter=None):
+    """
+    Scrape the given result pages in one browser context, in ascending order.
+    
+    Pages in between are clicked through without being extracted.
+    
+    Args:
+        pooled: PooledContext for this worker
+        page_numbers: Sorted page numbers to scrape
+        worker_id: Worker number used in log messages
+        emit: Coroutine function called with each ScrapedPage
+        page: Optional page that already shows page 1 of the results
+        timeouts: Optional ReadinessTimeouts for page changes
+        stats: Optional ReadinessStats page changes are recorded in
+        stop_condition: Optional callable given each page's companies; returning
+            True stops the worker early
+        proxy_pool: Optional ProxyPool told how each page went through the worker's proxy
+        directory_url: URL a new page opens the directory at
+        rate_limiter: Optional DomainRateLimiter every page change waits for
+        
+    Returns:
+        True if the stop condition ended the crawl
+    """
+    if page is None:
+        page = await pooled.context.new_page()
+        if rate_limiter is not None:
+            report_directory_responses(page, rate_limiter, directory_url)
+            await rate_limiter.acquire(directory_url)
+        await open_companies_directory(page, directory_url)
+    
+    current_page = 1
+    for page_number in page_numbers:
+        started = time.monotonic()
+        if page_number > current_page:
+            if rate_limiter is not None:
+                await rate_limiter.acquire(directory_url)
+            if page_number - 1 > current_page:
+                await skip_to_page(page, current_page, page_number - 1, timeouts=timeouts, stats=stats)
+                logger.info(f"[worker {worker_id}] Skipped ahead to page {page_number - 1}")
             
-            is_checked = await all_batches_checkbox.is_checked()
-            if not is_checked:
-                await all_batches_checkbox.click()
-                print('Clicked "All batches" checkbox')
+            # Click the next page button and wait for the new results to render
+            try:
+                readiness = await go_to_next_page(page, timeouts=timeouts, stats=stats)
+            except PageNotReadyError as e:
+                if proxy_pool is not None:
+                    proxy_pool.report_failure(pooled.proxy_dict)
+                raise PageNotReadyError(f"Page {page_number} did not load: {e}") from e
+            current_page = page_number
+            logger.info(f"[worker {worker_id}] Navigated to page {page_number} ({readiness.signal} after {readiness.elapsed_ms:.0f} ms)")
+        
+        # Scrape the current page
+        companies = await scrape_current_page(page)
+        pooled.record_pages()
+        if proxy_pool is not None:
+            proxy_pool.report_success(pooled.proxy_dict, time.monotonic() - started)
+        logger.info(f"[worker {worker_id}] Scraped {len(companies)} companies from page {page_number}")
+        await emit(ScrapedPage(page_number, companies, pooled.proxy_dict, "dom"))
+        
+        if stop_condition is not None and stop_condition(companies):
+            logger.info(f"[worker {worker_id}] Stopping after page {page_number}")
+            return True
+    
+    return False
+
+
+async def _fetch_search_page_list(pooled, template, page_numbers, worker_id, emit, page_size, index_name=None,
+                                  stop_condition=None, proxy_pool=None, rate_limiter=None, search_pages=None):
+    """
+    Fetch the given search pages through one context's proxy.
+    
+    Args:
+        search_pages: Optional plan from `split_search_pages`; page numbers
+            then index into it instead of the unsplit search's pagination
+    
+    Returns:
+        True if the stop condition ended the crawl
+    """
+    for page_number in page_numbers:
+        facet_filter, search_page = search_pages[page_number - 1] if search_pages else (None, page_number)
+        companies, _, truncated = await _search_reporting(
+            pooled, template, partial(fetch_search_page, template=template, page_number=search_page,
+                                      page_size=page_size, index_name=index_name, facet_filter=facet_filter),
+            proxy_pool, rate_limiter
+        )
+        pooled.record_pages()
+        logger.info(f"[worker {worker_id}] Fetched {len(companies)} companies from search page {page_number}")
+        await emit(ScrapedPage(page_number, companies, pooled.proxy_dict, "network", truncated))
+        
+        if stop_condition is not None and stop_condition(companies):
+            logger.info(f"[worker {worker_id}] Stopping after search page {page_number}")
+            return True
+    
+    return False
+
+
+async def _search_reporting(pooled, template, request, proxy_pool=None, rate_limiter=None):
+    """
+    Send one search request and tell the proxy pool how the worker's proxy did,
+    and the rate limiter (if any) how the search endpoint answered.
+    
+    Server errors and unreadable bodies are retried up to SEARCH_PAGE_RETRIES
+    times with a growing pause; other client errors are not, and neither is
+    a refused proxy (403/429), as retrying through it only digs the ban deeper.
+    
+    Args:
+        pooled: PooledContext whose request context (and proxy) the search goes through
+        template: SearchTemplate being replayed
+        request: Coroutine function given the request context, e.g. a partial of `fetch_search_page`
+        proxy_pool: Optional ProxyPool
+        rate_limiter: Optional DomainRateLimiter
+    
+    Returns:
+        Whatever `request` returns
+    """
+    for attempt in range(SEARCH_PAGE_RETRIES + 1):
+        if attempt:
+            inc("retries_total", kind="search_page")
+            await asyncio.sleep(attempt)
+        if rate_limiter is not None:
+            await rate_limiter.acquire(template.url)
+        started = time.monotonic()
+        try:
+            with span("extract", engine="network"):
+                result = await request(pooled.context.request)
+        except SearchRequestError as e:
+            if rate_limiter is not None:
+                rate_limiter.report(template.url, e.status, e.retry_after)
+            if proxy_pool is not None:
+                proxy_pool.report_failure(pooled.proxy_dict, banned=e.banned)
+            if e.banned or 400 <= e.status < 500 or attempt == SEARCH_PAGE_RETRIES:
+                raise
+            logger.warning(f"{e}, retrying")
+            continue
+        if rate_limiter is not None:
+            rate_limiter.report(template.url, 200)
+        if proxy_pool is not None:
+            proxy_pool.report_success(pooled.proxy_dict, time.monotonic() - started)
+        return result
+
+
+async def _plan_split_search(pooled, template, page_size, index_name=None, proxy_pool=None, rate_limiter=None):
+    """
+    Plan a capped search as one query per SPLIT_FACET value (see `split_search_pages`).
+    
+    Returns:
+        The plan, or None if the split cannot reach every company
+    """
+    counts, total_hits = await _search_reporting(
+        pooled, template, partial(fetch_facet_counts, template=template, facet=SPLIT_FACET, index_name=index_name),
+        proxy_pool, rate_limiter
+    )
+    search_pages = split_search_pages(counts, total_hits, page_size)
+    if search_pages is None:
+        largest = max(counts.values(), default=0)
+        logger.warning(f"Splitting the search by {SPLIT_FACET} cannot reach every company "
+                       f"({sum(counts.values())} of {total_hits} have one, the largest has {largest})")
+    return search_pages
+
+
+async def iter_company_pages(proxies, limit_pages=None, workers=1, readiness_timeouts=None, engine="dom",
+                             page_size=MAX_PAGE_SIZE, pool=None, headless=True, index_name=None,
+                             stop_condition=None, skip_pages=(), preferred_proxy=None, base_url=None,
+                             rate_limiter=None):
+    """
+    Scrape YCombinator companies and yield each page as soon as it is done.
+    
+    With more than one worker, each worker gets its own browser context behind
+    its own proxy and scrapes a slice of the pages in parallel; pages are then
+    yielded in the order they finish. Nothing is accumulated here, so memory
+    stays flat however large the crawl is.
+    
+    Two extraction engines are available:
+    - "dom" reads the company cards out of each rendered results page
+    - "network" captures the search request the directory sends and replays
+      it with large pages, parsing companies straight from the JSON. If no
+      search response can be captured or replayed it falls back to "dom".
+      When Algolia's pagination cap hides part of the directory and there
+      is no stop condition to end the crawl before the cap, the search is
+      split into one query per batch; if even that cannot reach every
+      company it falls back to "dom" as well.
+    
+    Args:
+        proxies: List of proxy dictionaries or a ProxyPool (required); workers
+            lease their proxies exclusively and report how each page went
+        limit_pages: Optional limit on number of pages to scrape
+        workers: Number of parallel browser contexts (capped by the number of available proxies)
+        readiness_timeouts: Optional ReadinessTimeouts for page changes
+        engine: Extraction engine, "dom" or "network"
+        page_size: Companies per search page for the "network" engine
+        pool: Optional BrowserPool to lease contexts from; by default a pool is
+            started for this crawl and closed afterwards
+        headless: Whether to run the browser headless when no pool is given
+        index_name: Optional search index for the "network" engine, e.g.
+            LAUNCH_DATE_INDEX to crawl newest companies first
+        stop_condition: Optional callable given each page's companies in page
+            order; returning True ends the crawl early. Forces a single worker.
+        skip_pages: Page numbers of the requested engine already scraped by a
+            previous run
+        preferred_proxy: Optional "address:port" to give the first worker, e.g.
+            the proxy a resumed run was using
+        base_url: Optional site root to crawl instead of www.ycombinator.com,
+            e.g. the benchmark fixture
+        rate_limiter: Optional DomainRateLimiter (e.g. the scheduler's) that
+            every navigation and search request waits for and reports its
+            status to, so throttling answers slow the crawl down
+        
+    Yields:
+        ScrapedPage for every page scraped
+    """
+    if not isinstance(proxies, ProxyPool):
+        if not proxies:
+            raise ValueError("Proxies are required for scraping")
+        proxies = ProxyPool.from_proxies(proxies)
+    proxy_pool = proxies
+    directory_url = f"{base_url.rstrip('/')}/companies" if base_url else COMPANIES_URL
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown extraction engine '{engine}', expected one of {', '.join(ENGINES)}")
+    
+    # Stopping early only makes sense when pages are visited in order
+    if stop_condition is not None and (workers or 1) > 1:
+        logger.info("A stop condition needs pages in order, running a single worker")
+        workers = 1
+    
+    # Give every worker its own proxy, favouring the healthiest ones
+    try:
+        worker_proxies = await proxy_pool.acquire_many(max(1, workers or 1), owner="worker", preferred=preferred_proxy)
+    except Exception as e:
+        raise ValueError(f"Error setting up proxy: {e}")
+    
+    if len(worker_proxies) < (workers or 1):
+        logger.warning(f"Only {len(worker_proxies)} proxies available, running {len(worker_proxies)} workers instead of {workers}")
+    
+    # Browser contexts come from a pool that outlives this crawl when the caller provides one
+    own_pool = pool is None
+    if own_pool:
+        pool = BrowserPool(headless=headless)
+    
+    skip_pages = set(skip_pages)
+    leased = []
+    tasks = []
+    failed = False
+    try:
+        # Lease one context per worker, each with a random user agent and its own proxy
+        for proxy_dict in worker_proxies:
+            leased.append(await pool.acquire(proxy_dict))
+            logger.info(f"Using proxy: {get_proxy_info_string(proxy_dict)}")
+        
+        # Open the directory in the first context; listen for its search request if we need it
+        first_page = await leased[0].context.new_page()
+        if rate_limiter is not None:
+            report_directory_responses(first_page, rate_limiter, directory_url)
+            await rate_limiter.acquire(directory_url)
+        capture = None
+        if engine == "network":
+            capture = SearchResponseCapture(first_page)
+            capture.attach()
+        
+        await open_companies_directory(first_page, directory_url)
+        
+        # Workers hand pages over through a small queue, so a slow consumer slows the crawl down
+        queue = asyncio.Queue(maxsize=2 * len(leased))
+        done = object()
+        readiness_stats = ReadinessStats()
+        
+        async def emit(scraped_page):
+            await queue.put(scraped_page)
+        
+        # Work out which engine will run and which pages each worker gets
+        search_template = None
+        first_search_page = None
+        search_pages = None
+        if capture is not None:
+            search_template = await capture.wait()
+            capture.detach()
+            if search_template is None:
+                logger.warning("No search response captured, falling back to DOM extraction")
             else:
-                print('"All batches" checkbox is already checked')
-            
-            # Click the "Show X companies" button to load the results
-            show_results_button = page.locator('div._showResults_i9oky_169 button')
-            await show_results_button.click()
-            print('Clicked "Show companies" button')
-            
-            # Wait for the results to load
-            await page.wait_for_selector('div._section_i9oky_163._results_i9oky_343 a._company_i9oky_355', timeout=30000)
-            print('Results loaded successfully')
-            
-            # Function to scrape the current page of companies
-            async def scrape_current_page():
-                return await page.evaluate('''() => {
-                    const companyElements = document.querySelectorAll('div._section_i9oky_163._results_i9oky_343 a._company_i9oky_355');
-                    const companies = [];
+                try:
+                    first_companies, total_pages, truncated = await _search_reporting(
+                        leased[0], search_template, partial(fetch_search_page, template=search_template, page_number=1,
+                                                            page_size=page_size, index_name=index_name),
+                        proxy_pool, rate_limiter
+                    )
+                    leased[0].record_pages()
+                    first_search_page = ScrapedPage(1, first_companies, leased[0].proxy_dict, "network", truncated)
                     
-                    companyElements.forEach(company => {
-                        // Extract company URL
-                        const url = company.getAttribute('href');
-                        
-                        // Extract company name
-                        const nameElement = company.querySelector('span._coName_i9oky_470');
-                        const name = nameElement ? nameElement.textContent.trim() : '';
-                        
-                        // Extract company location
-                        const locationElement = company.querySelector('span._coLocation_i9oky_486');
-                        const location = locationElement ? locationElement.textContent.trim() : '';
-                        
-                        // Extract company description
-                        const descriptionElement = company.querySelector('span._coDescription_i9oky_495');
-                        const description = descriptionElement ? descriptionElement.textContent.trim() : '';
-                        
-                        // Extract batch information
-                        const batchElement = company.querySelector('._pillWrapper_i9oky_33 a[href^="/companies?batch="] span');
-                        const batch = batchElement ? batchElement.textContent.replace(/^\\S+\\s+/, '') : ''; // Remove YC logo
-                        
-                        // Extract industry tags
-                        const industryElements = company.querySelectorAll('._pillWrapper_i9oky_33 a[href^="/companies?industry="] span');
-                        const industries = Array.from(industryElements).map(el => el.textContent.trim());
-                        
-                        // Extract logo URL
-                        const logoElement = company.querySelector('img');
-                        const logoUrl = logoElement ? logoElement.getAttribute('src') : '';
-                        
-                        // Add the company data to the array
-                        companies.push({
-                            name,
-                            url,
-                            location,
-                            description,
-                            batch,
-                            industries,
-                            logoUrl
-                        });
-                    });
-                    
-                    return companies;
-                }''')
-            
-            # Initial scrape
-            all_companies = []
-            initial_companies = await scrape_current_page()
-            all_companies.extend(initial_companies)
-            print(f"Initially scraped {len(initial_companies)} companies")
+                    # An early-stopping crawl only needs the newest pages, which the cap leaves
+                    # alone; a full crawl would silently miss every company past it, so it
+                    # pages through each batch on its own instead
+                    if truncated and stop_condition is None:
+                        search_pages = await _plan_split_search(
+                            leased[0], search_template, page_size, index_name, proxy_pool, rate_limiter
+                        )
+                        if search_pages is None:
+                            logger.warning("Search pagination is capped short of the directory, falling back to DOM extraction")
+                            search_template = None
+                        else:
+                            first_search_page = None
+                            total_pages = len(search_pages)
+                            logger.info(f"Search pagination is capped, splitting it into "
+                                        f"{len({facet_filter for facet_filter, _ in search_pages})} {SPLIT_FACET} queries")
+                except ValueError as e:
+                    logger.warning(f"Replaying the search request failed ({e}), falling back to DOM extraction")
+                    search_template = None
+        
+        if search_template is not None:
+            # Apply page limit if specified
+            if limit_pages and limit_pages > 0:
+                total_pages = min(total_pages, limit_pages)
+            logger.info(f"Found {total_pages} search pages of up to {page_size} companies")
             
-            # Check if there's pagination and handle it
-            has_pagination = await page.locator('nav.pagination').count() > 0
+            # A split crawl fetches its own first page; the unsplit one only told it to split
+            stopped = False
+            first_remaining = 1
+            if first_search_page is not None:
+                first_remaining = 2
+                if 1 not in skip_pages:
+                    await emit(first_search_page)
+                    stopped = stop_condition is not None and stop_condition(first_search_page.companies)
             
-            if has_pagination:
-                # Get the total number of pages
-                pagination_text = await page.locator('nav.pagination').text_content()
-                import re
-                match = re.search(r'of (\d+)', pagination_text)
-                if match:
-                    total_pages = int(match.group(1))
-                    
-                    # Apply page limit if specified
-                    if limit_pages and limit_pages > 0:
-                        total_pages = min(total_pages, limit_pages)
-                        
-                    print(f"Found pagination with {total_pages} total pages")
-                    
-                    # Loop through all pages
-                    for current_page in range(2, total_pages + 1):
-                        # Click the next page button
-                        await page.locator('button.pagination-next').click()
-                        print(f"Navigated to page {current_page}")
-                        
-                        # Wait for the page to load
-                        await page.wait_for_timeout(2000)  # Adjust timeout as needed
-                        
-                        # Scrape the current page
-                        page_companies = await scrape_current_page()
-                        all_companies.extend(page_companies)
-                        print(f"Scraped {len(page_companies)} companies from page {current_page}")
-                        
-                        # Optional: add a delay between page navigations
-                        await page.wait_for_timeout(1000)
+            remaining = [number for number in range(first_remaining, total_pages + 1) if number not in skip_pages]
+            chunks = [] if stopped else split_pages(remaining, len(leased))
+            tasks = [
+                asyncio.ensure_future(_fetch_search_page_list(
+                    leased[index], search_template, chunk, index + 1, emit, page_size,
+                    index_name=index_name,
+                    stop_condition=stop_condition,
+                    proxy_pool=proxy_pool,
+                    rate_limiter=rate_limiter,
+                    search_pages=search_pages
+                ))
+                for index, chunk in enumerate(chunks)
+            ]
+        else:
+            if engine == "network" and skip_pages:
+                logger.info("Previous progress refers to search pages, starting the DOM crawl from page 1")
+                skip_pages = set()
+            # The rendered directory is not in the requested index's order, so an order-based stop cannot apply
+            if index_name and stop_condition is not None:
+                logger.info("DOM pages are not sorted by the requested index, crawling every page")
+                stop_condition = None
             
-            # Save the data to a file with timestamp
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            output_dir = Path("ycombinator_data")
-            output_dir.mkdir(exist_ok=True)
+            total_pages = await get_total_pages(first_page)
             
-            output_file = output_dir / f"ycombinator_companies_{timestamp}.json"
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump(all_companies, f, indent=2)
+            # Apply page limit if specified
+            if limit_pages and limit_pages > 0:
+                total_pages = min(total_pages, limit_pages)
             
-            print(f"Successfully scraped {len(all_companies)} companies in total")
-            print(f"Data saved to {output_file}")
+            remaining = [number for number in range(1, total_pages + 1) if number not in skip_pages]
+            chunks = split_pages(remaining, len(leased))
+            logger.info(f"Found {total_pages} pages, {len(remaining)} left to scrape, split between {len(chunks)} workers: {_describe_pages(chunks)}")
             
-            return all_companies
-            
-        except Exception as e:
-            print(f"An error occurred: {e}")
-            raise
-        finally:
-            await browser.close()
+            # The first worker reuses the page that is already open
+            tasks = [
+                asyncio.ensure_future(_scrape_dom_page_list(
+                    leased[index],
+                    chunk,
+                    worker_id=index + 1,
+                    emit=emit,
+                    page=first_page if index == 0 else None,
+                    timeouts=readiness_timeouts,
+                    stats=readiness_stats,
+                    stop_condition=stop_condition,
+                    proxy_pool=proxy_pool,
+                    directory_url=directory_url,
+                    rate_limiter=rate_limiter
+                ))
+                for index, chunk in enumerate(chunks)
+            ]
+        
+        async def supervise():
+            try:
+                await asyncio.gather(*tasks)
+            finally:
+                await queue.put(done)
+        
+        supervisor = asyncio.ensure_future(supervise())
+        tasks.append(supervisor)
+        
+        while True:
+            item = await queue.get()
+            if item is done:
+                break
+            inc("pages_total", engine=item.engine)
+            inc("records_total", len(item.companies), engine=item.engine)
+            yield item
+        
+        # Surface the first worker error, if any
+        await supervisor
+        
+        if readiness_stats.results:
+            logger.info(f"Page readiness waits:\n{readiness_stats.format_summary()}")
+        if pool.resource_policy:
+            logger.info(f"Blocked {pool.resource_policy.blocked_count} requests, allowed {pool.resource_policy.allowed_count}")
+        
+    except Exception as e:
+        failed = True
+        logger.error(f"An error occurred: {e}")
+        raise
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        
+        # A failed crawl most likely means a bad proxy, so its contexts are recycled
+        for pooled in leased:
+            await pool.release(pooled, failed=failed)
+        if own_pool:
+            await pool.close()
+        for proxy_dict in worker_proxies:
+            await proxy_pool.release(proxy_dict)
+
+
+class CrawlCoverage:
+    """How much of the directory a crawl saw, filled in by `scrape_ycombinator_companies`."""
+
+    def __init__(self):
+        self.pages = 0
+        # Whether the engine's pagination stopped short of the whole directory
+        self.truncated = False
+
+
+async def scrape_ycombinator_companies(proxies, limit_pages=None, store=None, save_snapshot=None,
+                                       output_dir="ycombinator_data", coverage=None, **crawl_options):
+    """
+    Scrape YCombinator companies using proxies and return them all at once.
+    
+    This collects everything `iter_company_pages` yields into one list in
+    page order with duplicates removed. Use `run_streaming_scrape` for crawls
+    that should not be held in memory.
+    
+    Args:
+        proxies: List of proxy dictionaries or a ProxyPool (required)
+        limit_pages: Optional limit on number of pages to scrape
+        store: Optional CompanyStore; each page is upserted into it as soon as it is scraped
+        save_snapshot: Whether to write the full result to a timestamped JSON
+            file; by default only when there is no store to write to
+        output_dir: Directory the snapshot is written to
+        coverage: Optional CrawlCoverage to record the pages seen and any truncation in
+        **crawl_options: Passed on to iter_company_pages (workers, engine,
+            page_size, pool, headless, index_name, stop_condition, ...)
+        
+    Returns:
+        List of company dictionaries
+    """
+    if save_snapshot is None:
+        save_snapshot = store is None
+    
+    seen_at = datetime.now().isoformat(timespec='seconds')
+    page_results = {}
+    async for scraped_page in iter_company_pages(proxies, limit_pages=limit_pages, **crawl_options):
+        page_results[scraped_page.number] = scraped_page.companies
+        if coverage is not None:
+            coverage.pages += 1
+            coverage.truncated = coverage.truncated or scraped_page.truncated
+        # Write every page through to the store in its own transaction
+        if store is not None:
+            with span("persist", target="store"):
+                store.upsert_companies(scraped_page.companies, seen_at=seen_at)
+    
+    all_companies = merge_page_results(page_results)
+    logger.info(f"Successfully scraped {len(all_companies)} companies in total")
+    
+    if save_snapshot:
+        # Save the data to a file with timestamp
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        output_dir = Path(output_dir)
+        output_dir.mkdir(exist_ok=True)
+        
+        output_file = output_dir / f"ycombinator_companies_{timestamp}.json"
+        with open(output_file, 'w', encoding='utf-8') as f:
+            json.dump(all_companies, f, indent=2)
+        
+        logger.info(f"Data saved to {output_file}")
+    
+    return all_companies
+
+
+async def run_streaming_scrape(proxies, output_dir="ycombinator_data", resume=False, store=None,
+                               save_snapshot=False, enrich=False, enrich_options=None, **crawl_options):
+    """
+    Scrape the directory page by page into an NDJSON file with a checkpoint after every page.
+    
+    Records go to `<output_dir>/ycombinator_companies_<timestamp>.ndjson` and
+    progress to `<output_dir>/checkpoint.json` (pages done, cursor, proxy).
+    With `resume=True` an unfinished run continues where its checkpoint left
+    off, with the same engine, page size and (if still available) proxy.
+    
+    Args:
+        proxies: List of proxy dictionaries or a ProxyPool (required)
+        output_dir: Directory for the NDJSON output and the checkpoint
+        resume: Whether to continue the last unfinished run
+        store: Optional CompanyStore each page is also upserted into
+        save_snapshot: Whether to also export the run as a JSON array when it completes
+        enrich: Whether to fetch detail pages afterwards for every company in
+            the store that has no details yet or changed since they were fetched
+        enrich_options: Optional options for DetailEnricher (concurrency, per_host, ...)
+        **crawl_options: Passed on to iter_company_pages
+        
+    Returns:
+        Number of companies written by the run (including resumed progress)
+    """
+    output_dir = Path(output_dir)
+    checkpoint_path = output_dir / "checkpoint.json"
+    
+    sink = None
+    if resume:
+        try:
+            sink = NdjsonSink.resume(checkpoint_path)
+        except ValueError as e:
+            logger.warning(f"{e}, starting a new run")
+    
+    if sink is not None:
+        checkpoint = sink.checkpoint
+        crawl_options.update(engine=checkpoint['engine'], index_name=checkpoint['index_name'])
+        if checkpoint['page_size']:
+            crawl_options['page_size'] = checkpoint['page_size']
+        crawl_options['skip_pages'] = sink.completed_pages
+        crawl_options['preferred_proxy'] = checkpoint['proxy']
+        logger.info(f"Resuming {sink.output_path} after {len(sink.completed_pages)} pages and {sink.records} companies")
+    else:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        sink = NdjsonSink.create(
+            output_dir / f"ycombinator_companies_{timestamp}.ndjson",
+            checkpoint_path,
+            engine=crawl_options.get('engine', 'dom'),
+            page_size=crawl_options.get('page_size', MAX_PAGE_SIZE),
+            index_name=crawl_options.get('index_name')
+        )
+    
+    seen_at = datetime.now().isoformat(timespec='seconds')
+    try:
+        async for scraped_page in iter_company_pages(proxies, **crawl_options):
+            with span("persist", target="ndjson"):
+                written = sink.write_page(scraped_page)
+            if store is not None:
+                with span("persist", target="store"):
+                    store.upsert_companies(scraped_page.companies, seen_at=seen_at)
+            logger.info(f"Checkpointed page {scraped_page.number}: {written} new companies, {sink.records} in total")
+        sink.finish()
+    finally:
+        sink.close()
+    
+    logger.info(f"Successfully scraped {sink.records} companies in total")
+    logger.info(f"Data saved to {sink.output_path}")
+    
+    if save_snapshot:
+        json_path = sink.output_path.with_suffix('.json')
+        export_json_snapshot(sink.output_path, json_path)
+        logger.info(f"Snapshot saved to {json_path}")
+    
+    if enrich:
+        if store is None:
+            logger.warning("Enrichment writes to the company store, skipping it without one")
+        else:
+            await run_enrichment(store.companies_needing_details(), proxies, store=store,
+                                 pool=crawl_options.get('pool'), **(enrich_options or {}))
+    
+    return sink.records
+
+
+async def run_incremental_scrape(proxies, output_dir="ycombinator_data", early_stop=True, known_pages=2,
+                                 limit_pages=None, store=None, enrich=False, enrich_options=None, **scrape_options):
+    """
+    Scrape the directory and write only the companies that changed since the last run.
+    
+    Fingerprints from previous runs live in `<output_dir>/fingerprints.json`.
+    Each run writes `ycombinator_delta_<timestamp>.json` with the added,
+    changed and removed records and appends a one-line summary to
+    `changelog.jsonl`.
+    
+    With the "network" engine and an existing fingerprint store, the crawl is
+    sorted by launch date, fetched EARLY_STOP_PAGE_SIZE companies at a time,
+    and stops after `known_pages` consecutive pages of known, unchanged
+    companies. Edits to older companies are only picked up by
+    a full crawl (`early_stop=False`), which is also the only kind of run
+    that can report removals.
+    
+    Args:
+        proxies: List of proxy dictionaries or a ProxyPool (required)
+        output_dir: Directory holding fingerprints, deltas and the changelog
+        early_stop: Whether to stop once the crawl reaches known companies
+        known_pages: Consecutive known pages that end the crawl
+        limit_pages: Optional limit on number of pages to scrape
+        store: Optional CompanyStore kept in sync, including removals
+        enrich: Whether to fetch the detail pages of added and changed companies;
+            their details are merged into the delta records
+        enrich_options: Optional options for DetailEnricher (concurrency, per_host, ...)
+        **scrape_options: Passed on to scrape_ycombinator_companies
+        
+    Returns:
+        CompanyDelta describing the run
+    """
+    output_dir = Path(output_dir)
+    fingerprints = FingerprintStore.load(output_dir / "fingerprints.json")
+    
+    stop_condition = None
+    if early_stop and len(fingerprints) > 0:
+        if scrape_options.get("engine") == "network":
+            stop_condition = KnownTerritory(fingerprints, pages=known_pages)
+            scrape_options['page_size'] = min(scrape_options.get('page_size', MAX_PAGE_SIZE), EARLY_STOP_PAGE_SIZE)
+        else:
+            logger.info("Early stopping needs the network engine's launch date order, crawling every page")
+    
+    coverage = CrawlCoverage()
+    companies = await scrape_ycombinator_companies(
+        proxies=proxies,
+        limit_pages=limit_pages,
+        coverage=coverage,
+        index_name=LAUNCH_DATE_INDEX if stop_condition is not None else None,
+        stop_condition=stop_condition,
+        store=store,
+        save_snapshot=False,
+        output_dir=output_dir,
+        **scrape_options
+    )
+    
+    # Removals are only known when every company could have been seen
+    complete = (not limit_pages and not coverage.truncated
+                and not (stop_condition is not None and stop_condition.triggered))
+    delta = compute_delta(companies, fingerprints, complete=complete)
+    if delta.withheld_removals:
+        logger.warning(f"{delta.withheld_removals} of {len(fingerprints)} known companies were not seen; "
+                       f"treating the crawl as partial instead of removing them")
+    complete = delta.complete
+    
+    if enrich and (delta.added or delta.changed):
+        details = await run_enrichment(
+            delta.added + [item['company'] for item in delta.changed], proxies, store=store,
+            pool=scrape_options.get('pool'), **(enrich_options or {})
+        )
+        delta.added = [merge_details(company, details.get(company_key(company))) for company in delta.added]
+        for item in delta.changed:
+            item['company'] = merge_details(item['company'], details.get(company_key(item['company'])))
+    
+    now = datetime.now()
+    timestamp = now.strftime("%Y%m%d_%H%M%S")
+    with span("persist", target="delta"):
+        delta_file = write_delta(delta, output_dir, timestamp)
+        append_changelog(delta, output_dir, timestamp)
+        apply_delta(fingerprints, delta, seen_at=now.isoformat(timespec='seconds'))
+        fingerprints.save()
+        if store is not None and delta.removed:
+            store.delete_companies(item['key'] for item in delta.removed)
+    
+    logger.info(f"Incremental scrape ({'full' if complete else 'partial'} crawl): {delta.summary()}")
+    logger.info(f"Delta saved to {delta_file}")
+    return delta
+
+
+async def run_enrichment(companies, proxies, store=None, pool=None, **enrich_options):
+    """
+    Fetch detail pages (founders, team size, website, socials, long description) for companies.
+    
+    Pages are fetched over plain HTTP with bounded concurrency; only pages
+    that need JavaScript are rendered in the browser pool.
+    
+    Args:
+        companies: Company records with a `url`
+        proxies: List of proxy dictionaries or a ProxyPool
+        store: Optional CompanyStore the details are written to
+        pool: Optional BrowserPool for pages that need JavaScript
+        **enrich_options: Passed on to DetailEnricher (concurrency, per_host, timeout, retries)
+        
+    Returns:
+        Dictionary of slug to details
+    """
+    if not companies:
+        logger.info("No companies need enriching")
+        return {}
+    
+    if isinstance(proxies, ProxyPool):
+        proxy_pool = proxies
+    else:
+        proxy_pool = ProxyPool.from_proxies(proxies) if proxies else None
+    
+    logger.info(f"Enriching {len(companies)} companies from their detail pages")
+    details = await enrich_companies(companies, proxy_pool=proxy_pool, browser_pool=pool, **enrich_options)
+    if store is not None and details:
+        store.update_details(details)
+    return details
+
 
 # Function to load proxies from an API or file
 async def load_proxies(proxy_api_url=None, api_key=None):
     """
     Load proxies from an API endpoint.
     
+    Every page of the list is fetched, concurrently.
+    
     Args:
-        proxy_api_url: URL to fetch proxies from
+        proxy_api_url: URL to fetch proxies from; defaults to Webshare's proxy list
         api_key: Optional API key for authorization
         
     Returns:
@@ -220,81 +1012,63 @@ async def load_proxies(proxy_api_url=None, api_key=None):
     """
     # Default to Webshare API if no URL is provided
     if not proxy_api_url:
-        proxy_api_url = "https://proxy.webshare.io/api/v2/proxy/list/?mode=direct&page=1&page_size=25"
+        proxy_api_url = WEBSHARE_PROXY_LIST_URL
     
-    # Debug the API key
-    print(f"API key in load_proxies: {'Present' if api_key else 'Missing'}")
+    logger.debug(f"API key in load_proxies: {'present' if api_key else 'missing'}")
     
-    # Use the fetch_proxies function from proxy_manager
-    proxies = fetch_proxies(proxy_api_url, api_key)
+    proxies = await fetch_all_proxies(proxy_api_url, api_key)
     
     if proxies:
-        print(f"Successfully loaded {len(proxies)} proxies from API")
+        logger.info(f"Successfully loaded {len(proxies)} proxies from API")
         return proxies
     else:
         raise ValueError("No proxies available. Cannot proceed without proxies.")
 
+
 # Function to run the scraper periodically
-async def run_periodic_scraper(interval_hours=24, proxy_api_url=None, api_key=None):
-    while True:
-        print(f"Starting scrape at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        try:
-            # Load proxies before each scrape to ensure fresh proxies
-            proxies = await load_proxies(proxy_api_url, api_key)
-            await scrape_ycombinator_companies(proxies=proxies)
-        except Exception as e:
-            print(f"Scrape failed: {e}")
-            print("Will retry at next interval")
-        
-        # Wait for the next interval
-        next_run = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        print(f"Next scrape scheduled at: {next_run}")
-        await asyncio.sleep(interval_hours * 3600)  # Convert hours to seconds
-
-# Main execution
-#* The main function if you ever want to run this file directly
+async def run_periodic_scraper(interval_hours=24, proxy_api_url=None, api_key=None, workers=1, engine="dom",
+                               headless=True, max_pages_per_context=200, allowed_resources=(), incremental=False,
+                               store=None, enrich=False, enrich_options=None, http_cache=None, search_index=None,
+                               similarity=None, graph=None, cube=None, base_url=None, metrics_path=None):
+    """
+    Scrape now and then every `interval_hours`, as a single scheduler job.
+    
+    Runs follow a fixed grid instead of sleeping after each run, so they do
+    not drift. The browser and proxy pools are shared across runs, so proxy
+    health carries over. Use the `scheduler` command to run YC alongside
+    other sources.
+    """
+    from scheduler import Job, Scheduler, IntervalSchedule
+    from scheduler.sources.ycombinator import YCombinatorSource
+    
+    source = YCombinatorSource(
+        proxy_api_url=proxy_api_url,
+        api_key=api_key,
+        workers=workers,
+        engine=engine,
+        headless=headless,
+        max_pages_per_context=max_pages_per_context,
+        allowed_resources=allowed_resources,
+        incremental=incremental,
+        enrich=enrich,
+        enrich_options=enrich_options or {},
+        db=store.path if store is not None else None,
+        search_index=search_index,
+        similarity=similarity,
+        graph=graph,
+        cube=cube,
+        **({"base_url": base_url} if base_url else {})
+    )
+    job = Job(name="ycombinator-periodic", source=source, schedule=IntervalSchedule(interval_hours * 3600))
+    scheduler = Scheduler([job], max_concurrency=1, http_cache=http_cache, metrics_path=metrics_path)
+    if store is not None:
+        # Reuse the caller's store instead of opening the database a second time
+        await scheduler.shared(f"company_store:{store.path}", lambda: store)
+    await scheduler.run_forever(start_now=True)
+
+
 if __name__ == "__main__":
-    import argparse
-    
-    parser = argparse.ArgumentParser(description='YCombinator Company Scraper')
-    parser.add_argument('--periodic', action='store_true', help='Run the scraper periodically')
-    parser.add_argument('--interval', type=float, default=24, help='Interval in hours for periodic scraping')
-    parser.add_argument('--proxy-api', type=str, help='API URL to fetch proxy list')
-    parser.add_argument('--api-key', type=str, help='API key for proxy service')
-    parser.add_argument('--limit', type=int, help='Limit scraping to N pages (for testing)')
-    
-    args = parser.parse_args()
-    
-    # Debug the API key values
-    print(f"API key from args: '{args.api_key}'")
-    print(f"API key from env: '{webshare_api_key}'")
-    
-    # Use API key from environment if not provided in args
-    api_key = args.api_key or webshare_api_key
-    print(f"Final API key (type: {type(api_key)}): '{api_key}'")
-    
-    if not api_key:
-        print("ERROR: No API key provided. Set WEBSHARE_API_KEY in .env file or use --api-key")
-        sys.exit(1)
-    
-    if args.periodic:
-        print(f"Starting periodic scraper with {args.interval} hour interval")
-        asyncio.run(run_periodic_scraper(
-            interval_hours=args.interval,
-            proxy_api_url=args.proxy_api,
-            api_key=api_key
-        ))
-    else:
-        # Run once
-        async def run_once():
-            try:
-                proxies = await load_proxies(args.proxy_api, api_key)
-                return await scrape_ycombinator_companies(
-                    proxies=proxies,
-                    limit_pages=args.limit
-                )
-            except ValueError as e:
-                print(f"ERROR: {e}")
-                sys.exit(1)
-                
-        asyncio.run(run_once())
\ No newline at end of file
+    # The command line lives in main.py; running this file is `main.py yc-scraper`
+    from main import main
+    sys.argv.insert(1, "yc-scraper")
+    main()
@@ -0,0 +1,4 @@
+from .index import (
+    SearchIndex, DEFAULT_INDEX_PATH, FIELD_WEIGHTS, tokenize, highlight, encode_postings, decode_postings,
+    company_document, note_document, load_notes
+)
@@ -0,0 +1,656 @@
+import hashlib
+import html
+import json
+import logging
+import math
+import re
+import sqlite3
+import threading
+import zlib
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INDEX_PATH = Path("ycombinator_data") / "search_index.sqlite3"
+
+# Term frequencies are weighted by the field they occur in (a BM25F-style
+# simplification), so a match in a company's name outranks one in its
+# description
+FIELD_WEIGHTS = {
+    "title": 3.0,
+    "industries": 2.0,
+    "tags": 2.0,
+    "text": 1.0,
+    "details": 1.0,
+}
+
+# Weighted term frequencies are stored as integers in this unit
+TF_SCALE = 4
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has in is it its of on or that the this to was were will with".split()
+)
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    key TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    length REAL NOT NULL,
+    live INTEGER NOT NULL DEFAULT 0,
+    fields TEXT NOT NULL,
+    meta TEXT NOT NULL,
+    indexed_at TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_documents_live_key ON documents (key) WHERE live = 1;
+
+CREATE TABLE IF NOT EXISTS segments (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    doc_count INTEGER NOT NULL,
+    created_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT NOT NULL,
+    segment_id INTEGER NOT NULL REFERENCES segments (id) ON DELETE CASCADE,
+    doc_freq INTEGER NOT NULL,
+    data BLOB NOT NULL,
+    PRIMARY KEY (term, segment_id)
+) WITHOUT ROWID;
+"""
+
+# SQLite's default limit on bound parameters is 999 on older builds
+_MAX_PARAMS = 900
+
+# Narrowest unsigned type that holds every value, by code stored in the posting header
+_DTYPES = (np.uint8, np.uint16, np.uint32)
+
+
+def tokenize(text):
+    """Split text into lower-case index terms, dropping stopwords."""
+    return [token for token in TOKEN_PATTERN.findall((text or "").lower()) if token not in STOPWORDS]
+
+
+def _dtype_code(values):
+    peak = int(values.max()) if len(values) else 0
+    for code, dtype in enumerate(_DTYPES):
+        if peak <= np.iinfo(dtype).max:
+            return code
+    raise ValueError(f"Posting value {peak} does not fit in 32 bits")
+
+
+def encode_postings(doc_ids, tfs):
+    """
+    Encode a posting list as a compressed blob.
+
+    Doc ids are stored as gaps from the previous id (ascending ids make the
+    gaps small), each array in the narrowest integer type that fits, and
+    the result is zlib-compressed.
+
+    Args:
+        doc_ids: Ascending numpy array of document ids
+        tfs: Numpy array of weighted term frequencies in TF_SCALE units
+
+    Returns:
+        Bytes
+    """
+    gaps = np.diff(doc_ids, prepend=0).astype(np.int64)
+    gap_code, tf_code = _dtype_code(gaps), _dtype_code(tfs)
+    payload = (bytes([gap_code << 4 | tf_code])
+               + gaps.astype(_DTYPES[gap_code]).tobytes()
+               + np.asarray(tfs).astype(_DTYPES[tf_code]).tobytes())
+    return zlib.compress(payload, 6)
+
+
+def decode_postings(data, doc_freq):
+    """
+    Decode a blob from `encode_postings`.
+
+    Returns:
+        Tuple of (doc id array, weighted tf array in TF_SCALE units)
+    """
+    payload = zlib.decompress(data)
+    gap_dtype, tf_dtype = _DTYPES[payload[0] >> 4], _DTYPES[payload[0] & 0x0F]
+    split = 1 + doc_freq * np.dtype(gap_dtype).itemsize
+    gaps = np.frombuffer(payload, dtype=gap_dtype, count=doc_freq, offset=1)
+    tfs = np.frombuffer(payload, dtype=tf_dtype, count=doc_freq, offset=split)
+    return np.cumsum(gaps, dtype=np.int64), tfs
+
+
+def company_document(company):
+    """
+    Build the searchable fields and display metadata of a company record.
+
+    Returns:
+        Tuple of (fields dictionary, meta dictionary)
+    """
+    founders = company.get("founders") or []
+    details = " ".join(
+        [company.get("longDescription") or ""]
+        + [f"{founder.get('name', '')} {founder.get('title', '')}" for founder in founders if isinstance(founder, dict)]
+        + [company.get("location") or "", company.get("batch") or ""]
+    )
+    fields = {
+        "title": company.get("name") or "",
+        "text": company.get("description") or "",
+        "industries": " ".join(company.get("industries") or []),
+        "details": details.strip(),
+    }
+    meta = {
+        "slug": company.get("slug") or "",
+        "name": company.get("name") or "",
+        "batch": company.get("batch") or "",
+        "url": company.get("url") or "",
+        "logoUrl": company.get("logoUrl") or "",
+    }
+    return fields, meta
+
+
+def note_document(note):
+    """
+    Build the searchable fields and display metadata of a note or web clip.
+
+    Notes are dictionaries with `title`, `content` (or `preview`/`text`),
+    optional `tags` and optional `source`.
+
+    Returns:
+        Tuple of (fields dictionary, meta dictionary)
+    """
+    fields = {
+        "title": note.get("title") or "",
+        "text": note.get("content") or note.get("text") or note.get("preview") or "",
+        "tags": " ".join(note.get("tags") or []),
+    }
+    meta = {
+        "title": note.get("title") or "",
+        "source": note.get("source") or "",
+        "date": note.get("date") or "",
+    }
+    return fields, meta
+
+
+def highlight(text, terms, window=24, mark=("<mark>", "</mark>")):
+    """
+    Cut the part of `text` with the most query terms and mark them.
+
+    The text is HTML-escaped, so the snippet is safe to render as HTML.
+
+    Args:
+        text: Field text
+        terms: Set of index terms to mark
+        window: Tokens of context in the snippet
+        mark: Opening and closing marker
+
+    Returns:
+        Snippet string, or None if no term occurs in the text
+    """
+    tokens = [(match.start(), match.end(), match.group().lower()) for match in TOKEN_PATTERN.finditer(text or "")]
+    hits = [i for i, (_, _, token) in enumerate(tokens) if token in terms]
+    if not hits:
+        return None
+
+    # Slide a window over the hits and keep the one covering the most
+    best_start, best_count, right = hits[0], 0, 0
+    for left, start in enumerate(hits):
+        while right < len(hits) and hits[right] < start + window:
+            right += 1
+        if right - left > best_count:
+            best_start, best_count = start, right - left
+    first = max(0, best_start - window // 4)
+    last = min(len(tokens), first + window) - 1
+
+    parts, position = [], tokens[first][0]
+    for start, end, token in tokens[first:last + 1]:
+        if token in terms:
+            parts.append(html.escape(text[position:start]) + mark[0] + html.escape(text[start:end]) + mark[1])
+            position = end
+    parts.append(html.escape(text[position:tokens[last][1]]))
+    return ("… " if first > 0 else "") + "".join(parts) + (" …" if last < len(tokens) - 1 else "")
+
+
+class SearchIndex:
+    """
+    Incremental BM25 full-text index stored in SQLite.
+
+    The index is a list of immutable segments, like Lucene's. Added
+    documents are buffered and `commit` writes them as a new segment with
+    one compressed posting list per term. A changed document gets a new id
+    in the new segment and its old version is tombstoned; tombstoned ids are
+    skipped at query time and dropped when segments are merged by
+    `compact`, which `commit` runs once there are more than `max_segments`.
+
+    Document lengths and liveness are kept in memory as arrays indexed by
+    document id, so a query reads one posting row per term and segment and
+    scores with NumPy. Another process committing to the index (SQLite's
+    data_version changes) makes the next query reload them.
+    """
+
+    def __init__(self, path=DEFAULT_INDEX_PATH, k1=1.2, b=0.75, max_segments=8, flush_docs=20000):
+        """
+        Args:
+            path: Index database; ":memory:" for a throwaway index
+            k1: BM25 term frequency saturation
+            b: BM25 length normalization
+            max_segments: Segment count above which `commit` compacts
+            flush_docs: Buffered documents that trigger an automatic commit
+        """
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self.max_segments = max_segments
+        self.flush_docs = flush_docs
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        # Synced from the scheduler's blocking executor and searched from the
+        # API's worker threads, so the connection is shared behind a lock
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = NORMAL")
+        self._conn.execute("PRAGMA foreign_keys = ON")
+        self._conn.executescript(SCHEMA)
+        self._pending = {}
+        self._pending_keys = {}
+        self._load()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        self.close()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def data_version(self):
+        """SQLite's data version of the index database (see CompanyStore.data_version)."""
+        with self._lock:
+            return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def _load(self):
+        rows = self._conn.execute("SELECT id, length, live, kind FROM documents").fetchall()
+        size = (max(row[0] for row in rows) + 1) if rows else 1
+        self._lengths = np.zeros(size, dtype=np.float32)
+        self._live = np.zeros(size, dtype=bool)
+        self._kinds = {}
+        self._kind_codes = np.zeros(size, dtype=np.int16)
+        for doc_id, length, live, kind in rows:
+            self._lengths[doc_id] = length
+            self._live[doc_id] = bool(live)
+            self._kind_codes[doc_id] = self._kinds.setdefault(kind, len(self._kinds) + 1)
+        self._version = self.data_version()
+
+    def _grow(self, size):
+        if size <= len(self._lengths):
+            return
+        size = max(size, len(self._lengths) * 2)
+        for name in ("_lengths", "_live", "_kind_codes"):
+            current = getattr(self, name)
+            grown = np.zeros(size, dtype=current.dtype)
+            grown[:len(current)] = current
+            setattr(self, name, grown)
+
+    def _refresh(self):
+        if self.data_version() != self._version:
+            self._load()
+
+    @property
+    def doc_count(self):
+        """Number of live documents."""
+        with self._lock:
+            return int(self._live.sum())
+
+    def add(self, key, fields, kind="document", meta=None):
+        """
+        Add or replace a document.
+
+        Unchanged documents (same fields and metadata as the live version)
+        are skipped, so re-adding a whole dataset only touches what changed.
+
+        Args:
+            key: Unique document key, e.g. "company:acme"
+            fields: Dictionary of field name (see FIELD_WEIGHTS) to text
+            kind: Document kind, usable as a query filter
+            meta: JSON-serializable dictionary returned with results
+
+        Returns:
+            True if the document was (re)indexed, False if it was unchanged
+        """
+        with self._lock:
+            meta = meta or {}
+            content_hash = hashlib.sha1(json.dumps([kind, fields, meta], sort_keys=True).encode("utf-8")).hexdigest()
+            existing = self._pending_keys.get(key) or self._conn.execute(
+                "SELECT id, content_hash FROM documents WHERE key = ? AND live = 1", (key,)
+            ).fetchone()
+            if existing and existing[1] == content_hash:
+                return False
+
+            counts = Counter()
+            length = 0.0
+            for field, text in fields.items():
+                weight = FIELD_WEIGHTS.get(field, 1.0)
+                tokens = Counter(tokenize(text))
+                for token, count in tokens.items():
+                    counts[token] += weight * count
+                length += weight * tokens.total()
+
+            # Rows stay dead until `commit` writes their postings (in the same
+            # transaction), so a crash never leaves a document that looks
+            # indexed but cannot be found
+            doc_id = self._conn.execute(
+                "INSERT INTO documents (key, kind, content_hash, length, fields, meta, indexed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, kind, content_hash, length, json.dumps(fields, ensure_ascii=False),
+                 json.dumps(meta, ensure_ascii=False), datetime.now().isoformat(timespec="seconds"))
+            ).lastrowid
+
+            # The document is not searchable until its segment is written
+            self._grow(doc_id + 1)
+            self._lengths[doc_id] = length
+            self._kind_codes[doc_id] = self._kinds.setdefault(kind, len(self._kinds) + 1)
+            for term, tf in counts.items():
+                self._pending.setdefault(term, []).append((doc_id, max(1, round(tf * TF_SCALE))))
+            self._pending_keys[key] = (doc_id, content_hash)
+            if len(self._pending_keys) >= self.flush_docs:
+                self.commit()
+            return True
+
+    def delete(self, key):
+        """
+        Tombstone a document.
+
+        Returns:
+            True if a live document was deleted
+        """
+        with self._lock:
+            pending = self._pending_keys.pop(key, None)
+            with self._conn:
+                row = self._conn.execute("SELECT id FROM documents WHERE key = ? AND live = 1", (key,)).fetchone()
+                if row:
+                    self._conn.execute("UPDATE documents SET live = 0 WHERE id = ?", (row[0],))
+            if row:
+                self._live[row[0]] = False
+            return bool(row or pending)
+
+    def commit(self):
+        """
+        Write buffered documents as a new segment and make them searchable.
+
+        Returns:
+            Number of documents in the new segment
+        """
+        with self._lock:
+            if not self._pending_keys:
+                self._pending = {}
+                return 0
+            keys = list(self._pending_keys)
+            new_ids = [doc_id for doc_id, _ in self._pending_keys.values()]
+            with self._conn:
+                segment_id = self._conn.execute(
+                    "INSERT INTO segments (doc_count, created_at) VALUES (?, ?)",
+                    (len(new_ids), datetime.now().isoformat(timespec="seconds"))
+                ).lastrowid
+                self._conn.executemany(
+                    "INSERT INTO postings (term, segment_id, doc_freq, data) VALUES (?, ?, ?, ?)",
+                    (
+                        (term, segment_id, len(postings), encode_postings(
+                            np.fromiter((doc_id for doc_id, _ in postings), dtype=np.int64, count=len(postings)),
+                            np.fromiter((tf for _, tf in postings), dtype=np.int64, count=len(postings))
+                        ))
+                        for term, postings in self._pending.items()
+                    )
+                )
+                # Swap the previous versions for the new ones in the same transaction
+                replaced = []
+                for start in range(0, len(keys), _MAX_PARAMS):
+                    chunk = keys[start:start + _MAX_PARAMS]
+                    replaced.extend(row[0] for row in self._conn.execute(
+                        f"SELECT id FROM documents WHERE live = 1 AND key IN ({','.join('?' * len(chunk))})", chunk
+                    ))
+                for ids, live in ((replaced, 0), (new_ids, 1)):
+                    for start in range(0, len(ids), _MAX_PARAMS):
+                        chunk = ids[start:start + _MAX_PARAMS]
+                        self._conn.execute(
+                            f"UPDATE documents SET live = ? WHERE id IN ({','.join('?' * len(chunk))})", [live] + chunk
+                        )
+            self._live[replaced] = False
+            self._live[new_ids] = True
+            self._pending = {}
+            self._pending_keys = {}
+            self._version = self.data_version()
+
+            if self.segment_count() > self.max_segments:
+                self.compact()
+            return len(new_ids)
+
+    def segment_count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM segments").fetchone()[0]
+
+    def compact(self):
+        """
+        Merge every segment into one, dropping tombstoned documents.
+
+        Returns:
+            Number of tombstoned documents removed
+        """
+        with self._lock:
+            self.commit()
+            segments = [row[0] for row in self._conn.execute("SELECT id FROM segments")]
+            with self._conn:
+                dead = self._conn.execute("SELECT COUNT(*) FROM documents WHERE live = 0").fetchone()[0]
+                if len(segments) <= 1 and not dead:
+                    return 0
+                doc_count = self._conn.execute("SELECT COUNT(*) FROM documents WHERE live = 1").fetchone()[0]
+                merged_id = self._conn.execute(
+                    "INSERT INTO segments (doc_count, created_at) VALUES (?, ?)",
+                    (doc_count, datetime.now().isoformat(timespec="seconds"))
+                ).lastrowid
+
+                merged = []
+                term, parts = None, []
+                rows = self._conn.execute(
+                    f"SELECT term, doc_freq, data FROM postings WHERE segment_id IN ({','.join('?' * len(segments))}) "
+                    "ORDER BY term, segment_id",
+                    segments
+                )
+                for row_term, doc_freq, data in rows:
+                    if row_term != term and parts:
+                        merged.append(self._merge_postings(term, parts, merged_id))
+                        parts = []
+                    term = row_term
+                    parts.append(decode_postings(data, doc_freq))
+                if parts:
+                    merged.append(self._merge_postings(term, parts, merged_id))
+
+                self._conn.execute(
+                    f"DELETE FROM segments WHERE id IN ({','.join('?' * len(segments))})", segments
+                )
+                self._conn.executemany(
+                    "INSERT INTO postings (term, segment_id, doc_freq, data) VALUES (?, ?, ?, ?)",
+                    (entry for entry in merged if entry is not None)
+                )
+                self._conn.execute("DELETE FROM documents WHERE live = 0")
+            self._load()
+            logger.info(f"Compacted {len(segments)} segments into one, removing {dead} stale documents")
+            return dead
+
+    def _merge_postings(self, term, parts, segment_id):
+        doc_ids = np.concatenate([ids for ids, _ in parts])
+        tfs = np.concatenate([tfs for _, tfs in parts])
+        keep = self._live[doc_ids]
+        if not keep.any():
+            return None
+        # Segments hold increasing id ranges, so concatenating keeps ids sorted
+        return term, segment_id, int(keep.sum()), encode_postings(doc_ids[keep], tfs[keep])
+
+    def _expand_prefix(self, prefix, limit=32):
+        upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        return [row[0] for row in self._conn.execute(
+            "SELECT DISTINCT term FROM postings WHERE term >= ? AND term < ? LIMIT ?", (prefix, upper, limit)
+        )]
+
+    def _postings(self, term):
+        ids, tfs = [], []
+        for doc_freq, data in self._conn.execute("SELECT doc_freq, data FROM postings WHERE term = ?", (term,)):
+            segment_ids, segment_tfs = decode_postings(data, doc_freq)
+            ids.append(segment_ids)
+            tfs.append(segment_tfs)
+        if not ids:
+            return None, None
+        ids = np.concatenate(ids)
+        tfs = np.concatenate(tfs)
+        live = self._live[ids]
+        return ids[live], tfs[live].astype(np.float32) / TF_SCALE
+
+    def search(self, query, limit=10, kind=None, prefix=False, highlights=True):
+        """
+        Find the best matching documents for a query with BM25.
+
+        Args:
+            query: Free text; every term may match (OR semantics)
+            limit: Number of results
+            kind: Optional document kind (or list of kinds) to restrict to
+            prefix: Whether the last query term also matches as a prefix
+                (for search-as-you-type)
+            highlights: Whether to include marked snippets per field
+
+        Returns:
+            List of dictionaries with key, kind, score, meta and highlights
+        """
+        with self._lock:
+            self._refresh()
+            terms = list(dict.fromkeys(tokenize(query)))
+            if not terms or not self._live.any():
+                return []
+            query_terms = {term: 1.0 for term in terms}
+            if prefix:
+                last = (query.lower().split() or [""])[-1]
+                if last and TOKEN_PATTERN.fullmatch(last):
+                    for term in self._expand_prefix(last):
+                        query_terms.setdefault(term, 0.5)
+
+            live_count = max(1, self.doc_count)
+            average_length = float(self._lengths[self._live].mean()) or 1.0
+            norms = self.k1 * (1 - self.b + self.b * self._lengths / average_length)
+            scores = np.zeros(len(self._lengths), dtype=np.float32)
+            for term, boost in query_terms.items():
+                ids, tfs = self._postings(term)
+                if ids is None or not len(ids):
+                    continue
+                idf = math.log(1 + (live_count - len(ids) + 0.5) / (len(ids) + 0.5))
+                # Every document appears once per term, so fancy-index addition is safe
+                scores[ids] += boost * idf * tfs * (self.k1 + 1) / (tfs + norms[ids])
+
+            if kind:
+                kinds = [kind] if isinstance(kind, str) else kind
+                codes = [self._kinds[name] for name in kinds if name in self._kinds]
+                scores[~np.isin(self._kind_codes, codes)] = 0
+
+            candidates = np.flatnonzero(scores)
+            if len(candidates) > limit:
+                candidates = candidates[np.argpartition(-scores[candidates], limit - 1)[:limit]]
+            ranked = sorted(candidates.tolist(), key=lambda doc_id: (-scores[doc_id], doc_id))
+            if not ranked:
+                return []
+
+            rows = {
+                row[0]: row for row in self._conn.execute(
+                    f"SELECT id, key, kind, fields, meta FROM documents WHERE id IN ({','.join('?' * len(ranked))})",
+                    ranked
+                )
+            }
+            matched = set(query_terms)
+            results = []
+            for doc_id in ranked:
+                _, key, doc_kind, fields, meta = rows[doc_id]
+                result = {"key": key, "kind": doc_kind, "score": round(float(scores[doc_id]), 4), "meta": json.loads(meta)}
+                if highlights:
+                    snippets = {}
+                    for field, text in json.loads(fields).items():
+                        snippet = highlight(text, matched)
+                        if snippet:
+                            snippets[field] = snippet
+                    result["highlights"] = snippets
+                results.append(result)
+            return results
+
+    def sync_companies(self, store):
+        """
+        Bring the company documents in line with a CompanyStore.
+
+        New and changed companies are indexed, unchanged ones skipped and
+        companies no longer in the store deleted. Commits at the end.
+
+        Returns:
+            Dictionary with "indexed", "unchanged" and "deleted" counts
+        """
+        with self._lock:
+            seen = set()
+            indexed = unchanged = 0
+            for company in store.iter_companies():
+                key = f"company:{company['slug']}"
+                seen.add(key)
+                fields, meta = company_document(company)
+                if self.add(key, fields, kind="company", meta=meta):
+                    indexed += 1
+                else:
+                    unchanged += 1
+
+            known = [row[0] for row in self._conn.execute("SELECT key FROM documents WHERE kind = 'company' AND live = 1")]
+            deleted = sum(self.delete(key) for key in known if key not in seen)
+            self.commit()
+            return {"indexed": indexed, "unchanged": unchanged, "deleted": deleted}
+
+    def add_notes(self, notes, kind="note"):
+        """
+        Index notes or web clips (see `note_document`); each needs an `id`.
+
+        Returns:
+            Number of notes (re)indexed
+        """
+        with self._lock:
+            indexed = 0
+            for note in notes:
+                fields, meta = note_document(note)
+                indexed += self.add(f"{kind}:{note['id']}", fields, kind=kind, meta=meta)
+            self.commit()
+            return indexed
+
+    def stats(self):
+        """Document, segment, term and size counts of the index."""
+        with self._lock:
+            terms, posting_bytes = self._conn.execute(
+                "SELECT COUNT(DISTINCT term), COALESCE(SUM(LENGTH(data)), 0) FROM postings"
+            ).fetchone()
+            return {
+                "documents": self.doc_count,
+                "tombstones": self._conn.execute("SELECT COUNT(*) FROM documents WHERE live = 0").fetchone()[0],
+                "segments": self.segment_count(),
+                "terms": terms,
+                "postingBytes": posting_bytes,
+            }
+
+
+def load_notes(path):
+    """
+    Read notes or clips from a JSON array or NDJSON file.
+
+    Returns:
+        List of note dictionaries
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        content = f.read()
+    if content.lstrip().startswith("["):
+        return json.loads(content)
+    return [json.loads(line) for line in content.splitlines() if line.strip()]
@@ -0,0 +1,2 @@
+from .company_store import CompanyStore, CompanyPage, DEFAULT_DB_PATH, SORT_COLUMNS, encode_cursor, decode_cursor
+from .document_store import DocumentStore, DEFAULT_DOCUMENTS_PATH
@@ -0,0 +1,477 @@
+import base64
+import json
+import sqlite3
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+
+from scraper.ycombinator.incremental import company_key, fingerprint_company, normalize_industries
+
+DEFAULT_DB_PATH = Path("ycombinator_data") / "companies.sqlite3"
+
+# Columns the query API may sort by, mapped to their SQL expression
+SORT_COLUMNS = {
+    "name": "c.name",
+    "batch": "c.batch",
+    "location": "c.location",
+    "slug": "c.slug",
+    "first_seen": "c.first_seen",
+    "last_seen": "c.last_seen",
+    "updated_at": "c.updated_at",
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS companies (
+    id INTEGER PRIMARY KEY,
+    slug TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL DEFAULT '',
+    url TEXT NOT NULL DEFAULT '',
+    location TEXT NOT NULL DEFAULT '',
+    description TEXT NOT NULL DEFAULT '',
+    batch TEXT NOT NULL DEFAULT '',
+    logo_url TEXT NOT NULL DEFAULT '',
+    content_hash TEXT NOT NULL DEFAULT '',
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_companies_name ON companies (name, slug);
+CREATE INDEX IF NOT EXISTS idx_companies_batch ON companies (batch, name, slug);
+CREATE INDEX IF NOT EXISTS idx_companies_location ON companies (location, name, slug);
+
+CREATE TABLE IF NOT EXISTS industries (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS company_industries (
+    company_id INTEGER NOT NULL REFERENCES companies (id) ON DELETE CASCADE,
+    industry_id INTEGER NOT NULL REFERENCES industries (id),
+    PRIMARY KEY (company_id, industry_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_company_industries_industry ON company_industries (industry_id, company_id);
+"""
+
+# Schema changes applied in order to existing databases; PRAGMA user_version counts how many have run
+MIGRATIONS = (
+    # Detail page enrichment: a JSON object of extra fields and when it was fetched
+    """
+    ALTER TABLE companies ADD COLUMN details TEXT;
+    ALTER TABLE companies ADD COLUMN enriched_at TEXT;
+    """,
+)
+
+_UPSERT_COMPANY = """
+INSERT INTO companies (slug, name, url, location, description, batch, logo_url, content_hash,
+                       first_seen, last_seen, updated_at)
+VALUES (:slug, :name, :url, :location, :description, :batch, :logo_url, :content_hash,
+        :seen_at, :seen_at, :seen_at)
+ON CONFLICT (slug) DO UPDATE SET
+    name = excluded.name,
+    url = excluded.url,
+    location = excluded.location,
+    description = excluded.description,
+    batch = excluded.batch,
+    logo_url = excluded.logo_url,
+    updated_at = CASE WHEN companies.content_hash != excluded.content_hash
+                      THEN excluded.updated_at ELSE companies.updated_at END,
+    content_hash = excluded.content_hash,
+    last_seen = excluded.last_seen
+"""
+
+# SQLite's default limit on bound parameters is 999 on older builds
+_MAX_PARAMS = 900
+
+
+@dataclass
+class CompanyPage:
+    """One page of query results and the cursor for the next page (None on the last page)."""
+    items: list
+    next_cursor: str = None
+
+
+class CompanyStore:
+    """
+    Embedded SQLite store for scraped companies.
+
+    Companies are keyed by their directory slug. Industries live in their own
+    table joined through `company_industries`, and batch, location and
+    industry are indexed so filtered, sorted pages are read straight off an
+    index. Records come back in the scraper's dict shape plus `slug`,
+    `firstSeen`, `lastSeen`, `updatedAt` and `enrichedAt`, with any detail
+    page fields (founders, teamSize, ...) merged in.
+    """
+
+    def __init__(self, path=DEFAULT_DB_PATH):
+        """
+        Args:
+            path: Database file; parent directories are created as needed.
+                Use ":memory:" for a throwaway store.
+        """
+        self.path = path
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        # The API renders on worker threads and the scheduler syncs indexes
+        # from its blocking executor, so the connection is shared behind a lock
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = NORMAL")
+        self._conn.execute("PRAGMA foreign_keys = ON")
+        self._conn.executescript(SCHEMA)
+        self._migrate()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _migrate(self):
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        for number, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+            with self._conn:
+                for statement in filter(str.strip, migration.split(";")):
+                    self._conn.execute(statement)
+                self._conn.execute(f"PRAGMA user_version = {number}")
+
+    def upsert_companies(self, companies, seen_at=None):
+        """
+        Insert or update a batch of companies in a single transaction.
+
+        Args:
+            companies: List of company dictionaries as returned by the scraper
+            seen_at: ISO timestamp to record as last seen (defaults to now)
+
+        Returns:
+            Number of companies written
+        """
+        with self._lock:
+            seen_at = seen_at or datetime.now().isoformat(timespec="seconds")
+            rows = {}
+            industries = {}
+            for company in companies:
+                slug = company_key(company)
+                if not slug:
+                    continue
+                rows[slug] = {
+                    "slug": slug,
+                    "name": company.get("name") or "",
+                    "url": company.get("url") or "",
+                    "location": company.get("location") or "",
+                    "description": company.get("description") or "",
+                    "batch": company.get("batch") or "",
+                    "logo_url": company.get("logoUrl") or "",
+                    "content_hash": fingerprint_company(company)[0],
+                    "seen_at": seen_at,
+                }
+                industries[slug] = set(normalize_industries(company.get("industries")))
+
+            if not rows:
+                return 0
+
+            with self._conn:
+                self._conn.executemany(_UPSERT_COMPANY, rows.values())
+
+                company_ids = self._ids_for_slugs(list(rows))
+                all_industries = set().union(*industries.values())
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO industries (name) VALUES (?)",
+                    [(name,) for name in all_industries]
+                )
+                industry_ids = self._industry_ids(all_industries)
+
+                # Replace each company's industry links wholesale
+                ids = list(company_ids.values())
+                for start in range(0, len(ids), _MAX_PARAMS):
+                    chunk = ids[start:start + _MAX_PARAMS]
+                    self._conn.execute(
+                        f"DELETE FROM company_industries WHERE company_id IN ({','.join('?' * len(chunk))})",
+                        chunk
+                    )
+                self._conn.executemany(
+                    "INSERT INTO company_industries (company_id, industry_id) VALUES (?, ?)",
+                    [
+                        (company_ids[slug], industry_ids[name])
+                        for slug, names in industries.items()
+                        for name in names
+                    ]
+                )
+            return len(rows)
+
+    def update_details(self, details, enriched_at=None):
+        """
+        Store detail page data for companies in a single transaction.
+
+        Args:
+            details: Dictionary of slug to details (founders, teamSize, ...)
+            enriched_at: ISO timestamp of the fetch (defaults to now)
+
+        Returns:
+            Number of companies updated
+        """
+        with self._lock:
+            enriched_at = enriched_at or datetime.now().isoformat(timespec="seconds")
+            with self._conn:
+                cursor = self._conn.executemany(
+                    "UPDATE companies SET details = ?, enriched_at = ? WHERE slug = ?",
+                    [
+                        (json.dumps(value, ensure_ascii=False, separators=(",", ":")), enriched_at, slug)
+                        for slug, value in details.items()
+                    ]
+                )
+            return cursor.rowcount
+
+    def companies_needing_details(self, stale_before=None, limit=None):
+        """
+        Get companies whose details have never been fetched or are out of date.
+
+        Details are out of date when the listing changed after they were
+        fetched, or when they were fetched before `stale_before`.
+
+        Args:
+            stale_before: Optional ISO timestamp; details fetched earlier are refetched
+            limit: Optional maximum number of companies
+
+        Returns:
+            List of records with slug, name and url
+        """
+        with self._lock:
+            where = "details IS NULL OR enriched_at < updated_at"
+            params = []
+            if stale_before:
+                where += " OR enriched_at < ?"
+                params.append(stale_before)
+            sql = f"SELECT slug, name, url FROM companies WHERE {where} ORDER BY slug"
+            if limit:
+                sql += " LIMIT ?"
+                params.append(limit)
+            return [dict(row) for row in self._conn.execute(sql, params)]
+
+    def delete_companies(self, slugs):
+        """
+        Delete companies by slug.
+
+        Returns:
+            Number of companies deleted
+        """
+        with self._lock:
+            slugs = list(slugs)
+            deleted = 0
+            with self._conn:
+                for start in range(0, len(slugs), _MAX_PARAMS):
+                    chunk = slugs[start:start + _MAX_PARAMS]
+                    cursor = self._conn.execute(
+                        f"DELETE FROM companies WHERE slug IN ({','.join('?' * len(chunk))})",
+                        chunk
+                    )
+                    deleted += cursor.rowcount
+            return deleted
+
+    def import_snapshot(self, path):
+        """
+        Load a `ycombinator_companies_<timestamp>.json` snapshot into the store.
+
+        Returns:
+            Number of companies written
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            return self.upsert_companies(json.load(f))
+
+    def data_version(self):
+        """
+        Get SQLite's data version, which changes whenever another connection commits.
+
+        Readers compare it between requests to notice that a scrape has landed.
+        """
+        with self._lock:
+            return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def get(self, slug):
+        """Get one company by slug, or None."""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM companies WHERE slug = ?", (slug,)).fetchone()
+            return self._to_records([row])[0] if row else None
+
+    def count(self, batch=None, industry=None, location=None):
+        """Count companies matching the filters (see `query`)."""
+        with self._lock:
+            joins, where, params = self._filters(batch, industry, location)
+            sql = f"SELECT COUNT(DISTINCT c.id) FROM companies c {joins} {'WHERE ' + ' AND '.join(where) if where else ''}"
+            return self._conn.execute(sql, params).fetchone()[0]
+
+    def query(self, batch=None, industry=None, location=None, sort="name", descending=False, limit=50, cursor=None):
+        """
+        Get one page of companies using keyset pagination.
+
+        Filters accept a single value or a list of values. Pages are ordered
+        by the sort column with the slug as a tie-breaker, and the cursor
+        encodes the last row's position, so deep pages cost the same as the
+        first one.
+
+        Args:
+            batch: Batch name(s) to match, e.g. "Winter 2024"
+            industry: Industry name(s); a company matches if it has any of them
+            location: Location(s) to match exactly
+            sort: One of SORT_COLUMNS
+            descending: Whether to sort in descending order
+            limit: Maximum number of companies to return
+            cursor: `next_cursor` from the previous page
+
+        Returns:
+            CompanyPage
+
+        Raises:
+            ValueError: If the sort column or cursor is invalid
+        """
+        with self._lock:
+            if sort not in SORT_COLUMNS:
+                raise ValueError(f"Cannot sort by '{sort}', expected one of {', '.join(SORT_COLUMNS)}")
+            column = SORT_COLUMNS[sort]
+
+            joins, where, params = self._filters(batch, industry, location)
+            if cursor:
+                last_value, last_slug = decode_cursor(cursor)
+                where.append(f"({column}, c.slug) {'<' if descending else '>'} (?, ?)")
+                params.extend([last_value, last_slug])
+
+            direction = "DESC" if descending else "ASC"
+            sql = (
+                f"SELECT DISTINCT c.* FROM companies c {joins} "
+                f"{'WHERE ' + ' AND '.join(where) if where else ''} "
+                f"ORDER BY {column} {direction}, c.slug {direction} LIMIT ?"
+            )
+            rows = self._conn.execute(sql, params + [limit + 1]).fetchall()
+
+            next_cursor = None
+            if len(rows) > limit:
+                rows = rows[:limit]
+                last = rows[-1]
+                next_cursor = encode_cursor(last[column.split(".", 1)[1]], last["slug"])
+            return CompanyPage(self._to_records(rows), next_cursor)
+
+    def iter_companies(self, batch_size=1000):
+        """Yield every company in slug order without loading them all at once."""
+        cursor = None
+        while True:
+            page = self.query(sort="slug", limit=batch_size, cursor=cursor)
+            yield from page.items
+            if page.next_cursor is None:
+                return
+            cursor = page.next_cursor
+
+    def facet_counts(self, facet):
+        """
+        Count companies per batch, location or industry.
+
+        Args:
+            facet: "batch", "location" or "industry"
+
+        Returns:
+            List of (value, count) tuples, most common first
+        """
+        with self._lock:
+            if facet == "industry":
+                sql = ("SELECT i.name, COUNT(*) FROM company_industries ci JOIN industries i ON i.id = ci.industry_id "
+                       "GROUP BY i.id ORDER BY COUNT(*) DESC, i.name")
+            elif facet in ("batch", "location"):
+                sql = f"SELECT {facet}, COUNT(*) FROM companies GROUP BY {facet} ORDER BY COUNT(*) DESC, {facet}"
+            else:
+                raise ValueError(f"Unknown facet '{facet}', expected batch, location or industry")
+            return [tuple(row) for row in self._conn.execute(sql)]
+
+    def _filters(self, batch, industry, location):
+        joins, where, params = "", [], []
+        for column, value in (("c.batch", batch), ("c.location", location)):
+            if value:
+                values = [value] if isinstance(value, str) else list(value)
+                where.append(f"{column} IN ({','.join('?' * len(values))})")
+                params.extend(values)
+        if industry:
+            values = [industry] if isinstance(industry, str) else list(industry)
+            joins = ("JOIN company_industries ci ON ci.company_id = c.id "
+                     "JOIN industries i ON i.id = ci.industry_id")
+            where.append(f"i.name IN ({','.join('?' * len(values))})")
+            params.extend(values)
+        return joins, where, params
+
+    def _ids_for_slugs(self, slugs):
+        ids = {}
+        for start in range(0, len(slugs), _MAX_PARAMS):
+            chunk = slugs[start:start + _MAX_PARAMS]
+            ids.update(self._conn.execute(
+                f"SELECT slug, id FROM companies WHERE slug IN ({','.join('?' * len(chunk))})",
+                chunk
+            ).fetchall())
+        return ids
+
+    def _industry_ids(self, names):
+        names = list(names)
+        ids = {}
+        for start in range(0, len(names), _MAX_PARAMS):
+            chunk = names[start:start + _MAX_PARAMS]
+            ids.update(self._conn.execute(
+                f"SELECT name, id FROM industries WHERE name IN ({','.join('?' * len(chunk))})",
+                chunk
+            ).fetchall())
+        return ids
+
+    def _to_records(self, rows):
+        if not rows:
+            return []
+        ids = [row["id"] for row in rows]
+        industries = {company_id: [] for company_id in ids}
+        for start in range(0, len(ids), _MAX_PARAMS):
+            chunk = ids[start:start + _MAX_PARAMS]
+            for company_id, name in self._conn.execute(
+                "SELECT ci.company_id, i.name FROM company_industries ci JOIN industries i ON i.id = ci.industry_id "
+                f"WHERE ci.company_id IN ({','.join('?' * len(chunk))}) ORDER BY i.name",
+                chunk
+            ):
+                industries[company_id].append(name)
+
+        return [
+            {
+                **(json.loads(row["details"]) if row["details"] else {}),
+                "slug": row["slug"],
+                "name": row["name"],
+                "url": row["url"],
+                "location": row["location"],
+                "description": row["description"],
+                "batch": row["batch"],
+                "industries": industries[row["id"]],
+                "logoUrl": row["logo_url"],
+                "firstSeen": row["first_seen"],
+                "lastSeen": row["last_seen"],
+                "updatedAt": row["updated_at"],
+                "enrichedAt": row["enriched_at"],
+            }
+            for row in rows
+        ]
+
+
+def encode_cursor(value, slug):
+    """Encode a keyset position as an opaque URL-safe string."""
+    raw = json.dumps([value, slug], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor produced by `encode_cursor`.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        value, slug = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+    return value, slug
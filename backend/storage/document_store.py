@@ -0,0 +1,299 @@
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+
+DEFAULT_DOCUMENTS_PATH = Path("ycombinator_data") / "documents.sqlite3"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    size INTEGER NOT NULL DEFAULT 0,
+    file_hash TEXT NOT NULL,
+    pages INTEGER NOT NULL DEFAULT 0,
+    chunks INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'ingesting',
+    error TEXT,
+    ingested_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_documents_hash ON documents (file_hash, status);
+
+CREATE TABLE IF NOT EXISTS chunks (
+    id INTEGER PRIMARY KEY,
+    hash TEXT NOT NULL UNIQUE,
+    text TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS document_chunks (
+    document_id INTEGER NOT NULL REFERENCES documents (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    chunk_id INTEGER NOT NULL REFERENCES chunks (id),
+    page_start INTEGER NOT NULL,
+    page_end INTEGER NOT NULL,
+    PRIMARY KEY (document_id, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_document_chunks_chunk ON document_chunks (chunk_id);
+"""
+
+# SQLite's default limit on bound parameters is 999 on older builds
+_MAX_PARAMS = 900
+
+
+class DocumentStore:
+    """
+    Embedded SQLite store for ingested documents and their text chunks.
+
+    Each chunk's text is stored once per content hash, however many
+    documents (or positions within one) contain it; `document_chunks` maps
+    every document position to its chunk and the pages it came from.
+    Documents are keyed by path and remember the hash of the file they were
+    ingested from, so unchanged files are skipped on the next run.
+    """
+
+    def __init__(self, path=DEFAULT_DOCUMENTS_PATH):
+        """
+        Args:
+            path: Database file; parent directories are created as needed.
+                Use ":memory:" for a throwaway store.
+        """
+        self.path = path
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path))
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = NORMAL")
+        self._conn.execute("PRAGMA foreign_keys = ON")
+        self._conn.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        self._conn.close()
+
+    def data_version(self):
+        """Get SQLite's data version, which changes whenever another connection commits."""
+        return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def get_document(self, path):
+        """Get a document's row as a dictionary by path, or None."""
+        row = self._conn.execute("SELECT * FROM documents WHERE path = ?", (str(path),)).fetchone()
+        return _document_record(row) if row else None
+
+    def find_by_hash(self, file_hash):
+        """Get a fully ingested document with this file hash, or None."""
+        row = self._conn.execute(
+            "SELECT * FROM documents WHERE file_hash = ? AND status = 'done' LIMIT 1", (file_hash,)
+        ).fetchone()
+        return _document_record(row) if row else None
+
+    def begin_document(self, path, name, kind, size, file_hash, ingested_at=None):
+        """
+        Register a document about to be ingested, dropping any chunks of an earlier version.
+
+        Args:
+            path: Source path, the document's key
+            name: Display name
+            kind: Format, e.g. "pdf", "docx" or "text"
+            size: File size in bytes
+            file_hash: Hash of the file's bytes
+            ingested_at: ISO timestamp (defaults to now)
+
+        Returns:
+            Document id
+        """
+        ingested_at = ingested_at or datetime.now().isoformat(timespec='seconds')
+        with self._conn:
+            row = self._conn.execute(
+                """
+                INSERT INTO documents (path, name, kind, size, file_hash, status, ingested_at)
+                VALUES (?, ?, ?, ?, ?, 'ingesting', ?)
+                ON CONFLICT (path) DO UPDATE SET
+                    name = excluded.name, kind = excluded.kind, size = excluded.size,
+                    file_hash = excluded.file_hash, pages = 0, chunks = 0, status = 'ingesting',
+                    error = NULL, ingested_at = excluded.ingested_at
+                RETURNING id
+                """,
+                (str(path), name, kind, size, file_hash, ingested_at)
+            ).fetchone()
+            self._conn.execute("DELETE FROM document_chunks WHERE document_id = ?", (row[0],))
+        return row[0]
+
+    def add_chunks(self, document_id, chunks):
+        """
+        Write a batch of a document's chunks in one transaction.
+
+        Args:
+            document_id: Id from `begin_document`
+            chunks: Chunk objects (position, text, hash, page_start, page_end)
+
+        Returns:
+            Number of chunk texts that were not stored yet
+        """
+        chunks = list(chunks)
+        if not chunks:
+            return 0
+        with self._conn:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO chunks (hash, text) VALUES (?, ?)",
+                ((chunk.hash, chunk.text) for chunk in chunks)
+            )
+            new = self._conn.total_changes - before
+            ids = self._chunk_ids({chunk.hash for chunk in chunks})
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO document_chunks (document_id, position, chunk_id, page_start, page_end) "
+                "VALUES (?, ?, ?, ?, ?)",
+                ((document_id, chunk.position, ids[chunk.hash], chunk.page_start, chunk.page_end) for chunk in chunks)
+            )
+        return new
+
+    def copy_chunks(self, source_id, document_id):
+        """
+        Give a document the chunks of another one ingested from identical bytes.
+
+        Returns:
+            Number of chunk positions copied
+        """
+        with self._conn:
+            cursor = self._conn.execute(
+                """
+                INSERT OR REPLACE INTO document_chunks (document_id, position, chunk_id, page_start, page_end)
+                SELECT ?, position, chunk_id, page_start, page_end FROM document_chunks WHERE document_id = ?
+                """,
+                (document_id, source_id)
+            )
+        return cursor.rowcount
+
+    def finish_document(self, document_id, pages, chunks, error=None):
+        """Record how a document's ingestion ended."""
+        with self._conn:
+            self._conn.execute(
+                "UPDATE documents SET pages = ?, chunks = ?, status = ?, error = ? WHERE id = ?",
+                (pages, chunks, 'failed' if error else 'done', str(error) if error else None, document_id)
+            )
+
+    def delete_documents(self, paths):
+        """
+        Delete documents by path; chunks no other document uses go with them.
+
+        Returns:
+            Number of documents deleted
+        """
+        paths = [str(path) for path in paths]
+        deleted = 0
+        with self._conn:
+            for start in range(0, len(paths), _MAX_PARAMS):
+                chunk = paths[start:start + _MAX_PARAMS]
+                placeholders = ",".join("?" * len(chunk))
+                deleted += self._conn.execute(f"DELETE FROM documents WHERE path IN ({placeholders})", chunk).rowcount
+            self._prune_chunks()
+        return deleted
+
+    def prune_chunks(self):
+        """
+        Delete chunk texts no document refers to any more, e.g. after re-ingesting changed files.
+
+        Returns:
+            Number of chunks deleted
+        """
+        with self._conn:
+            return self._prune_chunks()
+
+    def _prune_chunks(self):
+        return self._conn.execute(
+            "DELETE FROM chunks WHERE NOT EXISTS (SELECT 1 FROM document_chunks dc WHERE dc.chunk_id = chunks.id)"
+        ).rowcount
+
+    def documents(self):
+        """Get every document's row as a dictionary, by path."""
+        return [_document_record(row) for row in self._conn.execute("SELECT * FROM documents ORDER BY path")]
+
+    def iter_chunks(self, path=None, batch_size=1000):
+        """
+        Yield chunks in document and position order, reading them in batches.
+
+        Args:
+            path: Optional document path to limit the chunks to
+            batch_size: Rows fetched per query
+
+        Yields:
+            Dictionaries with document, position, pageStart, pageEnd, hash and text
+        """
+        where = "WHERE d.path = ?" if path is not None else ""
+        params = [str(path)] if path is not None else []
+        last = (-1, -1)
+        while True:
+            rows = self._conn.execute(
+                f"""
+                SELECT d.id AS document_id, d.path, dc.position, dc.page_start, dc.page_end, c.hash, c.text
+                FROM document_chunks dc
+                JOIN documents d ON d.id = dc.document_id
+                JOIN chunks c ON c.id = dc.chunk_id
+                {where} {'AND' if where else 'WHERE'} (dc.document_id, dc.position) > (?, ?)
+                ORDER BY dc.document_id, dc.position
+                LIMIT ?
+                """,
+                params + [last[0], last[1], batch_size]
+            ).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield {
+                    "document": row["path"],
+                    "position": row["position"],
+                    "pageStart": row["page_start"],
+                    "pageEnd": row["page_end"],
+                    "hash": row["hash"],
+                    "text": row["text"],
+                }
+            last = (rows[-1]["document_id"], rows[-1]["position"])
+
+    def stats(self):
+        """Document, chunk and text size counts of the store."""
+        documents, failed, pages, positions = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(status = 'failed'), 0), COALESCE(SUM(pages), 0), COALESCE(SUM(chunks), 0) "
+            "FROM documents"
+        ).fetchone()
+        chunks, text_bytes = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(LENGTH(text)), 0) FROM chunks"
+        ).fetchone()
+        return {
+            "documents": documents,
+            "failed": failed,
+            "pages": pages,
+            "chunkPositions": positions,
+            "uniqueChunks": chunks,
+            "textBytes": text_bytes,
+        }
+
+    def _chunk_ids(self, hashes):
+        hashes = list(hashes)
+        ids = {}
+        for start in range(0, len(hashes), _MAX_PARAMS):
+            chunk = hashes[start:start + _MAX_PARAMS]
+            placeholders = ",".join("?" * len(chunk))
+            ids.update(self._conn.execute(f"SELECT hash, id FROM chunks WHERE hash IN ({placeholders})", chunk))
+        return ids
+
+
+def _document_record(row):
+    return {
+        "id": row["id"],
+        "path": row["path"],
+        "name": row["name"],
+        "kind": row["kind"],
+        "size": row["size"],
+        "fileHash": row["file_hash"],
+        "pages": row["pages"],
+        "chunks": row["chunks"],
+        "status": row["status"],
+        "error": row["error"],
+        "ingestedAt": row["ingested_at"],
+    }
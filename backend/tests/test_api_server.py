@@ -0,0 +1,119 @@
+import asyncio
+import json
+import os
+import sys
+import time
+import unittest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from api.server import ApiServer, CompanyApi
+from storage.company_store import CompanyStore
+
+
+def make_companies(count):
+    return [
+        {
+            "name": f"Company {index:03d}",
+            "url": f"https://www.ycombinator.com/companies/company-{index:03d}",
+            "location": "San Francisco, CA",
+            "description": "A company that makes software for other companies " * 3,
+            "batch": "Winter 2024",
+            "industries": ["B2B"],
+        }
+        for index in range(count)
+    ]
+
+
+class ConditionalRequestTest(unittest.TestCase):
+    """ETags differ per content encoding and If-None-Match is matched against the one served."""
+
+    def setUp(self):
+        self.store = CompanyStore(":memory:")
+        self.store.upsert_companies(make_companies(40))
+        self.api = CompanyApi(self.store)
+
+    def tearDown(self):
+        self.store.close()
+
+    def test_each_encoding_has_its_own_etag(self):
+        _, identity, body = self.api.respond("GET", "/companies?limit=40", {})
+        _, gzipped, _ = self.api.respond("GET", "/companies?limit=40", {"accept-encoding": "gzip"})
+        self.assertEqual(len(json.loads(body)["items"]), 40)
+        self.assertEqual(gzipped["Content-Encoding"], "gzip")
+        self.assertNotEqual(identity["ETag"], gzipped["ETag"])
+
+    def test_if_none_match_uses_the_served_encoding(self):
+        _, gzipped, _ = self.api.respond("GET", "/companies?limit=40", {"accept-encoding": "gzip"})
+        status, _, body = self.api.respond("GET", "/companies?limit=40",
+                                           {"accept-encoding": "gzip", "if-none-match": gzipped["ETag"]})
+        self.assertEqual((status, body), (304, b""))
+
+        # The gzip variant's tag does not validate the identity body
+        status, _, body = self.api.respond("GET", "/companies?limit=40", {"if-none-match": gzipped["ETag"]})
+        self.assertEqual(status, 200)
+        self.assertTrue(body)
+
+
+class SlowSearchIndex:
+    """Stands in for a SearchIndex whose queries take a while."""
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+
+    def data_version(self):
+        return 1
+
+    def search(self, query, **options):
+        time.sleep(self.seconds)
+        return []
+
+
+async def fetch(port, target, extra_headers=""):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"GET {target} HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n{extra_headers}\r\n"
+                 .encode("latin-1"))
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    return int(response.split(b" ", 2)[1]), time.monotonic()
+
+
+class ServerConcurrencyTest(unittest.IsolatedAsyncioTestCase):
+    """A slow render does not hold up other connections."""
+
+    async def asyncSetUp(self):
+        self.store = CompanyStore(":memory:")
+        self.store.upsert_companies(make_companies(5))
+        self.server = await ApiServer(self.store, port=0, search_index=SlowSearchIndex(0.5)).start()
+
+    async def asyncTearDown(self):
+        await self.server.close()
+        self.store.close()
+
+    async def test_fast_request_finishes_during_a_slow_one(self):
+        slow = asyncio.ensure_future(fetch(self.server.port, "/search?q=anything"))
+        await asyncio.sleep(0.05)
+        status, fast_done = await fetch(self.server.port, "/companies")
+        self.assertEqual(status, 200)
+        self.assertFalse(slow.done())
+        status, slow_done = await slow
+        self.assertEqual(status, 200)
+        self.assertLess(fast_done, slow_done)
+
+    async def test_errors_are_logged_with_their_traceback(self):
+        def fail(path, params):
+            raise RuntimeError("render failed")
+
+        self.server.api.render = fail
+        with self.assertLogs("api.server", "ERROR") as logs:
+            status, _ = await fetch(self.server.port, "/companies")
+        self.assertEqual(status, 500)
+        self.assertIn("RuntimeError: render failed", logs.output[0])
+
+    async def test_malformed_content_length_is_a_bad_request(self):
+        status, _ = await fetch(self.server.port, "/companies", "Content-Length: lots\r\n")
+        self.assertEqual(status, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
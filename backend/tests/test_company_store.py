@@ -0,0 +1,108 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scraper.ycombinator.incremental import fingerprint_company
+from storage.company_store import CompanyStore
+
+
+def make_company(index, industries=("B2B",), batch="Winter 2024"):
+    return {
+        "name": f"Company {index:02d}",
+        "url": f"https://www.ycombinator.com/companies/company-{index:02d}",
+        "location": "San Francisco, CA",
+        "description": f"Company number {index}",
+        "batch": batch,
+        "industries": list(industries),
+    }
+
+
+class CompanyStoreQueryTest(unittest.TestCase):
+    """Filtered counts and keyset pages."""
+
+    def setUp(self):
+        # 8 companies in both industries, 4 in each alone, 4 in neither
+        companies = (
+            [make_company(index, ("B2B", "AI")) for index in range(8)]
+            + [make_company(index, ("B2B",)) for index in range(8, 12)]
+            + [make_company(index, ("AI",), batch="Summer 2024") for index in range(12, 16)]
+            + [make_company(index, ("Fintech",)) for index in range(16, 20)]
+        )
+        self.store = CompanyStore(":memory:")
+        self.store.upsert_companies(companies)
+
+    def tearDown(self):
+        self.store.close()
+
+    def test_count_matches_each_company_once(self):
+        self.assertEqual(self.store.count(industry=["B2B", "AI"]), 16)
+        self.assertEqual(self.store.count(industry="AI"), 12)
+        self.assertEqual(self.store.count(industry=["B2B", "AI"], batch="Winter 2024"), 12)
+        self.assertEqual(self.store.count(), 20)
+
+    def test_count_agrees_with_the_pages(self):
+        slugs = []
+        cursor = None
+        while True:
+            page = self.store.query(industry=["B2B", "AI"], limit=5, cursor=cursor)
+            slugs.extend(company["slug"] for company in page.items)
+            if page.next_cursor is None:
+                break
+            cursor = page.next_cursor
+        self.assertEqual(len(slugs), len(set(slugs)))
+        self.assertEqual(len(slugs), self.store.count(industry=["B2B", "AI"]))
+
+    def test_cursor_continues_after_the_last_row(self):
+        first = self.store.query(sort="batch", descending=True, limit=6)
+        second = self.store.query(sort="batch", descending=True, limit=6, cursor=first.next_cursor)
+        everything = self.store.query(sort="batch", descending=True, limit=100)
+        self.assertEqual(
+            [company["slug"] for company in first.items + second.items],
+            [company["slug"] for company in everything.items[:12]]
+        )
+        self.assertIsNone(everything.next_cursor)
+
+    def test_invalid_cursor_is_rejected(self):
+        with self.assertRaises(ValueError):
+            self.store.query(cursor="not a cursor")
+
+    def test_industries_are_normalized_like_fingerprints(self):
+        company = make_company(99, (" Developer   Tools ", "AI", "AI", ""))
+        self.store.upsert_companies([company])
+        stored = self.store.get("company-99")
+        self.assertEqual(stored["industries"], ["AI", "Developer Tools"])
+        self.assertEqual(fingerprint_company(stored)[0], fingerprint_company(company)[0])
+
+
+class CompanyStoreDataVersionTest(unittest.TestCase):
+    """data_version changes when another connection commits, which is how readers invalidate caches."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        path = os.path.join(self.directory.name, "companies.sqlite3")
+        self.reader = CompanyStore(path)
+        self.writer = CompanyStore(path)
+
+    def tearDown(self):
+        self.reader.close()
+        self.writer.close()
+        self.directory.cleanup()
+
+    def test_changes_when_another_connection_commits(self):
+        before = self.reader.data_version()
+        self.assertEqual(self.reader.data_version(), before)
+
+        self.writer.upsert_companies([make_company(1)])
+        after = self.reader.data_version()
+        self.assertNotEqual(after, before)
+        self.assertEqual(self.reader.count(), 1)
+
+        # The reader's own writes do not change its view of the version
+        self.reader.upsert_companies([make_company(2)])
+        self.assertEqual(self.reader.data_version(), after)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+import os
+import sys
+import tempfile
+import threading
+import unittest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.http_cache import HttpCache
+
+
+class FakeResponse:
+    def __init__(self, status_code, headers, content):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+
+
+class FakeSession:
+    """Answers with a fixed body and ETag, and 304 when the request carries that ETag."""
+
+    def __init__(self, body=b"<html>company</html>", etag='"v1"'):
+        self.body = body
+        self.etag = etag
+        self.requests = []
+
+    def request(self, method, url, headers=None, data=None, **kwargs):
+        self.requests.append(headers or {})
+        if (headers or {}).get("If-None-Match") == self.etag:
+            return FakeResponse(304, {"ETag": self.etag}, b"")
+        return FakeResponse(200, {"ETag": self.etag, "Content-Type": "text/html"}, self.body)
+
+
+class HttpCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = HttpCache(self.directory.name, ttl_rules=())
+
+    def tearDown(self):
+        self.cache.close()
+        self.directory.cleanup()
+
+    def test_stale_entries_are_revalidated(self):
+        session = FakeSession()
+        first = self.cache.request(session, "GET", "https://example.com/a")
+        self.assertFalse(first.from_cache)
+
+        second = self.cache.request(session, "GET", "https://example.com/a")
+        self.assertEqual(session.requests[-1]["If-None-Match"], '"v1"')
+        self.assertTrue(second.revalidated)
+        self.assertEqual(second.content, session.body)
+        self.assertEqual(self.cache.stats.revalidated, 1)
+
+    def test_changed_response_replaces_the_entry(self):
+        session = FakeSession()
+        self.cache.request(session, "GET", "https://example.com/a")
+        session.body, session.etag = b"<html>changed</html>", '"v2"'
+        response = self.cache.request(session, "GET", "https://example.com/a")
+        self.assertFalse(response.from_cache)
+        self.assertEqual(self.cache.request(session, "GET", "https://example.com/a").content, b"<html>changed</html>")
+
+    def test_credentials_are_part_of_the_key(self):
+        url = "https://example.com/a"
+        keys = {
+            self.cache.cache_key("GET", url, {"Authorization": "Bearer one"}),
+            self.cache.cache_key("GET", url, {"Authorization": "Bearer two"}),
+            self.cache.cache_key("GET", url, {"Cookie": "session=one"}),
+            self.cache.cache_key("GET", url),
+        }
+        self.assertEqual(len(keys), 4)
+
+    def test_least_recently_used_entries_are_evicted(self):
+        bodies = {f"https://example.com/{index}": os.urandom(4096) for index in range(3)}
+        for url, body in bodies.items():
+            self.cache.store(self.cache.cache_key("GET", url), "GET", url, 200, {"ETag": '"x"'}, body)
+        first, second, third = [self.cache.cache_key("GET", url) for url in bodies]
+        # Reading the first entry makes the second the least recently used
+        self.assertIsNotNone(self.cache.lookup(first))
+
+        self.cache.max_bytes = self.cache.total_bytes() - 1
+        self.assertEqual(self.cache.evict(), 1)
+        self.assertIsNone(self.cache.lookup(second))
+        self.assertIsNotNone(self.cache.lookup(first))
+        self.assertIsNotNone(self.cache.lookup(third))
+        # The evicted body's file goes with it
+        body_files = list(self.cache.bodies_dir.rglob("*.gz"))
+        self.assertEqual(len(body_files), 2)
+
+    def test_store_racing_evict_never_loses_a_body(self):
+        self.cache.max_bytes = 0
+        url = "https://example.com/shared"
+        key = self.cache.cache_key("GET", url)
+        errors = []
+
+        def store():
+            try:
+                for _ in range(200):
+                    self.cache.store(key, "GET", url, 200, {"ETag": '"x"'}, b"shared body")
+                    # Whenever nobody holds the lock, every entry's body is on disk
+                    with self.cache._lock:
+                        for (body_hash,) in self.cache._conn.execute("SELECT body_hash FROM entries"):
+                            if not self.cache._body_path(body_hash).exists():
+                                errors.append("entry without a body")
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=store) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(list(self.cache.bodies_dir.rglob("*.tmp")), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
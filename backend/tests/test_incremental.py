@@ -0,0 +1,111 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scraper.ycombinator.incremental import (
+    MAX_REMOVED_FRACTION, FingerprintStore, KnownTerritory, apply_delta, compute_delta
+)
+
+
+def make_company(index, description=None):
+    return {
+        "name": f"Company {index:02d}",
+        "url": f"https://www.ycombinator.com/companies/company-{index:02d}",
+        "location": "San Francisco, CA",
+        "description": description or f"Company number {index}",
+        "batch": "Winter 2024",
+        "industries": ["B2B"],
+    }
+
+
+def known_store(count):
+    store = FingerprintStore(os.path.join(tempfile.gettempdir(), "unused-fingerprints.json"))
+    apply_delta(store, compute_delta([make_company(index) for index in range(count)], store))
+    return store
+
+
+class RemovedFractionTest(unittest.TestCase):
+    """A complete crawl missing too many known companies does not remove them."""
+
+    def setUp(self):
+        self.store = known_store(50)
+
+    def crawl_without(self, missing):
+        return [make_company(index) for index in range(missing, 50)]
+
+    def test_removals_up_to_the_limit_are_trusted(self):
+        missing = int(MAX_REMOVED_FRACTION * 50)
+        delta = compute_delta(self.crawl_without(missing), self.store)
+        self.assertEqual(len(delta.removed), missing)
+        self.assertEqual(delta.withheld_removals, 0)
+        self.assertTrue(delta.complete)
+
+        apply_delta(self.store, delta)
+        self.assertEqual(len(self.store), 50 - missing)
+
+    def test_removals_over_the_limit_are_withheld(self):
+        missing = int(MAX_REMOVED_FRACTION * 50) + 1
+        delta = compute_delta(self.crawl_without(missing), self.store)
+        self.assertEqual(delta.removed, [])
+        self.assertEqual(delta.withheld_removals, missing)
+        self.assertFalse(delta.complete)
+        self.assertEqual(len(delta.unchanged_keys), 50 - missing)
+
+        # The withheld companies stay known for the next run
+        apply_delta(self.store, delta)
+        self.assertEqual(len(self.store), 50)
+
+    def test_limit_can_be_switched_off(self):
+        delta = compute_delta(self.crawl_without(40), self.store, max_removed_fraction=None)
+        self.assertEqual(len(delta.removed), 40)
+        self.assertTrue(delta.complete)
+
+    def test_incomplete_crawl_removes_nothing(self):
+        delta = compute_delta(self.crawl_without(5), self.store, complete=False)
+        self.assertEqual((delta.removed, delta.withheld_removals, delta.complete), ([], 0, False))
+
+    def test_changes_are_kept_when_removals_are_withheld(self):
+        crawl = self.crawl_without(30) + [make_company(100)]
+        crawl[0] = make_company(30, description="Pivoted to payroll")
+        delta = compute_delta(crawl, self.store)
+        self.assertEqual(delta.withheld_removals, 30)
+        self.assertEqual([company["name"] for company in delta.added], ["Company 100"])
+        self.assertEqual([item["fields"] for item in delta.changed], [["description"]])
+
+
+class KnownTerritoryTest(unittest.TestCase):
+    """The crawl stops after a streak of pages whose companies are all known and unchanged."""
+
+    def setUp(self):
+        self.store = known_store(20)
+        self.stop = KnownTerritory(self.store, pages=2)
+
+    def test_stops_after_consecutive_known_pages(self):
+        self.assertFalse(self.stop([make_company(index) for index in range(0, 5)]))
+        self.assertTrue(self.stop([make_company(index) for index in range(5, 10)]))
+        self.assertTrue(self.stop.triggered)
+
+    def test_new_or_changed_company_resets_the_streak(self):
+        self.assertFalse(self.stop([make_company(index) for index in range(0, 5)]))
+        self.assertFalse(self.stop([make_company(5), make_company(99)]))
+        self.assertFalse(self.stop([make_company(index) for index in range(6, 10)]))
+        self.assertFalse(self.stop([make_company(10, description="Now with AI")]))
+        self.assertFalse(self.stop([make_company(index) for index in range(11, 15)]))
+        self.assertTrue(self.stop([make_company(index) for index in range(15, 20)]))
+
+    def test_empty_page_is_not_known_territory(self):
+        self.assertFalse(self.stop([make_company(0)]))
+        self.assertFalse(self.stop([]))
+        self.assertFalse(self.stop([make_company(1)]))
+        self.assertEqual(self.stop.streak, 1)
+
+    def test_empty_store_never_stops(self):
+        stop = KnownTerritory(FingerprintStore(os.path.join(tempfile.gettempdir(), "unused-fingerprints.json")))
+        for start in range(0, 20, 5):
+            self.assertFalse(stop([make_company(index) for index in range(start, start + 5)]))
+
+
+if __name__ == "__main__":
+    unittest.main()
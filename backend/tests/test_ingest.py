@@ -0,0 +1,131 @@
+import os
+import re
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ingest.chunking import Chunker, chunk_pages
+from ingest.pipeline import _Document, _Ingestion, ingest_paths
+from storage.document_store import DocumentStore
+
+
+def page_text(page_number, sentences=12):
+    return " ".join(f"Page {page_number} sentence {index} says something." for index in range(sentences))
+
+
+class ChunkerTest(unittest.TestCase):
+    """Chunks stay within the size, repeat the overlap and know their pages."""
+
+    def setUp(self):
+        self.pages = [(number, page_text(number)) for number in range(1, 6)]
+        self.chunks = list(chunk_pages(self.pages, size=300, overlap=60))
+
+    def test_chunks_stay_within_the_size(self):
+        self.assertGreater(len(self.chunks), 5)
+        self.assertEqual([chunk.position for chunk in self.chunks], list(range(len(self.chunks))))
+        for chunk in self.chunks:
+            self.assertLessEqual(len(chunk.text), 300)
+
+    def test_consecutive_chunks_overlap(self):
+        for previous, chunk in zip(self.chunks, self.chunks[1:]):
+            # The next chunk starts with the end of the previous one, at most `overlap` characters of it
+            tail = previous.text[-60:]
+            repeated = next((tail[start:] for start in range(len(tail)) if chunk.text.startswith(tail[start:])), "")
+            self.assertGreater(len(repeated.strip()), 20)
+
+    def test_page_bounds_cover_the_text(self):
+        self.assertEqual(self.chunks[0].page_start, 1)
+        self.assertEqual(self.chunks[-1].page_end, 5)
+        for previous, chunk in zip(self.chunks, self.chunks[1:]):
+            self.assertLessEqual(previous.page_start, chunk.page_start)
+            self.assertGreaterEqual(chunk.page_start, previous.page_end - 1)
+        for chunk in self.chunks:
+            pages = {int(number) for number in re.findall(r"Page (\d+)", chunk.text)}
+            self.assertEqual((chunk.page_start, chunk.page_end), (min(pages), max(pages)))
+
+    def test_overlap_larger_than_half_the_size_is_rejected(self):
+        with self.assertRaises(ValueError):
+            Chunker(100, 60)
+
+
+class PageOrderTest(unittest.TestCase):
+    """PDF page ranges finishing out of order are still chunked in page order."""
+
+    def setUp(self):
+        self.store = DocumentStore(":memory:")
+        self.ingestion = _Ingestion(self.store, workers=1, chunk_size=300, overlap=60, pages_per_task=2,
+                                    batch_size=4, force=False)
+
+    def tearDown(self):
+        self.store.close()
+
+    def test_later_ranges_wait_for_earlier_ones(self):
+        document_id = self.store.begin_document(Path("report.pdf"), "report.pdf", "pdf", 0, "hash")
+        document = _Document(document_id, Path("report.pdf"), 3, Chunker(300, 60))
+        ranges = {index: [(number, page_text(number)) for number in (index * 2 + 1, index * 2 + 2)]
+                  for index in range(3)}
+
+        for index in (2, 1):
+            document.ready[index] = ranges[index]
+            self.ingestion._ready_count += 1
+            self.ingestion._drain(document)
+            self.assertEqual((document.next_task, document.pages), (0, 0))
+        self.assertEqual(self.ingestion._ready_count, 2)
+
+        document.ready[0] = ranges[0]
+        self.ingestion._ready_count += 1
+        self.ingestion._drain(document)
+        self.assertEqual((document.next_task, document.pages, self.ingestion._ready_count), (3, 6, 0))
+
+        stored = list(self.store.iter_chunks(Path("report.pdf")))
+        expected = list(chunk_pages([page for index in range(3) for page in ranges[index]], size=300, overlap=60))
+        self.assertEqual([chunk["text"] for chunk in stored], [chunk.text for chunk in expected])
+        self.assertEqual(self.store.get_document(Path("report.pdf"))["status"], "done")
+
+
+class IngestPathsTest(unittest.TestCase):
+    """Unchanged files are skipped and identical files share chunks."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.root = Path(self.directory.name)
+        text = "\n\n".join(page_text(number) for number in range(1, 4))
+        for name in ("notes.txt", "copy of notes.txt"):
+            (self.root / name).write_text(text, encoding="utf-8")
+        self.store = DocumentStore(":memory:")
+
+    def tearDown(self):
+        self.store.close()
+        self.directory.cleanup()
+
+    def test_duplicate_file_copies_the_chunks(self):
+        stats = ingest_paths([self.root], self.store, workers=1, chunk_size=300, overlap=60)
+        self.assertEqual((stats["documents"], stats["copied"], stats["failed"]), (2, 1, 0))
+
+        original = list(self.store.iter_chunks(self.root / "copy of notes.txt"))
+        copy = list(self.store.iter_chunks(self.root / "notes.txt"))
+        self.assertTrue(original)
+        self.assertEqual([(chunk["position"], chunk["hash"]) for chunk in copy],
+                         [(chunk["position"], chunk["hash"]) for chunk in original])
+        # The copy's chunks are the same rows, not new ones
+        stats = self.store.stats()
+        self.assertEqual((stats["uniqueChunks"], stats["chunkPositions"]), (len(original), 2 * len(original)))
+        self.assertEqual(self.store.get_document(self.root / "notes.txt")["chunks"], len(original))
+
+    def test_unchanged_files_are_skipped(self):
+        ingest_paths([self.root], self.store, workers=1, chunk_size=300, overlap=60)
+        stats = ingest_paths([self.root], self.store, workers=1, chunk_size=300, overlap=60)
+        self.assertEqual((stats["unchanged"], stats["documents"], stats["newChunks"]), (2, 0, 0))
+
+    def test_missing_and_unsupported_files_are_logged(self):
+        (self.root / "image.png").write_bytes(b"\x89PNG\r\n\x1a\n")
+        with self.assertLogs("ingest.pipeline", "WARNING") as logs:
+            stats = ingest_paths([self.root / "image.png", self.root / "missing.txt"], self.store, workers=1)
+        self.assertEqual(stats["skipped"], 1)
+        self.assertEqual(len(logs.output), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+import asyncio
+import os
+import sys
+import unittest
+import urllib.error
+import urllib.request
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bench.fixture import INDEX_NAME, SEARCH_PATH, DirectoryFixture, synthetic_companies
+from scraper.ycombinator.incremental import company_key
+from scraper.ycombinator.network_capture import (
+    PAGINATION_LIMIT, SearchRequestError, SearchTemplate, fetch_facet_counts, fetch_search_page, split_search_pages
+)
+
+
+class FakeResponse:
+    def __init__(self, status, body, headers=None):
+        self.status = status
+        self.ok = 200 <= status < 300
+        self.headers = headers or {}
+        self._body = body
+
+    async def body(self):
+        return self._body
+
+
+class UrllibRequestContext:
+    """Just enough of Playwright's APIRequestContext to replay searches against the fixture."""
+
+    async def post(self, url, headers=None, data=None):
+        return await asyncio.to_thread(self._post, url, headers or {}, data)
+
+    def _post(self, url, headers, data):
+        request = urllib.request.Request(url, data=data.encode("utf-8"), headers=headers, method="POST")
+        try:
+            with urllib.request.urlopen(request, timeout=10) as response:
+                return FakeResponse(response.status, response.read(), dict(response.headers))
+        except urllib.error.HTTPError as e:
+            return FakeResponse(e.code, e.read(), dict(e.headers))
+
+
+class CannedRequestContext:
+    def __init__(self, response):
+        self.response = response
+
+    async def post(self, url, headers=None, data=None):
+        return self.response
+
+
+class SplitSearchTest(unittest.IsolatedAsyncioTestCase):
+    """A search capped by Algolia's pagination limit is split by batch and still reaches every company."""
+
+    def setUp(self):
+        self.fixture = DirectoryFixture(synthetic_companies(2500)).start()
+        host, port = self.fixture.address
+        self.template = SearchTemplate(f"http://{host}:{port}{SEARCH_PATH}", {}, INDEX_NAME,
+                                       {"query": "", "hitsPerPage": "40"})
+        self.request = UrllibRequestContext()
+
+    def tearDown(self):
+        self.fixture.close()
+
+    async def test_unsplit_search_is_truncated(self):
+        companies, total_pages, truncated = await fetch_search_page(self.request, self.template, 1, 1000)
+        self.assertEqual((len(companies), total_pages, truncated), (1000, 1, True))
+
+    async def test_split_search_reaches_every_company(self):
+        counts, total_hits = await fetch_facet_counts(self.request, self.template)
+        self.assertEqual(total_hits, 2500)
+        search_pages = split_search_pages(counts, total_hits, page_size=1000)
+        self.assertEqual(len(search_pages), len(counts))
+
+        slugs = set()
+        for facet_filter, page_number in search_pages:
+            companies, _, truncated = await fetch_search_page(
+                self.request, self.template, page_number, 1000, facet_filter=facet_filter
+            )
+            self.assertFalse(truncated)
+            slugs.update(company_key(company) for company in companies)
+        self.assertEqual(len(slugs), 2500)
+
+    async def test_split_pages_follow_the_page_size(self):
+        counts, total_hits = await fetch_facet_counts(self.request, self.template)
+        search_pages = split_search_pages(counts, total_hits, page_size=100)
+        # Ten batches of 250 companies, three pages each
+        self.assertEqual(len(search_pages), 30)
+        self.assertEqual(search_pages, sorted(search_pages))
+
+
+class SplitSearchPagesTest(unittest.TestCase):
+    def test_a_value_over_the_cap_cannot_be_split(self):
+        self.assertIsNone(split_search_pages({"W24": PAGINATION_LIMIT + 1, "S24": 10}, PAGINATION_LIMIT + 11))
+
+    def test_hits_without_a_value_cannot_be_split(self):
+        self.assertIsNone(split_search_pages({"W24": 600, "S24": 600}, 1500))
+
+    def test_pages_are_planned_per_value(self):
+        self.assertEqual(
+            split_search_pages({"W24": 250, "S24": 100}, 350, page_size=200),
+            [("batch:S24", 1), ("batch:W24", 1), ("batch:W24", 2)]
+        )
+
+
+class SearchResponseErrorTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.template = SearchTemplate("http://search.test/queries", {}, INDEX_NAME, {"query": ""})
+
+    async def test_body_that_is_not_json_raises_a_search_error(self):
+        request = CannedRequestContext(FakeResponse(200, b"<html>proxy error</html>"))
+        with self.assertRaises(SearchRequestError) as caught:
+            await fetch_search_page(request, self.template, 2)
+        self.assertEqual(caught.exception.status, 200)
+        self.assertFalse(caught.exception.banned)
+
+    async def test_error_status_raises_with_retry_after(self):
+        request = CannedRequestContext(FakeResponse(429, b"", {"retry-after": "3"}))
+        with self.assertRaises(SearchRequestError) as caught:
+            await fetch_search_page(request, self.template, 1)
+        self.assertTrue(caught.exception.banned)
+        self.assertEqual(caught.exception.retry_after, "3")
+
+
+if __name__ == "__main__":
+    unittest.main()
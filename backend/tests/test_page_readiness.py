@@ -0,0 +1,74 @@
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.page_readiness import ReadinessTimeouts, get_first_href, run_and_wait_for_results
+
+# Results page whose "next" button shows a loader inside the results straight
+# away and only swaps the cards in after a delay, like a slow search response
+LOADER_PAGE = """<!doctype html>
+<html>
+<body>
+<button id="next">Next</button>
+<div id="wrapper">
+  <div id="results">
+    <div id="loader" hidden>Loading...</div>
+    <a class="company" href="/companies/old-1">Old 1</a>
+    <a class="company" href="/companies/old-2">Old 2</a>
+  </div>
+</div>
+<script>
+document.getElementById("next").addEventListener("click", () => {
+  document.getElementById("loader").hidden = false;
+  setTimeout(() => {
+    const results = document.getElementById("results");
+    results.querySelectorAll("a.company").forEach((card) => card.remove());
+    for (const slug of ["new-1", "new-2"]) {
+      const card = document.createElement("a");
+      card.className = "company";
+      card.href = "/companies/" + slug;
+      card.textContent = slug;
+      results.appendChild(card);
+    }
+    document.getElementById("loader").hidden = true;
+  }, __DELAY__);
+});
+</script>
+</body>
+</html>
+"""
+
+
+class LoaderToggleTest(unittest.IsolatedAsyncioTestCase):
+    """A loader shown before the cards are swapped must not count as the new results."""
+
+    async def asyncSetUp(self):
+        try:
+            from playwright.async_api import async_playwright
+            self.playwright = await async_playwright().start()
+        except ImportError:
+            self.skipTest("Playwright is not installed")
+        try:
+            self.browser = await self.playwright.chromium.launch()
+        except Exception as e:
+            await self.playwright.stop()
+            self.skipTest(f"Chromium cannot be launched: {str(e).splitlines()[0]}")
+        self.page = await self.browser.new_page()
+
+    async def asyncTearDown(self):
+        await self.browser.close()
+        await self.playwright.stop()
+
+    async def test_waits_for_the_cards_not_the_loader(self):
+        await self.page.set_content(LOADER_PAGE.replace("__DELAY__", "800"))
+        result = await run_and_wait_for_results(
+            self.page, lambda: self.page.click("#next"), "#results", "#results a.company",
+            timeouts=ReadinessTimeouts(href=5000, mutation=5000, settle=100)
+        )
+        self.assertEqual(await get_first_href(self.page, "#results a.company"), "/companies/new-1")
+        self.assertGreaterEqual(result.elapsed_ms, 800)
+
+
+if __name__ == "__main__":
+    unittest.main()
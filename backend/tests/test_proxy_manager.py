@@ -0,0 +1,114 @@
+import asyncio
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bench.fixture import DirectoryFixture
+from utils.proxy_manager import ProxyPool, fetch_all_proxies, proxy_key
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def stand_in_proxies(count):
+    return [("127.0.0.1", 20000 + index) for index in range(count)]
+
+
+def proxy_dicts(count):
+    return [{"proxy_address": host, "port": port, "username": "u", "password": "p"}
+            for host, port in stand_in_proxies(count)]
+
+
+class FetchAllProxiesTest(unittest.IsolatedAsyncioTestCase):
+    """fetch_all_proxies against the benchmark fixture's Webshare-style list."""
+
+    def setUp(self):
+        self.fixture = DirectoryFixture([]).start()
+        self.fixture.proxies = stand_in_proxies(250)
+
+    def tearDown(self):
+        self.fixture.close()
+
+    async def test_fetches_every_page(self):
+        proxies = await fetch_all_proxies(self.fixture.proxy_list_url, page_size=100)
+        self.assertEqual(len(proxies), 250)
+        self.assertEqual(len({proxy_key(proxy) for proxy in proxies}), 250)
+        self.assertEqual(self.fixture.stats.snapshot()["proxyLists"], 3)
+
+    async def test_pool_caches_the_list_for_its_ttl(self):
+        clock = FakeClock()
+        pool = ProxyPool(self.fixture.proxy_list_url, ttl=600, page_size=100, clock=clock)
+        await pool.refresh()
+        await pool.refresh()
+        self.assertEqual(len(pool), 250)
+        self.assertEqual(self.fixture.stats.snapshot()["proxyLists"], 3)
+
+        clock.now += 601
+        self.fixture.proxies = stand_in_proxies(120)
+        await pool.refresh()
+        self.assertEqual(len(pool), 120)
+        self.assertEqual(self.fixture.stats.snapshot()["proxyLists"], 5)
+
+
+class ProxyPoolTest(unittest.IsolatedAsyncioTestCase):
+    """Cool-downs and exclusive leases of a fixed pool."""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.pool = ProxyPool.from_proxies(proxy_dicts(3), base_cooldown=30, ban_cooldown=3600, clock=self.clock)
+
+    async def test_failure_cools_a_proxy_down_with_backoff(self):
+        proxy = proxy_dicts(1)[0]
+        self.pool.report_failure(proxy)
+        self.assertEqual(self.pool.score(proxy), 0.0)
+        self.clock.now += 31
+        self.assertGreater(self.pool.score(proxy), 0.0)
+
+        # A second failure in a row doubles the cool-down
+        self.pool.report_failure(proxy)
+        self.clock.now += 31
+        self.assertEqual(self.pool.score(proxy), 0.0)
+        self.clock.now += 30
+        self.assertGreater(self.pool.score(proxy), 0.0)
+
+    async def test_cooling_proxies_are_not_handed_out(self):
+        proxies = proxy_dicts(3)
+        for proxy in proxies[:2]:
+            self.pool.report_failure(proxy, banned=True)
+        for _ in range(10):
+            self.assertEqual(proxy_key(await self.pool.acquire()), proxy_key(proxies[2]))
+
+        self.pool.report_failure(proxies[2])
+        with self.assertRaises(ValueError):
+            await self.pool.acquire(timeout=0.05)
+
+    async def test_exclusive_leases_are_never_shared(self):
+        leased = await self.pool.acquire_many(3, owner="worker")
+        self.assertEqual(len({proxy_key(proxy) for proxy in leased}), 3)
+        with self.assertRaises(ValueError):
+            await self.pool.acquire(exclusive=True, timeout=0.05)
+
+        waiter = asyncio.ensure_future(self.pool.acquire(exclusive=True, owner="late", timeout=5))
+        await asyncio.sleep(0.01)
+        await self.pool.release(leased[1])
+        self.assertEqual(proxy_key(await waiter), proxy_key(leased[1]))
+
+    async def test_shared_acquire_may_use_leased_proxies(self):
+        leased = await self.pool.acquire_many(3, owner="worker")
+        proxy = await self.pool.acquire(timeout=0.05)
+        self.assertIn(proxy_key(proxy), {proxy_key(item) for item in leased})
+
+    async def test_preferred_proxy_is_leased_first(self):
+        preferred = proxy_key(proxy_dicts(3)[2])
+        leased = await self.pool.acquire_many(2, preferred=preferred)
+        self.assertEqual(proxy_key(leased[0]), preferred)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,144 @@
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scheduler import Scheduler
+from scheduler.schedules import CronSchedule
+from scheduler.sources.hackernews import HackerNewsSource
+
+
+class CronDayTest(unittest.TestCase):
+    """Day and weekday only combine with OR when both are actually restricted."""
+
+    def test_full_range_day_field_is_unrestricted(self):
+        # 2026-10-17 is a Saturday; every form of "any day" waits for Monday
+        start = datetime(2026, 10, 17, 12)
+        for expression in ("0 0 * * 1", "0 0 */1 * 1", "0 0 1-31 * mon"):
+            self.assertEqual(CronSchedule(expression).next_after(start), datetime(2026, 10, 19), expression)
+
+    def test_full_range_weekday_field_is_unrestricted(self):
+        start = datetime(2026, 10, 17, 12)
+        for expression in ("0 0 1 * *", "0 0 1 * 0-7", "0 0 1 * */1"):
+            self.assertEqual(CronSchedule(expression).next_after(start), datetime(2026, 11, 1), expression)
+
+    def test_restricted_day_and_weekday_match_either(self):
+        # The 20th or a Friday, whichever comes first
+        self.assertEqual(CronSchedule("0 0 20 * 5").next_after(datetime(2026, 10, 17, 12)), datetime(2026, 10, 20))
+
+
+class FakeContext:
+    """Serves HN search pages from a list of stories, newest first, like the search API."""
+
+    def __init__(self, stories, cursor=None):
+        self.stories = sorted(stories, key=lambda story: -story["created_at_i"])
+        self.cursor = cursor
+        self.requests = []
+
+    def set_cursor(self, value):
+        self.cursor = value
+
+    async def fetch_json(self, url):
+        params = {name: values[0] for name, values in parse_qs(urlsplit(url).query).items()}
+        self.requests.append(params)
+        matching = self.stories
+        for operator, value in re.findall(r"created_at_i(>|<=)(\d+)", params["numericFilters"]):
+            if operator == ">":
+                matching = [story for story in matching if story["created_at_i"] > int(value)]
+            else:
+                matching = [story for story in matching if story["created_at_i"] <= int(value)]
+        size = int(params["hitsPerPage"])
+        page = int(params["page"])
+        return {"hits": matching[page * size:(page + 1) * size], "nbPages": -(-len(matching) // size)}
+
+
+def make_stories(times):
+    return [{"objectID": str(time), "title": f"Show HN: {time}", "created_at_i": time} for time in times]
+
+
+class HackerNewsCursorTest(unittest.IsolatedAsyncioTestCase):
+    """The cursor never moves past stories a run did not write."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def written(self):
+        ids = []
+        for path in sorted(Path(self.directory.name, "hackernews").glob("*.ndjson")):
+            with open(path, encoding="utf-8") as f:
+                ids.extend(json.loads(line)["id"] for line in f)
+        return ids
+
+    async def test_everything_new_fits_in_one_run(self):
+        context = FakeContext(make_stories(range(1, 26)), cursor=5)
+        source = HackerNewsSource(page_size=10, max_pages=3, output_dir=self.directory.name)
+        self.assertEqual(await source.run(context), "20 new stories")
+        self.assertEqual(context.cursor, 25)
+        self.assertEqual(sorted(map(int, self.written())), list(range(6, 26)))
+
+    async def test_runs_cut_short_resume_where_they_stopped(self):
+        context = FakeContext(make_stories(range(1, 61)))
+        source = HackerNewsSource(page_size=10, max_pages=3, output_dir=self.directory.name)
+        seen = []
+        for _ in range(4):
+            await source.run(context)
+            seen.extend(int(story_id) for story_id in self.written() if int(story_id) not in seen)
+            self.assertEqual(context.cursor, max(seen))
+            # Everything up to the cursor has been written
+            self.assertEqual(sorted(seen), list(range(1, context.cursor + 1)))
+        self.assertEqual(context.cursor, 60)
+
+    async def test_stories_posted_during_a_run_do_not_shift_the_pages(self):
+        context = FakeContext(make_stories(range(1, 61)))
+        original = context.fetch_json
+
+        async def fetch_json(url):
+            payload = await original(url)
+            if len(context.requests) == 1:
+                # New stories arrive right after the first page is read
+                context.stories = sorted(context.stories + make_stories(range(100, 105)),
+                                         key=lambda story: -story["created_at_i"])
+            return payload
+
+        context.fetch_json = fetch_json
+        source = HackerNewsSource(page_size=10, max_pages=3, output_dir=self.directory.name)
+        await source.run(context)
+        self.assertEqual(sorted(map(int, self.written())), list(range(1, 21)))
+        self.assertEqual(context.cursor, 20)
+
+
+class SchedulerSessionTest(unittest.IsolatedAsyncioTestCase):
+    """Every executor thread uses its own requests.Session."""
+
+    async def test_each_thread_has_its_own_session(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        scheduler = Scheduler([], state_path=os.path.join(directory.name, "state.json"))
+        barrier = threading.Barrier(4)
+
+        def session_of_thread():
+            session = scheduler.session
+            barrier.wait(timeout=5)
+            self.assertIs(scheduler.session, session)
+            return id(session)
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            sessions = list(pool.map(lambda _: session_of_thread(), range(4)))
+        self.assertEqual(len(set(sessions)), 4)
+        await scheduler.close()
+        self.assertEqual(scheduler._sessions, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
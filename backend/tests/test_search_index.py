@@ -0,0 +1,119 @@
+import math
+import os
+import sys
+import unittest
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from search.index import SearchIndex, decode_postings, encode_postings, tokenize
+
+
+def keys(results):
+    return [result["key"] for result in results]
+
+
+class PostingsTest(unittest.TestCase):
+    def test_round_trip_in_every_width(self):
+        for doc_ids, tfs in (([1, 2, 3], [4, 8, 4]), ([5, 700, 90000], [4, 300, 70000])):
+            decoded_ids, decoded_tfs = decode_postings(encode_postings(np.array(doc_ids), np.array(tfs)), len(doc_ids))
+            self.assertEqual(decoded_ids.tolist(), doc_ids)
+            self.assertEqual(decoded_tfs.tolist(), tfs)
+
+
+class BM25Test(unittest.TestCase):
+    """Scores follow the BM25 formula, with field weights applied to term frequencies."""
+
+    def setUp(self):
+        self.index = SearchIndex(":memory:")
+        self.texts = {
+            "one": "rocket engine rocket",
+            "two": "rocket fuel supplier with a long description of everything it sells",
+            "three": "payroll software",
+        }
+        for key, text in self.texts.items():
+            self.index.add(key, {"text": text})
+        self.index.commit()
+
+    def tearDown(self):
+        self.index.close()
+
+    def expected(self, key, term):
+        tokens = {name: tokenize(text) for name, text in self.texts.items()}
+        average = sum(map(len, tokens.values())) / len(tokens)
+        matching = [name for name in tokens if term in tokens[name]]
+        idf = math.log(1 + (len(tokens) - len(matching) + 0.5) / (len(matching) + 0.5))
+        tf = tokens[key].count(term)
+        k1, b = self.index.k1, self.index.b
+        return idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * len(tokens[key]) / average))
+
+    def test_scores_match_the_formula(self):
+        results = self.index.search("rocket")
+        self.assertEqual(keys(results), ["one", "two"])
+        for result in results:
+            self.assertAlmostEqual(result["score"], self.expected(result["key"], "rocket"), places=3)
+
+    def test_scores_add_up_across_terms(self):
+        score = self.index.search("rocket engine")[0]["score"]
+        self.assertAlmostEqual(score, self.expected("one", "rocket") + self.expected("one", "engine"), places=3)
+
+    def test_title_matches_outrank_text_matches(self):
+        self.index.add("titled", {"title": "Payroll", "text": "software for small teams"})
+        self.index.commit()
+        self.assertEqual(keys(self.index.search("payroll"))[0], "titled")
+
+
+class SegmentTest(unittest.TestCase):
+    """Commits write segments; compaction merges them and drops replaced and deleted documents."""
+
+    def setUp(self):
+        self.index = SearchIndex(":memory:", max_segments=100)
+        for batch in range(4):
+            for number in range(5):
+                self.index.add(f"doc:{batch}-{number}", {"text": f"batch{batch} shared word{number}"})
+            self.index.commit()
+
+    def tearDown(self):
+        self.index.close()
+
+    def test_compaction_keeps_the_results(self):
+        self.index.add("doc:0-0", {"text": "replaced shared"})
+        self.index.delete("doc:1-1")
+        self.index.commit()
+        before = self.index.search("shared", limit=50)
+        self.assertEqual(self.index.stats()["tombstones"], 2)
+        self.assertEqual(self.index.segment_count(), 5)
+
+        with self.assertLogs("search.index", "INFO") as logs:
+            self.assertEqual(self.index.compact(), 2)
+        self.assertIn("Compacted 5 segments into one, removing 2 stale documents", logs.output[0])
+        self.assertEqual(self.index.segment_count(), 1)
+        self.assertEqual(self.index.stats()["tombstones"], 0)
+        self.assertEqual(self.index.doc_count, 19)
+
+        after = self.index.search("shared", limit=50)
+        self.assertEqual([(result["key"], result["score"]) for result in after],
+                         [(result["key"], result["score"]) for result in before])
+        self.assertEqual(keys(self.index.search("replaced")), ["doc:0-0"])
+        self.assertEqual(keys(self.index.search("batch0", limit=50)), [f"doc:0-{number}" for number in range(1, 5)])
+        self.assertNotIn("doc:1-1", keys(self.index.search("batch1", limit=50)))
+
+    def test_compacting_a_compact_index_does_nothing(self):
+        self.index.compact()
+        self.assertEqual(self.index.compact(), 0)
+        self.assertEqual(self.index.segment_count(), 1)
+
+    def test_commit_compacts_past_max_segments(self):
+        self.index.max_segments = 4
+        self.index.add("doc:extra", {"text": "extra shared"})
+        self.index.commit()
+        self.assertEqual(self.index.segment_count(), 1)
+        self.assertEqual(len(self.index.search("shared", limit=50)), 21)
+
+    def test_unchanged_documents_are_not_reindexed(self):
+        self.assertFalse(self.index.add("doc:0-0", {"text": "batch0 shared word0"}))
+        self.assertTrue(self.index.add("doc:0-0", {"text": "batch0 shared word0 again"}))
+
+
+if __name__ == "__main__":
+    unittest.main()
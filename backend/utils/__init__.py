@@ -1 +1,5 @@
-from .proxy_manager import get_random_proxy, parse_proxy, get_proxy_info_string, get_random_user_agent, fetch_proxies
\ No newline at end of file
+from .proxy_manager import get_random_proxy, parse_proxy, parse_requests_proxy, get_proxy_info_string, get_random_user_agent, fetch_all_proxies, proxy_key, ProxyHealth, ProxyPool, WEBSHARE_PROXY_LIST_URL
+from .page_readiness import run_and_wait_for_results, get_first_href, ReadinessTimeouts, ReadinessResult, ReadinessStats, PageNotReadyError
+from .browser_pool import BrowserPool, PooledContext, ResourcePolicy
+from .http_cache import HttpCache, CachedResponse, CacheStats, parse_ttl_rule, DEFAULT_CACHE_DIR, DEFAULT_TTL_RULES
+from .metrics import MetricsRegistry, REGISTRY, DEFAULT_BUCKETS, inc, observe, span, record_span
@@ -0,0 +1,260 @@
+import asyncio
+import logging
+import re
+from contextlib import asynccontextmanager
+
+from playwright.async_api import async_playwright
+
+from .metrics import span
+from .proxy_manager import parse_proxy, get_proxy_info_string, get_random_user_agent, proxy_key
+
+logger = logging.getLogger(__name__)
+
+# Resource types that cost proxy bandwidth without carrying data we extract
+DEFAULT_BLOCKED_RESOURCE_TYPES = frozenset({"image", "media", "font"})
+
+# Analytics, tag managers and session recorders
+DEFAULT_BLOCKED_URL_PATTERNS = (
+    r"google-analytics\.com",
+    r"googletagmanager\.com",
+    r"doubleclick\.net",
+    r"connect\.facebook\.net",
+    r"segment\.(io|com)",
+    r"mixpanel\.com",
+    r"amplitude\.com",
+    r"hotjar\.com",
+    r"fullstory\.com",
+    r"clarity\.ms",
+    r"posthog\.com",
+    r"heap(analytics)?\.(io|com)",
+    r"intercom\.io",
+    r"sentry\.io",
+)
+
+
+class ResourcePolicy:
+    """
+    Decides which requests a browser context is allowed to make.
+
+    Requests whose resource type or URL is blocked are aborted before they hit
+    the network; URLs matching an allowed pattern always go through.
+    """
+
+    def __init__(self, blocked_resource_types=DEFAULT_BLOCKED_RESOURCE_TYPES,
+                 blocked_url_patterns=DEFAULT_BLOCKED_URL_PATTERNS, allowed_url_patterns=()):
+        """
+        Args:
+            blocked_resource_types: Playwright resource types to abort
+                (e.g. "image", "media", "font", "stylesheet")
+            blocked_url_patterns: Regexes of URLs to abort regardless of type
+            allowed_url_patterns: Regexes of URLs to let through even if blocked above
+        """
+        self.blocked_resource_types = set(blocked_resource_types)
+        self.blocked_url_patterns = [re.compile(pattern) for pattern in blocked_url_patterns]
+        self.allowed_url_patterns = [re.compile(pattern) for pattern in allowed_url_patterns]
+        self.blocked_count = 0
+        self.allowed_count = 0
+
+    def allow(self, pattern):
+        """Let URLs matching the regex through even if they would be blocked."""
+        self.allowed_url_patterns.append(re.compile(pattern))
+
+    def should_block(self, resource_type, url):
+        """
+        Check whether a request should be aborted.
+
+        Args:
+            resource_type: Playwright resource type of the request
+            url: Request URL
+
+        Returns:
+            True if the request should be aborted
+        """
+        if any(pattern.search(url) for pattern in self.allowed_url_patterns):
+            return False
+        if resource_type in self.blocked_resource_types:
+            return True
+        return any(pattern.search(url) for pattern in self.blocked_url_patterns)
+
+    async def handle_route(self, route):
+        """Playwright route handler applying the policy."""
+        request = route.request
+        if self.should_block(request.resource_type, request.url):
+            self.blocked_count += 1
+            await route.abort("blockedbyclient")
+        else:
+            self.allowed_count += 1
+            # Let a handler added earlier (e.g. the HTTP cache) see the request; without one it goes to the network
+            await route.fallback()
+
+    async def apply(self, context):
+        """Route every request made by the browser context through the policy."""
+        await context.route("**/*", self.handle_route)
+
+
+class PooledContext:
+    """A browser context handed out by BrowserPool, bound to one proxy."""
+
+    def __init__(self, context, proxy_dict):
+        self.context = context
+        self.proxy_dict = proxy_dict
+        self.pages_used = 0
+
+    def record_pages(self, count=1):
+        """Count result pages scraped with this context towards its recycling limit."""
+        self.pages_used += count
+
+
+class BrowserPool:
+    """
+    A long-lived browser that hands out per-proxy contexts and reuses them across runs.
+
+    Contexts are returned to the pool after use and recycled (closed and
+    replaced on next use) once they have served `max_pages_per_context` pages
+    or when the run using them failed, which usually means the proxy did.
+    The browser itself is relaunched only if it disconnects.
+    """
+
+    def __init__(self, headless=True, max_pages_per_context=200, max_idle_contexts=16, resource_policy=None,
+                 http_cache=None):
+        """
+        Args:
+            headless: Whether to launch the browser headless
+            max_pages_per_context: Pages a context may serve before it is recycled
+            max_idle_contexts: Contexts kept open between runs; extra ones are closed
+            resource_policy: ResourcePolicy applied to every context; defaults to
+                blocking images, media, fonts and analytics. Pass False to
+                allow everything.
+            http_cache: Optional HttpCache that serves and stores the requests
+                the resource policy lets through
+        """
+        self.headless = headless
+        self.max_pages_per_context = max_pages_per_context
+        self.max_idle_contexts = max_idle_contexts
+        self.resource_policy = ResourcePolicy() if resource_policy is None else resource_policy
+        self.http_cache = http_cache
+        self._playwright = None
+        self._browser = None
+        self._idle = {}
+        self._lock = asyncio.Lock()
+        self.launches = 0
+        self.contexts_created = 0
+        self.contexts_recycled = 0
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def start(self):
+        """Start Playwright and launch the browser if it is not running."""
+        async with self._lock:
+            if self._playwright is None:
+                self._playwright = await async_playwright().start()
+            if self._browser is None or not self._browser.is_connected():
+                # Contexts set their own proxy; the placeholder makes that work on every platform
+                with span("browser_launch"):
+                    self._browser = await self._playwright.chromium.launch(
+                        headless=self.headless,
+                        proxy={"server": "http://per-context"}
+                    )
+                self._idle = {}
+                self.launches += 1
+                logger.info(f"Launched browser (launch #{self.launches}, headless={self.headless})")
+
+    async def acquire(self, proxy_dict):
+        """
+        Get a context that routes through the given proxy.
+
+        Args:
+            proxy_dict: Proxy dictionary from the proxy provider
+
+        Returns:
+            PooledContext; hand it back with `release` when done
+        """
+        await self.start()
+
+        idle = self._idle.get(proxy_key(proxy_dict), [])
+        if idle:
+            return idle.pop()
+
+        with span("browser_context"):
+            context = await self._browser.new_context(
+                user_agent=get_random_user_agent(),
+                proxy=parse_proxy(proxy_dict)
+            )
+        # Playwright runs the route added last first, so the policy decides before the cache is consulted
+        if self.http_cache is not None:
+            await self.http_cache.apply(context)
+        if self.resource_policy:
+            await self.resource_policy.apply(context)
+        self.contexts_created += 1
+        return PooledContext(context, proxy_dict)
+
+    async def release(self, pooled, failed=False):
+        """
+        Return a context to the pool, or close it if it is due for recycling.
+
+        Args:
+            pooled: PooledContext from `acquire`
+            failed: Whether the work done with the context failed
+        """
+        browser_alive = self._browser is not None and self._browser.is_connected()
+        if failed or not browser_alive or pooled.pages_used >= self.max_pages_per_context:
+            self.contexts_recycled += 1
+            reason = "failure" if failed else f"{pooled.pages_used} pages"
+            logger.info(f"Recycling context for {get_proxy_info_string(pooled.proxy_dict)} after {reason}")
+            try:
+                await pooled.context.close()
+            except Exception:
+                pass
+            return
+
+        if sum(len(contexts) for contexts in self._idle.values()) >= self.max_idle_contexts:
+            await pooled.context.close()
+            return
+
+        # Keep the context (and its cookies) but drop its pages
+        for page in list(pooled.context.pages):
+            await page.close()
+        self._idle.setdefault(proxy_key(pooled.proxy_dict), []).append(pooled)
+
+    @asynccontextmanager
+    async def lease(self, proxy_dict):
+        """
+        Context manager around `acquire`/`release` that recycles the context on error.
+
+        Args:
+            proxy_dict: Proxy dictionary from the proxy provider
+
+        Yields:
+            PooledContext
+        """
+        pooled = await self.acquire(proxy_dict)
+        failed = False
+        try:
+            yield pooled
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            await self.release(pooled, failed=failed)
+
+    async def close(self):
+        """Close every context, the browser and Playwright."""
+        async with self._lock:
+            for contexts in self._idle.values():
+                for pooled in contexts:
+                    try:
+                        await pooled.context.close()
+                    except Exception:
+                        pass
+            self._idle = {}
+            if self._browser is not None:
+                await self._browser.close()
+                self._browser = None
+            if self._playwright is not None:
+                await self._playwright.stop()
+                self._playwright = None
@@ -0,0 +1,488 @@
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+DEFAULT_CACHE_DIR = Path("ycombinator_data") / "http_cache"
+
+# Compressed bytes kept on disk before the least recently used entries are evicted
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+# Seconds a response is served without asking the server again, by URL regex; the first match wins.
+# Anything else is stored only if it can be revalidated (ETag/Last-Modified) and is always revalidated.
+DEFAULT_TTL_RULES = (
+    (r"\.(js|css|woff2?|ttf|svg|png|jpe?g|webp|gif|ico)(\?|$)", 7 * 24 * 3600),
+    (r"ycombinator\.com/companies/[^/?#]+/?$", 6 * 3600),
+)
+
+# Request headers that change the response and so are part of the cache key; credentials
+# are among them so one client's responses are never served to another
+DEFAULT_VARY_HEADERS = ("accept", "accept-language", "authorization", "cookie")
+
+# Response headers that are not stored: ones that describe the transfer rather than the
+# stored (decoded) body, and cookies, which belong to the client that got the response
+_DROPPED_RESPONSE_HEADERS = {
+    "content-encoding", "content-length", "transfer-encoding", "connection", "keep-alive", "set-cookie"
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    method TEXT NOT NULL,
+    url TEXT NOT NULL,
+    status INTEGER NOT NULL,
+    headers TEXT NOT NULL,
+    body_hash TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    stored_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_entries_last_access ON entries (last_access);
+CREATE INDEX IF NOT EXISTS idx_entries_body_hash ON entries (body_hash);
+
+CREATE TABLE IF NOT EXISTS bodies (
+    hash TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    raw_size INTEGER NOT NULL
+);
+"""
+
+
+@dataclass
+class CachedResponse:
+    """
+    A response served by or through the cache, shaped like the parts of requests.Response we use.
+
+    Attributes:
+        status_code: HTTP status
+        headers: Response headers
+        content: Decoded body
+        from_cache: Whether the body came from disk (fresh hit or 304)
+        revalidated: Whether the server was asked and answered 304 Not Modified
+    """
+    status_code: int
+    headers: dict
+    content: bytes
+    from_cache: bool = False
+    revalidated: bool = False
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    @property
+    def text(self):
+        match = re.search(r"charset=([\w-]+)", self.headers.get("content-type", ""), re.IGNORECASE)
+        return self.content.decode(match.group(1) if match else "utf-8", errors="replace")
+
+
+@dataclass
+class CacheStats:
+    """Cache counters; `bytes_saved` counts body bytes that did not cross the network."""
+    hits: int = 0
+    revalidated: int = 0
+    misses: int = 0
+    stored: int = 0
+    evicted: int = 0
+    bytes_saved: int = 0
+    bytes_downloaded: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add(self, **counts):
+        with self._lock:
+            for name, value in counts.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def summary(self):
+        requests_seen = self.hits + self.revalidated + self.misses
+        return {
+            "hits": self.hits,
+            "revalidated": self.revalidated,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.revalidated) / requests_seen, 3) if requests_seen else 0.0,
+            "stored": self.stored,
+            "evicted": self.evicted,
+            "bytes_saved": self.bytes_saved,
+            "bytes_downloaded": self.bytes_downloaded,
+        }
+
+
+class HttpCache:
+    """
+    Content-addressed on-disk HTTP response cache.
+
+    Bodies are gzipped and stored once per SHA-256 of their content under
+    `<directory>/bodies`, so identical responses from different URLs share a
+    file. A SQLite index maps each request (method, URL, varying headers and
+    request body) to its status, headers, validators and body. Entries are
+    fresh for the TTL of the first matching URL rule (or the response's
+    max-age); stale entries with an ETag or Last-Modified are revalidated
+    with a conditional request. When the bodies outgrow `max_bytes`, the
+    least recently used entries are evicted.
+
+    The cache is safe to share between threads and between a Playwright
+    route handler and requests-based clients.
+    """
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES, ttl_rules=DEFAULT_TTL_RULES,
+                 default_ttl=0, vary_headers=DEFAULT_VARY_HEADERS, cacheable_post_patterns=()):
+        """
+        Args:
+            directory: Directory for the index and the bodies
+            max_bytes: Compressed body bytes to keep before evicting
+            ttl_rules: Sequence of (URL regex, seconds) pairs; the first match wins
+            default_ttl: Seconds for URLs no rule matches and that carry no max-age
+            vary_headers: Request header names that are part of the cache key
+            cacheable_post_patterns: Regexes of URLs whose POST requests may be
+                cached too (keyed by their body), e.g. search APIs
+        """
+        self.directory = Path(directory)
+        self.bodies_dir = self.directory / "bodies"
+        self.bodies_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.ttl_rules = [(re.compile(pattern), ttl) for pattern, ttl in ttl_rules]
+        self.default_ttl = default_ttl
+        self.vary_headers = tuple(name.lower() for name in vary_headers)
+        self.cacheable_post_patterns = [re.compile(pattern) for pattern in cacheable_post_patterns]
+        self.stats = CacheStats()
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.directory / "index.sqlite3"), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def add_ttl_rule(self, pattern, ttl):
+        """Give URLs matching the regex their own TTL, ahead of the existing rules."""
+        self.ttl_rules.insert(0, (re.compile(pattern), ttl))
+
+    def ttl_for(self, url, response_headers=None):
+        """
+        Get how many seconds a response for the URL stays fresh.
+
+        Args:
+            url: Request URL
+            response_headers: Optional response headers whose Cache-Control
+                max-age applies when no rule matches
+        """
+        for pattern, ttl in self.ttl_rules:
+            if pattern.search(url):
+                return ttl
+        cache_control = _lower_keys(response_headers or {}).get("cache-control", "")
+        match = re.search(r"max-age=(\d+)", cache_control)
+        if match and "no-cache" not in cache_control:
+            return int(match.group(1))
+        return self.default_ttl
+
+    def is_cacheable_request(self, method, url):
+        method = method.upper()
+        if method == "GET":
+            return True
+        return method == "POST" and any(pattern.search(url) for pattern in self.cacheable_post_patterns)
+
+    def cache_key(self, method, url, headers=None, body=None):
+        """Hash the parts of a request that select a response."""
+        headers = _lower_keys(headers or {})
+        digest = hashlib.sha256()
+        digest.update(f"{method.upper()} {url}\n".encode("utf-8"))
+        for name in self.vary_headers:
+            digest.update(f"{name}:{headers.get(name, '')}\n".encode("utf-8"))
+        if body:
+            digest.update(body if isinstance(body, bytes) else str(body).encode("utf-8"))
+        return digest.hexdigest()
+
+    def lookup(self, key):
+        """
+        Get the index entry for a cache key and mark it as recently used.
+
+        Returns:
+            Dictionary with status, headers, body_hash, etag, last_modified,
+            expires_at and `fresh`, or None
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, headers, body_hash, etag, last_modified, expires_at FROM entries WHERE key = ?",
+                (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            with self._conn:
+                self._conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (now, key))
+
+        status, headers, body_hash, etag, last_modified, expires_at = row
+        return {
+            "status": status,
+            "headers": json.loads(headers),
+            "body_hash": body_hash,
+            "etag": etag,
+            "last_modified": last_modified,
+            "expires_at": expires_at,
+            "fresh": expires_at > now,
+        }
+
+    def conditional_headers(self, entry):
+        """Request headers that ask the server whether a stale entry is still current."""
+        headers = {}
+        if entry and entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry["last_modified"]:
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def read_body(self, body_hash):
+        """Read a stored body, or None if its file is gone."""
+        try:
+            with gzip.open(self._body_path(body_hash), "rb") as f:
+                return f.read()
+        except (FileNotFoundError, OSError, EOFError):
+            return None
+
+    def store(self, key, method, url, status, headers, body):
+        """
+        Store a response if it may be cached.
+
+        Only 200 responses without `no-store` are kept, and only if they are
+        fresh for some time or can be revalidated.
+
+        Returns:
+            True if the response was stored
+        """
+        headers = {name: value for name, value in _lower_keys(headers).items()
+                   if name not in _DROPPED_RESPONSE_HEADERS}
+        cache_control = headers.get("cache-control", "")
+        if status != 200 or "no-store" in cache_control:
+            return False
+
+        ttl = self.ttl_for(url, headers)
+        etag = headers.get("etag")
+        last_modified = headers.get("last-modified")
+        if ttl <= 0 and not etag and not last_modified:
+            return False
+
+        body_hash = hashlib.sha256(body).hexdigest()
+        path = self._body_path(body_hash)
+        # Compress outside the lock; only moving the file into place needs it
+        temp_path = None if path.exists() else self._write_temp(path, body)
+
+        now = time.time()
+        with self._lock, self._conn:
+            # `evict` unlinks bodies under the lock too, so a file seen here is
+            # still there once the entry pointing at it is committed
+            if not path.exists():
+                os.replace(temp_path or self._write_temp(path, body), path)
+            elif temp_path is not None:
+                temp_path.unlink()
+            self._conn.execute(
+                "INSERT OR IGNORE INTO bodies (hash, size, raw_size) VALUES (?, ?, ?)",
+                (body_hash, path.stat().st_size, len(body))
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, method, url, status, headers, body_hash, etag, last_modified, "
+                "stored_at, expires_at, last_access) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, method.upper(), url, status, json.dumps(headers), body_hash, etag, last_modified,
+                 now, now + max(ttl, 0), now)
+            )
+        self.stats.add(stored=1)
+        self.evict()
+        return True
+
+    def touch(self, key, url, headers=None):
+        """Extend an entry's freshness after the server answered 304 Not Modified."""
+        now = time.time()
+        ttl = self.ttl_for(url, headers)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE entries SET stored_at = ?, expires_at = ?, last_access = ? WHERE key = ?",
+                (now, now + max(ttl, 0), now, key)
+            )
+
+    def total_bytes(self):
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM bodies").fetchone()[0]
+
+    def evict(self):
+        """
+        Drop least recently used entries until the bodies fit in `max_bytes`.
+
+        Returns:
+            Number of entries evicted
+        """
+        evicted = 0
+        with self._lock:
+            total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM bodies").fetchone()[0]
+            if total <= self.max_bytes:
+                return 0
+
+            orphaned = []
+            with self._conn:
+                rows = self._conn.execute("SELECT key, body_hash FROM entries ORDER BY last_access").fetchall()
+                for key, body_hash in rows:
+                    if total <= self.max_bytes:
+                        break
+                    self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                    evicted += 1
+                    still_used = self._conn.execute(
+                        "SELECT 1 FROM entries WHERE body_hash = ? LIMIT 1", (body_hash,)
+                    ).fetchone()
+                    if still_used is None:
+                        size = self._conn.execute("SELECT size FROM bodies WHERE hash = ?", (body_hash,)).fetchone()
+                        self._conn.execute("DELETE FROM bodies WHERE hash = ?", (body_hash,))
+                        total -= size[0] if size else 0
+                        orphaned.append(body_hash)
+
+            for body_hash in orphaned:
+                try:
+                    self._body_path(body_hash).unlink()
+                except FileNotFoundError:
+                    pass
+        self.stats.add(evicted=evicted)
+        return evicted
+
+    def request(self, session, method, url, headers=None, data=None, **kwargs):
+        """
+        Make a request with requests through the cache.
+
+        Fresh entries are served from disk; stale ones are revalidated with
+        a conditional request, and a 304 answer is served from disk.
+
+        Args:
+            session: requests.Session (or the requests module)
+            method: HTTP method
+            url: Request URL
+            headers: Optional request headers
+            data: Optional request body
+            **kwargs: Passed on to `session.request` (proxies, timeout, ...)
+
+        Returns:
+            CachedResponse
+        """
+        headers = dict(headers or {})
+        if not self.is_cacheable_request(method, url):
+            response = session.request(method, url, headers=headers, data=data, **kwargs)
+            return CachedResponse(response.status_code, dict(response.headers), response.content)
+
+        key = self.cache_key(method, url, headers, data)
+        entry = self.lookup(key)
+        cached = self._serve(entry) if entry is not None and entry["fresh"] else None
+        if cached is not None:
+            return cached
+
+        response = session.request(method, url, headers={**headers, **self.conditional_headers(entry)},
+                                   data=data, **kwargs)
+        if response.status_code == 304 and entry is not None:
+            revalidated = self._revalidated(key, url, entry, dict(response.headers))
+            if revalidated is not None:
+                return revalidated
+            # The body went missing; ask again without validators
+            response = session.request(method, url, headers=headers, data=data, **kwargs)
+
+        self.stats.add(misses=1, bytes_downloaded=len(response.content))
+        self.store(key, method, url, response.status_code, dict(response.headers), response.content)
+        return CachedResponse(response.status_code, dict(response.headers), response.content)
+
+    async def handle_route(self, route):
+        """
+        Playwright route handler serving requests through the cache.
+
+        Requests the cache does not handle fall back to the next handler (or
+        go to the network).
+        """
+        request = route.request
+        if not self.is_cacheable_request(request.method, request.url):
+            await route.fallback()
+            return
+
+        headers = await request.all_headers()
+        post_data = request.post_data_buffer
+        key = self.cache_key(request.method, request.url, headers, post_data)
+        entry = await asyncio.to_thread(self.lookup, key)
+        cached = await asyncio.to_thread(self._serve, entry) if entry is not None and entry["fresh"] else None
+        if cached is not None:
+            await route.fulfill(status=cached.status_code, headers=cached.headers, body=cached.content)
+            return
+
+        response = await route.fetch(headers={**headers, **self.conditional_headers(entry)})
+        if response.status == 304 and entry is not None:
+            revalidated = await asyncio.to_thread(self._revalidated, key, request.url, entry, response.headers)
+            if revalidated is not None:
+                await route.fulfill(status=revalidated.status_code, headers=revalidated.headers,
+                                    body=revalidated.content)
+                return
+            response = await route.fetch(headers=headers)
+
+        body = await response.body()
+        self.stats.add(misses=1, bytes_downloaded=len(body))
+        await asyncio.to_thread(self.store, key, request.method, request.url, response.status, response.headers, body)
+        await route.fulfill(response=response, body=body)
+
+    async def apply(self, context):
+        """
+        Route every request made by the browser context through the cache.
+
+        Apply this before a ResourcePolicy: Playwright runs the handler added
+        last first, so blocked requests are aborted before they reach the cache.
+        """
+        await context.route("**/*", self.handle_route)
+
+    def _serve(self, entry):
+        body = self.read_body(entry["body_hash"])
+        if body is None:
+            return None
+        self.stats.add(hits=1, bytes_saved=len(body))
+        return CachedResponse(entry["status"], entry["headers"], body, from_cache=True)
+
+    def _revalidated(self, key, url, entry, response_headers):
+        body = self.read_body(entry["body_hash"])
+        if body is None:
+            return None
+        self.touch(key, url, response_headers)
+        self.stats.add(revalidated=1, bytes_saved=len(body))
+        return CachedResponse(entry["status"], entry["headers"], body, from_cache=True, revalidated=True)
+
+    def _body_path(self, body_hash):
+        return self.bodies_dir / body_hash[:2] / f"{body_hash}.gz"
+
+    def _write_temp(self, path, body):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with gzip.open(temp_path, "wb", compresslevel=6) as f:
+            f.write(body)
+        return temp_path
+
+
+def _lower_keys(headers):
+    return {name.lower(): value for name, value in headers.items()}
+
+
+def parse_ttl_rule(text):
+    """
+    Parse a "REGEX=SECONDS" command line TTL rule.
+
+    Raises:
+        ValueError: If the rule is malformed
+    """
+    pattern, separator, seconds = text.rpartition("=")
+    if not separator or not pattern:
+        raise ValueError(f"Invalid cache TTL rule '{text}', expected REGEX=SECONDS")
+    re.compile(pattern)
+    return pattern, int(seconds)
@@ -0,0 +1,301 @@
+import bisect
+import os
+import tempfile
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+
+# Prefix of every exported metric name
+NAMESPACE = "godseye"
+
+# Histogram bucket upper bounds in seconds, from a fast evaluate() to a slow page load
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Durations kept per span for the percentiles of the run profile
+PROFILE_SAMPLES = 2048
+
+
+class _Histogram:
+    """Cumulative bucket counts, sum and count of one labelled histogram series."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class _SpanProfile:
+    """Totals and recent durations of one span, for the run profile."""
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples = deque(maxlen=PROFILE_SAMPLES)
+
+    def add(self, elapsed, failed):
+        self.count += 1
+        self.errors += failed
+        self.total += elapsed
+        self.max = max(self.max, elapsed)
+        self.samples.append(elapsed)
+
+
+class MetricsRegistry:
+    """
+    Counters, histograms and timed spans, exported in the Prometheus text format.
+
+    Metrics are created on first use and identified by name and labels, e.g.
+    `inc("records_total", 40, engine="dom")`. A span times a block of code
+    (`with span("navigate", step="directory"): ...`) into the
+    `godseye_span_seconds` histogram and into the run profile, which keeps
+    per-span totals and percentiles until `reset_profile` starts a new run.
+    Every method is thread-safe.
+    """
+
+    def __init__(self, namespace=NAMESPACE, clock=time.monotonic):
+        """
+        Args:
+            namespace: Prefix of every metric name
+            clock: Monotonic clock, replaceable for testing
+        """
+        self.namespace = namespace
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._metrics = {}
+        self._profile = {}
+        self._profile_started = clock()
+        self._profile_counters = {}
+        self.describe("span_seconds", "histogram", "Duration of timed scrape stages")
+        self.describe("span_errors_total", "counter", "Timed stages that raised")
+
+    def _name(self, name):
+        return f"{self.namespace}_{name}" if self.namespace else name
+
+    def describe(self, name, kind, help_text="", buckets=DEFAULT_BUCKETS):
+        """
+        Declare a metric's type and help text; undeclared metrics get them from first use.
+
+        Args:
+            name: Metric name without the namespace
+            kind: "counter", "gauge" or "histogram"
+            help_text: One-line description for the exposition
+            buckets: Bucket upper bounds for a histogram
+        """
+        with self._lock:
+            metric = self._metrics.setdefault(self._name(name), {"kind": kind, "series": {}})
+            metric.update(kind=kind, help=help_text, buckets=tuple(sorted(buckets)))
+
+    def _series(self, name, kind, labels):
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = self._metrics[name] = {"kind": kind, "help": "", "buckets": DEFAULT_BUCKETS, "series": {}}
+        elif metric["kind"] != kind:
+            raise ValueError(f"Metric {name} is a {metric['kind']}, not a {kind}")
+        key = tuple(sorted((label, str(value)) for label, value in labels.items()))
+        return metric, key
+
+    def inc(self, name, value=1, **labels):
+        """Add to a counter."""
+        with self._lock:
+            metric, key = self._series(self._name(name), "counter", labels)
+            metric["series"][key] = metric["series"].get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        """Set a gauge."""
+        with self._lock:
+            metric, key = self._series(self._name(name), "gauge", labels)
+            metric["series"][key] = value
+
+    def observe(self, name, value, **labels):
+        """Record a value (usually seconds) in a histogram."""
+        with self._lock:
+            metric, key = self._series(self._name(name), "histogram", labels)
+            series = metric["series"].get(key)
+            if series is None:
+                series = metric["series"][key] = _Histogram(metric["buckets"])
+            series.observe(value)
+
+    def record_span(self, name, elapsed, failed=False, **labels):
+        """Record a span measured elsewhere, e.g. a readiness wait that timed itself."""
+        self.observe("span_seconds", elapsed, span=name, **labels)
+        if failed:
+            self.inc("span_errors_total", span=name, **labels)
+        profile_key = name + "".join(f" {label}={value}" for label, value in sorted(labels.items()))
+        with self._lock:
+            self._profile.setdefault(profile_key, _SpanProfile()).add(elapsed, failed)
+
+    @contextmanager
+    def span(self, name, **labels):
+        """
+        Time the enclosed block, including any awaits inside it.
+
+        Args:
+            name: Stage name, e.g. "navigate" or "persist"
+            **labels: Extra labels, e.g. step="pagination"
+        """
+        started = self.clock()
+        failed = False
+        try:
+            yield
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            self.record_span(name, self.clock() - started, failed, **labels)
+
+    def _counter_totals(self):
+        return {
+            name: sum(metric["series"].values())
+            for name, metric in self._metrics.items()
+            if metric["kind"] == "counter" and metric["series"]
+        }
+
+    def render(self):
+        """
+        Render every metric in the Prometheus text exposition format (version 0.0.4).
+
+        Returns:
+            Exposition text ending in a newline
+        """
+        lines = []
+        with self._lock:
+            for name in sorted(self._metrics):
+                metric = self._metrics[name]
+                if not metric["series"]:
+                    continue
+                if metric["help"]:
+                    lines.append(f"# HELP {name} {_escape_help(metric['help'])}")
+                lines.append(f"# TYPE {name} {metric['kind']}")
+                for key in sorted(metric["series"]):
+                    series = metric["series"][key]
+                    if not isinstance(series, _Histogram):
+                        lines.append(f"{name}{_labels(key)} {_number(series)}")
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(series.buckets + (float("inf"),), series.counts):
+                        cumulative += count
+                        le = "+Inf" if bound == float("inf") else _number(bound)
+                        lines.append(f"{name}_bucket{_labels(key + (('le', le),))} {cumulative}")
+                    lines.append(f"{name}_sum{_labels(key)} {_number(series.sum)}")
+                    lines.append(f"{name}_count{_labels(key)} {series.count}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        """
+        Write the exposition to a file, atomically, e.g. for node_exporter's textfile collector.
+
+        Returns:
+            Path written
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        descriptor, temporary = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(descriptor, "w", encoding="utf-8") as f:
+                f.write(self.render())
+            os.replace(temporary, path)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+        return path
+
+    def reset_profile(self):
+        """Start a new run profile; exported metrics keep accumulating."""
+        with self._lock:
+            self._profile = {}
+            self._profile_started = self.clock()
+            self._profile_counters = self._counter_totals()
+
+    def profile(self):
+        """
+        Summarize where the current run's time went.
+
+        Spans overlap when workers run in parallel, so shares can add up to
+        more than 100%.
+
+        Returns:
+            Dictionary with the run's wall time, per span (slowest total
+            first) its count, errors, total seconds, share of the wall time
+            and mean/p50/p95/max milliseconds, and how much each counter grew
+        """
+        with self._lock:
+            wall = self.clock() - self._profile_started
+            spans = {}
+            for key, span in sorted(self._profile.items(), key=lambda item: item[1].total, reverse=True):
+                samples = sorted(span.samples)
+                spans[key] = {
+                    "count": span.count,
+                    "errors": span.errors,
+                    "total_s": round(span.total, 3),
+                    "share": round(span.total / wall, 3) if wall else None,
+                    "mean_ms": round(span.total / span.count * 1000, 1),
+                    "p50_ms": round(_percentile(samples, 0.50) * 1000, 1),
+                    "p95_ms": round(_percentile(samples, 0.95) * 1000, 1),
+                    "max_ms": round(span.max * 1000, 1),
+                }
+            counters = {
+                name: total - self._profile_counters.get(name, 0)
+                for name, total in sorted(self._counter_totals().items())
+                if total != self._profile_counters.get(name, 0)
+            }
+        return {"wall_s": round(wall, 3), "spans": spans, "counters": counters}
+
+    def format_profile(self):
+        """Return the run profile as human readable lines."""
+        profile = self.profile()
+        lines = [f"Run profile over {profile['wall_s']:.1f}s:"]
+        for key, stats in profile["spans"].items():
+            errors = f", {stats['errors']} failed" if stats["errors"] else ""
+            lines.append(
+                f"  {key}: {stats['count']}x, {stats['total_s']:.2f}s ({stats['share']:.0%}), "
+                f"mean {stats['mean_ms']} ms, p50 {stats['p50_ms']} ms, p95 {stats['p95_ms']} ms, "
+                f"max {stats['max_ms']} ms{errors}"
+            )
+        if profile["counters"]:
+            lines.append("  " + ", ".join(f"{name}={_number(value)}" for name, value in profile["counters"].items()))
+        return "\n".join(lines)
+
+
+def _percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def _number(value):
+    # Whole floats print without the trailing ".0"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def _escape_help(text):
+    return text.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def _escape_label(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(key):
+    if not key:
+        return ""
+    return "{" + ",".join(f'{label}="{_escape_label(value)}"' for label, value in key) + "}"
+
+
+# Process-wide registry the scraper, proxy pool and API report into
+REGISTRY = MetricsRegistry()
+
+inc = REGISTRY.inc
+observe = REGISTRY.observe
+span = REGISTRY.span
+record_span = REGISTRY.record_span
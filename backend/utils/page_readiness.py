@@ -0,0 +1,274 @@
+import asyncio
+import re
+import time
+from dataclasses import dataclass
+
+# Resolves once the first result no longer points at the given href
+FIRST_HREF_CHANGED_SCRIPT = '''([selector, previousHref]) => {
+    const first = document.querySelector(selector);
+    return first !== null && first.getAttribute('href') !== previousHref;
+}'''
+
+# Counts mutations around the results container until it is disconnected.
+# The parent is observed because frameworks often replace the container itself.
+INSTALL_OBSERVER_SCRIPT = '''(selector) => {
+    const previous = window.__resultsReadiness;
+    if (previous) previous.observer.disconnect();
+
+    const container = document.querySelector(selector);
+    const target = (container && container.parentElement) || document.body;
+    const state = { mutations: 0, lastMutation: performance.now() };
+    state.observer = new MutationObserver(() => {
+        state.mutations += 1;
+        state.lastMutation = performance.now();
+    });
+    state.observer.observe(target, { childList: true, subtree: true, characterData: true });
+    window.__resultsReadiness = state;
+}'''
+
+# Resolves once the results changed, the DOM has been quiet for quietMs and
+# there are results to read. Changed means at least minMutations mutations
+# seen and a new first result with requireHref, or either one without it.
+DOM_SETTLED_SCRIPT = '''([itemSelector, quietMs, minMutations, requireHref, previousHref]) => {
+    const state = window.__resultsReadiness;
+    if (!state) return false;
+    const first = document.querySelector(itemSelector);
+    if (first === null) return false;
+    const mutated = state.mutations >= minMutations;
+    const hrefChanged = first.getAttribute('href') !== previousHref;
+    const changed = requireHref ? mutated && hrefChanged : mutated || hrefChanged;
+    if (!changed) return false;
+    return performance.now() - state.lastMutation >= quietMs;
+}'''
+
+MUTATION_COUNT_SCRIPT = '''() => window.__resultsReadiness ? window.__resultsReadiness.mutations : 0'''
+
+DISCONNECT_OBSERVER_SCRIPT = '''() => {
+    const state = window.__resultsReadiness;
+    if (state) {
+        state.observer.disconnect();
+        delete window.__resultsReadiness;
+    }
+}'''
+
+
+class PageNotReadyError(TimeoutError):
+    """Raised when none of the readiness signals fire before their timeouts."""
+
+
+@dataclass
+class ReadinessTimeouts:
+    """
+    Per-signal timeouts in milliseconds.
+
+    Attributes:
+        href: How long to wait for the first result's href to change
+        network: How long to wait for the results request to finish
+        mutation: How long to wait for the results DOM to change and settle
+        settle: How long the DOM must stay quiet before a mutation or network
+            signal counts as ready
+    """
+    href: float = 15000
+    network: float = 15000
+    mutation: float = 15000
+    settle: float = 300
+
+
+@dataclass
+class ReadinessResult:
+    """Outcome of a single readiness wait."""
+    step: str
+    signal: str
+    elapsed_ms: float
+
+
+class ReadinessStats:
+    """Collects how long each readiness wait took and which signal ended it."""
+
+    def __init__(self):
+        self.results = []
+
+    def record(self, result):
+        self.results.append(result)
+
+    def summary(self):
+        """
+        Summarize the recorded waits per step.
+
+        Returns:
+            Dictionary mapping step name to count, mean/p50/p95/max elapsed
+            milliseconds, and how many waits each signal ended
+        """
+        steps = {}
+        for result in self.results:
+            steps.setdefault(result.step, []).append(result)
+
+        summary = {}
+        for step, results in steps.items():
+            elapsed = sorted(result.elapsed_ms for result in results)
+            signals = {}
+            for result in results:
+                signals[result.signal] = signals.get(result.signal, 0) + 1
+            summary[step] = {
+                "count": len(elapsed),
+                "mean_ms": round(sum(elapsed) / len(elapsed), 1),
+                "p50_ms": round(_percentile(elapsed, 0.50), 1),
+                "p95_ms": round(_percentile(elapsed, 0.95), 1),
+                "max_ms": round(elapsed[-1], 1),
+                "signals": signals,
+            }
+        return summary
+
+    def format_summary(self):
+        """Return the summary as human readable lines."""
+        lines = []
+        for step, stats in self.summary().items():
+            signals = ", ".join(f"{signal}={count}" for signal, count in stats["signals"].items())
+            lines.append(
+                f"{step}: {stats['count']} waits, mean {stats['mean_ms']} ms, "
+                f"p50 {stats['p50_ms']} ms, p95 {stats['p95_ms']} ms, max {stats['max_ms']} ms ({signals})"
+            )
+        return "\n".join(lines)
+
+
+def _percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def get_first_href(page, item_selector):
+    """
+    Get the href of the first result on the page.
+
+    Args:
+        page: Playwright page
+        item_selector: CSS selector matching each result link
+
+    Returns:
+        The href string, or None if there are no results
+    """
+    return await page.evaluate(
+        '(selector) => { const el = document.querySelector(selector); return el ? el.getAttribute("href") : null; }',
+        item_selector
+    )
+
+
+async def run_and_wait_for_results(page, action, container_selector, item_selector,
+                                   response_pattern=None, timeouts=None, stats=None, step="results"):
+    """
+    Run an action that changes the result list and wait until the new results are rendered.
+
+    Three signals race each other and the first to fire wins:
+    - href: the first result points somewhere new
+    - network: a response matching `response_pattern` finished and the DOM changed after it and settled
+    - mutation: the results DOM changed, the first result points somewhere new,
+      and the DOM then stayed quiet for `timeouts.settle`; a loader toggling
+      while the old results are still shown is not enough
+
+    Each signal has its own timeout; the wait only fails when all of them time out.
+
+    Args:
+        page: Playwright page
+        action: Coroutine function that triggers the change, e.g. a button click
+        container_selector: CSS selector of the element holding the results
+        item_selector: CSS selector matching each result link
+        response_pattern: Optional regex (string or compiled) matching the results request URL
+        timeouts: Optional ReadinessTimeouts
+        stats: Optional ReadinessStats the wait is recorded in
+        step: Name the wait is recorded under
+
+    Returns:
+        ReadinessResult describing which signal fired and how long it took
+
+    Raises:
+        PageNotReadyError: If no signal fires in time
+    """
+    timeouts = timeouts or ReadinessTimeouts()
+    if isinstance(response_pattern, str):
+        response_pattern = re.compile(response_pattern)
+
+    previous_href = await get_first_href(page, item_selector)
+    await page.evaluate(INSTALL_OBSERVER_SCRIPT, container_selector)
+
+    # The response listener has to be attached before the action fires the request
+    loop = asyncio.get_running_loop()
+    response_future = loop.create_future()
+
+    def on_response(response):
+        if not response_future.done() and response_pattern.search(response.url):
+            response_future.set_result(response)
+
+    if response_pattern is not None:
+        page.on("response", on_response)
+
+    started = time.perf_counter()
+    waiters = {}
+    try:
+        await action()
+
+        waiters[asyncio.ensure_future(page.wait_for_function(
+            FIRST_HREF_CHANGED_SCRIPT,
+            arg=[item_selector, previous_href],
+            timeout=timeouts.href,
+            polling="raf"
+        ))] = "href"
+        waiters[asyncio.ensure_future(page.wait_for_function(
+            DOM_SETTLED_SCRIPT,
+            arg=[item_selector, timeouts.settle, 1, True, previous_href],
+            timeout=timeouts.mutation,
+            polling=50
+        ))] = "mutation"
+        if response_pattern is not None:
+            waiters[asyncio.ensure_future(
+                _wait_for_results_response(page, response_future, item_selector, previous_href, timeouts)
+            )] = "network"
+
+        pending = set(waiters)
+        errors = []
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    result = ReadinessResult(step, waiters[task], (time.perf_counter() - started) * 1000)
+                    if stats is not None:
+                        stats.record(result)
+                    return result
+                errors.append(f"{waiters[task]}: {task.exception()}")
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if stats is not None:
+            stats.record(ReadinessResult(step, "timeout", elapsed_ms))
+        raise PageNotReadyError(f"Results did not change after {elapsed_ms:.0f} ms ({'; '.join(errors)})")
+    finally:
+        for task in waiters:
+            if not task.done():
+                task.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+        if response_pattern is not None:
+            page.remove_listener("response", on_response)
+        try:
+            await page.evaluate(DISCONNECT_OBSERVER_SCRIPT)
+        except Exception:
+            # The page may have navigated or closed; the observer went with it
+            pass
+
+
+async def _wait_for_results_response(page, response_future, item_selector, previous_href, timeouts):
+    """
+    Wait for the results request to finish, then for the DOM to render it and settle.
+
+    A finished response is not enough on its own: until the framework renders
+    it the old results are still on screen. So the DOM must also change after
+    the response arrived, counted from the mutations seen when its headers
+    came in, or the first result must point somewhere new (in case the render
+    beat that count).
+    """
+    response = await asyncio.wait_for(response_future, timeouts.network / 1000)
+    mutations_before = await page.evaluate(MUTATION_COUNT_SCRIPT)
+    await response.finished()
+    await page.wait_for_function(
+        DOM_SETTLED_SCRIPT,
+        arg=[item_selector, timeouts.settle, mutations_before + 1, False, previous_href],
+        timeout=timeouts.network,
+        polling=50
+    )
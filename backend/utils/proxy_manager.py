@@ -1,49 +1,20 @@
+import asyncio
+import logging
+import math
 import random
+import time
+from contextlib import asynccontextmanager
+from urllib.parse import parse_qsl, quote, urlencode, urlsplit, urlunsplit
+
 import requests
 
-def fetch_proxies(api_url, api_key=None):
-    """
-    Fetch proxies from an API endpoint.
-    
-    Args:
-        api_url: URL to fetch proxies from
-        api_key: Optional API key for authorization
-        
-    Returns:
-        A list of proxy dictionaries
-    """
-    headers = {}
-    if api_key:
-        # Webshare specifically uses this header format
-        headers['Authorization'] = f'Token {api_key}'
-    
-    try:
-        print(f"Fetching proxies from: {api_url}")
-        print(f"Using authorization header: {'Yes' if api_key else 'No'}")
-        
-        response = requests.get(api_url, headers=headers)
-        
-        # Print status code for debugging
-        print(f"API response status code: {response.status_code}")
-        
-        if response.status_code != 200:
-            print(f"API error response: {response.text}")
-            
-        response.raise_for_status()  # Raise exception for 4XX/5XX responses
-        
-        data = response.json()
-        
-        # Extract the proxy results from the JSON response
-        if 'results' in data and isinstance(data['results'], list):
-            return data['results']
-        else:
-            # Print the actual response structure for debugging
-            print(f"Unexpected API response format: {data.keys()}")
-            raise ValueError("Unexpected API response format. Expected 'results' list.")
-    
-    except requests.RequestException as e:
-        print(f"Error fetching proxies: {e}")
-        return []
+from .metrics import REGISTRY, inc, observe, span
+
+logger = logging.getLogger(__name__)
+
+REGISTRY.describe("proxy_request_seconds", "histogram", "Duration of successful requests per proxy")
+REGISTRY.describe("proxy_requests_total", "counter", "Requests per proxy by outcome (success, failure, banned)")
+REGISTRY.describe("bytes_total", "counter", "Response bytes received by kind")
 
 
 def get_random_proxy(proxies):
@@ -78,6 +49,21 @@ def parse_proxy(proxy_dict):
         "password": proxy_dict['password'],
     }
 
+def parse_requests_proxy(proxy_dict):
+    """
+    Parse proxy dictionary into a `proxies` mapping for requests.
+    
+    Args:
+        proxy_dict: Dictionary with proxy details including username, password,
+                   proxy_address, and port
+        
+    Returns:
+        Dictionary routing both http and https through the proxy
+    """
+    credentials = f"{quote(proxy_dict['username'], safe='')}:{quote(proxy_dict['password'], safe='')}"
+    url = f"http://{credentials}@{proxy_dict['proxy_address']}:{proxy_dict['port']}"
+    return {"http": url, "https": url}
+
 def get_proxy_info_string(proxy_dict):
     """
     Get a string representation of proxy for logging (without credentials).
@@ -103,4 +89,408 @@ def get_random_user_agent():
         "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36 Edg/119.0.0.0"
     ]
     
-    return random.choice(user_agents)
\ No newline at end of file
+    return random.choice(user_agents)
+
+
+# Webshare's proxy list; pagination parameters are added by fetch_all_proxies
+WEBSHARE_PROXY_LIST_URL = "https://proxy.webshare.io/api/v2/proxy/list/?mode=direct"
+
+
+def _with_query(url, **params):
+    """Return the URL with the given query parameters set (replacing existing ones)."""
+    parts = urlsplit(url)
+    query = dict(parse_qsl(parts.query, keep_blank_values=True))
+    query.update({name: str(value) for name, value in params.items()})
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+def _get_proxy_page(url, headers, timeout):
+    response = requests.get(url, headers=headers, timeout=timeout)
+    inc("bytes_total", len(response.content), kind="proxy_list")
+    if response.status_code != 200:
+        logger.error(f"API error response: {response.text}")
+    response.raise_for_status()
+    
+    data = response.json()
+    if 'results' not in data or not isinstance(data['results'], list):
+        raise ValueError("Unexpected API response format. Expected 'results' list.")
+    return data
+
+
+async def fetch_all_proxies(api_url=WEBSHARE_PROXY_LIST_URL, api_key=None, page_size=100, max_concurrency=8, timeout=30):
+    """
+    Fetch every page of a paginated proxy list without blocking the event loop.
+    
+    The first page tells us the total count; the remaining pages are then
+    fetched concurrently. Lists without a count are followed through their
+    `next` links one page at a time.
+    
+    Args:
+        api_url: URL of the proxy list; page and page_size are set on it
+        api_key: Optional API key for authorization
+        page_size: Proxies per page
+        max_concurrency: Maximum number of pages fetched at once
+        timeout: Request timeout in seconds
+        
+    Returns:
+        A list of proxy dictionaries (empty if the first page fails)
+    """
+    headers = {'Authorization': f'Token {api_key}'} if api_key else {}
+    with span("proxy_fetch"):
+        return await _fetch_proxy_pages(api_url, headers, page_size, max_concurrency, timeout)
+
+
+async def _fetch_proxy_pages(api_url, headers, page_size, max_concurrency, timeout):
+    try:
+        first = await asyncio.to_thread(
+            _get_proxy_page, _with_query(api_url, page=1, page_size=page_size), headers, timeout
+        )
+    except (requests.RequestException, ValueError) as e:
+        logger.error(f"Error fetching proxies: {e}")
+        return []
+    
+    proxies = list(first['results'])
+    count = first.get('count')
+    
+    if not isinstance(count, int):
+        # No total to plan with; follow the next links instead
+        next_url = first.get('next')
+        while next_url:
+            try:
+                data = await asyncio.to_thread(_get_proxy_page, next_url, headers, timeout)
+            except (requests.RequestException, ValueError) as e:
+                logger.error(f"Error fetching proxies from {next_url}: {e}")
+                break
+            proxies.extend(data['results'])
+            next_url = data.get('next')
+        return proxies
+    
+    semaphore = asyncio.Semaphore(max_concurrency)
+    
+    async def fetch_page(page):
+        async with semaphore:
+            try:
+                data = await asyncio.to_thread(
+                    _get_proxy_page, _with_query(api_url, page=page, page_size=page_size), headers, timeout
+                )
+                return data['results']
+            except (requests.RequestException, ValueError) as e:
+                logger.error(f"Error fetching proxy page {page}: {e}")
+                return []
+    
+    total_pages = math.ceil(count / page_size) if page_size else 1
+    for results in await asyncio.gather(*[fetch_page(page) for page in range(2, total_pages + 1)]):
+        proxies.extend(results)
+    return proxies
+
+
+def proxy_key(proxy_dict):
+    """Identify a proxy by "address:port"."""
+    return f"{proxy_dict['proxy_address']}:{proxy_dict['port']}"
+
+
+class ProxyHealth:
+    """Running health record for one proxy."""
+    
+    def __init__(self):
+        self.successes = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.bans = 0
+        self.latency = None
+        self.cooldown_until = 0.0
+        self.leased_by = None
+    
+    @property
+    def success_rate(self):
+        # Laplace smoothing: a new proxy starts at 0.5 rather than 0 or 1
+        return (self.successes + 1) / (self.successes + self.failures + 2)
+
+
+class ProxyPool:
+    """
+    Hands out proxies weighted by how well they have been working.
+    
+    The list is fetched from the provider (every page, concurrently) and
+    cached for `ttl` seconds. Each proxy's score is its smoothed success rate
+    times a latency factor, so fast, reliable proxies are picked more often.
+    Failures put a proxy on an exponentially growing cool-down; bans put it on
+    a long one. Proxies can be leased exclusively so that concurrent workers
+    never share one.
+    """
+    
+    def __init__(self, api_url=WEBSHARE_PROXY_LIST_URL, api_key=None, proxies=None, ttl=600, page_size=100,
+                 base_cooldown=30, max_cooldown=900, ban_cooldown=3600, latency_target=1.0, clock=time.monotonic):
+        """
+        Args:
+            api_url: URL of the provider's proxy list
+            api_key: Optional API key for the provider
+            proxies: Optional fixed list of proxy dictionaries; when given the
+                provider is never queried
+            ttl: Seconds before the cached list is fetched again
+            page_size: Proxies per page when fetching the list
+            base_cooldown: Seconds a proxy rests after its first failure;
+                doubled for every further failure in a row
+            max_cooldown: Upper bound for failure cool-downs
+            ban_cooldown: Seconds a proxy rests after being banned
+            latency_target: Latency in seconds that halves a proxy's score
+            clock: Monotonic clock, replaceable for testing
+        """
+        self.api_url = api_url
+        self.api_key = api_key
+        self.ttl = ttl
+        self.page_size = page_size
+        self.base_cooldown = base_cooldown
+        self.max_cooldown = max_cooldown
+        self.ban_cooldown = ban_cooldown
+        self.latency_target = latency_target
+        self.clock = clock
+        self._static = proxies is not None
+        self._proxies = {}
+        self._health = {}
+        self._fetched_at = None
+        self._refresh_lock = asyncio.Lock()
+        self._changed = asyncio.Condition()
+        if proxies is not None:
+            self._set_proxies(proxies)
+    
+    @classmethod
+    def from_proxies(cls, proxies, **options):
+        """Create a pool over a fixed list of proxy dictionaries."""
+        return cls(proxies=list(proxies), **options)
+    
+    def __len__(self):
+        return len(self._proxies)
+    
+    def _set_proxies(self, proxies):
+        self._proxies = {proxy_key(proxy): proxy for proxy in proxies}
+        # Keep the history of proxies that are still listed
+        self._health = {key: self._health.get(key) or ProxyHealth() for key in self._proxies}
+    
+    async def refresh(self, force=False):
+        """
+        Fetch the proxy list if the cache has expired.
+        
+        A failed fetch keeps the previous list.
+        
+        Args:
+            force: Fetch even if the cache is still fresh
+        """
+        if self._static:
+            return
+        async with self._refresh_lock:
+            fresh = self._fetched_at is not None and self.clock() - self._fetched_at < self.ttl
+            if fresh and not force:
+                return
+            proxies = await fetch_all_proxies(self.api_url, self.api_key, page_size=self.page_size)
+            if proxies:
+                self._set_proxies(proxies)
+                self._fetched_at = self.clock()
+                logger.info(f"Proxy pool refreshed with {len(proxies)} proxies")
+            elif not self._proxies:
+                raise ValueError("No proxies available. Cannot proceed without proxies.")
+    
+    async def get_proxies(self):
+        """Get every listed proxy, refreshing the cache if needed."""
+        await self.refresh()
+        return list(self._proxies.values())
+    
+    def score(self, proxy_dict):
+        """
+        Score a proxy between 0 and 1; 0 while it is cooling down.
+        
+        Args:
+            proxy_dict: Proxy dictionary
+            
+        Returns:
+            Success rate times latency_target / (latency_target + latency)
+        """
+        health = self._health.get(proxy_key(proxy_dict))
+        if health is None or health.cooldown_until > self.clock():
+            return 0.0
+        latency = self.latency_target if health.latency is None else health.latency
+        return health.success_rate * self.latency_target / (self.latency_target + latency)
+    
+    def _candidates(self, exclusive=True):
+        # Shared acquisitions may use a proxy a worker holds; only exclusive ones must not
+        now = self.clock()
+        return [
+            proxy for key, proxy in self._proxies.items()
+            if (not exclusive or self._health[key].leased_by is None)
+            and self._health[key].cooldown_until <= now
+        ]
+    
+    def _pick(self, candidates):
+        weights = [self.score(proxy) for proxy in candidates]
+        if not any(weights):
+            return random.choice(candidates)
+        return random.choices(candidates, weights=weights)[0]
+    
+    async def acquire(self, exclusive=False, owner=None, timeout=None):
+        """
+        Pick a proxy, weighted by score, skipping ones that are cooling down.
+        
+        An exclusive acquisition also skips proxies someone else has leased;
+        a shared one may be handed a leased proxy.
+        
+        If none is available, waits for a lease to be released or a cool-down
+        to end.
+        
+        Args:
+            exclusive: Lease the proxy so no one else gets it until `release`
+            owner: Name recorded as the lease holder
+            timeout: Maximum seconds to wait for a proxy (None waits forever)
+            
+        Returns:
+            Proxy dictionary
+            
+        Raises:
+            ValueError: If the pool is empty or no proxy frees up in time
+        """
+        await self.refresh()
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        
+        async with self._changed:
+            while True:
+                if not self._proxies:
+                    raise ValueError("No proxies available. Cannot proceed without proxies.")
+                
+                candidates = self._candidates(exclusive)
+                if candidates:
+                    proxy = self._pick(candidates)
+                    if exclusive:
+                        self._health[proxy_key(proxy)].leased_by = owner or "anonymous"
+                    return proxy
+                
+                # Sleep until the first cool-down ends, a lease is released, or we give up
+                now = self.clock()
+                cooling = [health.cooldown_until for health in self._health.values() if health.cooldown_until > now]
+                wait = min(cooling) - now if cooling else None
+                if deadline is not None:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        raise ValueError(f"No proxy became available within {timeout} seconds")
+                    wait = remaining if wait is None else min(wait, remaining)
+                try:
+                    await asyncio.wait_for(self._changed.wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
+    
+    async def acquire_many(self, count, owner=None, preferred=None):
+        """
+        Lease up to `count` distinct proxies for concurrent workers.
+        
+        Takes whatever is available right now (waiting only if nothing is).
+        
+        Args:
+            count: Number of proxies wanted
+            owner: Name prefix recorded as the lease holders
+            preferred: Optional "address:port" to lease first if available
+            
+        Returns:
+            List of between 1 and `count` leased proxy dictionaries
+        """
+        await self.refresh()
+        leased = []
+        async with self._changed:
+            if preferred in self._proxies and self._proxies[preferred] in self._candidates():
+                self._health[preferred].leased_by = f"{owner or 'worker'}-1"
+                leased.append(self._proxies[preferred])
+            while len(leased) < count:
+                candidates = self._candidates()
+                if not candidates:
+                    break
+                proxy = self._pick(candidates)
+                self._health[proxy_key(proxy)].leased_by = f"{owner or 'worker'}-{len(leased) + 1}"
+                leased.append(proxy)
+        
+        if not leased:
+            leased.append(await self.acquire(exclusive=True, owner=f"{owner or 'worker'}-1"))
+        return leased
+    
+    async def release(self, proxy_dict):
+        """End an exclusive lease."""
+        async with self._changed:
+            health = self._health.get(proxy_key(proxy_dict))
+            if health is not None:
+                health.leased_by = None
+            self._changed.notify_all()
+    
+    @asynccontextmanager
+    async def lease(self, owner=None, timeout=None):
+        """
+        Context manager that leases a proxy exclusively and releases it afterwards.
+        
+        Yields:
+            Proxy dictionary
+        """
+        proxy = await self.acquire(exclusive=True, owner=owner, timeout=timeout)
+        try:
+            yield proxy
+        finally:
+            await self.release(proxy)
+    
+    def report_success(self, proxy_dict, latency=None):
+        """
+        Record a successful request through a proxy.
+        
+        Args:
+            proxy_dict: Proxy dictionary
+            latency: Optional request duration in seconds, folded into a moving average
+        """
+        health = self._health.get(proxy_key(proxy_dict))
+        if health is None:
+            return
+        inc("proxy_requests_total", proxy=proxy_key(proxy_dict), outcome="success")
+        health.successes += 1
+        health.consecutive_failures = 0
+        if latency is not None:
+            observe("proxy_request_seconds", latency, proxy=proxy_key(proxy_dict))
+            health.latency = latency if health.latency is None else 0.8 * health.latency + 0.2 * latency
+    
+    def report_failure(self, proxy_dict, banned=False):
+        """
+        Record a failed request through a proxy and put it on cool-down.
+        
+        Args:
+            proxy_dict: Proxy dictionary
+            banned: Whether the target refused the proxy (e.g. HTTP 403/429)
+        """
+        health = self._health.get(proxy_key(proxy_dict))
+        if health is None:
+            return
+        inc("proxy_requests_total", proxy=proxy_key(proxy_dict), outcome="banned" if banned else "failure")
+        health.failures += 1
+        health.consecutive_failures += 1
+        if banned:
+            health.bans += 1
+            cooldown = self.ban_cooldown
+        else:
+            cooldown = min(self.max_cooldown, self.base_cooldown * 2 ** (health.consecutive_failures - 1))
+        health.cooldown_until = self.clock() + cooldown
+        logger.warning(f"Proxy {proxy_key(proxy_dict)} cooling down for {cooldown:.0f}s "
+                       f"({'banned' if banned else f'{health.consecutive_failures} failures in a row'})")
+    
+    def stats(self):
+        """
+        Describe every proxy's health.
+        
+        Returns:
+            List of dictionaries sorted by score, best first
+        """
+        now = self.clock()
+        rows = []
+        for key, proxy in self._proxies.items():
+            health = self._health[key]
+            rows.append({
+                'proxy': key,
+                'score': round(self.score(proxy), 3),
+                'successes': health.successes,
+                'failures': health.failures,
+                'bans': health.bans,
+                'latency': None if health.latency is None else round(health.latency, 3),
+                'cooldown_remaining': max(0.0, round(health.cooldown_until - now, 1)),
+                'leased_by': health.leased_by,
+            })
+        return sorted(rows, key=lambda row: row['score'], reverse=True)